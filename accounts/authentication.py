@@ -1,11 +1,26 @@
 # Backend/accounts/authentication.py
+from django.utils.translation import gettext_lazy as _
 from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .services.principal import build_user, perm_version_of, principal_for_token
+from .tokens import ScopedTokenUser
+
+
+def _revoked():
+    return AuthenticationFailed(_("Token has been revoked"), code="token_revoked")
 
 
 class HeaderJWTAuthentication(JWTAuthentication):
     """
     Custom JWT auth that explicitly reads the Authorization header
     via request.headers instead of request.META.
+
+    The user is rebuilt from a principal cached per token (see
+    accounts/services/principal.py) instead of being loaded on every request.
+    Tokens whose permission version (`pv`, accounts/tokens.py) is stale are
+    rejected.
     """
 
     def get_header(self, request):
@@ -16,3 +31,54 @@ class HeaderJWTAuthentication(JWTAuthentication):
             auth = auth.encode("iso-8859-1")
 
         return auth
+
+    def get_user(self, validated_token):
+        if api_settings.CHECK_REVOKE_TOKEN:
+            # needs the password hash, which is never cached
+            user = super().get_user(validated_token)
+            if "pv" in validated_token and validated_token["pv"] != user.perm_version:
+                raise _revoked()
+            return user
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+        principal = principal_for_token(validated_token, user_id)
+        if principal is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+        if api_settings.CHECK_USER_IS_ACTIVE and not principal["is_active"]:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        if "pv" in validated_token and validated_token["pv"] != principal["perm_version"]:
+            raise _revoked()
+        return build_user(principal)
+
+
+class ClaimsJWTAuthentication(HeaderJWTAuthentication):
+    """
+    Stateless variant for read-heavy endpoints: request.user is a
+    ScopedTokenUser built from the token's scope claims (id, role,
+    facility_id, patient_profile_id, provider_profile_id) and the user row is
+    never loaded. Revocation costs one cached permission-version lookup.
+
+    Views using it must not need the User model instance (filter by
+    `user_id=request.user.id`). Tokens without scope claims fall back to the
+    cached principal.
+    """
+
+    def get_user(self, validated_token):
+        if "pv" not in validated_token:
+            return super().get_user(validated_token)
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+        version = perm_version_of(user_id)
+        if version is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+        if validated_token["pv"] != version:
+            # deactivation bumps the version too
+            raise _revoked()
+        return ScopedTokenUser(validated_token)
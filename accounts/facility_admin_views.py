@@ -7,7 +7,7 @@ from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes, authentication_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from .authentication import HeaderJWTAuthentication as JWTAuthentication
 from django.shortcuts import get_object_or_404
 
 from .models import User
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 21:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0006_user_is_sacked_user_sacked_at_user_sacked_by'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='perm_version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
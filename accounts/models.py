@@ -64,6 +64,10 @@ class User(AbstractUser):
         help_text="Admin who sacked this provider"
     )
 
+    # Bumped when the user's access scope changes (role, facility, status,
+    # patient/provider profile); tokens minted for an older version are rejected.
+    perm_version = models.PositiveIntegerField(default=0)
+
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = []
 
@@ -0,0 +1,195 @@
+"""accounts/services/principal.py
+
+Cached request user for JWT authentication.
+
+Every authenticated request used to load the User row, then lazily the
+facility / patient_profile / provider_profile relations the views check.
+Instead the authenticator caches a compact principal per access token
+(`jti`) in the Django cache for AUTH_PRINCIPAL_CACHE_TTL seconds (never past
+the token's expiry):
+
+    id, email, names, role, facility_id, is_active, is_staff, is_superuser,
+    is_sacked, email_verified, perm_version, patient_profile_id,
+    provider_profile_id
+
+and rebuilds a User from it without a query:
+- the remaining fields (password, last_login, ...) are deferred, so reading
+  them loads them lazily and save() only writes the loaded fields;
+- a missing patient/provider profile is primed as such, so
+  `hasattr(user, "patient_profile")` needs no query either.
+
+Invalidation: saving/deleting a User, Patient or ProviderProfile bumps the
+user's version (accounts/signals.py); principals carry the version they were
+built for and are discarded when it no longer matches. Principal and version
+are read in one cache round trip. Invalidation only reaches every worker
+through a shared cache backend, so caching is off (every request loads the
+user, as before) while AUTH_PRINCIPAL_CACHE is a per-process backend
+(LocMemCache, DummyCache), whatever AUTH_PRINCIPAL_CACHE_TTL says.
+
+Scope claims (accounts/tokens.py) are checked against `perm_version`:
+bump_perm_version() revokes every token minted before the bump. Stateless
+authentication reads the current version through perm_version_of(), which
+caches it under its own key.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import F
+
+CACHED_FIELDS = (
+    "id",
+    "email",
+    "first_name",
+    "last_name",
+    "role",
+    "facility_id",
+    "is_active",
+    "is_staff",
+    "is_superuser",
+    "is_sacked",
+    "email_verified",
+    "perm_version",
+)
+PROFILE_RELATIONS = ("patient_profile", "provider_profile")
+
+# invalidate() on one worker can't reach these on another
+PROCESS_LOCAL_BACKENDS = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+def _alias() -> str:
+    return getattr(settings, "AUTH_PRINCIPAL_CACHE", "default")
+
+
+def ttl() -> int:
+    """Principal cache lifetime; 0 (disabled) unless the cache is shared."""
+    backend = settings.CACHES.get(_alias(), {}).get("BACKEND", "")
+    if backend in PROCESS_LOCAL_BACKENDS:
+        return 0
+    return int(getattr(settings, "AUTH_PRINCIPAL_CACHE_TTL", 60))
+
+
+def _cache():
+    return caches[_alias()]
+
+
+def _principal_key(jti) -> str:
+    return f"accounts:principal:{jti}"
+
+
+def _version_key(user_id) -> str:
+    return f"accounts:principal-version:{user_id}"
+
+
+def _perm_version_key(user_id) -> str:
+    return f"accounts:perm-version:{user_id}"
+
+
+def invalidate(user_id):
+    """Drop every cached principal of a user (all of their tokens)."""
+    if not user_id:
+        return
+    cache = _cache()
+    key = _version_key(user_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # no version yet: any principal cached so far was built for 0
+        cache.set(key, 1, None)
+    cache.delete(_perm_version_key(user_id))
+
+
+def bump_perm_version(user_id) -> int | None:
+    """Revoke the user's scoped tokens (role/facility/profile changed). Returns the new version."""
+    if not user_id:
+        return None
+    User = get_user_model()
+    users = User.objects.filter(pk=user_id)
+    users.update(perm_version=F("perm_version") + 1)
+    invalidate(user_id)
+    return users.values_list("perm_version", flat=True).first()
+
+
+def perm_version_of(user_id) -> int | None:
+    """Current permission version of a user, or None if the user is gone."""
+    cache = _cache()
+    key = _perm_version_key(user_id)
+    version = cache.get(key) if ttl() > 0 else None
+    if version is None:
+        User = get_user_model()
+        version = User.objects.filter(pk=user_id).values_list("perm_version", flat=True).first()
+        if version is not None and ttl() > 0:
+            cache.set(key, version, ttl())
+    return version
+
+
+def load_principal(user_id) -> dict | None:
+    """Principal dict from the DB (one query), or None if the user is gone."""
+    User = get_user_model()
+    row = (
+        User.objects.filter(pk=user_id)
+        .annotate(
+            patient_profile_pk=F("patient_profile__id"),
+            provider_profile_pk=F("provider_profile__id"),
+        )
+        .values(*CACHED_FIELDS, "patient_profile_pk", "provider_profile_pk")
+        .first()
+    )
+    if row is None:
+        return None
+    row["patient_profile_id"] = row.pop("patient_profile_pk")
+    row["provider_profile_id"] = row.pop("provider_profile_pk")
+    return row
+
+
+def build_user(principal: dict):
+    """User instance from a principal; other fields are deferred."""
+    User = get_user_model()
+    # from_db() takes the loaded values in model field order
+    names = [f.attname for f in User._meta.concrete_fields if f.attname in CACHED_FIELDS]
+    user = User.from_db(DEFAULT_DB_ALIAS, names, [principal[name] for name in names])
+    for relation in PROFILE_RELATIONS:
+        profile_id = principal.get(f"{relation}_id")
+        # Non-field attribute for id-only checks
+        setattr(user, f"{relation}_id", profile_id)
+        if profile_id is None:
+            # Reverse one-to-one: cached None means "no profile" (hasattr() is False)
+            User._meta.get_field(relation).set_cached_value(user, None)
+    return user
+
+
+def _token_ttl(validated_token) -> int:
+    exp = validated_token.get("exp")
+    if not exp:
+        return ttl()
+    remaining = int(exp - datetime.now(dt_timezone.utc).timestamp())
+    return max(0, min(ttl(), remaining))
+
+
+def principal_for_token(validated_token, user_id) -> dict | None:
+    """Cached principal for an access token, loading it on a miss."""
+    jti = validated_token.get("jti")
+    if not jti or ttl() <= 0:
+        return load_principal(user_id)
+
+    cache = _cache()
+    pkey, vkey = _principal_key(jti), _version_key(user_id)
+    found = cache.get_many([pkey, vkey])
+    version = found.get(vkey, 0)
+    cached = found.get(pkey)
+    if cached and cached.get("v") == version and str(cached.get("id")) == str(user_id):
+        return cached
+
+    principal = load_principal(user_id)
+    timeout = _token_ttl(validated_token)
+    if principal is not None and timeout > 0:
+        cache.set(pkey, {**principal, "v": version}, timeout)
+    return principal
@@ -0,0 +1,65 @@
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .services.principal import bump_perm_version, invalidate
+
+# User fields that are part of the token scope (accounts/tokens.py): name -> attname
+SCOPE_FIELDS = {"role": "role", "facility": "facility_id", "is_active": "is_active", "is_sacked": "is_sacked"}
+
+
+def _saved(update_fields, name, attname=None) -> bool:
+    return update_fields is None or name in update_fields or (attname or name) in update_fields
+
+
+@receiver(pre_save, sender=settings.AUTH_USER_MODEL)
+def detect_user_scope_change(sender, instance, raw=False, update_fields=None, **kwargs):
+    instance._scope_changed = False
+    if raw or instance.pk is None:
+        return
+    fields = [attname for name, attname in SCOPE_FIELDS.items() if _saved(update_fields, name, attname)]
+    if not fields:
+        return
+    old = sender.objects.filter(pk=instance.pk).values(*fields).first()
+    instance._scope_changed = old is not None and any(old[f] != getattr(instance, f) for f in fields)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def invalidate_user_principal(sender, instance, **kwargs):
+    if getattr(instance, "_scope_changed", False):
+        instance._scope_changed = False
+        # keep the in-memory version current so a later save() doesn't undo the bump
+        instance.perm_version = bump_perm_version(instance.pk)
+    else:
+        invalidate(instance.pk)
+
+
+@receiver(pre_save, sender="patients.Patient")
+@receiver(pre_save, sender="providers.ProviderProfile")
+def detect_profile_owner_change(sender, instance, raw=False, update_fields=None, **kwargs):
+    instance._owner_changed, instance._previous_user_id = False, None
+    if raw or instance.pk is None or not _saved(update_fields, "user", "user_id"):
+        return
+    previous = sender.objects.filter(pk=instance.pk).values_list("user_id", flat=True).first()
+    if previous != instance.user_id:
+        instance._owner_changed, instance._previous_user_id = True, previous
+
+
+@receiver(post_save, sender="patients.Patient")
+@receiver(post_save, sender="providers.ProviderProfile")
+def invalidate_profile_principal(sender, instance, created=False, **kwargs):
+    if created or getattr(instance, "_owner_changed", False):
+        instance._owner_changed = False
+        # linking/unlinking a profile changes the pid/prv claims
+        bump_perm_version(instance.user_id)
+        bump_perm_version(getattr(instance, "_previous_user_id", None))
+    else:
+        # profile ids are part of the principal
+        invalidate(instance.user_id)
+
+
+@receiver(post_delete, sender="patients.Patient")
+@receiver(post_delete, sender="providers.ProviderProfile")
+def revoke_profile_scope(sender, instance, **kwargs):
+    bump_perm_version(instance.user_id)
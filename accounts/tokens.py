@@ -0,0 +1,135 @@
+"""accounts/tokens.py
+
+JWTs carrying the user's access scope as signed claims.
+
+Tokens minted here (login, registration, refresh) carry:
+
+    role  user role
+    fid   facility id (null for independent users)
+    pid   patient profile id (null if the user has no patient profile)
+    prv   provider profile id (null if the user is not a provider)
+    pv    permission version (User.perm_version when the token was minted)
+
+Views and has_facility_permission() can scope querysets from these claims
+without loading the user. Scope changes bump User.perm_version
+(accounts/signals.py), which revokes every token minted before: the
+authenticators reject a `pv` that no longer matches. Refreshing re-reads the
+claims, so a client with a valid refresh token picks up its new scope on the
+next refresh.
+
+Tokens without `pv` (minted before scope claims existed) are still accepted
+by HeaderJWTAuthentication until they expire.
+"""
+
+from django.utils.functional import cached_property
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .services.principal import load_principal
+
+def scope_claims(principal: dict) -> dict:
+    """Scope claims of a principal (accounts.services.principal.load_principal)."""
+    return {
+        "role": principal["role"],
+        "fid": principal["facility_id"],
+        "pid": principal["patient_profile_id"],
+        "prv": principal["provider_profile_id"],
+        "pv": principal["perm_version"],
+    }
+
+
+def set_scope_claims(token, principal: dict):
+    for claim, value in scope_claims(principal).items():
+        token[claim] = value
+
+
+class ScopedRefreshToken(RefreshToken):
+    """RefreshToken whose access tokens carry the scope claims."""
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        principal = load_principal(user.pk)
+        if principal is not None:
+            set_scope_claims(token, principal)
+        return token
+
+
+def token_pair(user) -> dict:
+    refresh = ScopedRefreshToken.for_user(user)
+    return {"access": str(refresh.access_token), "refresh": str(refresh)}
+
+
+class ScopedTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Refresh that re-reads the scope claims (one query), so new access tokens
+    always carry the current role/facility/profiles and permission version.
+    """
+
+    token_class = ScopedRefreshToken
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs["refresh"])
+        user_id = refresh.payload.get(api_settings.USER_ID_CLAIM)
+        principal = load_principal(user_id) if user_id else None
+        if principal is None or not principal["is_active"]:
+            raise AuthenticationFailed(
+                self.error_messages["no_active_account"],
+                "no_active_account",
+            )
+        set_scope_claims(refresh, principal)
+
+        data = {"access": str(refresh.access_token)}
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            if api_settings.BLACKLIST_AFTER_ROTATION:
+                try:
+                    refresh.blacklist()
+                except AttributeError:
+                    # blacklist app not installed
+                    pass
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            refresh.outstand()
+            data["refresh"] = str(refresh)
+        return data
+
+
+class ScopedTokenUser(TokenUser):
+    """
+    Request user backed by the token's scope claims alone (no query).
+
+    Exposes the attributes views scope querysets with. It is not a model
+    instance: filter by `user_id=request.user.id`, not `user=request.user`.
+    """
+
+    @cached_property
+    def role(self):
+        return self.token.get("role")
+
+    @cached_property
+    def facility_id(self):
+        return self.token.get("fid")
+
+    @cached_property
+    def patient_profile_id(self):
+        return self.token.get("pid")
+
+    @cached_property
+    def provider_profile_id(self):
+        return self.token.get("prv")
+
+    @cached_property
+    def is_provider(self) -> bool:
+        return self.provider_profile_id is not None
+
+    @cached_property
+    def perm_version(self):
+        return self.token.get("pv")
+
+    def __str__(self):
+        return f"ScopedTokenUser {self.id}"
+
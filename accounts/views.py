@@ -6,8 +6,7 @@ from accounts.enums import UserRole
 from rest_framework import permissions, status
 from rest_framework.decorators import api_view, permission_classes, authentication_classes
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import RefreshToken
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from .authentication import HeaderJWTAuthentication as JWTAuthentication
 from rest_framework.permissions import IsAuthenticated
 
 from .serializers import (
@@ -22,10 +21,10 @@ from .serializers import (
 from .models import User
 from .services.email import send_email
 from .services.google import verify_google_id_token
+from .tokens import token_pair
 
 def _jwt_pair_for(user: User) -> dict:
-    refresh = RefreshToken.for_user(user)
-    return {"access": str(refresh.access_token), "refresh": str(refresh)}
+    return token_pair(user)
 
 @api_view(["GET", "PATCH"])
 @authentication_classes([JWTAuthentication])  
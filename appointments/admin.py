@@ -1,8 +1,22 @@
 from django.contrib import admin
-from .models import Appointment
+from .models import Appointment, AppointmentReminder, ProviderWorkingHours
 
 @admin.register(Appointment)
 class AppointmentAdmin(admin.ModelAdmin):
     list_display = ("id","patient","facility","provider","appt_type","status","start_at","end_at","created_at")
     list_filter = ("facility","status","appt_type")
     search_fields = ("patient__first_name","patient__last_name","reason","notes")
+
+
+@admin.register(ProviderWorkingHours)
+class ProviderWorkingHoursAdmin(admin.ModelAdmin):
+    list_display = ("id","provider","facility","weekday","start_time","end_time","slot_minutes","is_active")
+    list_filter = ("facility","weekday","is_active")
+    search_fields = ("provider__email","provider__first_name","provider__last_name")
+
+
+@admin.register(AppointmentReminder)
+class AppointmentReminderAdmin(admin.ModelAdmin):
+    list_display = ("id","appointment","offset_minutes","claimed_at","sent_at")
+    list_filter = ("offset_minutes",)
+    raw_id_fields = ("appointment",)
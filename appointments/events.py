@@ -0,0 +1,133 @@
+"""appointments/events.py
+
+Domain events published by the appointments app and their post-commit
+handlers (see core.events). Each handler is retried / dead-lettered on its
+own, so a failing email never blocks in-app notifications. Handlers do one
+thing each (one email, one recipient group) and in-app notifications are
+deduplicated on group_key, so a retry cannot notify anyone twice.
+"""
+
+from dataclasses import dataclass
+
+from django.contrib.auth import get_user_model
+
+from accounts.enums import UserRole
+from core.events import DomainEvent, subscribe
+from notifications.enums import Topic, Priority
+from notifications.services.notify import notify_user, notify_users, notify_patient
+
+from .models import Appointment
+from .services.notify import send_confirmation, send_provider_assignment
+
+
+@dataclass(frozen=True)
+class AppointmentBooked(DomainEvent):
+    appointment_id: int
+
+
+def _load(appointment_id):
+    return (
+        Appointment.objects.select_related("patient", "patient__user", "facility", "provider")
+        .filter(id=appointment_id)
+        .first()
+    )
+
+
+@subscribe(AppointmentBooked)
+def link_patient_to_facility(event):
+    """Record the facility in the patient's visit history (first facility is kept)."""
+    from patients.models import PatientFacilityLink
+
+    appt = _load(event.appointment_id)
+    if not appt or not appt.facility_id:
+        return
+    patient = appt.patient
+    PatientFacilityLink.objects.get_or_create(patient=patient, facility_id=appt.facility_id)
+    if not patient.facility_id:
+        patient.facility_id = appt.facility_id
+        patient.save(update_fields=["facility"])
+
+
+@subscribe(AppointmentBooked)
+def send_booking_confirmation(event):
+    """Confirmation email to the patient."""
+    appt = _load(event.appointment_id)
+    if appt:
+        send_confirmation(appt)
+
+
+@subscribe(AppointmentBooked)
+def send_booking_assignment(event):
+    """Assignment email to the provider (doctor/nurse/etc)."""
+    appt = _load(event.appointment_id)
+    if appt:
+        send_provider_assignment(appt)
+
+
+def _booking_notice(appt):
+    patient_name = getattr(appt.patient, "full_name", None) or f"Patient #{appt.patient_id}"
+    when = appt.start_at.strftime("%Y-%m-%d %H:%M") if appt.start_at else ""
+    return {
+        "topic": Topic.APPOINTMENT_CONFIRMED,
+        "title": "New appointment scheduled",
+        "body": f"{patient_name} • {when}\nReason: {appt.reason or '-'}",
+        "facility_id": appt.facility_id,
+        "data": {"appointment_id": appt.id, "patient_id": appt.patient_id},
+        "group_key": f"APPT:{appt.id}:CREATED",
+        # Appointment emails are sent by the handlers above; these are in-app only.
+        "allow_email": False,
+        # A retry must not notify the same user twice.
+        "dedupe": True,
+    }
+
+
+@subscribe(AppointmentBooked)
+def notify_booking_provider(event):
+    appt = _load(event.appointment_id)
+    if not appt or not appt.provider_id:
+        return
+    notify_user(
+        user=appt.provider,
+        priority=Priority.NORMAL,
+        action_url="/facility/appointments",
+        **_booking_notice(appt),
+    )
+
+
+@subscribe(AppointmentBooked)
+def notify_booking_staff(event):
+    appt = _load(event.appointment_id)
+    if not appt or not appt.facility_id:
+        return
+    staff_roles = [
+        UserRole.SUPER_ADMIN,
+        UserRole.ADMIN,
+        UserRole.FRONTDESK,
+        UserRole.NURSE,
+    ]
+    staff_users = (
+        get_user_model().objects.filter(facility_id=appt.facility_id, role__in=staff_roles)
+        .exclude(id=appt.provider_id)
+        .distinct()
+    )
+    notify_users(
+        users=staff_users,
+        priority=Priority.NORMAL,
+        action_url="/facility/appointments",
+        **_booking_notice(appt),
+    )
+
+
+@subscribe(AppointmentBooked)
+def notify_booking_patient(event):
+    """Patient (and guardian, if dependent)."""
+    appt = _load(event.appointment_id)
+    if not appt or not appt.patient:
+        return
+    when = appt.start_at.strftime("%Y-%m-%d %H:%M") if appt.start_at else ""
+    notify_patient(
+        patient=appt.patient,
+        priority=Priority.LOW,
+        action_url="/patient/appointments",
+        **{**_booking_notice(appt), "title": "Appointment booked", "body": f"Your appointment is scheduled for {when}."},
+    )
@@ -0,0 +1,58 @@
+"""appointments.management.commands.send_appointment_reminders
+
+Sends appointment reminders (in-app + email) at each configured offset before
+start_at. Safe to run from several schedulers at once and to retry: every
+(appointment, offset) is claimed exactly once (see
+appointments.services.reminders).
+
+Run periodically (cron / Render cron job), e.g. every 5 minutes.
+
+Usage:
+  python manage.py send_appointment_reminders
+  python manage.py send_appointment_reminders --offsets 24h,2h
+  python manage.py send_appointment_reminders --dry-run
+  python manage.py send_appointment_reminders --no-email --chunk-size 500
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = "Send due appointment reminders (idempotent per appointment and offset)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--offsets", help="Comma separated offsets, e.g. 24h,2h (default: APPOINTMENT_REMINDER_OFFSETS)")
+        parser.add_argument("--chunk-size", type=int, default=200, help="Appointments claimed per transaction")
+        parser.add_argument("--max-per-offset", type=int, default=None, help="Stop after this many per offset")
+        parser.add_argument("--facility", type=int, default=None, help="Only this facility id")
+        parser.add_argument("--no-email", action="store_true", help="In-app notifications only")
+        parser.add_argument("--dry-run", action="store_true", help="Only count due reminders")
+
+    def handle(self, *args, **options):
+        from appointments.services.reminders import parse_offsets, run_due_reminders
+
+        try:
+            offsets = parse_offsets(options["offsets"])
+        except ValueError as e:
+            raise CommandError(str(e))
+        if not offsets:
+            raise CommandError("No reminder offsets configured")
+
+        result = run_due_reminders(
+            offsets=offsets,
+            chunk_size=max(1, options["chunk_size"]),
+            max_per_offset=options["max_per_offset"],
+            send_emails=not options["no_email"],
+            dry_run=options["dry_run"],
+            facility_id=options["facility"],
+        )
+
+        for offset, n in result.claimed.items():
+            self.stdout.write(f"-{offset}m: {n} appointment(s){' due' if options['dry_run'] else ''}")
+
+        if options["dry_run"]:
+            self.stdout.write(self.style.WARNING(f"DRY RUN complete. Would remind: {result.total}"))
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f"Reminders sent: appointments={result.total} notifications={result.notifications} emails={result.emails}"
+        ))
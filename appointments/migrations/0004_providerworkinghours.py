@@ -0,0 +1,37 @@
+# Generated by Django 5.2.7 on 2026-10-18 20:38
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0003_alter_appointment_appt_type'),
+        ('facilities', '0008_facility_is_publicly_visible'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProviderWorkingHours',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('weekday', models.PositiveSmallIntegerField(help_text='0=Monday … 6=Sunday')),
+                ('start_time', models.TimeField()),
+                ('end_time', models.TimeField()),
+                ('slot_minutes', models.PositiveSmallIntegerField(default=30)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('facility', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='provider_working_hours', to='facilities.facility')),
+                ('provider', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='working_hours', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['provider_id', 'weekday', 'start_time'],
+                'indexes': [models.Index(fields=['provider', 'weekday'], name='appointment_provide_5e1bfd_idx')],
+                'constraints': [models.UniqueConstraint(fields=('provider', 'weekday', 'start_time'), name='uniq_provider_hours_window'), models.CheckConstraint(condition=models.Q(('end_time__gt', models.F('start_time'))), name='provider_hours_end_after_start'), models.CheckConstraint(condition=models.Q(('weekday__lte', 6)), name='provider_hours_valid_weekday')],
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.7 on 2026-10-18 20:44
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0004_providerworkinghours'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AppointmentReminder',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('offset_minutes', models.PositiveIntegerField()),
+                ('claimed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+                ('appointment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reminders', to='appointments.appointment')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('appointment', 'offset_minutes'), name='uniq_appointment_reminder_offset')],
+            },
+        ),
+    ]
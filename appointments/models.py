@@ -43,3 +43,57 @@ class Appointment(models.Model):
 
     def __str__(self):
         return f"Appt#{self.id} P:{self.patient_id} {self.start_at:%Y-%m-%d %H:%M} ({self.appt_type})"
+
+
+class ProviderWorkingHours(models.Model):
+    """
+    One bookable window in a provider's week (e.g. Mon 09:00-13:00).
+    A provider may have several windows per weekday; times are facility-local.
+    """
+    provider = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="working_hours")
+    facility = models.ForeignKey(Facility, null=True, blank=True, on_delete=models.CASCADE, related_name="provider_working_hours")
+
+    weekday = models.PositiveSmallIntegerField(help_text="0=Monday … 6=Sunday")
+    start_time = models.TimeField()
+    end_time = models.TimeField()
+    slot_minutes = models.PositiveSmallIntegerField(default=30)
+    is_active = models.BooleanField(default=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["provider", "weekday"]),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=["provider", "weekday", "start_time"], name="uniq_provider_hours_window"),
+            models.CheckConstraint(condition=models.Q(end_time__gt=models.F("start_time")), name="provider_hours_end_after_start"),
+            models.CheckConstraint(condition=models.Q(weekday__lte=6), name="provider_hours_valid_weekday"),
+        ]
+        ordering = ["provider_id", "weekday", "start_time"]
+
+    def __str__(self):
+        return f"U:{self.provider_id} d{self.weekday} {self.start_time:%H:%M}-{self.end_time:%H:%M}"
+
+
+class AppointmentReminder(models.Model):
+    """
+    One reminder (per offset before start) claimed for an appointment.
+
+    The unique (appointment, offset_minutes) row is the idempotency key: it is
+    inserted in the same transaction that claims the appointment, so re-runs
+    and overlapping schedulers never send the same reminder twice.
+    """
+    appointment = models.ForeignKey(Appointment, on_delete=models.CASCADE, related_name="reminders")
+    offset_minutes = models.PositiveIntegerField()
+    claimed_at = models.DateTimeField(default=timezone.now)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["appointment", "offset_minutes"], name="uniq_appointment_reminder_offset"),
+        ]
+
+    def __str__(self):
+        return f"Reminder appt#{self.appointment_id} -{self.offset_minutes}m"
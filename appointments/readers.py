@@ -0,0 +1,164 @@
+"""appointments/readers.py
+
+values()-based list reader for appointments (core.fastread). Mirrors
+AppointmentListSerializer field for field; keep the two in step.
+
+Appointment.encounter_id is a plain integer column, so the linked encounter
+is read through a join (one extra query per page), like
+AppointmentViewSet._attach_prefetched_encounters does for the serializer.
+"""
+from core.fastread import Reader, computed
+from encounters.readers import PROVIDER_LOOKUPS, independent, requester_role
+from facilities.models import Facility
+
+from .enums import ApptStatus
+from .serializers import AppointmentListSerializer
+
+FACILITY_TYPES = dict(Facility._meta.get_field("facility_type").flatchoices)
+FINISHED = (ApptStatus.CANCELLED, ApptStatus.COMPLETED, ApptStatus.NO_SHOW)
+ENCOUNTER_DONE = ("CLOSED", "CROSSED_OUT")
+
+
+def user_lookups(relation):
+    return (
+        relation,
+        f"{relation}__first_name",
+        f"{relation}__last_name",
+        f"{relation}__email",
+        f"{relation}__role",
+    )
+
+
+def user_names(user_ids, firsts, lasts, emails, roles):
+    """_get_user_name() per row: full name, else email, else User.__str__."""
+    return [
+        None if uid is None else (f"{first or ''} {last or ''}".strip() or email or f"{email} ({role})")
+        for uid, first, last, email, role in zip(user_ids, firsts, lasts, emails, roles)
+    ]
+
+
+def facility_labels(facility_ids, names, types):
+    """Facility name, else Facility.__str__."""
+    return [
+        None if fid is None else (name or f"{name} ({FACILITY_TYPES.get(ftype, ftype)})")
+        for fid, name, ftype in zip(facility_ids, names, types)
+    ]
+
+
+FACILITY_LOOKUPS = ("facility", "facility__name", "facility__facility_type")
+PROFILE_LOOKUPS = (
+    "provider__provider_profile",
+    "provider__provider_profile__business_name",
+)
+
+
+def encounter_statuses(encounter_ids, statuses):
+    """get_encounter_status() per row."""
+    return [status if eid else None for eid, status in zip(encounter_ids, statuses)]
+
+
+class AppointmentListReader(Reader):
+    serializer_class = AppointmentListSerializer
+    joins = {"encounter": ("encounter_id", "encounters.Encounter")}
+
+    @computed("patient", "patient__first_name", "patient__last_name")
+    def patient_name(patient_ids, firsts, lasts):
+        return [
+            None if not pid else ((first or "") + " " + (last or "")).strip() or f"{last}, {first}"
+            for pid, first, last in zip(patient_ids, firsts, lasts)
+        ]
+
+    @computed(*FACILITY_LOOKUPS, *PROVIDER_LOOKUPS, context=True)
+    def facility_name(context, facility_ids, names, types, *provider_cols):
+        labels = facility_labels(facility_ids, names, types)
+        if requester_role(context) != "PATIENT":
+            return labels
+        return [None if hide else label for label, hide in zip(labels, independent(*provider_cols))]
+
+    @computed(*FACILITY_LOOKUPS, *PROVIDER_LOOKUPS, *PROFILE_LOOKUPS, *user_lookups("provider")[1:], context=True)
+    def provider_org_name(
+        context, facility_ids, names, types, provider_ids, provider_facility_ids, profile_ids,
+        _, business_names, firsts, lasts, emails, roles,
+    ):
+        labels = facility_labels(facility_ids, names, types)
+        is_independent = independent(provider_ids, provider_facility_ids, profile_ids)
+        if requester_role(context) == "PATIENT":
+            return [None if hide else label for label, hide in zip(labels, is_independent)]
+
+        out = []
+        for label, pid, profile, business, first, last, email in zip(
+            labels, provider_ids, profile_ids, business_names, firsts, lasts, emails
+        ):
+            if label is not None:
+                out.append(label)  # facility booking
+                continue
+            if pid is None:
+                out.append(None)
+                continue
+            full = f"{first or ''} {last or ''}".strip()
+            if profile is not None:
+                # ProviderProfile.get_display_name()
+                name = (business.strip() if business else (f"{first} {last}".strip() or email or "")).strip()
+                if name:
+                    out.append(name)
+                    continue
+            out.append(full or email or None)
+        return out
+
+    @computed(*PROVIDER_LOOKUPS)
+    def provider_is_independent(*cols):
+        return independent(*cols)
+
+    @computed("encounter__id", *user_lookups("encounter__provider"), *user_lookups("provider"))
+    def provider_name(encounter_found, *cols):
+        enc_names = user_names(*cols[:5])
+        names = user_names(*cols[5:])
+        return [
+            enc_name if found is not None and enc_name is not None else name
+            for found, enc_name, name in zip(encounter_found, enc_names, names)
+        ]
+
+    @computed("encounter__id", "encounter__nurse")
+    def nurse(encounter_found, nurse_ids):
+        return [nid if found is not None else None for found, nid in zip(encounter_found, nurse_ids)]
+
+    @computed(*user_lookups("encounter__nurse"))
+    def nurse_name(*cols):
+        return user_names(*cols)
+
+    @computed("encounter_id")
+    def has_encounter(encounter_ids):
+        return [eid is not None for eid in encounter_ids]
+
+    @computed("encounter_id", "encounter__status")
+    def encounter_status(*cols):
+        return encounter_statuses(*cols)
+
+    @computed("encounter_id", "encounter__stage")
+    def encounter_stage(encounter_ids, stages):
+        return [stage if eid else None for eid, stage in zip(encounter_ids, stages)]
+
+    @computed("status", "encounter_id", "encounter__status")
+    def can_start_encounter(statuses, encounter_ids, enc_statuses):
+        out = []
+        for status, eid, enc_status in zip(statuses, encounter_ids, encounter_statuses(encounter_ids, enc_statuses)):
+            if status in FINISHED:
+                out.append(False)
+            elif not eid or enc_status is None:
+                out.append(True)
+            else:
+                out.append(enc_status in ENCOUNTER_DONE)
+        return out
+
+    @computed("status", "encounter_id", "encounter__status")
+    def available_actions(statuses, encounter_ids, enc_statuses):
+        out = []
+        for status, enc_status in zip(statuses, encounter_statuses(encounter_ids, enc_statuses)):
+            open_encounter = bool(enc_status) and enc_status not in ENCOUNTER_DONE
+            if status == ApptStatus.SCHEDULED:
+                out.append(["cancel"] if open_encounter else ["check_in", "cancel", "no_show"])
+            elif status == ApptStatus.CHECKED_IN:
+                out.append(["cancel"] if open_encounter else ["complete", "cancel"])
+            else:
+                out.append([])
+        return out
@@ -1,10 +1,14 @@
+from django.db import transaction
 from django.db.models import Q
 from rest_framework import serializers
 
-from .models import Appointment
+from .models import Appointment, ProviderWorkingHours
 from .enums import ApptStatus
+from .services.availability import book_lock, find_conflict
 from facilities.models import Facility
 
+OVERLAP_MESSAGE = "Provider already has an overlapping appointment in this time range."
+
 
 def _get_user_name(user):
     """Best-effort full name for display."""
@@ -275,44 +279,65 @@ class AppointmentSerializer(serializers.ModelSerializer):
         # Store inferred facility for create()
         self._facility = facility
 
-        # ✅ FIX: Prevent overlaps for the same provider (facility-scoped or global)
+        # Prevent overlaps for the same provider (facility-scoped or global).
+        # Re-checked under the provider's booking lock in create()/update().
         provider = attrs.get("provider")
-        if provider:
-            # Base query: filter by provider and active statuses
-            qs = Appointment.objects.filter(
-                provider=provider,
-                status__in=[ApptStatus.SCHEDULED, ApptStatus.CHECKED_IN],
-            )
-            
-            # Only filter by facility if one exists (facility-based vs independent)
-            if facility:
-                qs = qs.filter(facility=facility)
-            
-            if self.instance:
-                qs = qs.exclude(id=self.instance.id)
-            
-            # Overlap if (start < other.end) and (end > other.start)
-            if qs.filter(start_at__lt=end_at, end_at__gt=start_at).exists():
-                raise serializers.ValidationError(
-                    "Provider already has an overlapping appointment in this time range."
-                )
+        if provider and self._find_conflict(provider.id, start_at, end_at):
+            raise serializers.ValidationError(OVERLAP_MESSAGE)
 
         return attrs
 
+    def _find_conflict(self, provider_id, start_at, end_at):
+        facility = getattr(self, "_facility", None)
+        return find_conflict(
+            provider_id,
+            start_at,
+            end_at,
+            facility_id=getattr(facility, "id", None),
+            exclude_id=getattr(self.instance, "id", None),
+        )
+
+    def _locked_overlap_check(self, provider_id, start_at, end_at):
+        """Take the provider's booking lock and re-run the overlap check."""
+        if not provider_id or not start_at or not end_at:
+            return
+        book_lock(provider_id)
+        if self._find_conflict(provider_id, start_at, end_at):
+            raise serializers.ValidationError(OVERLAP_MESSAGE)
+
     def create(self, validated_data):
         user = self.context["request"].user
 
         # Avoid passing 'facility' twice
         validated_data.pop("facility", None)
 
-        appt = Appointment.objects.create(
-            facility=self._facility,
-            created_by=user,
-            status=ApptStatus.SCHEDULED,
-            **validated_data,
-        )
+        provider = validated_data.get("provider")
+        with transaction.atomic():
+            self._locked_overlap_check(
+                getattr(provider, "id", None),
+                validated_data.get("start_at"),
+                validated_data.get("end_at"),
+            )
+            appt = Appointment.objects.create(
+                facility=self._facility,
+                created_by=user,
+                status=ApptStatus.SCHEDULED,
+                **validated_data,
+            )
         return appt
 
+    def update(self, instance, validated_data):
+        provider = validated_data.get("provider", instance.provider)
+        if validated_data.get("status", instance.status) not in (ApptStatus.SCHEDULED, ApptStatus.CHECKED_IN):
+            provider = None
+        with transaction.atomic():
+            self._locked_overlap_check(
+                getattr(provider, "id", None),
+                validated_data.get("start_at", instance.start_at),
+                validated_data.get("end_at", instance.end_at),
+            )
+            return super().update(instance, validated_data)
+
 
 class AppointmentUpdateSerializer(AppointmentSerializer):
     """Serializer for updating appointments. Prevents changing facility after creation."""
@@ -541,4 +566,35 @@ class AppointmentListSerializer(serializers.ModelSerializer):
                 return ["cancel"]
             return ["complete", "cancel"]
 
-        return []
\ No newline at end of file
+        return []
+
+
+class ProviderWorkingHoursSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ProviderWorkingHours
+        fields = [
+            "id",
+            "provider",
+            "facility",
+            "weekday",
+            "start_time",
+            "end_time",
+            "slot_minutes",
+            "is_active",
+            "created_at",
+            "updated_at",
+        ]
+        read_only_fields = ["facility", "created_at", "updated_at"]
+
+    def validate(self, attrs):
+        start = attrs.get("start_time", getattr(self.instance, "start_time", None))
+        end = attrs.get("end_time", getattr(self.instance, "end_time", None))
+        weekday = attrs.get("weekday", getattr(self.instance, "weekday", None))
+        slot = attrs.get("slot_minutes", getattr(self.instance, "slot_minutes", 30))
+        if weekday is not None and not 0 <= weekday <= 6:
+            raise serializers.ValidationError({"weekday": "Use 0 (Monday) to 6 (Sunday)."})
+        if start and end and end <= start:
+            raise serializers.ValidationError("end_time must be after start_time.")
+        if not slot or slot < 5:
+            raise serializers.ValidationError({"slot_minutes": "Minimum slot length is 5 minutes."})
+        return attrs
@@ -0,0 +1,252 @@
+"""appointments/services/availability.py
+
+Provider availability: free slots = working hours minus booked intervals.
+
+Everything is done on sorted (start, end) interval lists:
+- booked appointments for the whole requested range come back from ONE
+  query ordered by start_at (served by the (provider, start_at) index) and
+  are merged into non-overlapping busy blocks;
+- each working window is swept against the busy blocks with a two-pointer
+  walk, leaving free intervals;
+- free intervals are cut into slots on the window's slot grid.
+
+Booking goes through `book_lock` + `find_conflict` inside one transaction,
+so concurrent requests for the same provider are serialised and the second
+one sees the first one's row instead of double-booking.
+"""
+
+from __future__ import annotations
+
+import zlib
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import Q
+from django.utils import timezone
+
+from ..enums import ApptStatus
+from ..models import Appointment, ProviderWorkingHours
+
+ACTIVE_STATUSES = (ApptStatus.SCHEDULED, ApptStatus.CHECKED_IN)
+
+# Namespace for pg_advisory_xact_lock(int, int) so provider ids don't collide
+# with other advisory locks in the database.
+_LOCK_NAMESPACE = zlib.crc32(b"appointments.provider") & 0x7FFFFFFF
+
+MAX_DAYS = 31
+
+
+# ---------------------------------------------------------------------------
+# Interval helpers
+# ---------------------------------------------------------------------------
+
+def merge_intervals(intervals) -> list[tuple]:
+    """Sort and coalesce overlapping/touching (start, end) pairs."""
+    out = []
+    for start, end in sorted(intervals):
+        if out and start <= out[-1][1]:
+            if end > out[-1][1]:
+                out[-1] = (out[-1][0], end)
+        else:
+            out.append((start, end))
+    return out
+
+
+def subtract_intervals(windows, busy) -> list[tuple]:
+    """
+    windows - busy, both sorted and non-overlapping.
+    Linear in len(windows) + len(busy).
+    """
+    out = []
+    i = 0
+    for w_start, w_end in windows:
+        cursor = w_start
+        while i < len(busy) and busy[i][1] <= cursor:
+            i += 1
+        j = i
+        while j < len(busy) and busy[j][0] < w_end:
+            b_start, b_end = busy[j]
+            if b_start > cursor:
+                out.append((cursor, b_start))
+            cursor = max(cursor, b_end)
+            if cursor >= w_end:
+                break
+            j += 1
+        if cursor < w_end:
+            out.append((cursor, w_end))
+    return out
+
+
+# ---------------------------------------------------------------------------
+# Working hours
+# ---------------------------------------------------------------------------
+
+def _parse_default_hours():
+    raw = getattr(settings, "APPOINTMENT_DEFAULT_HOURS", "08:00-17:00") or ""
+    try:
+        start_s, end_s = raw.split("-", 1)
+        return time.fromisoformat(start_s.strip()), time.fromisoformat(end_s.strip())
+    except ValueError:
+        return time(8, 0), time(17, 0)
+
+
+def _default_slot_minutes() -> int:
+    return int(getattr(settings, "APPOINTMENT_SLOT_MINUTES", 30))
+
+
+def weekly_hours(provider_id, *, facility_id=None) -> dict[int, list[tuple]]:
+    """
+    {weekday: [(start_time, end_time, slot_minutes), ...]} for a provider.
+    Providers with no configured rows get the default Monday-Friday hours.
+    """
+    rows = ProviderWorkingHours.objects.filter(provider_id=provider_id, is_active=True)
+    if facility_id:
+        rows = rows.filter(Q(facility_id=facility_id) | Q(facility__isnull=True))
+
+    week: dict[int, list[tuple]] = {}
+    for weekday, start, end, slot in rows.values_list("weekday", "start_time", "end_time", "slot_minutes"):
+        week.setdefault(weekday, []).append((start, end, slot))
+
+    if not week and not ProviderWorkingHours.objects.filter(provider_id=provider_id).exists():
+        start, end = _parse_default_hours()
+        slot = _default_slot_minutes()
+        week = {d: [(start, end, slot)] for d in range(5)}
+
+    for windows in week.values():
+        windows.sort()
+    return week
+
+
+def _aware(day, t):
+    return timezone.make_aware(datetime.combine(day, t), timezone.get_current_timezone())
+
+
+def day_windows(week, day) -> list[tuple]:
+    """[(start_dt, end_dt, slot_minutes)] for one calendar day, merged if overlapping."""
+    out = []
+    for start, end, slot in week.get(day.weekday(), []):
+        s, e = _aware(day, start), _aware(day, end)
+        if out and s <= out[-1][1]:
+            prev = out[-1]
+            out[-1] = (prev[0], max(prev[1], e), prev[2])
+        else:
+            out.append((s, e, slot))
+    return out
+
+
+# ---------------------------------------------------------------------------
+# Booked intervals
+# ---------------------------------------------------------------------------
+
+def _booked_qs(provider_id, *, facility_id=None, exclude_id=None):
+    qs = Appointment.objects.filter(provider_id=provider_id, status__in=ACTIVE_STATUSES)
+    # Facility-based bookings only clash within the facility (matches the
+    # serializer's historical overlap rule); independent bookings are global.
+    if facility_id:
+        qs = qs.filter(facility_id=facility_id)
+    if exclude_id:
+        qs = qs.exclude(id=exclude_id)
+    return qs
+
+
+def busy_intervals(provider_id, start, end, *, facility_id=None, exclude_id=None) -> list[tuple]:
+    qs = _booked_qs(provider_id, facility_id=facility_id, exclude_id=exclude_id).filter(
+        start_at__lt=end, end_at__gt=start
+    )
+    return merge_intervals(qs.order_by("start_at").values_list("start_at", "end_at"))
+
+
+def find_conflict(provider_id, start, end, *, facility_id=None, exclude_id=None):
+    """First active appointment overlapping [start, end), or None."""
+    return (
+        _booked_qs(provider_id, facility_id=facility_id, exclude_id=exclude_id)
+        .filter(start_at__lt=end, end_at__gt=start)
+        .order_by("start_at")
+        .only("id", "start_at", "end_at")
+        .first()
+    )
+
+
+# ---------------------------------------------------------------------------
+# Slots
+# ---------------------------------------------------------------------------
+
+def _slots_in(window_start, step, duration, free, not_before):
+    """Slots on the window grid (window_start + k*step) that fit inside `free`."""
+    out = []
+    f_start, f_end = free
+    lower = max(f_start, not_before) if not_before else f_start
+    offset = (lower - window_start) / step
+    k = int(offset) + (0 if offset == int(offset) else 1)
+    k = max(k, 0)
+    slot_start = window_start + k * step
+    while slot_start + duration <= f_end:
+        out.append((slot_start, slot_start + duration))
+        slot_start += step
+    return out
+
+
+def availability(provider_id, start_date, *, days=1, duration_minutes=None, facility_id=None, now=None) -> list[dict]:
+    """
+    Free slots for `days` calendar days starting at `start_date`.
+
+    Returns [{"date": date, "slots": [(start_dt, end_dt), ...]}, ...].
+    Past slots (before `now`) are dropped.
+    """
+    days = max(1, min(int(days), MAX_DAYS))
+    now = now or timezone.now()
+    week = weekly_hours(provider_id, facility_id=facility_id)
+
+    per_day = [(start_date + timedelta(days=i)) for i in range(days)]
+    windows_by_day = {d: day_windows(week, d) for d in per_day}
+
+    all_windows = [w for d in per_day for w in windows_by_day[d]]
+    busy = []
+    if all_windows:
+        busy = busy_intervals(
+            provider_id,
+            all_windows[0][0],
+            max(w[1] for w in all_windows),
+            facility_id=facility_id,
+        )
+
+    # Free intervals are subsets of the (sorted, disjoint) windows, so both
+    # lists can be walked together to recover each interval's slot grid.
+    free = subtract_intervals([(w[0], w[1]) for w in all_windows], busy)
+    slots_by_day = {d: [] for d in per_day}
+    fi = 0
+    for d in per_day:
+        for w_start, w_end, slot_minutes in windows_by_day[d]:
+            step = timedelta(minutes=slot_minutes or _default_slot_minutes())
+            duration = timedelta(minutes=duration_minutes) if duration_minutes else step
+            while fi < len(free) and free[fi][0] < w_end:
+                if w_end > now:
+                    slots_by_day[d].extend(_slots_in(w_start, step, duration, free[fi], now))
+                fi += 1
+
+    return [{"date": d, "slots": slots_by_day[d]} for d in per_day]
+
+
+# ---------------------------------------------------------------------------
+# Booking lock
+# ---------------------------------------------------------------------------
+
+def book_lock(provider_id):
+    """
+    Serialise bookings for one provider until the current transaction ends.
+    Must be called inside transaction.atomic().
+
+    PostgreSQL: transaction-scoped advisory lock (no row contention with
+    unrelated updates to the user). Elsewhere: SELECT ... FOR UPDATE on the
+    provider's user row (a no-op on SQLite, which serialises writers anyway).
+    """
+    if not provider_id:
+        return
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cur:
+            cur.execute("SELECT pg_advisory_xact_lock(%s, %s)", [_LOCK_NAMESPACE, int(provider_id)])
+        return
+    User = get_user_model()
+    list(User.objects.select_for_update().filter(pk=provider_id).values_list("pk", flat=True))
@@ -0,0 +1,215 @@
+"""appointments/services/reminders.py
+
+Appointment reminder scheduler used by `manage.py send_appointment_reminders`
+(and the legacy `send_reminders` action).
+
+For each configured offset (e.g. 24h, 2h before start):
+1. claim: in one short transaction, lock a chunk of due SCHEDULED
+   appointments with SELECT ... FOR UPDATE SKIP LOCKED (where supported),
+   insert their AppointmentReminder rows and stamp last_notified_at;
+2. fan out: build in-app notifications for the whole chunk and insert them
+   with notifications.services.notify.bulk_notify; emails go through the
+   usual send_reminder helper (outbox-backed).
+
+The (appointment, offset) reminder row is the idempotency key, so retried
+cron runs or overlapping workers never double-send. An appointment only gets
+the closest due offset: one booked 90 minutes ahead gets the 2h reminder,
+not a late 24h one.
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+from dataclasses import dataclass, field
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from notifications.enums import Topic, Priority
+from notifications.models import Notification
+from notifications.services.notify import bulk_notify, get_patient_notification_users
+
+from ..enums import ApptStatus
+from ..models import Appointment, AppointmentReminder
+from .notify import send_reminder
+
+logger = logging.getLogger(__name__)
+
+_OFFSET_RE = re.compile(r"^\s*(\d+)\s*([hm]?)\s*$", re.IGNORECASE)
+
+
+def parse_offsets(raw=None) -> list[int]:
+    """'24h,2h' -> [1440, 120] (minutes, largest first)."""
+    raw = raw if raw is not None else getattr(settings, "APPOINTMENT_REMINDER_OFFSETS", "24h,2h")
+    if isinstance(raw, (list, tuple)):
+        raw = ",".join(str(x) for x in raw)
+    out = set()
+    for part in str(raw).split(","):
+        if not part.strip():
+            continue
+        m = _OFFSET_RE.match(part)
+        if not m:
+            raise ValueError(f"Invalid reminder offset: {part!r}")
+        n, unit = int(m.group(1)), (m.group(2) or "m").lower()
+        minutes = n * 60 if unit == "h" else n
+        if minutes > 0:
+            out.add(minutes)
+    return sorted(out, reverse=True)
+
+
+@dataclass
+class ReminderRunResult:
+    claimed: dict = field(default_factory=dict)   # offset_minutes -> appointments claimed
+    notifications: int = 0
+    emails: int = 0
+
+    @property
+    def total(self) -> int:
+        return sum(self.claimed.values())
+
+
+def due_queryset(offset, smaller_offset, now, *, facility_id=None, provider_id=None, start=None, end=None):
+    """SCHEDULED appointments inside the `offset` window with no reminder row for it yet."""
+    qs = Appointment.objects.filter(
+        status=ApptStatus.SCHEDULED,
+        start_at__gt=now,
+        start_at__lte=now + timedelta(minutes=offset),
+    ).exclude(reminders__offset_minutes=offset)
+    if smaller_offset:
+        qs = qs.filter(start_at__gt=now + timedelta(minutes=smaller_offset))
+    if facility_id:
+        qs = qs.filter(facility_id=facility_id)
+    if provider_id:
+        qs = qs.filter(provider_id=provider_id)
+    if start:
+        qs = qs.filter(start_at__gte=start)
+    if end:
+        qs = qs.filter(start_at__lte=end)
+    return qs.order_by("start_at", "id")
+
+
+def claim(offset, smaller_offset, now, *, limit, **filters) -> list[Appointment] | None:
+    """
+    Lock, record and return up to `limit` due appointments for one offset.
+    Returns None when nothing is due (an empty list means every candidate
+    was claimed by another runner).
+    """
+    with transaction.atomic():
+        qs = due_queryset(offset, smaller_offset, now, **filters)
+        if connection.features.has_select_for_update_skip_locked:
+            qs = qs.select_for_update(skip_locked=True, of=("self",))
+        ids = list(qs.values_list("id", flat=True)[:limit])
+        if not ids:
+            return None
+        AppointmentReminder.objects.bulk_create(
+            [AppointmentReminder(appointment_id=i, offset_minutes=offset, claimed_at=now) for i in ids],
+            ignore_conflicts=True,
+        )
+        # Keep only rows this run inserted (another runner may have won a race
+        # on backends without SKIP LOCKED); claimed_at doubles as the token.
+        ids = list(
+            AppointmentReminder.objects.filter(
+                appointment_id__in=ids, offset_minutes=offset, claimed_at=now
+            ).values_list("appointment_id", flat=True)
+        )
+        Appointment.objects.filter(id__in=ids).update(last_notified_at=now)
+
+    return list(
+        Appointment.objects.select_related(
+            "patient__user",
+            "patient__guardian_user",
+            "patient__parent_patient__user",
+            "patient__parent_patient__guardian_user",
+            "facility",
+            "provider",
+        ).filter(id__in=ids).order_by("start_at", "id")
+    )
+
+
+def _label(offset) -> str:
+    if offset % 60 == 0:
+        hours = offset // 60
+        return f"{hours} hour{'s' if hours != 1 else ''}"
+    return f"{offset} minutes"
+
+
+def _notifications_for(appt, offset) -> list[Notification]:
+    when = timezone.localtime(appt.start_at).strftime("%Y-%m-%d %H:%M")
+    body = f"Reminder: appointment at {when} (in {_label(offset)})."
+    return [
+        Notification(
+            user=u,
+            facility_id=appt.facility_id,
+            topic=Topic.APPT_REMINDER,
+            priority=Priority.NORMAL,
+            title="Appointment Reminder",
+            body=body,
+            data={"appointment_id": appt.id, "offset_minutes": offset},
+            action_url="/patient/appointments",
+            group_key=f"APPT:{appt.id}:REMINDER:{offset}",
+        )
+        for u in get_patient_notification_users(appt.patient)
+    ]
+
+
+def fan_out(appts, offset, *, send_emails=True) -> tuple[int, int]:
+    """In-app notifications (bulk) + emails for a claimed chunk. Returns (notifications, emails)."""
+    rows = []
+    for appt in appts:
+        rows.extend(_notifications_for(appt, offset))
+    created = bulk_notify(rows)
+
+    emails = 0
+    if send_emails:
+        for appt in appts:
+            if not appt.notify_email:
+                continue
+            try:
+                send_reminder(appt)
+                emails += 1
+            except Exception:
+                logger.exception("Reminder email failed for appointment %s", appt.id)
+
+    AppointmentReminder.objects.filter(
+        appointment_id__in=[a.id for a in appts], offset_minutes=offset
+    ).update(sent_at=timezone.now())
+    return created, emails
+
+
+def run_due_reminders(*, offsets=None, now=None, chunk_size=200, max_per_offset=None,
+                      send_emails=True, dry_run=False, **filters) -> ReminderRunResult:
+    """
+    Claim and send every due reminder. `filters` narrows the scope
+    (facility_id, provider_id, start, end).
+    """
+    offsets = sorted(offsets or parse_offsets(), reverse=True)
+    now = now or timezone.now()
+    result = ReminderRunResult()
+
+    for i, offset in enumerate(offsets):
+        smaller = offsets[i + 1] if i + 1 < len(offsets) else None
+        result.claimed[offset] = 0
+
+        if dry_run:
+            qs = due_queryset(offset, smaller, now, **filters)
+            result.claimed[offset] = qs.count() if max_per_offset is None else min(qs.count(), max_per_offset)
+            continue
+
+        while max_per_offset is None or result.claimed[offset] < max_per_offset:
+            limit = chunk_size
+            if max_per_offset is not None:
+                limit = min(limit, max_per_offset - result.claimed[offset])
+            appts = claim(offset, smaller, now, limit=limit, **filters)
+            if appts is None:
+                break
+            if not appts:
+                continue
+            n, e = fan_out(appts, offset, send_emails=send_emails)
+            result.claimed[offset] += len(appts)
+            result.notifications += n
+            result.emails += e
+
+    return result
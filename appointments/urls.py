@@ -1,8 +1,10 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import AppointmentViewSet
+from .views import AppointmentViewSet, ProviderWorkingHoursViewSet
 
 router = DefaultRouter()
+# Registered before the "" prefix so "working-hours" is not read as an appointment pk.
+router.register("working-hours", ProviderWorkingHoursViewSet, basename="provider-working-hours")
 router.register("", AppointmentViewSet, basename="appointment")
 
 urlpatterns = [ path("", include(router.urls)) ]
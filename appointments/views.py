@@ -3,34 +3,39 @@ from django.utils import timezone
 from django.db.models import Q, Case, When, IntegerField, Value, Subquery
 from rest_framework import viewsets, mixins, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from accounts.authentication import HeaderJWTAuthentication as JWTAuthentication
 from django.contrib.auth import get_user_model
 from billing.models import Service, Price, Charge
 from accounts.enums import UserRole
-from patients.models import SystemHMO, HMOTier, PatientFacilityLink
+from patients.models import SystemHMO, HMOTier
 from facilities.permissions_utils import has_facility_permission
 from billing.services.pricing import get_service_price_info, resolve_price
-from .models import Appointment
+from .models import Appointment, ProviderWorkingHours
 from .serializers import (
     AppointmentSerializer,
     AppointmentUpdateSerializer,
     AppointmentListSerializer,
+    ProviderWorkingHoursSerializer,
 )
 from .permissions import IsStaff, CanViewAppointment
 from .enums import ApptStatus
+from .events import AppointmentBooked
+from .readers import AppointmentListReader
+from core.events import publish
+from core.fastread import FastListMixin
+from core.uploads import import_max_bytes, text_reader, upload_limit
 from decimal import Decimal
 from billing.models import Service
 from .services.notify import (
-    send_confirmation,
-    send_reminder,
     send_provider_assignment,
     send_completed,
     send_cancelled,
     send_no_show,
 )
-from notifications.services.notify import notify_user, notify_users, notify_facility_roles, notify_patient
+from notifications.services.notify import notify_user, notify_facility_roles, notify_patient
 from notifications.enums import Topic, Priority
 from accounts.enums import UserRole
 
@@ -38,6 +43,7 @@ User = get_user_model()
 
 
 class AppointmentViewSet(
+    FastListMixin,
     viewsets.GenericViewSet,
     mixins.CreateModelMixin,
     mixins.RetrieveModelMixin,
@@ -53,6 +59,7 @@ class AppointmentViewSet(
     )
     authentication_classes = [JWTAuthentication]
     permission_classes = [IsAuthenticated]
+    fast_reader = AppointmentListReader
 
     def get_serializer_class(self):
         if self.action == "list":
@@ -224,20 +231,8 @@ class AppointmentViewSet(
             if getattr(a, "encounter_id", None):
                 a._prefetched_encounter = enc_map.get(a.encounter_id)
 
-    def list(self, request, *args, **kwargs):
-        queryset = self.filter_queryset(self.get_queryset())
-
-        page = self.paginate_queryset(queryset)
-        if page is not None:
-            # page is already a list
-            self._attach_prefetched_encounters(page)
-            serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
-
-        objs = list(queryset)
+    def prepare_page(self, objs):
         self._attach_prefetched_encounters(objs)
-        serializer = self.get_serializer(objs, many=True)
-        return Response(serializer.data)
 
     def create(self, request, *args, **kwargs):
         """
@@ -287,117 +282,17 @@ class AppointmentViewSet(
         serializer = self.get_serializer(data=data)
         serializer.is_valid(raise_exception=True)
         self.perform_create(serializer)
-        resp = Response(
+
+        # Facility visit-history link, confirmation/provider emails and in-app
+        # notifications are handled after commit (appointments.events).
+        publish(AppointmentBooked(appointment_id=serializer.instance.id))
+
+        return Response(
             serializer.data,
             status=status.HTTP_201_CREATED,
             headers=self.get_success_headers(serializer.data),
         )
 
-        # Auto-link patient to facility visit history (do NOT overwrite previous facility)
-        try:
-            appt = Appointment.objects.select_related("patient", "facility").get(
-                id=resp.data["id"]
-            )
-            patient = appt.patient
-            if appt.facility_id:
-                PatientFacilityLink.objects.get_or_create(
-                    patient=patient,
-                    facility_id=appt.facility_id,
-                )
-                # Keep the original `Patient.facility` as the first-known facility (if empty).
-                if not patient.facility_id:
-                    patient.facility_id = appt.facility_id
-                    patient.save(update_fields=["facility"])
-        except Exception:
-            pass
-
-        # Send confirmation email
-        try:
-            appt = Appointment.objects.get(id=resp.data["id"])
-            send_confirmation(appt)
-            # Provider assignment email (doctor/nurse/etc)
-            send_provider_assignment(appt)
-        except Exception:
-            pass
-        # In-app notifications (facility staff + provider + patient)
-        try:
-            appt = Appointment.objects.select_related(
-                "patient", "facility", "provider", "patient__user"
-            ).get(id=resp.data["id"])
-
-            facility_id = appt.facility_id
-            patient_name = getattr(appt.patient, "full_name", None) or f"Patient #{appt.patient_id}"
-            when = appt.start_at.strftime("%Y-%m-%d %H:%M") if appt.start_at else ""
-
-            title = "New appointment scheduled"
-            body = f"{patient_name} • {when}\nReason: {appt.reason or '-'}"
-            data_payload = {"appointment_id": appt.id, "patient_id": appt.patient_id}
-            group_key = f"APPT:{appt.id}:CREATED"
-
-            # Provider
-            if appt.provider_id:
-                notify_user(
-                    user=appt.provider,
-                    topic=Topic.APPOINTMENT_CONFIRMED,
-                    priority=Priority.NORMAL,
-                    title=title,
-                    body=body,
-                    facility_id=facility_id,
-                    data=data_payload,
-                    action_url="/facility/appointments",
-                    group_key=group_key,
-                    # Avoid blocking the booking request by sending emails here.
-                    # Appointment emails are handled separately (send_confirmation / send_provider_assignment).
-                    allow_email=False,
-                )
-
-            # Facility staff
-            if facility_id:
-                staff_roles = [
-                    UserRole.SUPER_ADMIN,
-                    UserRole.ADMIN,
-                    UserRole.FRONTDESK,
-                    UserRole.NURSE,
-                ]
-                staff_users = (
-                    User.objects.filter(facility_id=facility_id, role__in=staff_roles)
-                    .exclude(id=appt.provider_id)
-                    .distinct()
-                )
-                notify_users(
-                    users=staff_users,
-                    topic=Topic.APPOINTMENT_CONFIRMED,
-                    priority=Priority.NORMAL,
-                    title=title,
-                    body=body,
-                    facility_id=facility_id,
-                    data=data_payload,
-                    action_url="/facility/appointments",
-                    group_key=group_key,
-                    # In-app only for this booking event; don't block the request on outbound email.
-                    allow_email=False,
-                )
-
-            # Patient (and guardian, if dependent)
-            if appt.patient:
-                notify_patient(
-                    patient=appt.patient,
-                    topic=Topic.APPOINTMENT_CONFIRMED,
-                    priority=Priority.LOW,
-                    title="Appointment booked",
-                    body=f"Your appointment is scheduled for {when}.",
-                    facility_id=facility_id,
-                    data=data_payload,
-                    action_url="/patient/appointments",
-                    group_key=group_key,
-                    # Patient email confirmation is sent via appointments/services/notify.py
-                    allow_email=False,
-                )
-        except Exception:
-            pass
-
-        return resp
-
     def retrieve(self, request, *args, **kwargs):
         obj = self.get_object()
         self.permission_classes = [IsAuthenticated, CanViewAppointment]
@@ -937,38 +832,87 @@ class AppointmentViewSet(
         
         return Response(counts)
 
-    @action(detail=False, methods=["post"])
-    def send_reminders(self, request):
+    @action(detail=False, methods=["get"])
+    def availability(self, request):
         """
-        Send reminder notifications for appointments in a time range.
-        Used by scheduled jobs.
+        Free booking slots for one provider.
+
+        Query params:
+          provider  (required) provider user id
+          date      YYYY-MM-DD, default today
+          days      number of days from `date` (1-31, default 1)
+          duration  appointment length in minutes (default: the window's slot length)
         """
-        start = parse_datetime(request.data.get("start")) or request.data.get("start")
-        end = parse_datetime(request.data.get("end")) or request.data.get("end")
+        from datetime import date as date_cls
+
+        from .services.availability import availability, MAX_DAYS
 
-        if not start or not end:
-            return Response({"detail": "start and end required"}, status=400)
+        params = request.query_params
+        try:
+            provider_id = int(params.get("provider"))
+        except (TypeError, ValueError):
+            return Response({"detail": "provider is required."}, status=status.HTTP_400_BAD_REQUEST)
 
-        qs = self.get_queryset().filter(
-            status=ApptStatus.SCHEDULED, start_at__gte=start, start_at__lte=end
+        provider = User.objects.filter(id=provider_id).only("id", "facility_id", "role").first()
+        if not provider or provider.role == UserRole.PATIENT:
+            return Response({"detail": "Provider not found."}, status=status.HTTP_404_NOT_FOUND)
+
+        try:
+            start_date = date_cls.fromisoformat(params["date"]) if params.get("date") else timezone.localdate()
+            days = int(params.get("days") or 1)
+            duration = int(params["duration"]) if params.get("duration") else None
+        except ValueError:
+            return Response({"detail": "Invalid date, days or duration."}, status=status.HTTP_400_BAD_REQUEST)
+        if not 1 <= days <= MAX_DAYS:
+            return Response({"detail": f"days must be between 1 and {MAX_DAYS}."}, status=status.HTTP_400_BAD_REQUEST)
+        if duration is not None and not 5 <= duration <= 24 * 60:
+            return Response({"detail": "duration must be between 5 and 1440 minutes."}, status=status.HTTP_400_BAD_REQUEST)
+
+        result = availability(
+            provider.id,
+            start_date,
+            days=days,
+            duration_minutes=duration,
+            facility_id=provider.facility_id,
         )
+        return Response({
+            "provider": provider.id,
+            "facility": provider.facility_id,
+            "days": [
+                {
+                    "date": day["date"].isoformat(),
+                    "slots": [
+                        {
+                            "start_at": timezone.localtime(s).isoformat(),
+                            "end_at": timezone.localtime(e).isoformat(),
+                        }
+                        for s, e in day["slots"]
+                    ],
+                }
+                for day in result
+            ],
+        })
 
-        n = 0
-        for appt in qs:
-            send_reminder(appt)
-            if appt.patient:
-                notify_patient(
-                    patient=appt.patient,
-                    topic="APPT_REMINDER",
-                    title="Appointment Reminder",
-                    body=f"Reminder: appointment at {appt.start_at}.",
-                    data={"appointment_id": appt.id},
-                    facility_id=appt.facility_id,
-                    allow_email=getattr(appt, "notify_email", False),
-                )
-            n += 1
+    @action(detail=False, methods=["post"])
+    def send_reminders(self, request):
+        """
+        Send due reminders within the caller's scope (optionally bounded by
+        start/end). Kept for existing integrations; schedulers should run
+        `manage.py send_appointment_reminders`. Idempotent per appointment
+        and reminder offset, so retries never double-send.
+        """
+        from .services.reminders import run_due_reminders
+
+        self.permission_classes = [IsAuthenticated, IsStaff]
+        self.check_permissions(request)
 
-        return Response({"sent": n})
+        start = parse_datetime(request.data.get("start") or "")
+        end = parse_datetime(request.data.get("end") or "")
+
+        u = request.user
+        scope = {"facility_id": u.facility_id} if u.facility_id else {"provider_id": u.id}
+        result = run_due_reminders(start=start, end=end, **scope)
+        return Response({"sent": result.total, "by_offset": result.claimed})
 
     @action(detail=False, methods=["get"], url_path="hmo-catalog")
     def hmo_catalog(self, request):
@@ -1256,6 +1200,7 @@ class AppointmentViewSet(
 
 
     @action(detail=False, methods=["post"], url_path="import-hmo-file", permission_classes=[IsAuthenticated, IsStaff])
+    @upload_limit(import_max_bytes)
     def import_hmo_file(self, request):
         """
         Bulk import HMO prices for appointment services from CSV/Excel.
@@ -1275,7 +1220,6 @@ class AppointmentViewSet(
         - created, updated, errors
         """
         import csv
-        import io
         from decimal import Decimal, InvalidOperation
 
         from billing.models import HMOPrice, Service
@@ -1311,9 +1255,8 @@ class AppointmentViewSet(
             file_ext = file_obj.name.lower().split(".")[-1]
 
             if file_ext == "csv":
-                content = file_obj.read().decode("utf-8", errors="ignore")
-                reader = csv.DictReader(io.StringIO(content))
-                rows = list(reader)
+                with text_reader(file_obj, errors="ignore") as buf:
+                    rows = list(csv.DictReader(buf))
 
             elif file_ext in ("xlsx", "xls"):
                 if file_ext == "xls":
@@ -1433,3 +1376,46 @@ def sync_appointment_on_encounter_close(encounter_id: int):
             appt.save(update_fields=["status", "updated_at"])
     except Exception:
         pass
+
+
+class ProviderWorkingHoursViewSet(viewsets.ModelViewSet):
+    """
+    Weekly working hours used by the availability endpoint.
+
+    Providers manage their own rows; facility admins / front desk manage rows
+    for providers in their facility.
+    """
+    serializer_class = ProviderWorkingHoursSerializer
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAuthenticated, IsStaff]
+
+    MANAGER_ROLES = (UserRole.SUPER_ADMIN, UserRole.ADMIN, UserRole.FRONTDESK)
+
+    def get_queryset(self):
+        u = self.request.user
+        qs = ProviderWorkingHours.objects.all()
+        if u.facility_id and u.role in self.MANAGER_ROLES:
+            qs = qs.filter(provider__facility_id=u.facility_id)
+        else:
+            qs = qs.filter(provider_id=u.id)
+
+        provider_id = self.request.query_params.get("provider")
+        if provider_id:
+            qs = qs.filter(provider_id=provider_id)
+        return qs
+
+    def _resolve_provider(self, serializer):
+        u = self.request.user
+        provider = serializer.validated_data.get("provider") or getattr(serializer.instance, "provider", None) or u
+        if provider.id != u.id:
+            if not (u.facility_id and u.role in self.MANAGER_ROLES and provider.facility_id == u.facility_id):
+                raise PermissionDenied("You can only manage working hours for providers in your facility.")
+        return provider
+
+    def perform_create(self, serializer):
+        provider = self._resolve_provider(serializer)
+        serializer.save(provider=provider, facility_id=provider.facility_id)
+
+    def perform_update(self, serializer):
+        provider = self._resolve_provider(serializer)
+        serializer.save(provider=provider, facility_id=provider.facility_id)
@@ -1,11 +1,19 @@
 from django.contrib import admin
-from .models import File, AttachmentLink
+from .models import Blob, File, AttachmentLink
 
 @admin.register(File)
 class FileAdmin(admin.ModelAdmin):
     list_display = ("id","original_name","facility","patient","visibility","tag","size_bytes","created_at")
     list_filter = ("facility","visibility","tag")
     search_fields = ("original_name","sha256")
+    raw_id_fields = ("blob",)
+
+@admin.register(Blob)
+class BlobAdmin(admin.ModelAdmin):
+    list_display = ("id","sha256","size_bytes","mime_type","ref_count","released_at","created_at")
+    list_filter = ("mime_type",)
+    search_fields = ("sha256",)
+    readonly_fields = ("sha256","file","size_bytes","ref_count","released_at","created_at")
 
 @admin.register(AttachmentLink)
 class AttachmentLinkAdmin(admin.ModelAdmin):
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class AttachmentsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'attachments'
+
+    def ready(self):
+        # blob reference counting
+        from . import signals  # noqa: F401
+        # register post-commit domain event handlers
+        from . import events  # noqa: F401
@@ -0,0 +1,28 @@
+"""attachments/events.py
+
+Attachment domain events and their post-commit handlers (see core.events).
+"""
+
+import logging
+from dataclasses import dataclass
+
+from core.events import DomainEvent, subscribe
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class DerivativesRequested(DomainEvent):
+    name: str  # storage key of the original
+
+
+@subscribe(DerivativesRequested)
+def generate_derivatives(event):
+    from .services.derivatives import DerivativeError, generate
+
+    try:
+        generate(event.name)
+    except DerivativeError as e:
+        # Undecodable originals are remembered as failed for a while; storage
+        # errors are not caught, so the dispatcher retries them.
+        logger.info(f"No derivatives for {event.name}: {e}")
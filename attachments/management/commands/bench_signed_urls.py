@@ -0,0 +1,127 @@
+"""
+attachments/management/commands/bench_signed_urls.py
+
+Compare per-row URL signing (FieldFile.url through S3Boto3Storage, as file
+serializers used to do) with the cached signer in
+attachments/services/signed_urls.py for one listing of N files.
+
+Signing is local (SigV4, no network), so the benchmark runs offline against
+dummy credentials unless --use-settings is given.
+
+Usage:
+    python manage.py bench_signed_urls
+    python manage.py bench_signed_urls --files 100 --rounds 50
+    python manage.py bench_signed_urls --use-settings   # configured bucket/credentials
+"""
+
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from attachments.services.signed_urls import SignedUrlCache, s3_signer
+
+
+def _client_kwargs(use_settings):
+    if use_settings:
+        return {
+            "endpoint_url": getattr(settings, "AWS_S3_ENDPOINT_URL", None),
+            "region_name": getattr(settings, "AWS_S3_REGION_NAME", None),
+            "access_key": settings.AWS_ACCESS_KEY_ID,
+            "secret_key": settings.AWS_SECRET_ACCESS_KEY,
+            "bucket_name": settings.AWS_STORAGE_BUCKET_NAME,
+        }
+    return {
+        "endpoint_url": "https://bench.storage.supabase.co/storage/v1/s3",
+        "region_name": "us-east-1",
+        "access_key": "bench-access-key",
+        "secret_key": "bench-secret-key",
+        "bucket_name": "media",
+    }
+
+
+class Command(BaseCommand):
+    help = "Benchmark per-row vs cached signed media URL generation"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--files", type=int, default=100, help="Files per listing (default: 100)")
+        parser.add_argument("--rounds", type=int, default=20, help="Listings per mode (default: 20)")
+        parser.add_argument("--use-settings", action="store_true", help="Sign with the configured bucket and credentials")
+
+    def _time(self, fn, rounds):
+        start = time.perf_counter()
+        for _ in range(rounds):
+            fn()
+        return (time.perf_counter() - start) * 1000 / rounds
+
+    def handle(self, *args, **options):
+        import boto3
+        from botocore.config import Config
+        from storages.backends.s3boto3 import S3Boto3Storage
+
+        n, rounds = options["files"], options["rounds"]
+        kw = _client_kwargs(options["use_settings"])
+        names = [f"attachments/blobs/{i:02x}/{i:064x}.pdf" for i in range(n)]
+        config = Config(signature_version="s3v4", s3={"addressing_style": "path"})
+
+        def storage():
+            return S3Boto3Storage(
+                access_key=kw["access_key"],
+                secret_key=kw["secret_key"],
+                bucket_name=kw["bucket_name"],
+                endpoint_url=kw["endpoint_url"],
+                region_name=kw["region_name"],
+                addressing_style="path",
+                signature_version="s3v4",
+                querystring_auth=True,
+                querystring_expire=3600,
+                default_acl=None,
+            )
+
+        # 1) per row, fresh storage (client + credential chain) per request
+        def per_row_fresh():
+            s = storage()
+            for name in names:
+                s.url(name)
+
+        # 2) per row, one long-lived storage
+        shared = storage()
+
+        def per_row_shared():
+            for name in names:
+                shared.url(name)
+
+        client = boto3.client(
+            "s3",
+            endpoint_url=kw["endpoint_url"],
+            region_name=kw["region_name"],
+            aws_access_key_id=kw["access_key"],
+            aws_secret_access_key=kw["secret_key"],
+            config=config,
+        )
+        sign = s3_signer(client, kw["bucket_name"])
+
+        # 3) one batch per listing, cache emptied each time (cold)
+        cold = SignedUrlCache(sign, expires=3600, max_size=n)
+
+        def batch_cold():
+            cold.clear()
+            cold.get_many(names)
+
+        # 4) one batch per listing, warm cache (repeat listings within a bucket)
+        warm = SignedUrlCache(sign, expires=3600, max_size=n)
+        warm.get_many(names)
+
+        def batch_warm():
+            warm.get_many(names)
+
+        results = [
+            ("per-row, storage per request", self._time(per_row_fresh, rounds)),
+            ("per-row, shared storage", self._time(per_row_shared, rounds)),
+            ("cached signer, cold", self._time(batch_cold, rounds)),
+            ("cached signer, warm", self._time(batch_warm, rounds)),
+        ]
+        baseline = results[0][1]
+        self.stdout.write(f"{n} files, {rounds} rounds (ms per listing)")
+        for label, ms in results:
+            self.stdout.write(f"  {label:<30} {ms:9.3f}  x{baseline / ms if ms else 0:,.1f}")
@@ -0,0 +1,71 @@
+"""
+attachments/management/commands/gc_attachment_blobs.py
+
+Delete attachment blobs no File references any more (see
+attachments/services/blobs.py). Blobs are kept for
+ATTACHMENT_BLOB_GC_GRACE_HOURS after their last reference is dropped.
+Staged direct uploads that expired without being finalized are purged too.
+
+Usage:
+    python manage.py gc_attachment_blobs
+    python manage.py gc_attachment_blobs --dry-run
+    python manage.py gc_attachment_blobs --grace-hours 1
+    python manage.py gc_attachment_blobs --recount      # repair ref counts from File rows first
+    python manage.py gc_attachment_blobs --orphans      # also delete stored bytes with no Blob row
+"""
+
+from datetime import timedelta
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db.models import Sum
+
+from attachments.services.blobs import (
+    collect_garbage,
+    collectable,
+    grace_period,
+    miscounted,
+    orphaned_keys,
+    recount_references,
+)
+from attachments.services.direct import expired_uploads, purge_expired_uploads
+
+
+class Command(BaseCommand):
+    help = "Garbage-collect unreferenced attachment blobs"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--grace-hours", type=int, help="Override ATTACHMENT_BLOB_GC_GRACE_HOURS")
+        parser.add_argument("--limit", type=int, default=1000, help="Max blobs to delete (default: 1000)")
+        parser.add_argument("--recount", action="store_true", help="Recompute ref counts from File rows first")
+        parser.add_argument("--orphans", action="store_true", help="Also delete blob keys in storage with no Blob row")
+        parser.add_argument("--dry-run", action="store_true", help="Show what would be deleted")
+
+    def handle(self, *args, **options):
+        grace = timedelta(hours=options["grace_hours"]) if options["grace_hours"] is not None else grace_period()
+
+        if options["dry_run"]:
+            qs = collectable(grace)
+            total = qs.aggregate(n=Sum("size_bytes"))["n"] or 0
+            self.stdout.write(self.style.WARNING("DRY RUN - nothing deleted"))
+            if options["recount"]:
+                self.stdout.write(f"Would correct the reference count of {miscounted().count()} blob(s)")
+            self.stdout.write(f"Would delete {qs.count()} blob(s), {total} bytes")
+            self.stdout.write(f"Would purge {expired_uploads().count()} expired direct upload(s)")
+            if options["orphans"]:
+                for key in orphaned_keys(grace=grace):
+                    self.stdout.write(f"  orphan: {key}")
+            return
+
+        if options["recount"]:
+            self.stdout.write(f"Recounted references: {recount_references()} blob(s) corrected")
+
+        deleted, freed = collect_garbage(grace=grace, limit=options["limit"])
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} blob(s), freed {freed} bytes"))
+        self.stdout.write(self.style.SUCCESS(f"Purged {purge_expired_uploads(options['limit'])} expired direct upload(s)"))
+
+        if options["orphans"]:
+            keys = orphaned_keys(grace=grace)
+            for key in keys:
+                default_storage.delete(key)
+            self.stdout.write(self.style.SUCCESS(f"Deleted {len(keys)} orphaned key(s)"))
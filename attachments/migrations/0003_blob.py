@@ -0,0 +1,64 @@
+# Generated by Django 5.2.7 on 2026-10-18 21:04
+
+import attachments.models
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_blobs(apps, schema_editor):
+    """
+    One Blob per existing sha256, pointing at the oldest copy's key. Every
+    File with that hash is repointed to it; extra legacy copies are left in
+    storage untouched.
+    """
+    File = apps.get_model("attachments", "File")
+    Blob = apps.get_model("attachments", "Blob")
+
+    groups = {}
+    for row in File.objects.exclude(sha256="").exclude(file="").order_by("id").values(
+        "id", "sha256", "file", "size_bytes", "mime_type"
+    ):
+        groups.setdefault(row["sha256"], []).append(row)
+
+    for sha256, rows in groups.items():
+        first = rows[0]
+        blob = Blob.objects.create(
+            sha256=sha256,
+            file=first["file"],
+            size_bytes=first["size_bytes"],
+            mime_type=first["mime_type"] or "",
+            ref_count=len(rows),
+        )
+        File.objects.filter(id__in=[r["id"] for r in rows]).update(blob=blob, file=first["file"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attachments', '0002_file_description'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Blob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64, unique=True)),
+                ('file', models.FileField(max_length=255, upload_to=attachments.models.blob_path)),
+                ('size_bytes', models.BigIntegerField(default=0)),
+                ('mime_type', models.CharField(blank=True, max_length=100)),
+                ('ref_count', models.PositiveIntegerField(default=0)),
+                ('released_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['ref_count', 'released_at'], name='attachments_ref_cou_694a6e_idx')],
+            },
+        ),
+        migrations.AddField(
+            model_name='file',
+            name='blob',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='files', to='attachments.blob'),
+        ),
+        migrations.RunPython(backfill_blobs, migrations.RunPython.noop),
+    ]
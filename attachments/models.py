@@ -1,9 +1,10 @@
-import hashlib
+import uuid
+
 from django.conf import settings
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
 from django.core.validators import FileExtensionValidator
-from django.db import models
+from django.db import models, transaction
 from facilities.models import Facility
 from patients.models import Patient
 from .enums import Visibility
@@ -18,10 +19,44 @@ def upload_path(instance, filename):
   return f"attachments/{scope}/{pscope}/{filename}"
 
 
+def blob_path(instance, filename):
+  # media/attachments/blobs/{sha[:2]}/{sha}{ext} - content-addressed, shared by File rows
+  ext = ""
+  if "." in filename:
+    ext = "." + filename.rsplit(".", 1)[-1].lower()
+  return f"attachments/blobs/{instance.sha256[:2]}/{instance.sha256}{ext}"
+
+
+class Blob(models.Model):
+  """
+  Stored bytes, once per content hash (see services/blobs.py).
+  `ref_count` counts the File rows pointing at it; blobs back at zero are
+  removed by `manage.py gc_attachment_blobs` after a grace period.
+  """
+  sha256 = models.CharField(max_length=64, unique=True)
+  file = models.FileField(upload_to=blob_path, max_length=255)
+  size_bytes = models.BigIntegerField(default=0)
+  mime_type = models.CharField(max_length=100, blank=True)
+  ref_count = models.PositiveIntegerField(default=0)
+  released_at = models.DateTimeField(null=True, blank=True)  # last time a reference was dropped
+  created_at = models.DateTimeField(auto_now_add=True)
+
+  class Meta:
+    indexes = [
+      models.Index(fields=["ref_count", "released_at"]),
+    ]
+
+  def __str__(self):
+    return f"Blob {self.sha256[:12]} x{self.ref_count}"
+
+
 class File(models.Model):
   """
   Single source of truth for uploaded files.
   Link to any object via AttachmentLink or store the FK on the feature model.
+
+  The bytes live in a shared, content-addressed Blob; `file` points at the
+  blob's storage key, so identical uploads are stored once.
   """
   file = models.FileField(
     upload_to=upload_path,
@@ -31,6 +66,13 @@ class File(models.Model):
   mime_type = models.CharField(max_length=100, blank=True)
   size_bytes = models.BigIntegerField(default=0)
   sha256 = models.CharField(max_length=64, blank=True)
+  blob = models.ForeignKey(
+    Blob,
+    null=True,
+    blank=True,
+    on_delete=models.PROTECT,
+    related_name="files",
+  )
 
   # NEW: optional human-readable description (used in UI)
   description = models.CharField(max_length=255, blank=True)
@@ -75,23 +117,66 @@ class File(models.Model):
     ordering = ["-created_at", "-id"]
 
   def save(self, *args, **kwargs):
-    # capture size & sha256 on first save or when file replaced
-    if self.file and (not self.size_bytes or not self.sha256):
-      self.size_bytes = self.file.size or 0
-      # read small chunks to hash
-      h = hashlib.sha256()
-      for chunk in self.file.chunks():
-        h.update(chunk)
-      self.sha256 = h.hexdigest()
     # infer facility from patient if missing
     if not self.facility_id and self.patient_id and self.patient.facility_id:
       self.facility_id = self.patient.facility_id
-    super().save(*args, **kwargs)
+
+    # new upload (or file replaced): hash once, store only unseen content
+    if not (self.file and not self.file._committed):
+      return super().save(*args, **kwargs)
+
+    from .services.blobs import acquire_blob, release_blob
+
+    old_blob_id = None
+    if self.pk:
+      old_blob_id = File.objects.filter(pk=self.pk).values_list("blob_id", flat=True).first()
+
+    with transaction.atomic():
+      blob = acquire_blob(self.file, mime_type=self.mime_type)
+      self.blob = blob
+      self.file.name = blob.file.name
+      self.file._committed = True
+      self.size_bytes = blob.size_bytes
+      self.sha256 = blob.sha256
+      super().save(*args, **kwargs)
+      if old_blob_id:
+        release_blob(old_blob_id)
 
   def __str__(self):
     return f"File#{self.id} {self.original_name}"
 
 
+class DirectUpload(models.Model):
+  """
+  An upload the client sends straight to storage with a presigned PUT
+  (see services/direct.py). The object sits under a staging key until it
+  is finalized into a File (or another model's FileField) or expires.
+  """
+  token = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+  key = models.CharField(max_length=255)
+  original_name = models.CharField(max_length=255)
+  mime_type = models.CharField(max_length=100, blank=True)
+  size_bytes = models.BigIntegerField()               # declared; enforced by the signed PUT
+  sha256 = models.CharField(max_length=64, blank=True)  # declared (optional), verified on finalize
+  uploaded_by = models.ForeignKey(
+    settings.AUTH_USER_MODEL,
+    null=True,
+    on_delete=models.SET_NULL,
+    related_name="direct_uploads",
+  )
+  expires_at = models.DateTimeField()
+  completed_at = models.DateTimeField(null=True, blank=True)
+  created_at = models.DateTimeField(auto_now_add=True)
+
+  class Meta:
+    indexes = [
+      models.Index(fields=["completed_at", "expires_at"]),
+    ]
+
+  def __str__(self):
+    return f"DirectUpload {self.token} {self.original_name}"
+
+
 class AttachmentLink(models.Model):
   """
   Generic relation to attach a File to any object (e.g., Encounter, ImagingReport, LabOrder).
@@ -1,13 +1,99 @@
 from django.contrib.contenttypes.models import ContentType
+from django.db import models, transaction
 from rest_framework import serializers
-from .models import File, AttachmentLink
+from .models import ALLOWED_EXTS, File, AttachmentLink
 from .enums import Visibility
+from .services.derivatives import PREVIEW, THUMB, derivative_urls
+from .services.signed_urls import media_url, media_urls
 
 MAX_SIZE_BYTES = 20 * 1024 * 1024  # 20MB default cap; adjust per your infra
 
+# What the sniffed content (core.uploads.sniff_mime) must be for each extension
+EXT_MIME_TYPES = {
+    "pdf": "application/pdf",
+    "jpg": "image/jpeg",
+    "jpeg": "image/jpeg",
+    "png": "image/png",
+    "tif": "image/tiff",
+    "tiff": "image/tiff",
+    "bmp": "image/bmp",
+    "gif": "image/gif",
+}
+
+
+class SignedFileField(serializers.FileField):
+    """FileField rendered through the signed URL cache (services/signed_urls.py)."""
+
+    def to_representation(self, value):
+        if not value:
+            return None
+        return _absolute(media_url(value), self.context)
+
+
+def _absolute(url, context):
+    request = context.get("request", None)
+    if url and request is not None and url.startswith("/"):
+        return request.build_absolute_uri(url)
+    return url
+
+
+class DerivativeUrlField(serializers.Field):
+    """
+    Read-only thumbnail/preview URL of a FileField (services/derivatives.py);
+    None for types without derivatives.
+    """
+
+    def __init__(self, kind, **kwargs):
+        self.kind = kind
+        kwargs["read_only"] = True
+        kwargs.setdefault("source", "file")
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        if not value:
+            return None
+        # filled in one batch by SignedUrlListSerializer
+        known = self.context.get("derivative_urls", {}).get(self.kind, {})
+        url = known[value.name] if value.name in known else derivative_urls([value], self.kind).get(value.name)
+        return _absolute(url, self.context)
+
+
+class SignedUrlsMixin:
+    """ModelSerializer mixin: model FileFields render as SignedFileField."""
+    serializer_field_mapping = {
+        **serializers.ModelSerializer.serializer_field_mapping,
+        models.FileField: SignedFileField,
+    }
+
+
+class SignedUrlListSerializer(serializers.ListSerializer):
+    """
+    Signs the file URLs (and resolves the DerivativeUrlFields) of every row
+    in one batch before rendering, so the per-row fields are cache hits.
+    Use as Meta.list_serializer_class.
+    """
+
+    def to_representation(self, data):
+        rows = data.all() if isinstance(data, models.manager.BaseManager) else data
+        rows = list(rows)
+        media_urls(
+            getattr(row, f.attname)
+            for row in rows if hasattr(row, "_meta")
+            for f in row._meta.fields
+            if isinstance(f, models.FileField)
+        )
+        derivatives = self.context.setdefault("derivative_urls", {})
+        for field in self.child.fields.values():
+            if isinstance(field, DerivativeUrlField):
+                files = [getattr(row, field.source, None) for row in rows]
+                derivatives.setdefault(field.kind, {}).update(derivative_urls(files, field.kind))
+        return super().to_representation(rows)
+
 
 class FileSerializer(serializers.ModelSerializer):
     url = serializers.SerializerMethodField()
+    thumbnail_url = DerivativeUrlField(THUMB)
+    preview_url = DerivativeUrlField(PREVIEW)
 
     class Meta:
         model = File
@@ -24,19 +110,21 @@ class FileSerializer(serializers.ModelSerializer):
             "description",  # NEW
             "created_at",
             "url",
+            "thumbnail_url",
+            "preview_url",
         ]
         read_only_fields = ["size_bytes", "sha256", "created_at"]
+        list_serializer_class = SignedUrlListSerializer
 
     def get_url(self, obj):
-        # Direct MEDIA URL; consider signed URLs if using S3 later
+        # Cached (signed, for private buckets) URL; see services/signed_urls.py
         try:
-            return obj.file.url
+            return media_url(obj.file)
         except Exception:
             return None
 
 
-class UploadSerializer(serializers.Serializer):
-    file = serializers.FileField()
+class FileMetaSerializer(serializers.Serializer):
     patient = serializers.IntegerField(required=False)  # Patient.id
 
     # NEW: allow linking directly from frontend
@@ -52,12 +140,75 @@ class UploadSerializer(serializers.Serializer):
     # NEW: simple free-text description
     description = serializers.CharField(required=False, allow_blank=True)
 
+
+class UploadSerializer(FileMetaSerializer):
+    file = serializers.FileField()
+
     def validate_file(self, f):
         if f.size > MAX_SIZE_BYTES:
             raise serializers.ValidationError("File too large (>20MB).")
+        # sniffed_type is set by core.uploads.StreamingUploadHandler
+        sniffed = getattr(f, "sniffed_type", None)
+        ext = (f.name or "").rsplit(".", 1)[-1].lower()
+        if sniffed is not None and ext in EXT_MIME_TYPES and sniffed != EXT_MIME_TYPES[ext]:
+            raise serializers.ValidationError("File content does not match its extension.")
         return f
 
 
+class PresignUploadSerializer(serializers.Serializer):
+    """Request a presigned PUT (see services/direct.py)."""
+    filename = serializers.CharField(max_length=200)
+    content_type = serializers.CharField(max_length=100, required=False, allow_blank=True, default="")
+    size = serializers.IntegerField(min_value=1)
+    sha256 = serializers.RegexField(r"^[0-9a-f]{64}$", required=False, allow_blank=True, default="")
+
+    def validate_filename(self, name):
+        ext = name.rsplit(".", 1)[-1].lower() if "." in name else ""
+        if ext not in ALLOWED_EXTS:
+            raise serializers.ValidationError(f"File type not allowed (allowed: {', '.join(ALLOWED_EXTS)}).")
+        return name
+
+    def validate_size(self, size):
+        if size > MAX_SIZE_BYTES:
+            raise serializers.ValidationError("File too large (>20MB).")
+        return size
+
+
+class DirectUploadMixin:
+    """
+    ModelSerializer mixin: accept `upload_id` (a finalized-on-save presigned
+    direct upload, see services/direct.py) instead of a multipart file for
+    `direct_upload_field`. Pass the request in the serializer context.
+    """
+    direct_upload_field = "file"
+
+    def get_fields(self):
+        fields = super().get_fields()
+        fields["upload_id"] = serializers.UUIDField(write_only=True, required=False)
+        fields[self.direct_upload_field].required = False
+        return fields
+
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+        if self.instance is None and not attrs.get(self.direct_upload_field) and not attrs.get("upload_id"):
+            raise serializers.ValidationError({self.direct_upload_field: "Provide a file or an upload_id."})
+        return attrs
+
+    def create(self, validated_data):
+        token = validated_data.pop("upload_id", None)
+        if not token:
+            return super().create(validated_data)
+
+        from .services.direct import claim_upload, finalize_to_field
+
+        user = getattr(self.context.get("request"), "user", None)
+        with transaction.atomic():
+            instance = self.Meta.model(**validated_data)
+            finalize_to_field(claim_upload(token, user), instance, self.direct_upload_field)
+            instance.save()
+        return instance
+
+
 class LinkSerializer(serializers.Serializer):
     file_id = serializers.IntegerField()
     app_label = serializers.CharField()   # e.g., "imaging"
@@ -0,0 +1,192 @@
+"""
+attachments/services/blobs.py
+
+Content-addressed storage for attachments.File.
+
+acquire_blob(upload) hashes the upload in ONE pass over its chunks and
+returns the Blob for that sha256 with ref_count + 1:
+- known content: nothing is written to storage (no second copy, no upload);
+- new content: the bytes are written once under attachments/blobs/<sha>.
+adopt_stored() does the same for bytes a client already uploaded directly
+(services/direct.py), moving them with a server-side copy.
+
+release_blob(blob_id) drops a reference (File deleted or its file replaced).
+Blobs left at zero references are removed by collect_garbage
+(`manage.py gc_attachment_blobs`) once ATTACHMENT_BLOB_GC_GRACE_HOURS have
+passed, so a re-upload in the meantime simply revives them.
+"""
+
+import hashlib
+import logging
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from ..models import Blob, File, blob_path
+from .derivatives import delete_derivatives, source_of
+
+logger = logging.getLogger(__name__)
+
+BLOB_PREFIX = "attachments/blobs"
+
+
+def hash_upload(upload) -> tuple[str, int]:
+    """(sha256 hex, size in bytes) from a single pass over the upload."""
+    # Multipart uploads were already hashed while streaming (core.uploads).
+    raw = getattr(upload, "file", upload)
+    if getattr(raw, "sha256", "") and raw.size is not None:
+        return raw.sha256, raw.size
+
+    h = hashlib.sha256()
+    size = 0
+    for chunk in upload.chunks():
+        h.update(chunk)
+        size += len(chunk)
+    return h.hexdigest(), size
+
+
+def _store(blob, upload):
+    """Write the bytes under the blob's key unless that key already exists."""
+    key = blob_path(blob, os.path.basename(upload.name or ""))
+    storage = blob.file.storage
+    if not storage.exists(key):
+        saved = storage.save(key, upload)
+        if saved != key:
+            # Same content landed concurrently; keep the canonical key only.
+            storage.delete(saved)
+    blob.file.name = key
+
+
+def acquire_blob(upload, *, mime_type="") -> Blob:
+    """Blob for the upload's content, with one more reference."""
+    sha256, size = hash_upload(upload)
+    for _ in range(3):
+        if Blob.objects.filter(sha256=sha256).update(ref_count=F("ref_count") + 1):
+            return Blob.objects.get(sha256=sha256)
+
+        blob = Blob(sha256=sha256, size_bytes=size, mime_type=mime_type or "", ref_count=1)
+        _store(blob, upload)
+        try:
+            with transaction.atomic():
+                blob.save()
+            return blob
+        except IntegrityError:
+            # A concurrent upload of the same content created the row first.
+            continue
+    raise RuntimeError(f"Could not acquire blob {sha256}")
+
+
+def adopt_stored(key, *, sha256, size, mime_type="", backend) -> Blob:
+    """
+    Blob for bytes already in storage at `key` (a finalized direct upload),
+    with one more reference. The staged object is moved to the blob key,
+    or dropped when the content is already stored.
+    """
+    for _ in range(3):
+        if Blob.objects.filter(sha256=sha256).update(ref_count=F("ref_count") + 1):
+            backend.delete(key)
+            return Blob.objects.get(sha256=sha256)
+
+        blob = Blob(sha256=sha256, size_bytes=size, mime_type=mime_type or "", ref_count=1)
+        blob.file.name = blob_path(blob, os.path.basename(key))
+        if blob.file.storage.exists(blob.file.name):
+            backend.delete(key)
+        else:
+            backend.move(key, blob.file.name)
+        try:
+            with transaction.atomic():
+                blob.save()
+            return blob
+        except IntegrityError:
+            continue
+    raise RuntimeError(f"Could not adopt blob {sha256}")
+
+
+def release_blob(blob_id):
+    """Drop one reference; the blob becomes collectable at zero."""
+    Blob.objects.filter(pk=blob_id, ref_count__gt=0).update(
+        ref_count=F("ref_count") - 1,
+        released_at=timezone.now(),
+    )
+
+
+def grace_period() -> timedelta:
+    return timedelta(hours=getattr(settings, "ATTACHMENT_BLOB_GC_GRACE_HOURS", 24))
+
+
+def miscounted():
+    """Blobs whose ref_count differs from their File rows, annotated with `refs`."""
+    counted = (
+        File.objects.filter(blob=OuterRef("pk"))
+        .order_by()
+        .values("blob")
+        .annotate(n=Count("id"))
+        .values("n")
+    )
+    return Blob.objects.annotate(refs=Coalesce(Subquery(counted), Value(0))).exclude(ref_count=F("refs"))
+
+
+def recount_references() -> int:
+    """Recompute ref_count from File rows (repair). Returns rows changed."""
+    return miscounted().update(ref_count=F("refs"))
+
+
+def collectable(grace=None):
+    """Unreferenced blobs whose last reference was dropped before the grace period."""
+    cutoff = timezone.now() - (grace if grace is not None else grace_period())
+    return Blob.objects.filter(ref_count=0, files__isnull=True, created_at__lt=cutoff).exclude(
+        released_at__gte=cutoff
+    )
+
+
+def collect_garbage(*, grace=None, limit=1000) -> tuple[int, int]:
+    """Delete collectable blobs and their bytes. Returns (blobs, bytes)."""
+    deleted = freed = 0
+    for pk in list(collectable(grace).values_list("pk", flat=True)[:limit]):
+        with transaction.atomic():
+            # Lock and re-check: a concurrent acquire_blob waits on this row.
+            blob = collectable(grace).select_for_update().filter(pk=pk).first()
+            if blob is None:
+                continue
+            name = blob.file.name
+            blob.delete()
+            try:
+                blob.file.storage.delete(name)
+                delete_derivatives(name, storage=blob.file.storage)
+            except Exception as e:
+                logger.warning(f"Failed to delete blob bytes {name}: {e}")
+            deleted += 1
+            freed += blob.size_bytes
+    return deleted, freed
+
+
+def orphaned_keys(*, grace=None):
+    """Storage keys under the blob prefix with no Blob row (e.g. failed saves)."""
+    from django.core.files.storage import default_storage
+
+    cutoff = timezone.now() - (grace if grace is not None else grace_period())
+    try:
+        shards, _ = default_storage.listdir(BLOB_PREFIX)
+    except (FileNotFoundError, NotImplementedError):
+        return []
+
+    keys = []
+    for shard in shards:
+        _, names = default_storage.listdir(f"{BLOB_PREFIX}/{shard}")
+        candidates = {f"{BLOB_PREFIX}/{shard}/{n}" for n in names}
+        known = set(Blob.objects.filter(file__in=candidates).values_list("file", flat=True))
+        # thumbnails/previews live next to their blob (services/derivatives.py)
+        known |= {key for key in candidates if source_of(key) in known}
+        for key in sorted(candidates - known):
+            try:
+                if default_storage.get_modified_time(key) >= cutoff:
+                    continue
+            except (NotImplementedError, OSError):
+                pass
+            keys.append(key)
+    return keys
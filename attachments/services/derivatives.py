@@ -0,0 +1,282 @@
+"""
+attachments/services/derivatives.py
+
+Thumbnails and web previews of stored images and PDFs, so galleries don't
+download full-resolution originals.
+
+- Derivatives live next to the original under a deterministic key:
+  <original>.thumb.jpg and <original>.preview.jpg (<original>.preview.png,
+  the rendered first page, for PDFs). Blob-backed files are content
+  addressed, so identical uploads share their derivatives too.
+- generate() reads the original once, renders the largest size first and
+  downsizes from it. JPEGs are decoded at reduced scale (Image.draft).
+  PDF pages are rendered with pypdfium2 (WeasyPrint only writes PDFs).
+- Which keys exist is remembered in the Django cache, so listings don't
+  touch storage. derivative_urls() returns the stored derivative's URL
+  when it is known to exist, otherwise a signed URL to DerivativeView,
+  which generates on first request and redirects. The listing also queues
+  background generation (attachments.events.DerivativesRequested).
+- Originals that can't be decoded are cached as failed for
+  ATTACHMENT_DERIVATIVE_FAILED_TTL; storage errors are not cached.
+"""
+
+import hashlib
+import io
+import os
+import time
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.urls import reverse
+
+from .signed_urls import media_urls
+
+THUMB = "thumb"
+PREVIEW = "preview"
+KINDS = (PREVIEW, THUMB)  # largest first: each is resized from the previous
+
+IMAGE_EXTS = {"jpg", "jpeg", "png", "gif", "bmp", "tif", "tiff", "webp"}
+READY, FAILED = "ready", "failed"
+CACHE_TTL = 7 * 24 * 3600
+SALT = "attachments.derivatives"
+
+
+class DerivativeError(Exception):
+    pass
+
+
+def sizes() -> dict:
+    """{kind: max edge in px}"""
+    return {
+        THUMB: int(getattr(settings, "ATTACHMENT_THUMBNAIL_PX", 256)),
+        PREVIEW: int(getattr(settings, "ATTACHMENT_PREVIEW_PX", 1600)),
+    }
+
+
+def failed_ttl() -> int:
+    """Seconds an original that can't be decoded is not retried."""
+    return int(getattr(settings, "ATTACHMENT_DERIVATIVE_FAILED_TTL", 900))
+
+
+def _ext(name) -> str:
+    return os.path.splitext(name or "")[1].lstrip(".").lower()
+
+
+def is_pdf(name) -> bool:
+    return _ext(name) == "pdf"
+
+
+def supports(name) -> bool:
+    return bool(name) and (is_pdf(name) or _ext(name) in IMAGE_EXTS)
+
+
+def derivative_key(name, kind) -> str:
+    ext = "png" if kind == PREVIEW and is_pdf(name) else "jpg"
+    return f"{name}.{kind}.{ext}"
+
+
+def source_of(key):
+    """Original key of a derivative key, or None."""
+    for kind in KINDS:
+        for ext in ("jpg", "png"):
+            suffix = f".{kind}.{ext}"
+            if key.endswith(suffix):
+                return key[: -len(suffix)]
+    return None
+
+
+def _cache_key(key) -> str:
+    return "attachments:derivative:" + hashlib.sha1(key.encode()).hexdigest()
+
+
+# ---------------------------------------------------------------------------
+# Rendering
+# ---------------------------------------------------------------------------
+
+def _load_pdf(fh, max_px):
+    try:
+        import pypdfium2 as pdfium
+    except ImportError as e:
+        raise DerivativeError("pypdfium2 is required for PDF previews") from e
+
+    pdf = pdfium.PdfDocument(fh.read())
+    try:
+        if len(pdf) == 0:
+            raise DerivativeError("PDF has no pages")
+        page = pdf[0]
+        width, height = page.get_size()  # points (1/72 in)
+        scale = max_px / max(width, height, 1)
+        return page.render(scale=scale).to_pil()
+    finally:
+        pdf.close()
+
+
+def _load_image(fh, max_px):
+    from PIL import Image, ImageOps
+
+    img = Image.open(fh)
+    img.draft("RGB", (max_px, max_px))  # JPEG: decode at reduced scale
+    img = ImageOps.exif_transpose(img)
+    img.load()
+    return img
+
+
+def _flatten(img):
+    """RGB on white (JPEG has no alpha or palette)."""
+    from PIL import Image
+
+    if img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info):
+        img = img.convert("RGBA")
+        bg = Image.new("RGB", img.size, (255, 255, 255))
+        bg.paste(img, mask=img.getchannel("A"))
+        return bg
+    return img.convert("RGB") if img.mode != "RGB" else img
+
+
+def _encode(img, key) -> bytes:
+    buf = io.BytesIO()
+    if key.endswith(".png"):
+        img.save(buf, "PNG", optimize=True)
+    else:
+        img.save(buf, "JPEG", quality=82, optimize=True, progressive=True)
+    return buf.getvalue()
+
+
+def _save(key, data, storage):
+    saved = storage.save(key, ContentFile(data))
+    if saved != key:
+        # Rendered concurrently; keep the canonical key only.
+        storage.delete(saved)
+
+
+def _render(name, data, missing, keys) -> dict:
+    """{kind: encoded bytes} of the missing derivatives."""
+    from PIL import Image
+
+    px = sizes()
+    fh = io.BytesIO(data)
+    img = _load_pdf(fh, px[PREVIEW]) if is_pdf(name) else _load_image(fh, px[PREVIEW])
+    img = _flatten(img)
+    out = {}
+    for kind in KINDS:
+        img.thumbnail((px[kind], px[kind]), Image.Resampling.LANCZOS)
+        if kind in missing:
+            out[kind] = _encode(img, keys[kind])
+    return out
+
+
+def generate(name, *, storage=None) -> dict:
+    """
+    Create the missing derivatives of `name`. Returns {kind: key}.
+    Raises DerivativeError if the original can't be rendered.
+    """
+    storage = storage or default_storage
+    if not supports(name):
+        raise DerivativeError(f"No derivatives for {name}")
+
+    keys = {kind: derivative_key(name, kind) for kind in KINDS}
+    missing = [kind for kind in KINDS if not storage.exists(keys[kind])]
+    if missing:
+        # Storage errors propagate (the worker or the next request retries);
+        # only a file that can't be decoded is remembered as failed.
+        with storage.open(name, "rb") as fh:
+            data = fh.read()
+        try:
+            rendered = _render(name, data, missing, keys)
+        except DerivativeError:
+            cache.set_many({_cache_key(k): FAILED for k in keys.values()}, failed_ttl())
+            raise
+        except Exception as e:
+            cache.set_many({_cache_key(k): FAILED for k in keys.values()}, failed_ttl())
+            raise DerivativeError(f"Cannot render {name}: {e}") from e
+        for kind, body in rendered.items():
+            _save(keys[kind], body, storage)
+
+    cache.set_many({_cache_key(k): READY for k in keys.values()}, CACHE_TTL)
+    return keys
+
+
+def ensure(name, kind) -> str:
+    """Key of one derivative, generating it if needed."""
+    key = derivative_key(name, kind)
+    state = cache.get(_cache_key(key))
+    if state == FAILED:
+        raise DerivativeError(f"Cannot render {name}")
+    if state == READY or default_storage.exists(key):
+        cache.set(_cache_key(key), READY, CACHE_TTL)
+        return key
+    return generate(name)[kind]
+
+
+def queue(name):
+    """Generate `name`'s derivatives in the background (once per 5 minutes)."""
+    if not supports(name):
+        return
+    from ..events import DerivativesRequested
+    from core.events import publish
+
+    # add() is atomic: only the first caller queues it
+    if cache.add(_cache_key(name) + ":queued", 1, 300):
+        publish(DerivativesRequested(name=name))
+
+
+def delete_derivatives(name, *, storage=None):
+    storage = storage or default_storage
+    for kind in KINDS:
+        key = derivative_key(name, kind)
+        storage.delete(key)
+        cache.delete(_cache_key(key))
+
+
+# ---------------------------------------------------------------------------
+# URLs
+# ---------------------------------------------------------------------------
+
+def _lazy_url(name, kind):
+    """Signed DerivativeView URL, stable within a signed-URL expiry bucket."""
+    from .signed_urls import expires_in
+
+    step = max(expires_in() // 2, 1)
+    exp = (int(time.time()) // step + 2) * step
+    token = signing.Signer(salt=SALT).sign_object({"k": name, "d": kind, "e": exp}, compress=True)
+    return reverse("attachments-derivative", args=[token])
+
+
+def load_token(token):
+    """(name, kind) of a valid, unexpired DerivativeView token, else None."""
+    try:
+        claims = signing.Signer(salt=SALT).unsign_object(token)
+    except signing.BadSignature:
+        return None
+    if claims.get("e", 0) < time.time() or claims.get("d") not in KINDS:
+        return None
+    return claims["k"], claims["d"]
+
+
+def derivative_urls(files, kind) -> dict:
+    """
+    {name: url or None} for FieldFiles (or keys). Unknown derivatives get a
+    lazy URL and are queued for background generation.
+    """
+    names = [n for n in (getattr(f, "name", f) for f in files) if n and supports(n)]
+    if not names:
+        return {}
+    keys = {n: derivative_key(n, kind) for n in names}
+    states = cache.get_many([_cache_key(k) for k in keys.values()])
+
+    ready = [n for n in names if states.get(_cache_key(keys[n])) == READY]
+    urls = media_urls([keys[n] for n in ready])
+    out = {}
+    for n in names:
+        state = states.get(_cache_key(keys[n]))
+        if state == READY:
+            out[n] = urls.get(keys[n])
+        elif state == FAILED:
+            out[n] = None
+        else:
+            out[n] = _lazy_url(n, kind)
+            queue(n)
+    return out
@@ -0,0 +1,271 @@
+"""
+attachments/services/direct.py
+
+Direct-to-storage transfers: the API hands out short-lived presigned URLs
+and the client moves the bytes itself, so large scans never occupy a web
+worker.
+
+Upload flow:
+1. start_upload() records a DirectUpload and returns a presigned PUT for a
+   staging key (attachments/uploads/<token>/<name>). The declared size is
+   part of the signature, so storage rejects a different body length.
+2. The client PUTs the bytes.
+3. finalize_to_blob() (attachments.File) or finalize_to_field() (any other
+   FileField) checks size and sha256, then moves the staged object into
+   place with a server-side copy.
+
+Backends (ATTACHMENT_DIRECT_BACKEND):
+- S3:    Supabase-compatible S3 through one boto3 client per process
+         (s3_client(), shared with services/signed_urls.py).
+- LOCAL: stand-in for dev/tests; signed URLs served by DirectTransferView
+         from default_storage.
+"""
+
+import base64
+import hashlib
+import logging
+import time
+from datetime import timedelta
+from functools import lru_cache
+
+from django.conf import settings
+from django.core import signing
+from django.core.files.storage import default_storage
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import content_disposition_header
+from rest_framework import serializers
+
+from ..models import DirectUpload
+
+logger = logging.getLogger(__name__)
+
+STAGING_PREFIX = "attachments/uploads"
+CHUNK_SIZE = 64 * 1024
+
+
+def expires_in() -> int:
+    return int(getattr(settings, "ATTACHMENT_PRESIGN_EXPIRES_SEC", 900))
+
+
+@lru_cache(maxsize=1)
+def s3_client():
+    """The process-wide boto3 S3 client for the configured bucket."""
+    import boto3
+    from botocore.config import Config
+
+    return boto3.client(
+        "s3",
+        endpoint_url=getattr(settings, "AWS_S3_ENDPOINT_URL", None),
+        region_name=getattr(settings, "AWS_S3_REGION_NAME", None),
+        aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+        aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+        config=Config(
+            signature_version=getattr(settings, "AWS_S3_SIGNATURE_VERSION", "s3v4"),
+            s3={"addressing_style": getattr(settings, "AWS_S3_ADDRESSING_STYLE", "path")},
+            # S3-compatible layers (Supabase) don't all accept default checksums
+            request_checksum_calculation="when_required",
+            response_checksum_validation="when_required",
+        ),
+    )
+
+
+class S3DirectBackend:
+    name = "S3"
+
+    def __init__(self):
+        self.bucket = settings.AWS_STORAGE_BUCKET_NAME
+        self.client = s3_client()
+
+    def presign_put(self, key, *, content_type, size, sha256="", expires=None):
+        params = {"Bucket": self.bucket, "Key": key, "ContentType": content_type, "ContentLength": size}
+        headers = {"Content-Type": content_type}
+        if sha256:
+            checksum = base64.b64encode(bytes.fromhex(sha256)).decode()
+            params["ChecksumSHA256"] = checksum
+            headers["x-amz-checksum-sha256"] = checksum
+        url = self.client.generate_presigned_url(
+            "put_object", Params=params, ExpiresIn=expires or expires_in(), HttpMethod="PUT"
+        )
+        return url, headers
+
+    def presign_get(self, key, *, filename="", inline=False, expires=None):
+        params = {"Bucket": self.bucket, "Key": key}
+        if filename:
+            params["ResponseContentDisposition"] = content_disposition_header(not inline, filename)
+        return self.client.generate_presigned_url("get_object", Params=params, ExpiresIn=expires or expires_in())
+
+    def stat(self, key):
+        """(size, sha256 hex or "") of a stored object, or None if missing."""
+        from botocore.exceptions import ClientError
+
+        try:
+            head = self.client.head_object(Bucket=self.bucket, Key=key, ChecksumMode="ENABLED")
+        except ClientError:
+            return None
+        checksum = head.get("ChecksumSHA256") or ""
+        sha256 = base64.b64decode(checksum).hex() if checksum and "-" not in checksum else ""
+        return head["ContentLength"], sha256
+
+    def iter_chunks(self, key):
+        body = self.client.get_object(Bucket=self.bucket, Key=key)["Body"]
+        yield from body.iter_chunks(CHUNK_SIZE)
+
+    def move(self, src, dst):
+        self.client.copy_object(Bucket=self.bucket, Key=dst, CopySource={"Bucket": self.bucket, "Key": src})
+        self.delete(src)
+
+    def delete(self, key):
+        self.client.delete_object(Bucket=self.bucket, Key=key)
+
+
+class LocalDirectBackend:
+    """Signed URLs to DirectTransferView; bytes live in default_storage."""
+
+    name = "LOCAL"
+    salt = "attachments.direct"
+
+    def _url(self, claims, expires):
+        claims["exp"] = int(time.time()) + (expires or expires_in())
+        return reverse("attachments-direct", args=[signing.dumps(claims, salt=self.salt, compress=True)])
+
+    def load(self, token, method):
+        """Claims of a valid, unexpired token for `method`, else None."""
+        try:
+            claims = signing.loads(token, salt=self.salt)
+        except signing.BadSignature:
+            return None
+        if claims.get("m") != method or claims.get("exp", 0) < time.time():
+            return None
+        return claims
+
+    def presign_put(self, key, *, content_type, size, sha256="", expires=None):
+        url = self._url({"m": "PUT", "k": key, "ct": content_type, "n": size}, expires)
+        return url, {"Content-Type": content_type}
+
+    def presign_get(self, key, *, filename="", inline=False, expires=None):
+        return self._url({"m": "GET", "k": key, "f": filename, "i": bool(inline)}, expires)
+
+    def stat(self, key):
+        if not default_storage.exists(key):
+            return None
+        h = hashlib.sha256()
+        for chunk in self.iter_chunks(key):
+            h.update(chunk)
+        return default_storage.size(key), h.hexdigest()
+
+    def iter_chunks(self, key):
+        with default_storage.open(key, "rb") as fh:
+            yield from fh.chunks(CHUNK_SIZE)
+
+    def move(self, src, dst):
+        if not default_storage.exists(dst):
+            with default_storage.open(src, "rb") as fh:
+                default_storage.save(dst, fh)
+        self.delete(src)
+
+    def delete(self, key):
+        default_storage.delete(key)
+
+
+@lru_cache(maxsize=1)
+def get_backend():
+    name = (getattr(settings, "ATTACHMENT_DIRECT_BACKEND", "LOCAL") or "LOCAL").upper()
+    return S3DirectBackend() if name == "S3" else LocalDirectBackend()
+
+
+def start_upload(*, user, filename, content_type, size, sha256=""):
+    """DirectUpload row + (url, headers) for the client's PUT."""
+    upload = DirectUpload(
+        original_name=filename,
+        mime_type=content_type,
+        size_bytes=size,
+        sha256=sha256,
+        uploaded_by=user,
+        expires_at=timezone.now() + timedelta(seconds=expires_in()),
+    )
+    upload.key = f"{STAGING_PREFIX}/{upload.token}/{default_storage.get_valid_name(filename)}"
+    upload.save()
+    url, headers = get_backend().presign_put(
+        upload.key, content_type=content_type, size=size, sha256=sha256
+    )
+    return upload, url, headers
+
+
+def claim_upload(token, user) -> DirectUpload:
+    """Lock the caller's pending upload; call inside transaction.atomic()."""
+    upload = (
+        DirectUpload.objects.select_for_update()
+        .filter(token=token, uploaded_by=user, completed_at__isnull=True, expires_at__gt=timezone.now())
+        .first()
+    )
+    if upload is None:
+        raise serializers.ValidationError("Upload not found or expired.")
+    return upload
+
+
+def _verify(upload, backend):
+    """(size, sha256) of the staged object, checked against what was declared."""
+    stat = backend.stat(upload.key)
+    if stat is None:
+        raise serializers.ValidationError("File has not been uploaded yet.")
+    size, sha256 = stat
+    if size != upload.size_bytes:
+        raise serializers.ValidationError("Uploaded size does not match the declared size.")
+    if not sha256:
+        h = hashlib.sha256()
+        for chunk in backend.iter_chunks(upload.key):
+            h.update(chunk)
+        sha256 = h.hexdigest()
+    if upload.sha256 and upload.sha256 != sha256:
+        raise serializers.ValidationError("Uploaded content does not match the declared sha256.")
+    return size, sha256
+
+
+def finalize_to_blob(upload):
+    """Adopt a staged upload as a (deduplicated) Blob with one more reference."""
+    from .blobs import adopt_stored
+
+    backend = get_backend()
+    size, sha256 = _verify(upload, backend)
+    blob = adopt_stored(upload.key, sha256=sha256, size=size, mime_type=upload.mime_type, backend=backend)
+    upload.completed_at = timezone.now()
+    upload.save(update_fields=["completed_at"])
+    return blob
+
+
+def finalize_to_field(upload, instance, field_name):
+    """Move a staged upload to `instance.<field_name>`'s upload_to path (instance not saved)."""
+    backend = get_backend()
+    _verify(upload, backend)
+    field = instance._meta.get_field(field_name)
+    name = default_storage.get_available_name(field.generate_filename(instance, upload.original_name))
+    backend.move(upload.key, name)
+    getattr(instance, field_name).name = name
+    upload.completed_at = timezone.now()
+    upload.save(update_fields=["completed_at"])
+    return instance
+
+
+def presign_download(field_file, *, filename="", inline=False):
+    """Short-lived GET URL for a stored file."""
+    return get_backend().presign_get(field_file.name, filename=filename, inline=inline)
+
+
+def expired_uploads():
+    return DirectUpload.objects.filter(completed_at__isnull=True, expires_at__lt=timezone.now())
+
+
+def purge_expired_uploads(limit=1000) -> int:
+    """Delete staged objects (and rows) of uploads that were never finalized."""
+    backend = get_backend()
+    purged = 0
+    for upload in expired_uploads().order_by("id")[:limit]:
+        try:
+            backend.delete(upload.key)
+        except Exception as e:
+            logger.warning(f"Failed to delete staged upload {upload.key}: {e}")
+            continue
+        upload.delete()
+        purged += 1
+    return purged
@@ -0,0 +1,135 @@
+"""
+attachments/services/signed_urls.py
+
+Media URLs for serializers. With a private bucket (SUPABASE_MEDIA_SIGNED)
+every FieldFile.url is a SigV4 presign through S3Boto3Storage; listings of
+attachments, patient/provider documents and imaging assets did dozens of
+those per response.
+
+media_url() / media_urls() instead:
+- sign with the one process-wide boto3 client (direct.s3_client());
+- cache signed URLs in an in-process LRU keyed by (key, expiry bucket).
+  Time is cut into buckets of half the URL lifetime; a URL is signed once
+  per bucket and dropped when the bucket ends, so a cached URL always has
+  at least half its lifetime left when it is handed out;
+- sign all misses of a list in one pass (SignedUrlListSerializer).
+
+Public buckets and local storage need no signing; the storage URL is
+returned as-is.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+
+
+def expires_in() -> int:
+    return int(getattr(settings, "ATTACHMENT_SIGNED_URL_EXPIRES_SEC", 3600))
+
+
+def signing_enabled() -> bool:
+    return bool(getattr(settings, "USE_SUPABASE_S3", False) and getattr(settings, "AWS_QUERYSTRING_AUTH", False))
+
+
+class SignedUrlCache:
+    """
+    Thread-safe LRU of signed URLs. `sign(keys, expires)` returns
+    {key: url} for a list of storage keys.
+    """
+
+    def __init__(self, sign, *, expires=3600, max_size=4096, clock=time.time):
+        self.sign = sign
+        self.expires = expires
+        self.max_size = max_size
+        self.clock = clock
+        self.step = max(expires // 2, 1)
+        self._entries = OrderedDict()  # key -> (bucket, url)
+        self._lock = threading.Lock()
+
+    def get_many(self, keys) -> dict:
+        bucket = int(self.clock() // self.step)
+        found, missing = {}, []
+        with self._lock:
+            for key in dict.fromkeys(keys):
+                entry = self._entries.get(key)
+                if entry and entry[0] == bucket:
+                    self._entries.move_to_end(key)
+                    found[key] = entry[1]
+                else:
+                    missing.append(key)
+        if not missing:
+            return found
+
+        signed = self.sign(missing, self.expires)
+        with self._lock:
+            for key, url in signed.items():
+                self._entries[key] = (bucket, url)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        found.update(signed)
+        return found
+
+    def get(self, key) -> str:
+        return self.get_many([key])[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def s3_signer(client, bucket, location=""):
+    """`sign` callable for SignedUrlCache presigning GETs with `client`."""
+    prefix = f"{location.strip('/')}/" if location else ""
+
+    def sign(keys, expires):
+        return {
+            key: client.generate_presigned_url(
+                "get_object", Params={"Bucket": bucket, "Key": prefix + key}, ExpiresIn=expires
+            )
+            for key in keys
+        }
+
+    return sign
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> SignedUrlCache:
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                from .direct import s3_client
+
+                _cache = SignedUrlCache(
+                    s3_signer(s3_client(), settings.AWS_STORAGE_BUCKET_NAME, getattr(settings, "AWS_LOCATION", "")),
+                    expires=expires_in(),
+                    max_size=int(getattr(settings, "ATTACHMENT_SIGNED_URL_CACHE_SIZE", 4096)),
+                )
+    return _cache
+
+
+def _name(value):
+    return getattr(value, "name", value) or ""
+
+
+def media_urls(files) -> dict:
+    """{name: url} for FieldFiles (or storage keys); empty names are skipped."""
+    names = [n for n in map(_name, files) if n]
+    if not signing_enabled():
+        return {n: default_storage.url(n) for n in names}
+    return get_cache().get_many(names)
+
+
+def media_url(value):
+    """URL of one FieldFile (or storage key), or None if empty."""
+    name = _name(value)
+    if not name:
+        return None
+    return media_urls([name])[name]
@@ -0,0 +1,13 @@
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from .models import File
+
+
+@receiver(post_delete, sender=File)
+def release_file_blob(sender, instance, **kwargs):
+    # Bytes are shared; only the blob's reference goes away here.
+    if instance.blob_id:
+        from .services.blobs import release_blob
+
+        release_blob(instance.blob_id)
@@ -1,8 +1,12 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import FileViewSet
+from .views import DerivativeView, DirectTransferView, FileViewSet
 
 router = DefaultRouter()
 router.register("", FileViewSet, basename="file")
 
-urlpatterns = [ path("", include(router.urls)) ]
+urlpatterns = [
+    path("direct/<str:token>/", DirectTransferView.as_view(), name="attachments-direct"),
+    path("derivatives/<str:token>/", DerivativeView.as_view(), name="attachments-derivative"),
+    path("", include(router.urls)),
+]
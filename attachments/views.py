@@ -1,17 +1,30 @@
+import tempfile
+
 from django.contrib.contenttypes.models import ContentType
 from django.shortcuts import get_object_or_404
 from django.utils.encoding import smart_str
+from django.db import transaction
 from django.db.models import Q
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseRedirect
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
 from rest_framework import viewsets, mixins, status
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from accounts.authentication import HeaderJWTAuthentication as JWTAuthentication
 
+from core.uploads import upload_limit
+from patients.access import access_q
+from patients.enums import AccessSource
 from patients.models import Patient
 from .models import File, AttachmentLink
-from .serializers import FileSerializer, UploadSerializer, LinkSerializer
+from .serializers import (
+    MAX_SIZE_BYTES, FileSerializer, FileMetaSerializer, UploadSerializer, PresignUploadSerializer, LinkSerializer,
+)
 from .permissions import CanViewFile, IsStaff
+from .services import derivatives
 from .enums import Visibility
 
 
@@ -210,17 +223,11 @@ class FileViewSet(
             if role not in {"SUPER_ADMIN", "ADMIN"}:
                 uid = getattr(u, "id", None)
                 if uid:
+                    clinical = [src for src in AccessSource.values if src != AccessSource.PROVIDER_LINK]
                     q = q.filter(
                         Q(uploaded_by_id=uid)
-                        | Q(patient__appointments__provider_id=uid)
-                        | Q(patient__encounters__created_by_id=uid)
-                        | Q(patient__encounters__provider_id=uid)
-                        | Q(patient__encounters__nurse_id=uid)
-                        | Q(patient__lab_orders__ordered_by_id=uid)
-                        | Q(patient__lab_orders__outsourced_to_id=uid)
-                        | Q(patient__prescriptions__prescribed_by_id=uid)
-                        | Q(patient__prescriptions__outsourced_to_id=uid)
-                    ).distinct()
+                        | access_q(uid, field="patient_id", sources=clinical)
+                    )
 
         # Simple filters
         patient = params.get("patient")
@@ -247,26 +254,11 @@ class FileViewSet(
         self.check_object_permissions(request, obj)
         return Response(FileSerializer(obj).data)
 
-    @action(detail=False, methods=["post"], permission_classes=[IsAuthenticated])
-    def upload(self, request):
+    def _file_fields(self, request, data):
         """
-        Multipart/form-data:
-        - file: <binary>
-        - patient: <id> (optional; associates file for patient and auto-infers facility)
-        - visibility: PRIVATE/PATIENT/INTERNAL
-        - tag: optional
-        - description: optional
-
-        Optional linking fields (any of these, used by the frontend):
-        - ref_type + ref_id            (e.g. ENCOUNTER, LAB, IMAGING, PRESCRIPTION)
-        - owner_type + owner_id        (e.g. "lab_order", "imaging_request")
-        - lab_order                    (numeric id)
-        - imaging_request              (numeric id)
+        Scoping/metadata fields for a new File from upload metadata, plus the
+        (ContentType, object_id) it should be linked to (or (None, None)).
         """
-        s = UploadSerializer(data=request.data)
-        s.is_valid(raise_exception=True)
-        data = s.validated_data
-
         # Associate with patient/facility if provided
         patient = None
         if data.get("patient"):
@@ -293,10 +285,7 @@ class FileViewSet(
         if not patient and ct and obj_id:
             patient = _get_patient_for_ref(ct, obj_id)
 
-        f = File.objects.create(
-            file=data["file"],
-            original_name=data["file"].name,
-            mime_type=getattr(data["file"], "content_type", ""),
+        fields = dict(
             uploaded_by=request.user,
             facility=(
                 getattr(request.user, "facility", None)
@@ -307,7 +296,9 @@ class FileViewSet(
             tag=data.get("tag", ""),
             description=data.get("description", ""),
         )
+        return fields, ct, obj_id
 
+    def _link(self, f, ct, obj_id):
         # 🔗 Optional: link this file to a specific object
         if ct and obj_id:
             AttachmentLink.objects.get_or_create(
@@ -316,8 +307,128 @@ class FileViewSet(
                 object_id=obj_id,
             )
 
+    @action(detail=False, methods=["post"], permission_classes=[IsAuthenticated])
+    @upload_limit(MAX_SIZE_BYTES)
+    def upload(self, request):
+        """
+        Multipart/form-data:
+        - file: <binary>
+        - patient: <id> (optional; associates file for patient and auto-infers facility)
+        - visibility: PRIVATE/PATIENT/INTERNAL
+        - tag: optional
+        - description: optional
+
+        Optional linking fields (any of these, used by the frontend):
+        - ref_type + ref_id            (e.g. ENCOUNTER, LAB, IMAGING, PRESCRIPTION)
+        - owner_type + owner_id        (e.g. "lab_order", "imaging_request")
+        - lab_order                    (numeric id)
+        - imaging_request              (numeric id)
+        """
+        s = UploadSerializer(data=request.data)
+        s.is_valid(raise_exception=True)
+        data = s.validated_data
+
+        fields, ct, obj_id = self._file_fields(request, data)
+        f = File.objects.create(
+            file=data["file"],
+            original_name=data["file"].name,
+            mime_type=getattr(data["file"], "sniffed_type", "") or getattr(data["file"], "content_type", ""),
+            **fields,
+        )
+        self._link(f, ct, obj_id)
+        derivatives.queue(f.file.name)
         return Response(FileSerializer(f).data, status=status.HTTP_201_CREATED)
 
+    @action(detail=False, methods=["post"], url_path="uploads", permission_classes=[IsAuthenticated])
+    def presign_upload(self, request):
+        """
+        Start a direct-to-storage upload.
+        payload: { filename, size, content_type?, sha256? }
+        returns: { upload_id, method: "PUT", url, headers, expires_at }
+
+        PUT the bytes to `url` with exactly `headers`, then call
+        uploads/<upload_id>/finalize/ (or pass upload_id to a document
+        endpoint) to record the file.
+        """
+        from .services.direct import start_upload
+
+        s = PresignUploadSerializer(data=request.data)
+        s.is_valid(raise_exception=True)
+        data = s.validated_data
+        upload, url, headers = start_upload(
+            user=request.user,
+            filename=data["filename"],
+            content_type=data["content_type"] or "application/octet-stream",
+            size=data["size"],
+            sha256=data["sha256"],
+        )
+        return Response(
+            {
+                "upload_id": str(upload.token),
+                "method": "PUT",
+                "url": url,
+                "headers": headers,
+                "expires_at": upload.expires_at,
+            },
+            status=status.HTTP_201_CREATED,
+        )
+
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path=r"uploads/(?P<token>[0-9a-f-]{36})/finalize",
+        permission_classes=[IsAuthenticated],
+    )
+    def finalize_upload(self, request, token=None):
+        """
+        Record a directly uploaded file after checking its size and sha256.
+        Accepts the same metadata as upload/ (patient, visibility, tag,
+        description, ref_type/ref_id, lab_order, imaging_request).
+        """
+        from .services.direct import claim_upload, finalize_to_blob
+
+        s = FileMetaSerializer(data=request.data)
+        s.is_valid(raise_exception=True)
+        fields, ct, obj_id = self._file_fields(request, s.validated_data)
+
+        with transaction.atomic():
+            upload = claim_upload(token, request.user)
+            blob = finalize_to_blob(upload)
+            f = File.objects.create(
+                file=blob.file.name,
+                blob=blob,
+                size_bytes=blob.size_bytes,
+                sha256=blob.sha256,
+                original_name=upload.original_name,
+                mime_type=upload.mime_type,
+                **fields,
+            )
+            self._link(f, ct, obj_id)
+
+        derivatives.queue(f.file.name)
+        return Response(FileSerializer(f).data, status=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=["get"])
+    def download(self, request, pk=None):
+        """
+        Redirect to a short-lived presigned GET for the file.
+        ?inline=1 to display instead of download; ?json=1 returns { url }.
+        """
+        from .services.direct import presign_download
+
+        f = self.get_object()
+        self.permission_classes = [IsAuthenticated, CanViewFile]
+        self.check_object_permissions(request, f)
+
+        url = presign_download(
+            f.file,
+            filename=f.original_name,
+            inline=request.query_params.get("inline") in ("1", "true", "yes"),
+        )
+        if request.query_params.get("json") in ("1", "true", "yes"):
+            return Response({"url": url})
+        return HttpResponseRedirect(url)
+
     @action(detail=False, methods=["post"], permission_classes=[IsAuthenticated, IsStaff])
     def link(self, request):
         """
@@ -356,6 +467,85 @@ class FileViewSet(
                 {"detail": "Admins only for INTERNAL files"}, status=403
             )
 
-        f.file.delete(save=False)  # remove binary
+        # Bytes are shared by content hash; the blob is released here and
+        # removed by gc_attachment_blobs once nothing references it.
         f.delete()
         return Response(status=204)
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class DirectTransferView(View):
+    """
+    LOCAL stand-in for S3 presigned URLs (ATTACHMENT_DIRECT_BACKEND=LOCAL):
+    the signed token in the URL is the only credential, as with S3.
+    """
+
+    def _claims(self, token, method):
+        from .services.direct import LocalDirectBackend, get_backend
+
+        backend = get_backend()
+        if not isinstance(backend, LocalDirectBackend):
+            raise Http404
+        return backend.load(token, method)
+
+    def put(self, request, token):
+        from django.core.files import File as DjangoFile
+        from django.core.files.storage import default_storage
+
+        claims = self._claims(token, "PUT")
+        if claims is None:
+            return HttpResponse("Invalid or expired upload URL", status=403)
+        expected = claims["n"]
+        if int(request.META.get("CONTENT_LENGTH") or 0) != expected:
+            return HttpResponse("Content-Length does not match the signed size", status=400)
+
+        with tempfile.SpooledTemporaryFile(max_size=1024 * 1024) as tmp:
+            received = 0
+            while chunk := request.read(64 * 1024):
+                received += len(chunk)
+                if received > expected:
+                    return HttpResponse("Body larger than the signed size", status=413)
+                tmp.write(chunk)
+            if received != expected:
+                return HttpResponse("Body shorter than the signed size", status=400)
+            tmp.seek(0)
+            default_storage.delete(claims["k"])
+            default_storage.save(claims["k"], DjangoFile(tmp))
+        return HttpResponse(status=200)
+
+    def get(self, request, token):
+        from django.core.files.storage import default_storage
+
+        claims = self._claims(token, "GET")
+        if claims is None:
+            return HttpResponse("Invalid or expired download URL", status=403)
+        try:
+            fh = default_storage.open(claims["k"], "rb")
+        except FileNotFoundError:
+            raise Http404
+        filename = claims.get("f") or claims["k"].rsplit("/", 1)[-1]
+        return FileResponse(fh, as_attachment=not claims.get("i"), filename=filename)
+
+
+class DerivativeView(View):
+    """
+    Lazy thumbnail/preview (services/derivatives.py): generate on first
+    request, then redirect to the stored derivative. The signed token in the
+    URL is the only credential, as with the original's signed URL.
+    """
+
+    def get(self, request, token):
+        from .services.derivatives import DerivativeError, ensure, load_token
+        from .services.signed_urls import media_url
+
+        claims = load_token(token)
+        if claims is None:
+            return HttpResponse("Invalid or expired preview URL", status=403)
+        name, kind = claims
+        try:
+            key = ensure(name, kind)
+        except (DerivativeError, FileNotFoundError):
+            raise Http404
+        response = HttpResponseRedirect(media_url(key))
+        response["Cache-Control"] = "private, max-age=300"
+        return response
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import AuditLog
+from .models import AuditLog, AuditArchive
 
 @admin.register(AuditLog)
 class AuditLogAdmin(admin.ModelAdmin):
@@ -7,3 +7,10 @@ class AuditLogAdmin(admin.ModelAdmin):
     list_filter = ("verb","target_ct")
     search_fields = ("actor_email","message","changes","extra")
     readonly_fields = [f.name for f in AuditLog._meta.fields]
+
+
+@admin.register(AuditArchive)
+class AuditArchiveAdmin(admin.ModelAdmin):
+    list_display = ("id","facility","month","row_count","size_bytes","restored_at","created_at")
+    list_filter = ("month",)
+    readonly_fields = [f.name for f in AuditArchive._meta.fields]
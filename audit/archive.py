@@ -0,0 +1,262 @@
+"""
+audit.archive
+
+Moves old AuditLog rows out of the live table into compressed archive
+segments, and reads/restores them on demand.
+
+Layout in the default storage backend:
+    audit-archive/{f<facility_id>|global}/{YYYY-MM}/{segment}.ndjson.gz
+
+Each line is one JSON-encoded AuditLog row. An AuditArchive row indexes every
+segment so ranges can be found without listing the bucket.
+
+Restored rows carry extra["restored_from"] (the segment id). They are still in
+that segment, so the next archive run drops them from the live table instead of
+writing them into a second segment.
+"""
+import gzip
+import io
+import itertools
+import json
+import uuid
+from datetime import date
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import AuditLog, AuditArchive
+from .signals import SafeJSONEncoder
+
+ARCHIVE_PREFIX = "audit-archive"
+RESTORED_KEY = "restored_from"
+
+
+def _storage_key(facility_id, month: date) -> str:
+    scope = f"f{facility_id}" if facility_id else "global"
+    return f"{ARCHIVE_PREFIX}/{scope}/{month:%Y-%m}/{uuid.uuid4().hex}.ndjson.gz"
+
+
+def _row_to_dict(row: AuditLog) -> dict:
+    return {
+        "id": str(row.id),
+        "actor_id": row.actor_id,
+        "actor_email": row.actor_email,
+        "ip_address": row.ip_address,
+        "user_agent": row.user_agent,
+        "verb": row.verb,
+        "message": row.message,
+        "target_ct_id": row.target_ct_id,
+        "target_model": f"{row.target_ct.app_label}.{row.target_ct.model}",
+        "target_id": row.target_id,
+        "changes": row.changes,
+        "extra": row.extra,
+        "created_at": row.created_at.isoformat(),
+    }
+
+
+def pending_groups(cutoff):
+    """(facility_id, month) pairs that still have live rows older than cutoff."""
+    return (
+        AuditLog.objects.filter(created_at__lt=cutoff)
+        .annotate(month=TruncMonth("created_at"))
+        .values_list("actor__facility_id", "month")
+        .distinct()
+        .order_by("month", "actor__facility_id")
+    )
+
+
+def group_queryset(cutoff, facility_id, month_start):
+    month_start = timezone.localtime(month_start) if timezone.is_aware(month_start) else month_start
+    if month_start.month == 12:
+        next_month = month_start.replace(year=month_start.year + 1, month=1)
+    else:
+        next_month = month_start.replace(month=month_start.month + 1)
+
+    qs = AuditLog.objects.filter(
+        created_at__gte=month_start,
+        created_at__lt=min(next_month, cutoff),
+    )
+    if facility_id:
+        qs = qs.filter(actor__facility_id=facility_id)
+    else:
+        qs = qs.filter(actor__facility_id__isnull=True)
+    return qs.select_related("target_ct").order_by("created_at", "id")
+
+
+def archive_group(cutoff, facility_id, month_start, *, batch_size=1000) -> AuditArchive | None:
+    """
+    Write one archive segment for a facility/month and delete the archived
+    rows from the live table in short, separate transactions.
+    """
+    qs = group_queryset(cutoff, facility_id, month_start)
+
+    buf = io.BytesIO()
+    ids, restored = [], []
+    first_at = last_at = None
+    with gzip.GzipFile(fileobj=buf, mode="wb") as gz:
+        for row in qs.iterator(chunk_size=batch_size):
+            if (row.extra or {}).get(RESTORED_KEY):
+                restored.append(row.id)  # already archived in that segment
+                continue
+            line = json.dumps(_row_to_dict(row), cls=SafeJSONEncoder)
+            gz.write(line.encode("utf-8") + b"\n")
+            ids.append(row.id)
+            first_at = first_at or row.created_at
+            last_at = row.created_at
+
+    _delete_live(restored, batch_size)
+    if not ids:
+        return None
+
+    month = timezone.localtime(month_start).date() if timezone.is_aware(month_start) else month_start.date()
+    key = default_storage.save(_storage_key(facility_id, month), ContentFile(buf.getvalue()))
+
+    archive = AuditArchive.objects.create(
+        facility_id=facility_id,
+        month=month.replace(day=1),
+        storage_key=key,
+        row_count=len(ids),
+        size_bytes=buf.tell(),
+        first_event_at=first_at,
+        last_event_at=last_at,
+    )
+
+    # Only delete once the segment is durably written and indexed.
+    _delete_live(ids, batch_size)
+    return archive
+
+
+def _delete_live(ids, batch_size):
+    for i in range(0, len(ids), batch_size):
+        with transaction.atomic():
+            AuditLog.objects.filter(id__in=ids[i:i + batch_size]).delete()
+
+
+def iter_archive(archive: AuditArchive, *, start=None, end=None):
+    """Yield archived rows (dicts), optionally bounded by created_at."""
+    with default_storage.open(archive.storage_key, "rb") as fh:
+        with gzip.GzipFile(fileobj=fh, mode="rb") as gz:
+            for raw in gz:
+                if not raw.strip():
+                    continue
+                row = json.loads(raw)
+                if start or end:
+                    created = parse_datetime(row["created_at"])
+                    if start and created < start:
+                        continue
+                    if end and created > end:
+                        continue
+                yield row
+
+
+class ArchiveRows:
+    """
+    Rows of a segment matching `match(row)`, newest first, as a lazy sequence
+    for Django's Paginator: len() streams the segment once to count, and a
+    slice streams it again keeping only the rows on that page. Segments are
+    written oldest first, so the page is read in reverse.
+    """
+
+    def __init__(self, archive, *, start=None, end=None, match=None):
+        self.archive = archive
+        self.start = start
+        self.end = end
+        self.match = match or (lambda row: True)
+        self._count = None
+
+    def _rows(self):
+        return (r for r in iter_archive(self.archive, start=self.start, end=self.end) if self.match(r))
+
+    def __len__(self):
+        if self._count is None:
+            self._count = sum(1 for _ in self._rows())
+        return self._count
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice) or key.step not in (None, 1):
+            raise TypeError("ArchiveRows only supports contiguous slices")
+        total = len(self)
+        first, stop, _ = key.indices(total)
+        if stop <= first:
+            return []
+        page = list(itertools.islice(self._rows(), total - stop, total - first))
+        page.reverse()
+        return page
+
+
+def restore_archive(archive: AuditArchive, *, start=None, end=None, batch_size=1000) -> int:
+    """
+    Re-insert archived rows into the live table. Idempotent: rows that are
+    already present are left untouched. Returns the number of rows inserted.
+
+    Inserted rows are tagged with extra["restored_from"] so archiving them
+    again does not duplicate them into a new segment.
+    """
+    from accounts.models import User
+
+    ct_cache = {}
+
+    def _ct_id(row):
+        label = row.get("target_model") or ""
+        if label not in ct_cache:
+            app_label, _, model = label.partition(".")
+            ct = ContentType.objects.filter(app_label=app_label, model=model).only("id").first()
+            ct_cache[label] = ct.id if ct else row.get("target_ct_id")
+        return ct_cache[label]
+
+    restored = 0
+    batch = []
+
+    def _flush(rows):
+        present = set(
+            AuditLog.objects.filter(id__in=[uuid.UUID(r["id"]) for r in rows]).values_list("id", flat=True)
+        )
+        rows = [r for r in rows if uuid.UUID(r["id"]) not in present]
+        if not rows:
+            return 0
+        actor_ids = {r["actor_id"] for r in rows if r.get("actor_id")}
+        live_actors = set(User.objects.filter(id__in=actor_ids).values_list("id", flat=True))
+        objs, created_at = [], {}
+        for r in rows:
+            obj = AuditLog(
+                id=uuid.UUID(r["id"]),
+                actor_id=r["actor_id"] if r.get("actor_id") in live_actors else None,
+                actor_email=r.get("actor_email") or "",
+                ip_address=r.get("ip_address"),
+                user_agent=r.get("user_agent"),
+                verb=r["verb"],
+                message=r.get("message") or "",
+                target_ct_id=_ct_id(r),
+                target_id=r["target_id"],
+                changes=r.get("changes") or {},
+                extra={**(r.get("extra") or {}), RESTORED_KEY: archive.id},
+            )
+            created_at[obj.id] = parse_datetime(r["created_at"])
+            objs.append(obj)
+
+        with transaction.atomic():
+            AuditLog.objects.bulk_create(objs, ignore_conflicts=True)
+            # created_at is auto_now_add, so bulk_create stamped "now"; put the
+            # original event time back.
+            for obj in objs:
+                obj.created_at = created_at[obj.id]
+            AuditLog.objects.bulk_update(objs, ["created_at"])
+        return len(objs)
+
+    for row in iter_archive(archive, start=start, end=end):
+        batch.append(row)
+        if len(batch) >= batch_size:
+            restored += _flush(batch)
+            batch = []
+    if batch:
+        restored += _flush(batch)
+
+    archive.restored_at = timezone.now()
+    archive.restored_count += restored
+    archive.save(update_fields=["restored_at", "restored_count"])
+    return restored
@@ -0,0 +1,93 @@
+# audit/management/commands/archive_audit_logs.py
+"""
+Management command to move old audit events into compressed archive storage.
+
+Rows older than the retention window are written as gzip'd NDJSON segments
+(one per facility per month) through the default storage backend, indexed in
+AuditArchive, then deleted from the live table in small batches.
+
+Usage:
+    python manage.py archive_audit_logs                     # Default: archive events older than AUDIT_RETENTION_DAYS
+    python manage.py archive_audit_logs --dry-run           # Show what would be archived
+    python manage.py archive_audit_logs --days 90           # Archive events older than 90 days
+    python manage.py archive_audit_logs --batch-size 500    # Delete in batches of 500
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = "Archive old audit logs to compressed storage and remove them from the live table"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Show what would be archived without actually doing it",
+        )
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=getattr(settings, "AUDIT_RETENTION_DAYS", 180),
+            help="Archive events older than this many days (default: AUDIT_RETENTION_DAYS or 180)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Delete from the live table in batches of this size (default: 1000)",
+        )
+
+    def handle(self, *args, **options):
+        from audit.archive import archive_group, pending_groups, group_queryset
+
+        dry_run = options["dry_run"]
+        days = options["days"]
+        batch_size = options["batch_size"]
+
+        cutoff = timezone.now() - timedelta(days=days)
+        groups = list(pending_groups(cutoff))
+
+        if not groups:
+            self.stdout.write(f"No audit logs older than {days} days")
+            return
+
+        if dry_run:
+            self.stdout.write(self.style.WARNING("DRY RUN - No changes will be made"))
+
+        total_rows = 0
+        total_segments = 0
+
+        for facility_id, month_start in groups:
+            scope = f"facility {facility_id}" if facility_id else "global"
+            label = f"{scope} {timezone.localtime(month_start):%Y-%m}"
+
+            if dry_run:
+                count = group_queryset(cutoff, facility_id, month_start).count()
+                self.stdout.write(f"Would archive {count} events for {label}")
+                total_rows += count
+                continue
+
+            archive = archive_group(cutoff, facility_id, month_start, batch_size=batch_size)
+            if archive is None:
+                continue
+            total_rows += archive.row_count
+            total_segments += 1
+            self.stdout.write(
+                f"Archived {archive.row_count} events for {label} -> {archive.storage_key}"
+            )
+
+        if dry_run:
+            self.stdout.write(
+                self.style.WARNING(f"\nDRY RUN COMPLETE - {total_rows} events would be archived")
+            )
+        else:
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"\nArchive complete: {total_rows} events in {total_segments} segments"
+                )
+            )
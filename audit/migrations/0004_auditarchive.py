@@ -0,0 +1,35 @@
+# Generated by Django 5.2.7 on 2026-10-18 20:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audit', '0003_auditlog_audit_audit_actor_i_ec0f72_idx'),
+        ('facilities', '0008_facility_is_publicly_visible'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuditArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('storage_key', models.CharField(max_length=255, unique=True)),
+                ('row_count', models.PositiveIntegerField(default=0)),
+                ('size_bytes', models.BigIntegerField(default=0)),
+                ('first_event_at', models.DateTimeField(blank=True, null=True)),
+                ('last_event_at', models.DateTimeField(blank=True, null=True)),
+                ('restored_at', models.DateTimeField(blank=True, null=True)),
+                ('restored_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('facility', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='audit_archives', to='facilities.facility')),
+            ],
+            options={
+                'ordering': ['-month', '-created_at'],
+                'indexes': [models.Index(fields=['facility', 'month'], name='audit_audit_facilit_9dc2cf_idx'), models.Index(fields=['first_event_at', 'last_event_at'], name='audit_audit_first_e_84191e_idx')],
+            },
+        ),
+    ]
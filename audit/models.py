@@ -45,3 +45,36 @@ class AuditLog(models.Model):
 
     def __str__(self):
         return f"{self.verb} {self.target_ct.model}#{self.target_id} by {self.actor_id} @ {self.created_at:%Y-%m-%d %H:%M}"
+
+
+class AuditArchive(models.Model):
+    """
+    One compressed archive segment of audit events moved out of the live table.
+
+    Segments are gzip'd NDJSON (one AuditLog row per line), written through the
+    default storage backend and grouped per facility per month.
+    """
+    facility = models.ForeignKey("facilities.Facility", null=True, blank=True, on_delete=models.SET_NULL, related_name="audit_archives")
+    month = models.DateField()                                       # first day of the archived month
+    storage_key = models.CharField(max_length=255, unique=True)
+
+    row_count = models.PositiveIntegerField(default=0)
+    size_bytes = models.BigIntegerField(default=0)
+    first_event_at = models.DateTimeField(null=True, blank=True)
+    last_event_at = models.DateTimeField(null=True, blank=True)
+
+    restored_at = models.DateTimeField(null=True, blank=True)
+    restored_count = models.PositiveIntegerField(default=0)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["facility", "month"]),
+            models.Index(fields=["first_event_at", "last_event_at"]),
+        ]
+        ordering = ["-month", "-created_at"]
+
+    def __str__(self):
+        scope = f"facility#{self.facility_id}" if self.facility_id else "global"
+        return f"AuditArchive {scope} {self.month:%Y-%m} ({self.row_count} rows)"
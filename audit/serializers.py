@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import AuditLog
+from .models import AuditLog, AuditArchive
 
 
 class AuditLogSerializer(serializers.ModelSerializer):
@@ -150,4 +150,23 @@ class AuditLogSerializer(serializers.ModelSerializer):
         short_id = str(obj.target_id)
         if len(short_id) > 8:
             short_id = short_id[:8] + "…"
-        return f"{model_name.replace('_', ' ').title()} #{short_id}"
\ No newline at end of file
+        return f"{model_name.replace('_', ' ').title()} #{short_id}"
+
+
+class AuditArchiveSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = AuditArchive
+        fields = [
+            "id",
+            "facility",
+            "month",
+            "storage_key",
+            "row_count",
+            "size_bytes",
+            "first_event_at",
+            "last_event_at",
+            "restored_at",
+            "restored_count",
+            "created_at",
+        ]
+        read_only_fields = fields
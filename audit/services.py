@@ -17,3 +17,20 @@ def log_action(*, obj, title: str, extra: dict | None = None):
         target_id=str(obj.pk),
         extra=extra or {},
     )
+
+
+def log_update(*, obj, before: dict, after: dict):
+    """UPDATE entry for a write that bypassed save() (QuerySet.update())."""
+    req = get_request()
+    user = getattr(req, "user", None)
+    AuditLog.objects.create(
+        actor=(user if getattr(user, "is_authenticated", False) else None),
+        actor_email=(getattr(user, "email", "") if getattr(user, "is_authenticated", False) else ""),
+        ip_address=(getattr(req, "META", {}).get("REMOTE_ADDR") if req else None),
+        user_agent=(getattr(req, "META", {}).get("HTTP_USER_AGENT") if req else None),
+        verb=Verb.UPDATE,
+        message="Updated",
+        target_ct=ContentType.objects.get_for_model(obj.__class__),
+        target_id=str(obj.pk),
+        changes={"before": before, "after": after},
+    )
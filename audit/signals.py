@@ -79,6 +79,13 @@ def _skip_sender(sender) -> bool:
     label = f"{sender._meta.app_label}.{sender._meta.model_name}"
     return label in {
         "audit.auditlog",
+        "audit.auditarchive",
+        "patients.patientaccessgrant",  # derived index, rebuilt from source rows
+        "core.searchdocument",          # derived index, rebuilt from source rows
+        "core.failedevent",             # event bus dead letters (operational)
+        "pharmacy.stocksnapshot",       # derived from the stock ledger
+        "attachments.blob",             # storage refcounts; File rows are audited
+        "attachments.directupload",     # staging rows for presigned uploads
         "contenttypes.contenttype",
         "sessions.session",
         "admin.logentry",
@@ -1,8 +1,9 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import AuditLogViewSet
+from .views import AuditLogViewSet, AuditArchiveViewSet
 
 router = DefaultRouter()
 router.register("logs", AuditLogViewSet, basename="audit-log")
+router.register("archives", AuditArchiveViewSet, basename="audit-archive")
 
 urlpatterns = [ path("", include(router.urls)) ]
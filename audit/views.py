@@ -1,12 +1,18 @@
-from django.utils.dateparse import parse_datetime
+from datetime import datetime, time
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 from django.db.models import Q
-from rest_framework import viewsets, mixins
+from rest_framework import viewsets, mixins, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
 from rest_framework.pagination import PageNumberPagination
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from accounts.authentication import HeaderJWTAuthentication as JWTAuthentication
 
-from .models import AuditLog
-from .serializers import AuditLogSerializer
+from .models import AuditLog, AuditArchive
+from .serializers import AuditLogSerializer, AuditArchiveSerializer
 from .permissions import IsAdmin
 
 
@@ -83,4 +89,103 @@ class AuditLogViewSet(viewsets.GenericViewSet, mixins.ListModelMixin, mixins.Ret
         if end: 
             q = q.filter(created_at__lte=parse_datetime(end) or end)
 
-        return q.select_related('actor', 'target_ct').order_by("-created_at", "-id")
\ No newline at end of file
+        return q.select_related('actor', 'target_ct').order_by("-created_at", "-id")
+
+
+def _parse_bound(value, *, is_end):
+    """Aware datetime for an ISO datetime or date (whole day); 400 if invalid."""
+    s = str(value).strip()
+    try:
+        # parse_datetime() also takes a bare date (as midnight); check dates first
+        day = parse_date(s)
+        dt = None if day else parse_datetime(s)
+    except ValueError:
+        day = dt = None
+    if day is not None:
+        dt = datetime.combine(day, time.max if is_end else time.min)
+    elif dt is None:
+        raise ValidationError({"end" if is_end else "start": "Invalid date or datetime."})
+    if timezone.is_naive(dt):
+        dt = timezone.make_aware(dt, timezone.get_current_timezone())
+    return dt
+
+
+class AuditArchiveViewSet(viewsets.GenericViewSet, mixins.ListModelMixin, mixins.RetrieveModelMixin):
+    """
+    Archived audit segments (see `manage.py archive_audit_logs`).
+
+    GET  /archives/?start=&end=          -> segments overlapping a time range
+    GET  /archives/{id}/entries/         -> archived events (filters: start, end, verb, model, target_id)
+    POST /archives/{id}/restore/         -> copy events back into the live table (optional start/end)
+    """
+    serializer_class = AuditArchiveSerializer
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAuthenticated, IsAdmin]
+    pagination_class = AuditLogPagination
+
+    def get_queryset(self):
+        from accounts.enums import UserRole
+
+        user = self.request.user
+        facility_id = getattr(user, "facility_id", None)
+
+        if user.role == UserRole.SUPER_ADMIN and facility_id is None:
+            q = AuditArchive.objects.all()
+        elif not facility_id:
+            return AuditArchive.objects.none()
+        else:
+            q = AuditArchive.objects.filter(facility_id=facility_id)
+
+        start, end = self._range(self.request.query_params)
+        if start:
+            q = q.filter(last_event_at__gte=start)
+        if end:
+            q = q.filter(first_event_at__lte=end)
+
+        return q.order_by("-month", "-created_at")
+
+    def _range(self, params):
+        start = params.get("start")
+        end = params.get("end")
+        return (
+            _parse_bound(start, is_end=False) if start else None,
+            _parse_bound(end, is_end=True) if end else None,
+        )
+
+    @action(detail=True, methods=["get"])
+    def entries(self, request, pk=None):
+        from .archive import ArchiveRows
+
+        archive = self.get_object()
+        start, end = self._range(request.query_params)
+        verb = request.query_params.get("verb")
+        model = (request.query_params.get("model") or "").lower()
+        target_id = request.query_params.get("target_id")
+
+        def match(row):
+            if verb and row.get("verb") != verb:
+                return False
+            if model and row.get("target_model", "").split(".")[-1] != model:
+                return False
+            if target_id and row.get("target_id") != str(target_id):
+                return False
+            return True
+
+        # streamed page by page, never the whole segment in memory
+        rows = ArchiveRows(archive, start=start, end=end, match=match)
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(page)
+        return Response(rows[:AuditLogPagination.max_page_size])
+
+    @action(detail=True, methods=["post"])
+    def restore(self, request, pk=None):
+        from .archive import restore_archive
+
+        archive = self.get_object()
+        start, end = self._range(request.data)
+        restored = restore_archive(archive, start=start, end=end)
+        return Response(
+            {"archive": archive.id, "restored": restored},
+            status=status.HTTP_200_OK,
+        )
@@ -6,6 +6,15 @@ class ChargeStatus(models.TextChoices):
     PAID = "PAID","Paid"
     VOID = "VOID","Void"
 
+class ChargeSource(models.TextChoices):
+    """
+    Operational record a charge was posted for (Charge.source_type/source_id).
+    At most one non-void charge per (source, service).
+    """
+    LAB_ORDER = "LAB_ORDER","Lab order"
+    IMAGING_REQUEST = "IMAGING_REQUEST","Imaging request"
+    DISPENSE = "DISPENSE","Dispense event"
+
 class PaymentMethod(models.TextChoices):
     CASH = "CASH","Cash"
     CARD = "CARD","Card"
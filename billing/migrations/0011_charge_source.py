@@ -0,0 +1,48 @@
+# Generated by Django 5.2.7 on 2026-10-18 21:01
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F, Min
+
+
+def backfill_sources(apps, schema_editor):
+    """Key the first non-void charge per (lab order | imaging request, service)."""
+    Charge = apps.get_model("billing", "Charge")
+    for source_type, link in (("LAB_ORDER", "lab_order_id"), ("IMAGING_REQUEST", "imaging_request_id")):
+        first = (
+            Charge.objects.filter(**{f"{link}__isnull": False})
+            .exclude(status="VOID")
+            .order_by()
+            .values(link, "service_id")
+            .annotate(first=Min("id"))
+            .values("first")
+        )
+        Charge.objects.filter(id__in=first).update(source_type=source_type, source_id=F(link))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('billing', '0010_remove_payment_billing_payment_patient_or_hmo_and_more'),
+        ('facilities', '0008_facility_is_publicly_visible'),
+        ('patients', '0016_backfill_patientaccessgrant'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='charge',
+            name='source_id',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='charge',
+            name='source_type',
+            field=models.CharField(blank=True, choices=[('LAB_ORDER', 'Lab order'), ('IMAGING_REQUEST', 'Imaging request'), ('DISPENSE', 'Dispense event')], max_length=16),
+        ),
+        migrations.RunPython(backfill_sources, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='charge',
+            constraint=models.UniqueConstraint(condition=models.Q(('source_id__isnull', False), models.Q(('status', 'VOID'), _negated=True)), fields=('source_type', 'source_id', 'service'), name='billing_charge_unique_source_service'),
+        ),
+    ]
@@ -7,7 +7,7 @@ from django.db.models import Q
 
 from facilities.models import Facility
 from patients.models import Patient, HMO
-from .enums import ChargeStatus, PaymentMethod, PaymentSource
+from .enums import ChargeSource, ChargeStatus, PaymentMethod, PaymentSource
 
 class Service(models.Model):
     """
@@ -75,6 +75,10 @@ class Charge(models.Model):
     imaging_request_id = models.PositiveIntegerField(null=True, blank=True)
     prescription_id = models.PositiveIntegerField(null=True, blank=True)
 
+    # idempotency key for automatic charges (see billing.services.charges)
+    source_type = models.CharField(max_length=16, choices=ChargeSource.choices, blank=True)
+    source_id = models.PositiveIntegerField(null=True, blank=True)
+
     created_by = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, on_delete=models.SET_NULL, related_name="charges_created")
     created_at = models.DateTimeField(auto_now_add=True)
 
@@ -93,6 +97,11 @@ class Charge(models.Model):
                     | (Q(facility__isnull=True) & Q(owner__isnull=False))
                 ),
             ),
+            models.UniqueConstraint(
+                name="billing_charge_unique_source_service",
+                fields=["source_type", "source_id", "service"],
+                condition=Q(source_id__isnull=False) & ~Q(status=ChargeStatus.VOID),
+            ),
         ]
         ordering = ["-created_at","-id"]
 
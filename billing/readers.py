@@ -0,0 +1,130 @@
+"""billing/readers.py
+
+values()-based list reader for charges (core.fastread). Mirrors
+ChargeReadSerializer field for field; keep the two in step.
+"""
+from decimal import Decimal
+
+from core.fastread import Reader, computed
+
+from .serializers import ChargeReadSerializer
+
+ZERO = Decimal("0.00")
+
+
+def _insured(patient_ids, statuses, system_hmo_ids, hmo_ids):
+    return [
+        pid is not None and ((status or "").upper() == "INSURED" or bool(shmo or hmo))
+        for pid, status, shmo, hmo in zip(patient_ids, statuses, system_hmo_ids, hmo_ids)
+    ]
+
+
+def _amounts(values):
+    return [Decimal(str(v or 0)) for v in values]
+
+
+INSURED_LOOKUPS = ("patient", "patient__insurance_status", "patient__system_hmo", "patient__hmo")
+HMO_LOOKUPS = (
+    "patient",
+    "patient__system_hmo",
+    "patient__system_hmo__name",
+    "patient__hmo",
+    "patient__hmo__name",
+)
+
+
+def _hmo_display(patient_ids, shmo_ids, shmo_names, hmo_ids, hmo_names):
+    """(hmo_id, hmo_name) per row: SystemHMO first, then the legacy HMO."""
+    out = []
+    for pid, shmo, shmo_name, hmo, hmo_name in zip(patient_ids, shmo_ids, shmo_names, hmo_ids, hmo_names):
+        if pid is None:
+            out.append((None, ""))
+        elif shmo is not None:
+            out.append((shmo, shmo_name))
+        elif hmo is not None:
+            out.append((hmo, hmo_name))
+        else:
+            out.append((None, ""))
+    return out
+
+
+class ChargeListReader(Reader):
+    serializer_class = ChargeReadSerializer
+
+    @computed("patient", "patient__first_name", "patient__last_name")
+    def patient_name(patient_ids, firsts, lasts):
+        out = []
+        for pid, first, last in zip(patient_ids, firsts, lasts):
+            if pid is None:
+                out.append("")
+                continue
+            # Patient.__str__ when both names are blank
+            out.append(f"{first} {last}".strip() or f"{last}, {first}")
+        return out
+
+    @computed("patient", "patient__hmo", "patient__hmo__name")
+    def patient_hmo(patient_ids, hmo_ids, names):
+        return [
+            {"id": hmo, "name": name} if pid is not None and hmo is not None else None
+            for pid, hmo, name in zip(patient_ids, hmo_ids, names)
+        ]
+
+    @computed(
+        "patient",
+        "patient__system_hmo",
+        "patient__system_hmo__name",
+        "patient__hmo_tier",
+        "patient__hmo_tier__name",
+    )
+    def patient_system_hmo(patient_ids, shmo_ids, shmo_names, tier_ids, tier_names):
+        return [
+            {"id": shmo, "name": name, "tier_id": tier, "tier_name": tier_name if tier is not None else None}
+            if pid is not None and shmo is not None
+            else None
+            for pid, shmo, name, tier, tier_name in zip(patient_ids, shmo_ids, shmo_names, tier_ids, tier_names)
+        ]
+
+    @computed(*INSURED_LOOKUPS)
+    def payment_source(*cols):
+        return ["HMO" if insured else "PATIENT_DIRECT" for insured in _insured(*cols)]
+
+    @computed(*HMO_LOOKUPS)
+    def hmo_id(*cols):
+        return [hid for hid, _ in _hmo_display(*cols)]
+
+    @computed(*HMO_LOOKUPS)
+    def hmo_name(*cols):
+        return [name for _, name in _hmo_display(*cols)]
+
+    @computed("amount", *INSURED_LOOKUPS)
+    def patient_portion(amounts, *cols):
+        return [ZERO if insured else amt for amt, insured in zip(_amounts(amounts), _insured(*cols))]
+
+    @computed("amount", *INSURED_LOOKUPS)
+    def hmo_portion(amounts, *cols):
+        return [amt if insured else ZERO for amt, insured in zip(_amounts(amounts), _insured(*cols))]
+
+    @computed("id")
+    def claim_status(ids):
+        return [None] * len(ids)
+
+    @computed("amount", "allocated_total")
+    def outstanding(amounts, allocated):
+        return [amt - alloc for amt, alloc in zip(_amounts(amounts), _amounts(allocated))]
+
+    @computed(
+        "created_by",
+        "created_by__first_name",
+        "created_by__last_name",
+        "created_by__email",
+        "created_by__role",
+    )
+    def created_by_name(user_ids, firsts, lasts, emails, roles):
+        out = []
+        for uid, first, last, email, role in zip(user_ids, firsts, lasts, emails, roles):
+            if uid is None:
+                out.append("")
+                continue
+            # User.get_full_name(), then email, then User.__str__
+            out.append(f"{first} {last}".strip() or email or f"{email} ({role})")
+        return out
@@ -167,6 +167,8 @@ class ChargeReadSerializer(serializers.ModelSerializer):
             "created_by_name",
             "created_at",
         ]
+        # walked by the SerializerMethodFields (core.prefetch)
+        select_related = ["patient__hmo", "patient__system_hmo", "patient__hmo_tier", "created_by"]
 
     def _patient_is_insured(self, patient) -> bool:
         if not patient:
@@ -281,6 +283,7 @@ class PaymentAllocationReadSerializer(serializers.ModelSerializer):
     class Meta:
         model = PaymentAllocation
         fields = ["charge_id", "charge_service_code", "charge_description", "patient_name", "amount"]
+        select_related = ["charge__patient"]
 
     def get_patient_name(self, obj):
         p = getattr(obj.charge, "patient", None)
@@ -440,6 +443,7 @@ class PaymentReadSerializer(serializers.ModelSerializer):
             "allocated_total",
             "unallocated_total",
         ]
+        select_related = ["patient", "hmo", "system_hmo", "facility_hmo__system_hmo", "received_by"]
 
     def get_patient_name(self, obj):
         p = getattr(obj, "patient", None)
@@ -0,0 +1,216 @@
+# billing/services/charges.py
+"""
+Set-based charge posting for operational modules (labs, imaging, pharmacy).
+
+`post_charges` turns a list of ChargeLine rows into Charges for one patient
+and one billing scope with a fixed number of queries:
+- missing catalog Services (by code) are bulk-created,
+- missing per-scope Price rows are bulk-created from the line's base price,
+- all services are priced together through resolve_prices (HMO / tier
+  aware), falling back to the line's base price,
+- all Charges are inserted with one bulk_create (cached patient summaries
+  are then dropped with patients.dashboard.invalidate_for).
+
+Every charge carries a source (ChargeSource + id of the lab order, imaging
+request or dispense event). The unique (source_type, source_id, service)
+constraint on non-void charges makes posting idempotent: lines already
+charged are skipped up front and concurrent inserts are dropped with
+ignore_conflicts, so completion hooks can call this repeatedly. Charges
+entered by hand (ChargeCreateSerializer) carry only the order link column
+(lab_order_id / imaging_request_id), so those count as posted too.
+
+Lines are keyed by (source, service): a lab order listing the same test
+twice gets one charge for both (quantities are summed).
+
+`post_charges_for_order` builds the lines for a lab order or imaging request.
+"""
+
+import logging
+from dataclasses import dataclass
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Q
+
+from billing.enums import ChargeSource, ChargeStatus
+from billing.models import Charge, Price, Service
+from billing.services.pricing import resolve_prices
+
+logger = logging.getLogger(__name__)
+
+CENTS = Decimal("0.01")
+
+# Charge column linking a manual charge to the record of a source type
+LINK_FIELDS = {
+    ChargeSource.LAB_ORDER: "lab_order_id",
+    ChargeSource.IMAGING_REQUEST: "imaging_request_id",
+}
+
+
+@dataclass(frozen=True)
+class ChargeLine:
+    code: str                   # Service.code, e.g. LAB:FBC or DRUG:PARA_500_TAB
+    name: str                   # Service name when the service is created
+    base_price: Decimal = Decimal("0")
+    qty: int = 1
+    description: str = ""
+    source_id: int | None = None  # overrides post_charges(source_id=...) per line
+
+
+def ensure_services(lines) -> dict:
+    """{code: Service} for every line, creating missing services in bulk."""
+    codes = {ln.code for ln in lines}
+    services = Service.objects.in_bulk(codes, field_name="code")
+    missing = {}
+    for ln in lines:
+        if ln.code not in services and ln.code not in missing:
+            missing[ln.code] = Service(
+                code=ln.code,
+                name=ln.name,
+                default_price=ln.base_price or 0,
+                is_active=True,
+            )
+    if missing:
+        Service.objects.bulk_create(missing.values(), ignore_conflicts=True)
+        services = Service.objects.in_bulk(codes, field_name="code")
+    return services
+
+
+def ensure_scope_prices(services: dict, lines, *, facility=None, owner=None):
+    """Per-scope Price rows so independent providers don't inherit someone else's defaults."""
+    scope = {"facility": facility, "owner": None} if facility else {"facility": None, "owner": owner}
+    have = set(
+        Price.objects.filter(**scope, service__in=services.values()).values_list("service_id", flat=True)
+    )
+    rows = {}
+    for ln in lines:
+        service = services[ln.code]
+        if service.id not in have and service.id not in rows:
+            rows[service.id] = Price(**scope, service=service, amount=ln.base_price or 0, currency="NGN")
+    if rows:
+        Price.objects.bulk_create(rows.values(), ignore_conflicts=True)
+
+
+def post_charges(
+    lines,
+    *,
+    patient,
+    source_type,
+    source_id=None,
+    facility=None,
+    owner=None,
+    created_by=None,
+    **links,
+) -> list[Charge]:
+    """
+    Bulk-create one Charge per line not yet charged for its source. `links`
+    are the Charge back-link fields (encounter_id, lab_order_id, ...).
+    Returns the non-void charges of every posted source and service,
+    including ones that already existed.
+    """
+    lines = [ln for ln in lines if (ln.source_id or source_id)]
+    if not lines or not patient or not (facility or owner):
+        return []
+
+    services = ensure_services(lines)
+    try:
+        with transaction.atomic():
+            ensure_scope_prices(services, lines, facility=facility, owner=owner)
+    except Exception as e:
+        logger.warning(f"Failed to ensure base prices for {len(services)} service(s): {e}")
+
+    def key(ln):
+        return ln.source_id or source_id, services[ln.code].id
+
+    existing = Q(source_type=source_type, source_id__in={sid for sid, _ in map(key, lines)})
+    link = LINK_FIELDS.get(source_type)
+    if link and source_id and links.get(link) == source_id:
+        # manual charges for the same order have the link but no source
+        existing |= Q(**{link: source_id})
+    posted = Charge.objects.filter(
+        existing,
+        service_id__in={s.id for s in services.values()},
+    ).exclude(status=ChargeStatus.VOID)
+    charged = {
+        (sid if stype == source_type else source_id, service_id)
+        for stype, sid, service_id in posted.values_list("source_type", "source_id", "service_id")
+    }
+
+    pending = [ln for ln in lines if key(ln) not in charged]
+    if not pending:
+        return list(posted.select_related("service").order_by("id"))
+
+    prices = resolve_prices(
+        {services[ln.code] for ln in pending},
+        facility=facility,
+        owner=owner,
+        system_hmo=getattr(patient, "system_hmo", None),
+        tier=getattr(patient, "hmo_tier", None),
+    )
+    qty = {}
+    for ln in pending:
+        qty[key(ln)] = qty.get(key(ln), 0) + ln.qty
+    charges = {}
+    for ln in pending:
+        if key(ln) in charges:
+            continue
+        service = services[ln.code]
+        unit_price = prices.get(service.id)
+        if unit_price is None:
+            unit_price = ln.base_price or Decimal("0.00")
+        unit_price = Decimal(str(unit_price))
+        charges[key(ln)] = Charge(
+            patient=patient,
+            facility=facility,
+            owner=owner,
+            service=service,
+            description=ln.description or service.name,
+            unit_price=unit_price,
+            qty=qty[key(ln)],
+            amount=(unit_price * Decimal(qty[key(ln)])).quantize(CENTS),
+            created_by=created_by,
+            source_type=source_type,
+            source_id=key(ln)[0],
+            **links,
+        )
+    # A concurrent post of the same source loses on the unique constraint.
+    Charge.objects.bulk_create(charges.values(), ignore_conflicts=True)
+    if charges:
+        # bulk_create sends no post_save; drop the cached patient summaries.
+        from patients.dashboard import invalidate_for
+
+        invalidate_for(*charges.values())
+    return list(posted.select_related("service").order_by("id"))
+
+
+def post_charges_for_order(order, *, user=None) -> list[Charge]:
+    """
+    Ensure the charges of a lab order (one per catalog test) or an imaging
+    request (its procedure). Idempotent; returns the order's charges.
+    """
+    from imaging.models import ImagingRequest
+    from labs.models import LabOrder
+
+    if isinstance(order, LabOrder):
+        from labs.services.billing import billing_scope, charge_lines
+
+        source_type, links = ChargeSource.LAB_ORDER, {"lab_order_id": order.id}
+    elif isinstance(order, ImagingRequest):
+        from imaging.services.billing import billing_scope, charge_lines
+
+        source_type, links = ChargeSource.IMAGING_REQUEST, {"imaging_request_id": order.id}
+    else:
+        raise TypeError(f"Cannot bill {type(order).__name__}")
+
+    facility, owner = billing_scope(order, user)
+    return post_charges(
+        charge_lines(order),
+        patient=order.patient,
+        source_type=source_type,
+        source_id=order.id,
+        facility=facility,
+        owner=owner,
+        created_by=user,
+        encounter_id=order.encounter_id,
+        **links,
+    )
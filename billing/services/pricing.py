@@ -78,6 +78,63 @@ def resolve_price(
     return None
 
 
+def resolve_prices(
+    services,
+    facility=None,
+    owner=None,
+    system_hmo=None,
+    tier=None,
+) -> Dict[int, Optional[Decimal]]:
+    """
+    resolve_price() for many services at once, with the same priority but one
+    query per price level instead of one per service.
+
+    Returns:
+        dict: {service_id: Decimal or None}
+    """
+    ids = {s.id for s in services}
+    resolved = {sid: None for sid in ids}
+
+    def first_amounts(qs):
+        # Mirrors .first() per service: lowest pk wins, zero means "not set"
+        amounts = {}
+        for sid, amount in qs.order_by("pk").values_list("service_id", "amount"):
+            amounts.setdefault(sid, amount)
+        return {sid: amount for sid, amount in amounts.items() if amount}
+
+    def fill(amounts):
+        for sid, amount in amounts.items():
+            if resolved.get(sid) is None:
+                resolved[sid] = amount
+
+    # Priority 1 & 2: HMO-specific price
+    if system_hmo and (facility or owner):
+        scope = (
+            {'facility': facility, 'owner__isnull': True}
+            if facility else
+            {'owner': owner, 'facility__isnull': True}
+        )
+        try:
+            hmo_prices = HMOPrice.objects.filter(
+                service_id__in=ids, system_hmo=system_hmo, is_active=True, **scope
+            )
+            if tier:
+                fill(first_amounts(hmo_prices.filter(tier=tier)))
+            fill(first_amounts(hmo_prices.filter(tier__isnull=True)))
+        except Exception:
+            pass
+
+    # Priority 3: Facility-specific price
+    if facility:
+        fill(first_amounts(Price.objects.filter(service_id__in=ids, facility=facility, owner__isnull=True)))
+
+    # Priority 4: Owner-specific price
+    if owner:
+        fill(first_amounts(Price.objects.filter(service_id__in=ids, owner=owner, facility__isnull=True)))
+
+    return resolved
+
+
 def _resolve_hmo_price(
     service,
     facility,
@@ -1,8 +1,8 @@
 import csv
-import io
 from decimal import Decimal
 from datetime import date
 
+from django.db import transaction
 from django.db.models import Sum, Q, Count
 from django.db.models.functions import Coalesce
 from django.utils.dateparse import parse_datetime, parse_date
@@ -11,7 +11,10 @@ from rest_framework import viewsets, mixins, status
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from accounts.authentication import HeaderJWTAuthentication as JWTAuthentication
+from core.fastread import FastListMixin
+from core.prefetch import PrefetchPlanMixin
+from core.uploads import import_max_bytes, text_reader, upload_limit
 
 from .models import Service, Price, Charge, Payment, PaymentAllocation
 from .serializers import (
@@ -25,6 +28,7 @@ from .serializers import (
     HMOOutstandingChargesSerializer,
 )
 from .permissions import IsStaff
+from .readers import ChargeListReader
 from .enums import ChargeStatus, PaymentMethod, PaymentSource
 
 from notifications.services.notify import notify_patient
@@ -46,27 +50,31 @@ class ServiceViewSet(viewsets.GenericViewSet, mixins.ListModelMixin, mixins.Crea
         return super().create(request, *args, **kwargs)
 
     @action(detail=False, methods=["post"], permission_classes=[IsAuthenticated, IsStaff])
+    @upload_limit(import_max_bytes)
     def import_csv(self, request):
         """CSV columns: code,name,default_price"""
         f = request.FILES.get("file")
         if not f:
             return Response({"detail": "file is required"}, status=400)
 
-        buf = io.StringIO(f.read().decode("utf-8"))
-        reader = csv.DictReader(buf)
         created, updated = 0, 0
-        for row in reader:
-            code = (row.get("code") or "").strip()
-            if not code:
-                continue
-            defaults = {
-                "name": (row.get("name") or "").strip(),
-                "default_price": (row.get("default_price") or 0),
-                "is_active": True,
-            }
-            _, is_created = Service.objects.update_or_create(code=code, defaults=defaults)
-            created += int(is_created)
-            updated += int(not is_created)
+        # Rows are decoded as they are written: all or nothing.
+        try:
+            with transaction.atomic(), text_reader(f) as buf:
+                for row in csv.DictReader(buf):
+                    code = (row.get("code") or "").strip()
+                    if not code:
+                        continue
+                    defaults = {
+                        "name": (row.get("name") or "").strip(),
+                        "default_price": (row.get("default_price") or 0),
+                        "is_active": True,
+                    }
+                    _, is_created = Service.objects.update_or_create(code=code, defaults=defaults)
+                    created += int(is_created)
+                    updated += int(not is_created)
+        except UnicodeDecodeError:
+            return Response({"detail": "File must be UTF-8 encoded CSV."}, status=400)
         return Response({"created": created, "updated": updated})
 
 
@@ -119,6 +127,8 @@ class PriceViewSet(viewsets.GenericViewSet, mixins.ListModelMixin, mixins.Create
 
 # --- Charges ---
 class ChargeViewSet(
+    FastListMixin,
+    PrefetchPlanMixin,
     viewsets.GenericViewSet,
     mixins.CreateModelMixin,
     mixins.RetrieveModelMixin,
@@ -127,6 +137,7 @@ class ChargeViewSet(
     queryset = Charge.objects.select_related("patient", "patient__hmo", "facility", "service", "created_by")
     authentication_classes = [JWTAuthentication]
     permission_classes = [IsAuthenticated]
+    fast_reader = ChargeListReader
 
     def get_serializer_class(self):
         if self.action in ("create",):
@@ -538,6 +549,7 @@ class ChargeViewSet(
 
 # --- Payments ---
 class PaymentViewSet(
+    PrefetchPlanMixin,
     viewsets.GenericViewSet,
     mixins.CreateModelMixin,
     mixins.RetrieveModelMixin,
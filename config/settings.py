@@ -117,6 +117,55 @@ NOTIFICATIONS_EMAIL_DEFAULT_TOPICS = [
 ]
 
 
+# Audit logs older than this are moved to compressed archive storage by
+# `manage.py archive_audit_logs`.
+AUDIT_RETENTION_DAYS = int(os.getenv("AUDIT_RETENTION_DAYS", "180"))
+
+
+# Seconds a patient dashboard / header-card summary stays cached. Writes to
+# the contributing models invalidate it earlier.
+PATIENT_SUMMARY_CACHE_TTL = int(os.getenv("PATIENT_SUMMARY_CACHE_TTL", "60"))
+
+# Availability fallback for providers with no ProviderWorkingHours rows:
+# "HH:MM-HH:MM" on Monday-Friday, split into APPOINTMENT_SLOT_MINUTES slots.
+APPOINTMENT_DEFAULT_HOURS = os.getenv("APPOINTMENT_DEFAULT_HOURS", "08:00-17:00")
+APPOINTMENT_SLOT_MINUTES = int(os.getenv("APPOINTMENT_SLOT_MINUTES", "30"))
+
+# Reminder offsets before start_at for `manage.py send_appointment_reminders`
+# (comma separated; "h" / "m" suffixes, bare numbers are minutes).
+APPOINTMENT_REMINDER_OFFSETS = os.getenv("APPOINTMENT_REMINDER_OFFSETS", "24h,2h")
+
+# Post-commit domain events (core.events): THREAD runs handlers in a bounded
+# worker pool, INLINE runs them synchronously after commit. Handlers that
+# still fail after DOMAIN_EVENTS_MAX_ATTEMPTS land in core.FailedEvent.
+# In THREAD mode retries are rescheduled on a timer after the backoff
+# (doubling per attempt); no thread sleeps.
+DOMAIN_EVENTS_MODE = (os.getenv("DOMAIN_EVENTS_MODE", "THREAD") or "THREAD").upper()
+DOMAIN_EVENTS_WORKERS = int(os.getenv("DOMAIN_EVENTS_WORKERS", "4"))
+DOMAIN_EVENTS_QUEUE_SIZE = int(os.getenv("DOMAIN_EVENTS_QUEUE_SIZE", "256"))
+DOMAIN_EVENTS_MAX_ATTEMPTS = int(os.getenv("DOMAIN_EVENTS_MAX_ATTEMPTS", "3"))
+DOMAIN_EVENTS_RETRY_BACKOFF_SEC = float(os.getenv("DOMAIN_EVENTS_RETRY_BACKOFF_SEC", "0.5"))
+
+# Hot list endpoints (patients, encounters, charges, notifications,
+# appointments) render from values() rows through core.fastread readers;
+# off falls back to their DRF serializers.
+FAST_LIST_READERS = env_bool("FAST_LIST_READERS", default=True)
+
+# Pharmacy reorder forecasting (pharmacy/services/forecast.py): exponential
+# smoothing of daily dispensing over the window; reorder point covers the
+# supplier lead time plus safety stock at the given service-level z-score,
+# order quantity tops stock up to cover lead time + review period.
+PHARMACY_FORECAST_WINDOW_DAYS = int(os.getenv("PHARMACY_FORECAST_WINDOW_DAYS", "90"))
+PHARMACY_FORECAST_ALPHA = float(os.getenv("PHARMACY_FORECAST_ALPHA", "0.2"))
+PHARMACY_LEAD_TIME_DAYS = int(os.getenv("PHARMACY_LEAD_TIME_DAYS", "7"))
+PHARMACY_REVIEW_DAYS = int(os.getenv("PHARMACY_REVIEW_DAYS", "14"))
+PHARMACY_SERVICE_LEVEL_Z = float(os.getenv("PHARMACY_SERVICE_LEVEL_Z", "1.65"))
+
+# Attachment blobs (attachments/services/blobs.py) are stored once per sha256;
+# unreferenced blobs are kept this long before gc_attachment_blobs deletes them.
+ATTACHMENT_BLOB_GC_GRACE_HOURS = int(os.getenv("ATTACHMENT_BLOB_GC_GRACE_HOURS", "24"))
+
+
 # ---------------------------------------------------------------------
 # Application definition
 # ---------------------------------------------------------------------
@@ -189,8 +238,16 @@ SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=int(os.getenv("ACCESS_TOKEN_LIFETIME_MIN", "30"))),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=int(os.getenv("REFRESH_TOKEN_LIFETIME_DAYS", "7"))),
     "AUTH_HEADER_TYPES": ("Bearer", "JWT"),
+    # re-reads the role/facility/profile claims on refresh (accounts/tokens.py)
+    "TOKEN_REFRESH_SERIALIZER": "accounts.tokens.ScopedTokenRefreshSerializer",
 }
 
+# Authenticated user principal cached per access token (accounts/services/principal.py).
+# Invalidation on user/profile saves reaches all workers only with a shared CACHES backend,
+# so the cache stays off while AUTH_PRINCIPAL_CACHE is LocMem/Dummy (the default here).
+AUTH_PRINCIPAL_CACHE = os.getenv("AUTH_PRINCIPAL_CACHE", "default")
+AUTH_PRINCIPAL_CACHE_TTL = int(os.getenv("AUTH_PRINCIPAL_CACHE_TTL", "60"))  # 0 disables
+
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
@@ -270,6 +327,15 @@ STATIC_ROOT = BASE_DIR / "staticfiles"
 
 MEDIA_ROOT = BASE_DIR / "media"
 
+# Multipart uploads stream through core.uploads.StreamingUploadHandler:
+# size enforced while reading, sha256 + type sniffed in the same pass,
+# spooled to disk above FILE_UPLOAD_MAX_MEMORY_SIZE. FILE_UPLOAD_MAX_BYTES is
+# the per-file default; endpoints tighten it with @upload_limit.
+FILE_UPLOAD_HANDLERS = ["core.uploads.StreamingUploadHandler"]
+FILE_UPLOAD_MAX_MEMORY_SIZE = int(os.getenv("FILE_UPLOAD_MAX_MEMORY_SIZE", str(2_621_440)))  # 2.5MB
+FILE_UPLOAD_MAX_BYTES = int(os.getenv("FILE_UPLOAD_MAX_BYTES", str(50 * 1024 * 1024)))
+IMPORT_UPLOAD_MAX_BYTES = int(os.getenv("IMPORT_UPLOAD_MAX_BYTES", str(10 * 1024 * 1024)))  # CSV/XLSX imports
+
 # Supabase Storage (S3 protocol)
 SUPABASE_PROJECT_REF = os.getenv("SUPABASE_PROJECT_REF", "").strip()
 AWS_ACCESS_KEY_ID = os.getenv("SUPABASE_S3_ACCESS_KEY_ID", "").strip() or os.getenv("AWS_ACCESS_KEY_ID", "").strip()
@@ -319,6 +385,27 @@ else:
         "staticfiles": {"BACKEND": "whitenoise.storage.CompressedManifestStaticFilesStorage"},
     }
 
+# Direct-to-storage transfers (attachments/services/direct.py): S3 presigns
+# PUT/GET against the bucket above; LOCAL serves signed URLs from MEDIA_ROOT.
+ATTACHMENT_DIRECT_BACKEND = (os.getenv("ATTACHMENT_DIRECT_BACKEND", "S3" if USE_SUPABASE_S3 else "LOCAL") or "LOCAL").upper()
+ATTACHMENT_PRESIGN_EXPIRES_SEC = int(os.getenv("ATTACHMENT_PRESIGN_EXPIRES_SEC", "900"))
+
+# Signed media URLs in API responses (attachments/services/signed_urls.py),
+# used when the bucket is private (SUPABASE_MEDIA_SIGNED). URLs are cached
+# per process and re-signed every half lifetime.
+ATTACHMENT_SIGNED_URL_EXPIRES_SEC = int(os.getenv("ATTACHMENT_SIGNED_URL_EXPIRES_SEC", "3600"))
+ATTACHMENT_SIGNED_URL_CACHE_SIZE = int(os.getenv("ATTACHMENT_SIGNED_URL_CACHE_SIZE", "4096"))
+
+# Thumbnails / previews of images and PDFs (attachments/services/derivatives.py): max edge in px
+ATTACHMENT_THUMBNAIL_PX = int(os.getenv("ATTACHMENT_THUMBNAIL_PX", "256"))
+ATTACHMENT_PREVIEW_PX = int(os.getenv("ATTACHMENT_PREVIEW_PX", "1600"))
+# how long an undecodable original is remembered as failed before retrying
+ATTACHMENT_DERIVATIVE_FAILED_TTL = int(os.getenv("ATTACHMENT_DERIVATIVE_FAILED_TTL", "900"))
+
+# Post the procedure charge (IMG:<code>) when an imaging report is issued
+# (imaging/services/billing.py). Off by default: imaging is billed by hand.
+IMAGING_AUTO_CHARGE = env_bool("IMAGING_AUTO_CHARGE", default=False)
+
 # ---------------------------------------------------------------------
 # Production security (Render)
 # ---------------------------------------------------------------------
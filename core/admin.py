@@ -1,3 +1,11 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import FailedEvent
+
+
+@admin.register(FailedEvent)
+class FailedEventAdmin(admin.ModelAdmin):
+    list_display = ("id", "event_type", "handler", "attempts", "created_at", "last_attempt_at", "resolved_at")
+    list_filter = ("event_type", "resolved_at")
+    search_fields = ("handler", "error")
+    readonly_fields = ("created_at",)
@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        # keep SearchDocument rows in sync with patients/providers/drugs/lab tests
+        from .search import connect_signals
+        connect_signals()
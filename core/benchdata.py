@@ -0,0 +1,288 @@
+"""
+core.benchdata
+
+Synthetic multi-facility dataset for the query benchmarks (bench_queries).
+
+BenchData.setup() creates two facilities, each with one staff user per role
+(doctors and nurses with a provider profile), wards and beds, plus a system
+HMO with a tier enabled in both. grow(n) then adds "units" until every
+facility has n of them. A unit is one patient with a typical footprint:
+
+    catalog entries (service, price, drug, stock, lab test, procedure),
+    patient + facility/provider links, allergy, encounter, vitals,
+    appointment, charge + payment, prescription, lab order, imaging
+    request, lab result and prescription notifications (referring to the
+    unit's records), reminder, and one more doctor or nurse
+
+Rows are filled from model metadata (fill()): required fields get
+placeholder values and every foreign key, nullable or not, points at an
+object of the same unit/facility when one of that model exists. Nullable
+relations are filled on purpose, since serializers that walk them
+(created_by, hmo_enrollment_facility, nurse, ...) are the N+1 candidates.
+A model that cannot be created on the current database is skipped and
+reported in `errors` instead of aborting the run.
+
+Meant to run inside a transaction that is rolled back.
+"""
+import datetime
+import decimal
+import itertools
+import uuid
+
+from django.apps import apps
+from django.db import IntegrityError, DatabaseError, models, transaction
+from django.utils import timezone
+
+from accounts.enums import UserRole
+
+# Created per unit, in order; each row joins the unit's pool so later rows
+# point at it (a charge at the unit's service and patient, ...).
+UNIT_MODELS = [
+    "billing.Service",
+    "billing.Price",
+    "pharmacy.Drug",
+    "pharmacy.StockItem",
+    "labs.LabTest",
+    "imaging.ImagingProcedure",
+    "patients.Patient",
+    "patients.PatientFacilityLink",
+    "patients.PatientProviderLink",
+    "patients.Allergy",
+    "encounters.Encounter",
+    "vitals.VitalSign",
+    "appointments.Appointment",
+    "billing.Charge",
+    "billing.Payment",
+    "billing.PaymentAllocation",
+    "pharmacy.Prescription",
+    "pharmacy.PrescriptionItem",
+    "labs.LabOrder",
+    "labs.LabOrderItem",
+    "imaging.ImagingRequest",
+    "notifications.Notification",
+    "notifications.Reminder",
+]
+
+# Relations left empty: self references and links to independent
+# (facility-less) actors would move rows out of the facility's scope.
+NULL_FIELDS = {"owner", "outsourced_to", "parent_patient", "guardian_user"}
+NULL_MODEL_FIELDS = {
+    "patients.Patient": {"user"},
+}
+
+# User foreign keys are filled with the facility's user of this role
+# (by field-name keyword); everything else gets the doctor.
+USER_FIELD_ROLES = [
+    ("nurse", UserRole.NURSE),
+    ("lab", UserRole.LAB),
+    ("pharm", UserRole.PHARMACY),
+    ("dispens", UserRole.PHARMACY),
+    ("desk", UserRole.FRONTDESK),
+    ("admin", UserRole.SUPER_ADMIN),
+]
+
+STAFF_ROLES = [r for r in UserRole.values if r != UserRole.PATIENT]
+
+
+def _user_model():
+    from django.contrib.auth import get_user_model
+
+    return get_user_model()
+
+
+class BenchData:
+    """
+    See module docstring. `persona` receives per-user rows (notifications).
+    `unit_models` limits a unit to those labels (kept in UNIT_MODELS order).
+    """
+
+    def __init__(self, *, facilities=2, persona_role=UserRole.SUPER_ADMIN, unit_models=None):
+        self.facility_count = facilities
+        self.persona_role = persona_role
+        self.unit_models = [m for m in UNIT_MODELS if unit_models is None or m in unit_models]
+        self.facilities = []
+        self.staff = {}  # facility id -> {role: user}
+        self.pools = {}  # facility id -> {model: instance}
+        self.units = 0
+        self.errors = {}  # model label -> first error
+        self._seq = itertools.count(1)
+
+    @property
+    def persona(self):
+        return self.staff[self.facilities[0].id][self.persona_role]
+
+    def url_kwargs(self) -> dict:
+        """Values for nested-route kwargs (`facility_pk`, ...)."""
+        return {"facility_pk": self.facilities[0].pk}
+
+    # ------------------------------------------------------------------
+    # Setup
+    # ------------------------------------------------------------------
+
+    def setup(self):
+        from patients.models import HMOTier, SystemHMO
+
+        system_hmo = self.fill(SystemHMO, {})
+        tier = HMOTier.objects.filter(system_hmo=system_hmo).first() or self.fill(
+            HMOTier, {"system_hmo": system_hmo, "level": 1}
+        )
+        for i in range(self.facility_count):
+            facility = self.fill(apps.get_model("facilities", "Facility"), {"name": f"Bench Facility {i + 1}"})
+            self.facilities.append(facility)
+            pool = {type(system_hmo): system_hmo, type(tier): tier, type(facility): facility}
+            self.pools[facility.id] = pool
+            self.staff[facility.id] = {role: self._staff_user(facility, role) for role in STAFF_ROLES}
+            self.create("patients.FacilityHMO", facility, {"facility": facility, "system_hmo": system_hmo})
+            ward = self.create("facilities.Ward", facility, {"facility": facility})
+            if ward is not None:
+                self.create("facilities.Bed", facility, {"ward": ward})
+        return self
+
+    def _staff_user(self, facility, role):
+        n = next(self._seq)
+        user = _user_model().objects.create_user(
+            email=f"bench-{role.lower()}-{n}@bench.test",
+            password=None,
+            role=role,
+            facility=facility,
+            first_name=role.title(),
+            last_name=f"Bench {n}",
+            is_staff=role in (UserRole.SUPER_ADMIN, UserRole.ADMIN),
+        )
+        if role in (UserRole.DOCTOR, UserRole.NURSE):
+            self.create("providers.ProviderProfile", facility, {"user": user})
+        return user
+
+    # ------------------------------------------------------------------
+    # Units
+    # ------------------------------------------------------------------
+
+    def grow(self, units):
+        """Add units until every facility has `units` of them."""
+        while self.units < units:
+            for facility in self.facilities:
+                self._add_unit(facility)
+            self.units += 1
+        return self
+
+    def _add_unit(self, facility):
+        start = timezone.now() + datetime.timedelta(days=self.units + 1)
+        overrides = {
+            "appointments.Appointment": {"start_at": start, "end_at": start + datetime.timedelta(minutes=30)},
+            "notifications.Notification": {"user": self.staff[facility.id][self.persona_role]},
+        }
+        # one more clinician per unit, so staff/provider listings grow too
+        self._staff_user(facility, UserRole.NURSE if self.units % 2 else UserRole.DOCTOR)
+        for label in self.unit_models:
+            if label == "notifications.Notification":
+                for refs in self._notification_refs(facility):
+                    self.create(label, facility, {**overrides[label], **refs})
+                continue
+            self.create(label, facility, overrides.get(label, {}))
+
+    def _notification_refs(self, facility) -> list:
+        """
+        A lab result and a prescription notification pointing at the unit's
+        records, so the feed's text enrichment is measured too.
+        """
+        pool = self.pools[facility.id]
+        patient = pool.get(apps.get_model("patients", "Patient"))
+        out = []
+        for topic, key, label in (
+            ("LAB_RESULT_READY", "order_id", "labs.LabOrder"),
+            ("PRESCRIPTION_READY", "prescription_id", "pharmacy.Prescription"),
+        ):
+            record = pool.get(apps.get_model(label))
+            data = {"patient_id": patient.id} if patient is not None else {}
+            if record is not None:
+                data[key] = record.id
+            out.append({"topic": topic, "data": data})
+        return out
+
+    def create(self, label, facility, overrides):
+        """fill() one row in a savepoint; failures are recorded, not raised."""
+        model = apps.get_model(label)
+        try:
+            with transaction.atomic():
+                obj = self.fill(model, overrides, facility=facility)
+        except (IntegrityError, DatabaseError, ValueError, TypeError) as e:
+            self.errors.setdefault(label, f"{type(e).__name__}: {e}")
+            return None
+        self.pools[facility.id][model] = obj
+        return obj
+
+    # ------------------------------------------------------------------
+    # Generic row filler
+    # ------------------------------------------------------------------
+
+    def fill(self, model, overrides, *, facility=None):
+        values = dict(overrides)
+        skip = NULL_FIELDS | NULL_MODEL_FIELDS.get(model._meta.label, set())
+        n = next(self._seq)
+        for f in model._meta.concrete_fields:
+            if f.primary_key or f.name in values or f.attname in values:
+                continue
+            if f.is_relation:
+                if f.name in skip or f.related_model is model:
+                    continue
+                target = self._related(f, facility)
+                if target is None and not f.null:
+                    target = self.fill(f.related_model, {}, facility=facility)
+                if target is not None:
+                    values[f.name] = target
+                continue
+            if f.null or f.has_default() or getattr(f, "auto_now", False) or getattr(f, "auto_now_add", False):
+                continue
+            if f.blank and isinstance(f, (models.CharField, models.TextField)) and not f.choices:
+                continue
+            values[f.name] = self._placeholder(model, f, n)
+        return model.objects.create(**values)
+
+    def _related(self, field, facility):
+        if facility is None:
+            return None
+        related = field.related_model
+        if related is _user_model():
+            if field.one_to_one:
+                return None
+            staff = self.staff.get(facility.id, {})
+            for keyword, role in USER_FIELD_ROLES:
+                if keyword in field.name:
+                    return staff.get(role)
+            return staff.get(UserRole.DOCTOR)
+        if field.one_to_one:
+            return None
+        return self.pools[facility.id].get(related)
+
+    @staticmethod
+    def _placeholder(model, f, n):
+        if f.choices:
+            return f.choices[0][0]
+        if isinstance(f, models.EmailField):
+            return f"{model._meta.model_name}-{n}@bench.test"
+        if isinstance(f, models.FileField):
+            return f"bench/{model._meta.model_name}-{n}.pdf"
+        if isinstance(f, (models.CharField, models.TextField)):
+            value = f"{model.__name__} {n}"
+            return value[: f.max_length] if f.max_length else value
+        if isinstance(f, models.BooleanField):
+            return False
+        if isinstance(f, models.DecimalField):
+            return decimal.Decimal(min(1500, 10 ** (f.max_digits - f.decimal_places) - 1))
+        if isinstance(f, (models.IntegerField, models.FloatField)):
+            return 1
+        if isinstance(f, models.DateTimeField):
+            return timezone.now()
+        if isinstance(f, models.DateField):
+            return datetime.date(1990, 1, 1)
+        if isinstance(f, models.TimeField):
+            return datetime.time(9, 0)
+        if isinstance(f, models.DurationField):
+            return datetime.timedelta(minutes=30)
+        if isinstance(f, models.UUIDField):
+            return uuid.uuid4()
+        if isinstance(f, models.JSONField):
+            return {}
+        if isinstance(f, models.GenericIPAddressField):
+            return "127.0.0.1"
+        raise ValueError(f"No placeholder for {model.__name__}.{f.name} ({f.get_internal_type()})")
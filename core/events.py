@@ -0,0 +1,218 @@
+"""
+core.events
+
+Small in-process domain event bus for side effects that must not slow down
+or break the write that caused them (emails, in-app notifications, links).
+
+- Events are frozen dataclasses carrying ids only (handlers re-load what
+  they need), declared in each app's `events.py`.
+- `publish(event)` defers dispatch to `transaction.on_commit`, so nothing
+  fires for a rolled-back write and handlers see committed rows.
+- Each handler runs independently in a bounded thread pool
+  (DOMAIN_EVENTS_WORKERS). When the pool's queue is full the handler runs in
+  the publishing thread instead of queueing without limit.
+- A failing handler is retried DOMAIN_EVENTS_MAX_ATTEMPTS times with
+  exponential backoff, then recorded as a FailedEvent (dead letter) for
+  `manage.py replay_failed_events`. Retries are scheduled on a timer and
+  resubmitted to the pool; nothing sleeps in a worker or request thread.
+- A retry re-runs the whole handler, so a handler does one thing (one
+  email, one recipient group) or makes its steps idempotent.
+
+DOMAIN_EVENTS_MODE=INLINE runs handlers synchronously after commit (tests,
+management commands, debugging).
+"""
+import logging
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Callable
+
+from django.conf import settings
+from django.db import close_old_connections, connections, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+_handlers: dict[str, list[Callable]] = defaultdict(list)
+_event_types: dict[str, type] = {}
+
+_pool = None
+_pool_slots = None
+_pool_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class DomainEvent:
+    """Base class; subclasses are frozen dataclasses of JSON-safe ids/values."""
+
+    @classmethod
+    def event_type(cls) -> str:
+        return f"{cls.__module__.split('.')[0]}.{cls.__name__}"
+
+    def payload(self) -> dict:
+        return asdict(self)
+
+
+def handler_path(fn) -> str:
+    return f"{fn.__module__}.{fn.__qualname__}"
+
+
+# ---------------------------------------------------------------------------
+# Registration
+# ---------------------------------------------------------------------------
+
+def subscribe(event_cls):
+    """Decorator registering a handler `fn(event)` for an event class."""
+    def decorator(fn):
+        key = event_cls.event_type()
+        _event_types[key] = event_cls
+        if fn not in _handlers[key]:
+            _handlers[key].append(fn)
+        return fn
+    return decorator
+
+
+def handlers_for(event_cls) -> list[Callable]:
+    return list(_handlers.get(event_cls.event_type(), ()))
+
+
+def event_class(event_type: str):
+    return _event_types.get(event_type)
+
+
+# ---------------------------------------------------------------------------
+# Publishing / dispatch
+# ---------------------------------------------------------------------------
+
+def _mode() -> str:
+    return (getattr(settings, "DOMAIN_EVENTS_MODE", "THREAD") or "THREAD").upper()
+
+
+def _max_attempts() -> int:
+    return max(1, int(getattr(settings, "DOMAIN_EVENTS_MAX_ATTEMPTS", 3)))
+
+
+def _backoff() -> float:
+    return float(getattr(settings, "DOMAIN_EVENTS_RETRY_BACKOFF_SEC", 0.5))
+
+
+def _get_pool():
+    global _pool, _pool_slots
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                workers = max(1, int(getattr(settings, "DOMAIN_EVENTS_WORKERS", 4)))
+                queue_size = max(workers, int(getattr(settings, "DOMAIN_EVENTS_QUEUE_SIZE", 256)))
+                _pool_slots = threading.BoundedSemaphore(queue_size)
+                _pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="domain-events")
+    return _pool, _pool_slots
+
+
+def publish(event: DomainEvent, *, using=None):
+    """Dispatch `event` to its handlers once the current transaction commits."""
+    transaction.on_commit(lambda: dispatch(event), using=using)
+
+
+def dispatch(event: DomainEvent):
+    handlers = handlers_for(type(event))
+    if not handlers:
+        return
+    if _mode() == "INLINE":
+        for fn in handlers:
+            run_handler(fn, event)
+        return
+    for fn in handlers:
+        _submit(fn, event)
+
+
+def _submit(fn, event, attempt=1):
+    pool, slots = _get_pool()
+    if not slots.acquire(blocking=False):
+        # Back-pressure: queue is full, run here rather than grow without bound.
+        _run_attempt(fn, event, attempt)
+        return
+    try:
+        future = pool.submit(_run_in_worker, fn, event, attempt)
+    except RuntimeError:
+        # Pool shut down (interpreter exit): best effort inline.
+        slots.release()
+        _run_attempt(fn, event, attempt)
+        return
+    future.add_done_callback(lambda _f: slots.release())
+
+
+def _run_in_worker(fn, event, attempt):
+    close_old_connections()
+    try:
+        _run_attempt(fn, event, attempt)
+    finally:
+        close_old_connections()
+
+
+def _run_attempt(fn, event, attempt):
+    """One attempt; a failure schedules the next one instead of sleeping."""
+    attempts = _max_attempts()
+    error = _call(fn, event, attempt, attempts)
+    if error is None:
+        return
+    if attempt >= attempts:
+        _dead_letter(fn, event, error, attempts)
+        return
+    timer = threading.Timer(_backoff() * (2 ** (attempt - 1)), _retry, args=(fn, event, attempt + 1))
+    timer.daemon = True
+    timer.start()
+
+
+def _retry(fn, event, attempt):
+    try:
+        _submit(fn, event, attempt)
+    finally:
+        # the timer thread may have run the handler itself (back-pressure)
+        connections.close_all()
+
+
+def _call(fn, event, attempt, attempts) -> str | None:
+    """Run the handler once; the error text on failure, else None."""
+    try:
+        fn(event)
+        return None
+    except Exception as exc:
+        error = f"{type(exc).__name__}: {exc}"
+        logger.warning(
+            "Event handler %s failed for %s (attempt %s/%s): %s",
+            handler_path(fn), event.event_type(), attempt, attempts, error,
+        )
+        return error
+
+
+def run_handler(fn, event, *, max_attempts=None) -> bool:
+    """
+    Run one handler synchronously (INLINE mode), retrying right away.
+    Returns True on success; on final failure a FailedEvent is recorded and
+    False is returned. Never raises.
+    """
+    attempts = max_attempts or _max_attempts()
+    error = ""
+    for attempt in range(1, attempts + 1):
+        error = _call(fn, event, attempt, attempts)
+        if error is None:
+            return True
+    _dead_letter(fn, event, error, attempts)
+    return False
+
+
+def _dead_letter(fn, event, error, attempts):
+    from .models import FailedEvent
+
+    try:
+        FailedEvent.objects.create(
+            event_type=event.event_type(),
+            payload=event.payload(),
+            handler=handler_path(fn),
+            error=error[:4000],
+            attempts=attempts,
+            last_attempt_at=timezone.now(),
+        )
+    except Exception:
+        logger.exception("Could not record failed event %s for %s", event.event_type(), handler_path(fn))
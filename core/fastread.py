@@ -0,0 +1,331 @@
+"""
+core.fastread
+
+Lean read path for hot list endpoints.
+
+A Reader renders the same JSON as a list serializer, but from values_list()
+rows instead of model instances, one column at a time:
+
+- plain fields ("status", "service.code", "patient") become values() lookups
+  and keep their DRF representation (dates, decimals) through the
+  serializer's own field, applied to the whole column;
+- a nested serializer on a foreign key is rendered once per distinct
+  related object and mapped back onto the rows;
+- SerializerMethodFields are replaced by column functions declared on the
+  reader with @computed(lookups...): they receive whole columns (lists) and
+  return one, so there is no per-row serializer or method dispatch.
+
+The field plan (lookups, converters, column functions) is compiled once per
+reader, field set and queryset annotations. A serializer field the reader
+cannot produce raises ImproperlyConfigured when the plan is compiled, so a
+reader cannot silently drift from its serializer.
+
+Sparse fieldsets: `?fields=id,status,patient_name` limits the response (and
+the query) to those fields, on the fast path and on the serializer path.
+
+FastListMixin wires a reader into a viewset's list(); FAST_LIST_READERS=0
+switches every endpoint back to its serializer (bench_list_readers compares
+both).
+"""
+from __future__ import annotations
+
+from django.apps import apps
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from rest_framework import serializers
+from rest_framework.fields import empty
+from rest_framework.response import Response
+
+from .prefetch import apply_plan
+
+# DRF fields whose to_representation() returns values() output unchanged
+IDENTITY_FIELDS = (
+    serializers.BooleanField,
+    serializers.CharField,
+    serializers.ChoiceField,
+    serializers.IntegerField,
+    serializers.JSONField,
+    serializers.PrimaryKeyRelatedField,
+    serializers.ReadOnlyField,
+)
+
+_SKIP = object()  # key left out of the row, as DRF does for a broken dotted source
+
+
+def computed(*lookups, context=False):
+    """
+    Column function for the field of the same name. Called once per page
+    with one list per lookup (and the serializer context first when
+    `context` is set); returns the column.
+    """
+
+    def decorate(fn):
+        fn.lookups = lookups
+        fn.needs_context = context
+        return fn
+
+    return decorate
+
+
+def requested_fields(request, serializer_class) -> list | None:
+    """Field names of `?fields=`, validated against the serializer, or None."""
+    raw = request.query_params.get("fields") if request is not None else None
+    if not raw:
+        return None
+    names = [name.strip() for name in raw.split(",") if name.strip()]
+    readable = [name for name, f in serializer_class(context={}).fields.items() if not f.write_only]
+    unknown = [name for name in names if name not in readable]
+    if unknown:
+        raise serializers.ValidationError({"fields": f"Unknown field(s): {', '.join(unknown)}"})
+    return [name for name in readable if name in names]
+
+
+def _model_field(model, name):
+    """Model field by name, or the foreign key whose column (`x_id`) it is."""
+    try:
+        return model._meta.get_field(name)
+    except FieldDoesNotExist:
+        pass
+    for f in model._meta.concrete_fields:
+        if f.attname == name:
+            return f
+    return None
+
+
+class _Program:
+    """Compiled plan of one reader for one field set."""
+
+    def __init__(self, names):
+        self.names = names
+        self.lookups = []  # values_list() lookups
+        self.joined = {}  # join alias -> lookups read through it
+        self.columns = []  # per output field: (kind, payload)
+
+    def lookup(self, path) -> str:
+        if path not in self.lookups:
+            self.lookups.append(path)
+        return path
+
+
+class Reader:
+    """
+    Subclasses set `serializer_class` (the list serializer they stand in for)
+    and define a @computed function per SerializerMethodField.
+
+    `joins` reads other tables through integer id columns that are not
+    foreign keys: {"encounter": ("encounter_id", "encounters.Encounter")}
+    makes "encounter__status" a lookup, loaded with one extra query.
+    """
+
+    serializer_class = None
+    joins = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._computed = {}
+        for klass in reversed(cls.__mro__):
+            for name, value in vars(klass).items():
+                if callable(value) and hasattr(value, "lookups"):
+                    cls._computed[name] = value
+        cls._programs = {}
+
+    def __init__(self, fields=None, *, context=None):
+        self.fields = tuple(fields) if fields else None
+        self.context = context or {}
+        self.program = None
+
+    @property
+    def model(self):
+        return self.serializer_class.Meta.model
+
+    # ------------------------------------------------------------------
+    # Compilation
+    # ------------------------------------------------------------------
+
+    def _compile(self, annotations) -> _Program:
+        key = (self.fields, frozenset(annotations))
+        program = self._programs.get(key)
+        if program is not None:
+            return program
+
+        declared = self.serializer_class(context={}).fields
+        names = [
+            name for name, f in declared.items()
+            if not f.write_only and (self.fields is None or name in self.fields)
+        ]
+        program = _Program(names)
+        for name in names:
+            program.columns.append(self._column(program, name, declared[name], annotations))
+        self._programs[key] = program
+        return program
+
+    def _column(self, program, name, field, annotations):
+        fn = self._computed.get(name)
+        if fn is not None:
+            return "computed", (fn, [self._lookup(program, path) for path in fn.lookups])
+
+        where = f"{type(self).__name__}: field '{name}'"
+        if isinstance(field, (serializers.SerializerMethodField, serializers.ListSerializer, serializers.ManyRelatedField)):
+            raise ImproperlyConfigured(f"{where} needs a @computed column")
+
+        attrs = field.source_attrs
+        model, hops = self.model, []
+        for attr in attrs[:-1]:
+            f = _model_field(model, attr)
+            if f is None or not f.is_relation or f.many_to_many or f.one_to_many:
+                raise ImproperlyConfigured(f"{where}: source '{field.source}' is not a to-one path")
+            hops.append(f)
+            model = f.related_model
+        last = _model_field(model, attrs[-1])
+        if last is None and (hops or attrs[-1] not in annotations):
+            raise ImproperlyConfigured(f"{where}: '{field.source}' is neither a field nor an annotation")
+        path = "__".join(attrs)
+
+        # DRF leaves the key out when a nullable hop is empty (read-only, no default)
+        presence = []
+        if field.default is empty and not field.allow_null and not field.required:
+            presence = [
+                self._lookup(program, "__".join(attrs[: i + 1]))
+                for i, hop in enumerate(hops)
+                if hop.null and hop.concrete
+            ]
+
+        if isinstance(field, serializers.BaseSerializer):
+            if last is None or not last.is_relation or last.many_to_many or last.one_to_many:
+                raise ImproperlyConfigured(f"{where}: nested serializers need a to-one source")
+            return "nested", (name, self._lookup(program, path), last.related_model)
+
+        if last is not None and last.is_relation and last.name == attrs[-1] and not isinstance(field, serializers.RelatedField):
+            raise ImproperlyConfigured(f"{where}: '{field.source}' is a relation")
+        convert = None if isinstance(field, IDENTITY_FIELDS) else field.to_representation
+        return "plain", (self._lookup(program, path), convert, presence)
+
+    def _lookup(self, program, path) -> str:
+        alias = path.split("__", 1)[0]
+        if alias in self.joins and "__" in path:
+            id_lookup = self.joins[alias][0]
+            program.lookup(id_lookup)
+            program.joined.setdefault(alias, [])
+            rest = path.split("__", 1)[1]
+            if rest not in program.joined[alias]:
+                program.joined[alias].append(rest)
+            return path
+        return program.lookup(path)
+
+    # ------------------------------------------------------------------
+    # Rendering
+    # ------------------------------------------------------------------
+
+    def queryset(self, qs):
+        """values_list() queryset of the compiled lookups (paginate this)."""
+        self.program = self._compile(qs.query.annotations)
+        return qs.prefetch_related(None).values_list(*self.program.lookups)
+
+    def render(self, rows) -> list:
+        program = self.program
+        rows = list(rows)
+        if rows:
+            cols = dict(zip(program.lookups, (list(c) for c in zip(*rows))))
+        else:
+            cols = {path: [] for path in program.lookups}
+        for alias, paths in program.joined.items():
+            cols.update(self._join(alias, paths, cols))
+
+        serializer, out, skippable = None, [], []
+        for name, (kind, payload) in zip(program.names, program.columns):
+            if kind == "plain":
+                path, convert, presence = payload
+                column = cols[path]
+                if convert is not None:
+                    column = [None if v is None else convert(v) for v in column]
+                if presence:
+                    present = [all(v is not None for v in vals) for vals in zip(*(cols[p] for p in presence))]
+                    column = [v if ok else _SKIP for v, ok in zip(column, present)]
+                    skippable.append(name)
+            elif kind == "computed":
+                fn, paths = payload
+                args = [cols[path] for path in paths]
+                column = fn(self.context, *args) if fn.needs_context else fn(*args)
+            else:
+                if serializer is None:
+                    serializer = self.serializer_class(context=self.context)
+                column = self._nested(serializer.fields[payload[0]], cols[payload[1]], payload[2])
+            out.append(column)
+
+        names = program.names
+        data = [dict(zip(names, values)) for values in zip(*out)] if rows else []
+        for name in skippable:
+            for row in data:
+                if row[name] is _SKIP:
+                    del row[name]
+        return data
+
+    def _join(self, alias, paths, cols) -> dict:
+        id_lookup, label = self.joins[alias]
+        ids = cols[id_lookup]
+        wanted = {i for i in ids if i is not None}
+        found = {}
+        if wanted:
+            model = apps.get_model(label)
+            found = {
+                row[0]: row[1:]
+                for row in model._default_manager.filter(pk__in=wanted).values_list("pk", *paths)
+            }
+        blank = (None,) * len(paths)
+        joined = [found.get(i, blank) for i in ids]
+        return {
+            f"{alias}__{path}": [row[n] for row in joined]
+            for n, path in enumerate(paths)
+        }
+
+    @staticmethod
+    def _nested(field, ids, model) -> list:
+        wanted = {i for i in ids if i is not None}
+        reps = {}
+        if wanted:
+            objs = apply_plan(model._default_manager.filter(pk__in=wanted), type(field))
+            reps = {obj.pk: field.to_representation(obj) for obj in objs}
+        return [None if i is None else reps.get(i) for i in ids]
+
+
+def fast_lists_enabled() -> bool:
+    return bool(getattr(settings, "FAST_LIST_READERS", True))
+
+
+class FastListMixin:
+    """
+    ViewSet mixin: list() renders through `fast_reader` (a Reader subclass)
+    and honours `?fields=`. List it before the DRF bases.
+
+    Views whose list() builds its own queryset return list_response(qs).
+    prepare_page() runs on the model instances of the serializer path only.
+    """
+
+    fast_reader = None
+
+    def list(self, request, *args, **kwargs):
+        return self.list_response(self.filter_queryset(self.get_queryset()))
+
+    def prepare_page(self, objs):
+        pass
+
+    def list_response(self, queryset):
+        fields = requested_fields(self.request, self.get_serializer_class())
+        if self.fast_reader is not None and fast_lists_enabled():
+            reader = self.fast_reader(fields, context=self.get_serializer_context())
+            rows = reader.queryset(queryset)
+            page = self.paginate_queryset(rows)
+            data = reader.render(page if page is not None else rows)
+        else:
+            page = self.paginate_queryset(queryset)
+            objs = page if page is not None else list(queryset)
+            self.prepare_page(objs)
+            serializer = self.get_serializer(objs, many=True)
+            if fields:
+                for name in list(serializer.child.fields):
+                    if name not in fields:
+                        serializer.child.fields.pop(name)
+            data = serializer.data
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
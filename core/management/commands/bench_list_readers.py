@@ -0,0 +1,199 @@
+# core/management/commands/bench_list_readers.py
+"""
+Fast list readers (core.fastread) against the list serializers they stand in
+for.
+
+Seeds one facility (core/benchdata.py) inside a transaction that is rolled
+back and, at each scale, requests every hot list endpoint with
+FAST_LIST_READERS on and off. Reports the median time of each path, the
+speedup and query counts, and compares the two JSON bodies row by row.
+
+Fails (exit code 1) when a reader's output differs from its serializer's,
+so a field added to a serializer without its reader column shows up here.
+Fields in VOLATILE depend on the clock and are left out of the comparison.
+
+Usage:
+    python manage.py bench_list_readers
+    python manage.py bench_list_readers --scales 100,1000 --repeat 5
+    python manage.py bench_list_readers --only appointment --fields id,status,patient_name
+    python manage.py bench_list_readers --json report.json
+"""
+
+import json
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import (
+    CaptureQueriesContext,
+    override_settings,
+    setup_test_environment,
+    teardown_test_environment,
+)
+from django.urls import reverse
+
+from accounts.enums import UserRole
+
+ENDPOINTS = ["patient-list", "encounter-list", "charge-list", "notification-list", "appointment-list"]
+
+# what a unit needs for those lists (charges are priced, payments allocate,
+# notifications refer to lab orders and prescriptions)
+UNIT_MODELS = [
+    "billing.Service",
+    "billing.Price",
+    "pharmacy.Drug",
+    "labs.LabTest",
+    "patients.Patient",
+    "patients.PatientFacilityLink",
+    "encounters.Encounter",
+    "appointments.Appointment",
+    "billing.Charge",
+    "billing.Payment",
+    "billing.PaymentAllocation",
+    "pharmacy.Prescription",
+    "pharmacy.PrescriptionItem",
+    "labs.LabOrder",
+    "labs.LabOrderItem",
+    "notifications.Notification",
+]
+
+VOLATILE = {"time_ago"}
+PAGE_SIZE = {"notification-list": ("limit", 100)}
+
+
+def _rows(body):
+    return body["results"] if isinstance(body, dict) and "results" in body else body
+
+
+def _diff(fast, slow) -> list:
+    """Descriptions of the first differences between two list bodies."""
+    fast, slow = _rows(fast), _rows(slow)
+    if len(fast) != len(slow):
+        return [f"{len(fast)} rows vs {len(slow)}"]
+    out = []
+    for a, b in zip(fast, slow):
+        keys = (set(a) | set(b)) - VOLATILE
+        for key in sorted(keys):
+            if a.get(key, "<missing>") != b.get(key, "<missing>"):
+                out.append(f"id={b.get('id')} {key}: {a.get(key, '<missing>')!r} != {b.get(key, '<missing>')!r}")
+        if len(out) >= 5:
+            break
+    return out
+
+
+class Command(BaseCommand):
+    help = "Compare fast list readers with their serializers (speed, queries, output parity)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scales", default="100,1000", help="Rows to measure at (default: 100,1000)")
+        parser.add_argument("--repeat", type=int, default=3, help="Timed requests per path (default: 3)")
+        parser.add_argument("--only", action="append", help="Only URL names containing this (repeatable)")
+        parser.add_argument("--fields", help="Also pass ?fields= (sparse fieldset) on every request")
+        parser.add_argument(
+            "--persona",
+            default=UserRole.SUPER_ADMIN,
+            choices=[r for r in UserRole.values if r != UserRole.PATIENT],
+            help="Role of the requesting facility user (default: SUPER_ADMIN)",
+        )
+        parser.add_argument("--json", help="Write the report as JSON to this path")
+
+    def handle(self, *args, **options):
+        from core.benchdata import BenchData
+
+        try:
+            scales = sorted({int(s) for s in options["scales"].split(",") if s.strip()})
+        except ValueError:
+            raise CommandError("--scales must be comma-separated integers")
+        if not scales or scales[0] < 1:
+            raise CommandError("--scales must be positive")
+        names = [n for n in ENDPOINTS if not options["only"] or any(o in n for o in options["only"])]
+        if not names:
+            raise CommandError("No endpoints matched")
+
+        setup_test_environment()  # locmem email backend, testserver host
+        try:
+            with transaction.atomic():
+                data = BenchData(facilities=1, persona_role=options["persona"], unit_models=UNIT_MODELS).setup()
+                report = self._run(data, names, scales, options)
+                seed_errors = dict(data.errors)
+                transaction.set_rollback(True)
+        finally:
+            teardown_test_environment()
+
+        self._print(report)
+        for label, error in seed_errors.items():
+            self.stderr.write(f"not seeded: {label}: {error}")
+        if options["json"]:
+            with open(options["json"], "w") as fh:
+                json.dump({"scales": scales, "seed_errors": seed_errors, "endpoints": report}, fh, indent=2)
+
+        mismatched = [r for r in report if r["diff"]]
+        if mismatched:
+            raise CommandError(
+                f"{len(mismatched)} reader(s) differ from their serializer: "
+                + ", ".join(f"{r['endpoint']}@{r['scale']}" for r in mismatched)
+            )
+        self.stdout.write(self.style.SUCCESS("readers match their serializers"))
+
+    def _run(self, data, names, scales, options) -> list:
+        from rest_framework.test import APIClient
+
+        client = APIClient(raise_request_exception=True)
+        client.force_authenticate(user=data.persona)
+        report = []
+        for scale in scales:
+            data.grow(scale)
+            for name in names:
+                params = dict([PAGE_SIZE[name]]) if name in PAGE_SIZE else {}
+                if options["fields"]:
+                    params["fields"] = options["fields"]
+                url = reverse(name)
+                fast = self._measure(client, url, params, True, options["repeat"])
+                slow = self._measure(client, url, params, False, options["repeat"])
+                report.append({
+                    "endpoint": name,
+                    "scale": scale,
+                    "rows": len(_rows(slow["body"])),
+                    "fast_ms": fast["ms"],
+                    "serializer_ms": slow["ms"],
+                    "speedup": round(slow["ms"] / fast["ms"], 2) if fast["ms"] else None,
+                    "fast_queries": fast["queries"],
+                    "serializer_queries": slow["queries"],
+                    "diff": _diff(fast["body"], slow["body"]),
+                })
+        return report
+
+    @staticmethod
+    def _measure(client, url, params, fast, repeat) -> dict:
+        with override_settings(FAST_LIST_READERS=fast):
+            client.get(url, params)  # warm-up: compiled reader plans, lazy settings
+            timings = []
+            for _ in range(max(1, repeat)):
+                with CaptureQueriesContext(connection) as ctx:
+                    start = time.perf_counter()
+                    response = client.get(url, params)
+                    timings.append(time.perf_counter() - start)
+        if response.status_code != 200:
+            raise CommandError(f"{url} ({'fast' if fast else 'serializer'}): HTTP {response.status_code}")
+        return {
+            "ms": round(statistics.median(timings) * 1000, 2),
+            "queries": len(ctx.captured_queries),
+            "body": json.loads(response.content),
+        }
+
+    def _print(self, report):
+        width = max(len(r["endpoint"]) for r in report)
+        self.stdout.write(
+            f"{'endpoint':<{width}}  {'scale':>5} {'rows':>5} {'fast ms':>9} {'ser. ms':>9} "
+            f"{'speedup':>7} {'queries':>9}  parity"
+        )
+        for r in report:
+            line = (
+                f"{r['endpoint']:<{width}}  {r['scale']:>5} {r['rows']:>5} {r['fast_ms']:>9.2f} "
+                f"{r['serializer_ms']:>9.2f} {r['speedup'] or 0:>6.2f}x "
+                f"{r['fast_queries']:>4}/{r['serializer_queries']:<4}  {'ok' if not r['diff'] else 'DIFF'}"
+            )
+            self.stdout.write(self.style.ERROR(line) if r["diff"] else line)
+            for d in r["diff"]:
+                self.stdout.write(f"    {d}")
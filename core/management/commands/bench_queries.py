@@ -0,0 +1,142 @@
+# core/management/commands/bench_queries.py
+"""
+Query-budget benchmark for every list and retrieve endpoint.
+
+Seeds a multi-facility dataset (core/benchdata.py) inside a transaction
+that is rolled back, hits each endpoint as a facility user at 1, 10 and
+100 rows per facility and reports rows, query count, SQL time,
+serialization time and total time per endpoint (core/querybench.py).
+
+Fails (exit code 1) when an endpoint's query count grows with the number
+of rows (N+1), so CI can run it after `migrate` on an empty database.
+
+Usage:
+    python manage.py bench_queries
+    python manage.py bench_queries --only encounters --only billing
+    python manage.py bench_queries --scales 1,10,100 --persona DOCTOR
+    python manage.py bench_queries --json report.json --markdown report.md
+    python manage.py bench_queries --report-only   # never fail
+"""
+
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from accounts.enums import UserRole
+
+
+def _cells(result, attr):
+    return "/".join("-" if getattr(s, attr) is None else f"{getattr(s, attr):g}" for s in result.samples)
+
+
+class Command(BaseCommand):
+    help = "Benchmark query counts of list/retrieve endpoints at growing row counts and flag N+1s"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scales", default="1,10,100", help="Rows per facility to measure at (default: 1,10,100)")
+        parser.add_argument("--only", action="append", help="Only routes matching this regex (repeatable)")
+        parser.add_argument("--exclude", action="append", help="Skip routes matching this regex (repeatable)")
+        parser.add_argument(
+            "--persona",
+            default=UserRole.SUPER_ADMIN,
+            choices=[r for r in UserRole.values if r != UserRole.PATIENT],
+            help="Role of the requesting facility user (default: SUPER_ADMIN)",
+        )
+        parser.add_argument("--tolerance", type=int, default=0, help="Extra queries allowed across scales (default: 0)")
+        parser.add_argument("--json", help="Write the full report as JSON to this path")
+        parser.add_argument("--markdown", help="Write the report as a Markdown table to this path")
+        parser.add_argument("--report-only", action="store_true", help="Report N+1s without failing")
+
+    def handle(self, *args, **options):
+        from core.benchdata import BenchData
+        from core.querybench import discover, run
+
+        try:
+            scales = sorted({int(s) for s in options["scales"].split(",") if s.strip()})
+        except ValueError:
+            raise CommandError("--scales must be comma-separated integers")
+        if not scales or scales[0] < 1:
+            raise CommandError("--scales must be positive")
+
+        endpoints = discover(include=options["only"], exclude=options["exclude"])
+        if not endpoints:
+            raise CommandError("No endpoints matched")
+        self.stdout.write(f"{len(endpoints)} endpoints, scales {scales}, persona {options['persona']}")
+
+        setup_test_environment()  # locmem email backend, testserver host
+        try:
+            with transaction.atomic():
+                data = BenchData(persona_role=options["persona"]).setup()
+                results = run(endpoints, data, scales)
+                seed_errors = dict(data.errors)
+                transaction.set_rollback(True)
+        finally:
+            teardown_test_environment()
+
+        tolerance = options["tolerance"]
+        offenders = [r for r in results if r.growth > tolerance]
+        self._print(results, tolerance)
+        for label, error in seed_errors.items():
+            self.stderr.write(f"not seeded: {label}: {error}")
+
+        if options["json"]:
+            with open(options["json"], "w") as fh:
+                json.dump(
+                    {
+                        "scales": scales,
+                        "persona": options["persona"],
+                        "tolerance": tolerance,
+                        "seed_errors": seed_errors,
+                        "endpoints": [r.as_dict() for r in results],
+                    },
+                    fh,
+                    indent=2,
+                )
+        if options["markdown"]:
+            with open(options["markdown"], "w") as fh:
+                fh.write(self._markdown(results, scales, tolerance))
+
+        if offenders and not options["report_only"]:
+            raise CommandError(
+                f"{len(offenders)} endpoint(s) run more queries as rows grow: "
+                + ", ".join(r.endpoint.key for r in offenders)
+            )
+        self.stdout.write(self.style.SUCCESS(f"{len(offenders)} N+1 endpoint(s)"))
+
+    def _verdict(self, result, tolerance):
+        if result.skipped and not result.samples:
+            return f"skipped ({result.skipped})"
+        if result.errors:
+            return f"error {result.errors[0].status}"
+        if result.growth > tolerance:
+            return f"N+1 (+{result.growth})"
+        return "ok"
+
+    def _print(self, results, tolerance):
+        width = max(len(r.endpoint.key) for r in results)
+        self.stdout.write(
+            f"{'endpoint':<{width}}  {'rows':<12} {'queries':<14} {'sql ms':<20} {'serialize ms':<20} verdict"
+        )
+        for r in results:
+            line = (
+                f"{r.endpoint.key:<{width}}  {_cells(r, 'rows'):<12} {_cells(r, 'queries'):<14} "
+                f"{_cells(r, 'sql_ms'):<20} {_cells(r, 'serialize_ms'):<20} {self._verdict(r, tolerance)}"
+            )
+            self.stdout.write(self.style.ERROR(line) if r.growth > tolerance else line)
+
+    def _markdown(self, results, scales, tolerance):
+        scale_txt = "/".join(str(s) for s in scales)
+        lines = [
+            f"# Query budget ({scale_txt} rows per facility)",
+            "",
+            "| Endpoint | Rows | Queries | SQL ms | Serialize ms | Total ms | Verdict |",
+            "|---|---|---|---|---|---|---|",
+        ]
+        for r in results:
+            lines.append(
+                f"| `{r.endpoint.key}` | {_cells(r, 'rows')} | {_cells(r, 'queries')} | {_cells(r, 'sql_ms')} "
+                f"| {_cells(r, 'serialize_ms')} | {_cells(r, 'total_ms')} | {self._verdict(r, tolerance)} |"
+            )
+        return "\n".join(lines) + "\n"
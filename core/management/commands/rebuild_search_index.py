@@ -0,0 +1,44 @@
+# core/management/commands/rebuild_search_index.py
+"""
+Rebuild SearchDocument rows used by list-endpoint search.
+
+Signals keep the index current for normal saves; run this after bulk imports
+or any `.update()` on indexed models.
+
+Usage:
+    python manage.py rebuild_search_index                 # all kinds
+    python manage.py rebuild_search_index --kind patient  # one kind
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search index (patients, providers, drugs, lab tests)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--kind",
+            action="append",
+            help="Only rebuild this kind (repeatable). Default: all kinds",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Insert documents in batches of this size (default: 1000)",
+        )
+
+    def handle(self, *args, **options):
+        from core.search import INDEXES, rebuild
+
+        kinds = options["kind"] or list(INDEXES)
+        unknown = set(kinds) - set(INDEXES)
+        if unknown:
+            raise CommandError(f"Unknown kind(s): {', '.join(sorted(unknown))}. Choose from {', '.join(INDEXES)}")
+
+        for kind in kinds:
+            written = rebuild(kind, batch_size=options["batch_size"])
+            self.stdout.write(f"{kind}: {written} documents")
+
+        self.stdout.write(self.style.SUCCESS("Search index rebuilt"))
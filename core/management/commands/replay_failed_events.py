@@ -0,0 +1,70 @@
+# core/management/commands/replay_failed_events.py
+"""
+Re-run domain event handlers that ended up in the FailedEvent dead-letter
+table (see core.events).
+
+Each unresolved row is replayed once, synchronously. Success marks the row
+resolved; failure bumps `attempts` and stores the latest error.
+
+Usage:
+    python manage.py replay_failed_events
+    python manage.py replay_failed_events --event-type appointments.AppointmentBooked
+    python manage.py replay_failed_events --id 12 --id 13
+    python manage.py replay_failed_events --dry-run
+"""
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+
+class Command(BaseCommand):
+    help = "Replay failed domain event handlers (dead letters)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--event-type", help="Only replay this event type")
+        parser.add_argument("--id", type=int, action="append", help="Only replay these FailedEvent ids (repeatable)")
+        parser.add_argument("--limit", type=int, default=500, help="Max rows to replay (default: 500)")
+        parser.add_argument("--dry-run", action="store_true", help="List what would be replayed")
+
+    def handle(self, *args, **options):
+        from core.events import event_class
+        from core.models import FailedEvent
+
+        qs = FailedEvent.objects.filter(resolved_at__isnull=True).order_by("created_at", "id")
+        if options["event_type"]:
+            qs = qs.filter(event_type=options["event_type"])
+        if options["id"]:
+            qs = qs.filter(id__in=options["id"])
+        rows = list(qs[: options["limit"]])
+
+        ok = failed = 0
+        for row in rows:
+            if options["dry_run"]:
+                self.stdout.write(f"#{row.id} {row.event_type} -> {row.handler} ({row.attempts} attempts)")
+                continue
+
+            cls = event_class(row.event_type)
+            try:
+                if cls is None:
+                    raise LookupError(f"Unknown event type {row.event_type}")
+                fn = import_string(row.handler)
+                fn(cls(**row.payload))
+            except Exception as exc:
+                row.attempts += 1
+                row.error = f"{type(exc).__name__}: {exc}"[:4000]
+                row.last_attempt_at = timezone.now()
+                row.save(update_fields=["attempts", "error", "last_attempt_at"])
+                failed += 1
+                continue
+
+            row.attempts += 1
+            row.last_attempt_at = row.resolved_at = timezone.now()
+            row.save(update_fields=["attempts", "last_attempt_at", "resolved_at"])
+            ok += 1
+
+        if options["dry_run"]:
+            self.stdout.write(f"{len(rows)} failed event(s) pending")
+            return
+        style = self.style.SUCCESS if not failed else self.style.WARNING
+        self.stdout.write(style(f"Replayed {ok}, still failing {failed}"))
@@ -0,0 +1,153 @@
+import re
+import unicodedata
+
+from django.db import migrations
+
+POSTGRES_SQL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS core_searchdoc_trgm_idx ON core_searchdocument USING gin (document gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS core_searchdoc_tsv_idx ON core_searchdocument USING gin (to_tsvector('simple', document))",
+]
+POSTGRES_REVERSE = [
+    "DROP INDEX IF EXISTS core_searchdoc_tsv_idx",
+    "DROP INDEX IF EXISTS core_searchdoc_trgm_idx",
+]
+
+SQLITE_SQL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS core_searchdocument_fts USING fts5("
+    "document, content='core_searchdocument', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS core_searchdocument_fts_vocab USING fts5vocab(core_searchdocument_fts, 'row')",
+    "CREATE TRIGGER IF NOT EXISTS core_searchdocument_ai AFTER INSERT ON core_searchdocument BEGIN "
+    "INSERT INTO core_searchdocument_fts(rowid, document) VALUES (new.id, new.document); END",
+    "CREATE TRIGGER IF NOT EXISTS core_searchdocument_ad AFTER DELETE ON core_searchdocument BEGIN "
+    "INSERT INTO core_searchdocument_fts(core_searchdocument_fts, rowid, document) VALUES ('delete', old.id, old.document); END",
+    "CREATE TRIGGER IF NOT EXISTS core_searchdocument_au AFTER UPDATE ON core_searchdocument BEGIN "
+    "INSERT INTO core_searchdocument_fts(core_searchdocument_fts, rowid, document) VALUES ('delete', old.id, old.document); "
+    "INSERT INTO core_searchdocument_fts(rowid, document) VALUES (new.id, new.document); END",
+]
+SQLITE_REVERSE = [
+    "DROP TRIGGER IF EXISTS core_searchdocument_au",
+    "DROP TRIGGER IF EXISTS core_searchdocument_ad",
+    "DROP TRIGGER IF EXISTS core_searchdocument_ai",
+    "DROP TABLE IF EXISTS core_searchdocument_fts_vocab",
+    "DROP TABLE IF EXISTS core_searchdocument_fts",
+]
+
+
+def _run(schema_editor, statements):
+    for sql in statements:
+        schema_editor.execute(sql)
+
+
+def create_backend_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        _run(schema_editor, POSTGRES_SQL)
+    elif vendor == "sqlite":
+        _run(schema_editor, SQLITE_SQL)
+
+
+def drop_backend_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        _run(schema_editor, POSTGRES_REVERSE)
+    elif vendor == "sqlite":
+        _run(schema_editor, SQLITE_REVERSE)
+
+
+# Frozen copy of the core.search document builders at the time of this
+# migration; later changes to core.search are picked up by rebuild_search_index.
+_TOKEN_RE = re.compile(r"[^0-9a-z]+")
+
+
+def _normalize(text):
+    if text is None:
+        return ""
+    text = unicodedata.normalize("NFKD", str(text))
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return _TOKEN_RE.sub(" ", text.lower()).strip()
+
+
+def _phone_variants(phone):
+    digits = re.sub(r"\D", "", phone or "")
+    if not digits:
+        return []
+    out = [digits]
+    if digits.startswith("234") and len(digits) > 10:
+        out.append("0" + digits[3:])
+    return out
+
+
+def _document(*parts):
+    tokens = []
+    for part in parts:
+        if isinstance(part, (list, tuple)):
+            tokens.extend(_normalize(p) for p in part)
+        else:
+            tokens.append(_normalize(part))
+    return " ".join(t for t in tokens if t)
+
+
+def _patient_document(p):
+    return _document(
+        p.first_name, p.middle_name, p.last_name, p.email,
+        _phone_variants(p.phone), p.insurance_number, str(p.pk),
+    )
+
+
+def _provider_document(prof):
+    user = prof.user
+    return _document(
+        getattr(user, "first_name", ""), getattr(user, "last_name", ""),
+        prof.business_name, prof.license_number, _phone_variants(prof.phone), prof.bio,
+    )
+
+
+def _drug_document(d):
+    return _document(d.name, d.code, d.strength, d.form, d.route)
+
+
+def _labtest_document(t):
+    return _document(t.name, t.code, t.unit)
+
+
+# (kind, app_label, model_name, select_related, build)
+DOCUMENTS = [
+    ("patient", "patients", "Patient", (), _patient_document),
+    ("provider", "providers", "ProviderProfile", ("user",), _provider_document),
+    ("drug", "pharmacy", "Drug", (), _drug_document),
+    ("labtest", "labs", "LabTest", (), _labtest_document),
+]
+
+
+def backfill(apps, schema_editor):
+    SearchDocument = apps.get_model("core", "SearchDocument")
+    for kind, app_label, model_name, select_related, build in DOCUMENTS:
+        model = apps.get_model(app_label, model_name)
+        qs = model.objects.all()
+        if select_related:
+            qs = qs.select_related(*select_related)
+        batch = []
+        for obj in qs.iterator(chunk_size=1000):
+            batch.append(SearchDocument(kind=kind, object_id=obj.pk, document=build(obj)))
+            if len(batch) >= 1000:
+                SearchDocument.objects.bulk_create(batch, ignore_conflicts=True)
+                batch = []
+        if batch:
+            SearchDocument.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+        ('patients', '0016_backfill_patientaccessgrant'),
+        ('providers', '0004_providerprofile_is_publicly_visible'),
+        ('pharmacy', '0005_stockitem_max_stock_level_stockitem_reorder_level'),
+        ('labs', '0003_labtest_created_by_labtest_facility_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_backend_indexes, drop_backend_indexes),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.7 on 2026-10-18 20:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_searchdocument_backend_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FailedEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_type', models.CharField(max_length=120)),
+                ('payload', models.JSONField(blank=True, default=dict)),
+                ('handler', models.CharField(max_length=255)),
+                ('error', models.TextField(blank=True)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_attempt_at', models.DateTimeField(blank=True, null=True)),
+                ('resolved_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['-created_at', '-id'],
+                'indexes': [models.Index(fields=['resolved_at', 'created_at'], name='core_failed_resolve_de45a8_idx'), models.Index(fields=['event_type'], name='core_failed_event_t_c131a0_idx')],
+            },
+        ),
+    ]
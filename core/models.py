@@ -1,3 +1,50 @@
 from django.db import models
 
-# Create your models here.
+
+class SearchDocument(models.Model):
+    """
+    Normalised, denormalised search text for one indexed object.
+
+    Maintained by core.search (signals + `rebuild_search_index`). The backing
+    full-text indexes are backend specific and created in migrations:
+    - PostgreSQL: pg_trgm GIN index on `document` + GIN index on its tsvector
+    - SQLite: FTS5 external-content table `core_searchdocument_fts`
+    """
+    kind = models.CharField(max_length=32)           # "patient", "provider", "drug", "labtest"
+    object_id = models.PositiveBigIntegerField()
+    document = models.TextField(blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ("kind", "object_id")
+
+    def __str__(self):
+        return f"SearchDocument({self.kind}#{self.object_id})"
+
+
+class FailedEvent(models.Model):
+    """
+    Dead letter for a domain event handler that kept failing (core.events).
+
+    One row per (event, handler) that exhausted its retries. Replayed with
+    `manage.py replay_failed_events`; `resolved_at` is set once a replay
+    succeeds.
+    """
+    event_type = models.CharField(max_length=120)    # e.g. "appointments.AppointmentBooked"
+    payload = models.JSONField(default=dict, blank=True)
+    handler = models.CharField(max_length=255)       # dotted path of the handler function
+    error = models.TextField(blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_attempt_at = models.DateTimeField(null=True, blank=True)
+    resolved_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at", "-id"]
+        indexes = [
+            models.Index(fields=["resolved_at", "created_at"]),
+            models.Index(fields=["event_type"]),
+        ]
+
+    def __str__(self):
+        return f"FailedEvent({self.event_type} -> {self.handler})"
@@ -0,0 +1,277 @@
+"""
+core.prefetch
+
+Declarative prefetch plans for read serializers.
+
+A serializer declares the relations its SerializerMethodFields walk in its
+Meta (mixins may carry a Meta of their own; every Meta in the MRO counts):
+
+    class ChargeReadSerializer(serializers.ModelSerializer):
+        class Meta:
+            model = Charge
+            fields = [...]
+            select_related = ("patient__hmo", "created_by")
+            prefetch_related = ("allocations",)
+
+and plan_for() adds what the declared fields already imply:
+
+- a dotted source ("service.code") joins the relation it walks;
+- a nested serializer joins its relation (prefetches it with many=True) and
+  its own plan is applied below that path;
+- a many-related field prefetches its relation.
+
+Relations below a to-many are loaded by the Prefetch of that relation
+(Prefetch("allocations", queryset=...select_related("charge__service"))),
+so a nested list costs one query per page, not one per row.
+
+Paths are checked against the models when the plan is built (once per
+serializer class): a path that is not a chain of relations raises
+ImproperlyConfigured.
+
+PrefetchPlanMixin applies the plan of get_serializer_class() to the queryset
+list/retrieve serialize (filter_queryset(), which both call on
+get_queryset()), so adding a field to a serializer cannot silently bring
+back per-row queries. Views that serialize a hand-built queryset call
+apply_plan() themselves.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from django.db.models import Prefetch, QuerySet
+from rest_framework import serializers
+
+
+@dataclass
+class Plan:
+    model: type
+    select_related: list = field(default_factory=list)
+    prefetch: dict = field(default_factory=dict)  # to-many path -> Plan of its model
+    extra: list = field(default_factory=list)  # Prefetch objects declared as-is
+
+    def __bool__(self):
+        return bool(self.select_related or self.prefetch or self.extra)
+
+    def select(self, path):
+        if path and path not in self.select_related:
+            self.select_related.append(path)
+
+    def many(self, path, model) -> Plan:
+        return self.prefetch.setdefault(path, Plan(model))
+
+    def merge(self, other: Plan, prefix=""):
+        """Add `other` (a plan of the relation at `prefix`) to this plan."""
+        join = (lambda path: f"{prefix}__{path}") if prefix else (lambda path: path)
+        for path in other.select_related:
+            self.select(join(path))
+        for path, inner in other.prefetch.items():
+            self.many(join(path), inner.model).merge(inner)
+        for lookup in other.extra:
+            self.extra.append(
+                Prefetch(join(lookup.prefetch_through), queryset=lookup.queryset, to_attr=lookup.to_attr)
+                if prefix
+                else lookup
+            )
+
+    def lookups(self, seen=frozenset()) -> list:
+        """prefetch_related() lookups; paths in `seen` are prefetched already, so only extend them."""
+        lookups = []
+        for path, inner in self.prefetch.items():
+            if path in seen or not inner:
+                lookups.append(path)
+                lookups.extend(f"{path}__{lookup}" for lookup in inner.flat())
+            else:
+                lookups.append(Prefetch(path, queryset=inner.apply(inner.model._default_manager.all())))
+        return lookups + list(self.extra)
+
+    def flat(self) -> list:
+        """The plan as plain lookup strings (for use below an existing Prefetch)."""
+        lookups = list(self.select_related)
+        for path, inner in self.prefetch.items():
+            lookups.append(path)
+            lookups.extend(f"{path}__{lookup}" for lookup in inner.flat())
+        return lookups
+
+    def apply(self, qs):
+        if self.select_related:
+            qs = qs.select_related(*self.select_related)
+        lookups = self.lookups(_prefetched_paths(qs))
+        return qs.prefetch_related(*lookups) if lookups else qs
+
+
+def _prefetched_paths(qs) -> set:
+    """Every path (and parent path) the queryset already prefetches."""
+    seen = set()
+    for lookup in qs._prefetch_related_lookups:
+        path = lookup.prefetch_to if isinstance(lookup, Prefetch) else lookup
+        parts = path.split("__")
+        seen.update("__".join(parts[: i + 1]) for i in range(len(parts)))
+    return seen
+
+
+# ---------------------------------------------------------------------------
+# Relation paths
+# ---------------------------------------------------------------------------
+
+def _relation(model, name):
+    """(lookup name, related model, to-many) of a relation attribute, or None."""
+    try:
+        f = model._meta.get_field(name)
+    except FieldDoesNotExist:
+        # reverse relation without related_name: attribute is the accessor (`x_set`)
+        f = next(
+            (r for r in model._meta.related_objects if r.get_accessor_name() == name),
+            None,
+        )
+    if f is None or not f.is_relation or f.related_model is None:
+        return None
+    lookup = f.get_accessor_name() if f.auto_created and not f.concrete else f.name
+    return lookup, f.related_model, bool(f.one_to_many or f.many_to_many)
+
+
+def _steps(model, attrs) -> list:
+    """Leading relations of an attribute chain as (lookup, model, to-many)."""
+    steps = []
+    for name in attrs:
+        rel = _relation(model, name)
+        if rel is None:
+            break
+        steps.append(rel)
+        model = rel[1]
+    return steps
+
+
+def _add(plan: Plan, steps, nested: Plan | None = None):
+    """Load the relation chain `steps` from plan.model (and `nested` below it)."""
+    for i, (_, model, many) in enumerate(steps):
+        if many:
+            path = "__".join(lookup for lookup, _, _ in steps[: i + 1])
+            _add(plan.many(path, model), steps[i + 1:], nested)
+            return
+    path = "__".join(lookup for lookup, _, _ in steps)
+    plan.select(path)
+    if nested:
+        plan.merge(nested, path)
+
+
+def _declared(serializer_class, attr) -> list:
+    lookups = []
+    for klass in reversed(serializer_class.__mro__):
+        meta = klass.__dict__.get("Meta")
+        for lookup in getattr(meta, attr, None) or ():
+            if lookup not in lookups:
+                lookups.append(lookup)
+    return lookups
+
+
+def _declared_steps(serializer_class, model, path) -> list:
+    parts = path.split("__")
+    steps = _steps(model, parts)
+    if len(steps) != len(parts):
+        raise ImproperlyConfigured(
+            f"{serializer_class.__name__}.Meta: '{path}' is not a relation path of {model.__name__}"
+        )
+    return steps
+
+
+# ---------------------------------------------------------------------------
+# Plans
+# ---------------------------------------------------------------------------
+
+def _declared_plan(cls, model) -> Plan:
+    plan = Plan(model)
+    for path in _declared(cls, "select_related"):
+        _add(plan, _declared_steps(cls, model, path))
+    for lookup in _declared(cls, "prefetch_related"):
+        if isinstance(lookup, Prefetch):
+            _declared_steps(cls, model, lookup.prefetch_through)
+            plan.extra.append(lookup)
+            continue
+        steps = _declared_steps(cls, model, lookup)
+        if not any(many for _, _, many in steps):
+            raise ImproperlyConfigured(
+                f"{cls.__name__}.Meta: '{lookup}' is not a to-many relation; use select_related"
+            )
+        _add(plan, steps)
+    return plan
+
+
+def _build(serializer, model) -> Plan:
+    plan = _declared_plan(type(serializer), model)
+    try:
+        fields = serializer.fields
+    except Exception:
+        # fields need a request or instance: declared paths only
+        return plan
+
+    for f in fields.values():
+        if f.write_only:
+            continue
+        attrs = f.source_attrs
+        steps = _steps(model, attrs)
+        if isinstance(f, serializers.BaseSerializer):
+            child = f.child if isinstance(f, serializers.ListSerializer) else f
+            if len(steps) != len(attrs):
+                continue  # property or method source: nothing to load
+            target = steps[-1][1] if steps else model
+            nested = _build(child, target) if isinstance(child, serializers.BaseSerializer) else None
+            if steps:
+                _add(plan, steps, nested)
+            elif nested:
+                plan.merge(nested)  # source="*"
+        elif isinstance(f, serializers.RelatedField) and f.use_pk_only_optimization() and len(steps) == len(attrs):
+            _add(plan, steps[:-1])  # reads the foreign key column only
+        elif steps:
+            _add(plan, steps)
+    return plan
+
+
+_plans = {}
+
+
+def plan_for(serializer_class) -> Plan | None:
+    """The (cached) plan of a ModelSerializer class, None for other serializers."""
+    if serializer_class in _plans:
+        return _plans[serializer_class]
+    model = getattr(getattr(serializer_class, "Meta", None), "model", None)
+    if model is None:
+        plan = None
+    else:
+        try:
+            serializer = serializer_class(context={})
+        except Exception:
+            # no instance to read the fields from: declared paths only
+            plan = _declared_plan(serializer_class, model)
+        else:
+            plan = _build(serializer, model)
+    _plans[serializer_class] = plan
+    return plan
+
+
+def apply_plan(qs, serializer_class):
+    """
+    `qs` with the serializer's plan applied. Left as is when it is not a
+    queryset of the serializer's model, or when the plan cannot apply
+    (values(), union(), only()/defer()).
+    """
+    if not isinstance(qs, QuerySet) or serializer_class is None:
+        return qs
+    plan = plan_for(serializer_class)
+    if not plan or not issubclass(qs.model, plan.model):
+        return qs
+    query = qs.query
+    if qs._fields is not None or query.combinator or query.deferred_loading[0]:
+        return qs
+    return plan.apply(qs)
+
+
+class PrefetchPlanMixin:
+    """
+    ViewSet mixin: list/retrieve load what get_serializer_class() declares.
+    List it before the DRF bases.
+    """
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        return apply_plan(queryset, self.get_serializer_class())
@@ -0,0 +1,262 @@
+"""
+core.querybench
+
+Query-budget harness for list and retrieve endpoints (bench_queries).
+
+- discover() walks the URL conf for DRF list/retrieve routes (router
+  viewsets and generic views).
+- run() hits each route as one user at growing dataset sizes
+  (core.benchdata) and records per request: rows returned, query count,
+  SQL time, time spent in serializer `.data` and total time. Queries run
+  lazily while serializing (FK walks in SerializerMethodFields) count in
+  both the query count and the serialization time.
+- An endpoint whose query count grows with the dataset is an N+1: its
+  `growth` is the number of extra queries between the smallest and the
+  largest non-empty sample.
+"""
+import functools
+import re
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
+from rest_framework import serializers
+
+LIST, RETRIEVE = "list", "retrieve"
+MAX_PAGE_SIZE = 1000
+
+
+@dataclass
+class Endpoint:
+    name: str  # URL name, e.g. "encounter-list"
+    route: str  # e.g. "api/encounters/<pk>/"
+    action: str  # LIST or RETRIEVE
+    view: str  # dotted view class
+    kwargs: tuple = ()  # URL kwargs other than pk
+    page_param: str = ""  # page-size query parameter, if paginated
+
+    @property
+    def key(self) -> str:
+        return f"{self.route} [{self.action}]"
+
+
+@dataclass
+class Sample:
+    scale: int
+    status: int
+    rows: int | None
+    queries: int
+    sql_ms: float
+    serialize_ms: float
+    total_ms: float
+
+
+@dataclass
+class Result:
+    endpoint: Endpoint
+    samples: list = field(default_factory=list)
+    skipped: str = ""
+
+    @property
+    def growth(self) -> int:
+        """Extra queries from the smallest to the largest non-empty sample."""
+        ok = [s for s in self.samples if s.status < 400 and s.rows]
+        if len(ok) < 2:
+            return 0
+        return max(0, ok[-1].queries - ok[0].queries)
+
+    @property
+    def errors(self) -> list:
+        return [s for s in self.samples if s.status >= 500]
+
+    def as_dict(self) -> dict:
+        return {
+            **asdict(self.endpoint),
+            "key": self.endpoint.key,
+            "growth": self.growth,
+            "skipped": self.skipped,
+            "samples": [asdict(s) for s in self.samples],
+        }
+
+
+# ---------------------------------------------------------------------------
+# Discovery
+# ---------------------------------------------------------------------------
+
+def _route(prefix, pattern) -> str:
+    route = prefix + str(pattern.pattern)
+    route = re.sub(r"\(\?P<(\w+)>[^)]*\)", r"<\1>", route)
+    return route.replace("^", "").replace("$", "").replace("\\", "")
+
+
+def _walk(patterns, prefix=""):
+    for p in patterns:
+        if isinstance(p, URLResolver):
+            yield from _walk(p.url_patterns, prefix + str(p.pattern))
+        elif isinstance(p, URLPattern):
+            yield prefix, p
+
+
+def _action(callback):
+    cls = getattr(callback, "cls", None)
+    if cls is None:
+        return None
+    actions = getattr(callback, "actions", None)
+    if actions is not None:
+        action = actions.get("get")
+        return action if action in (LIST, RETRIEVE) else None
+    if hasattr(cls, "list"):
+        return LIST
+    if hasattr(cls, "retrieve"):
+        return RETRIEVE
+    return None
+
+
+def discover(include=None, exclude=None) -> list:
+    """List/retrieve endpoints, optionally filtered by regexes on the route."""
+    endpoints, seen = [], set()
+    for prefix, pattern in _walk(get_resolver().url_patterns):
+        action = _action(pattern.callback)
+        if action is None or not pattern.name or pattern.name in seen:
+            continue
+        kwargs = set(pattern.pattern.regex.groupindex)
+        if "format" in kwargs:
+            continue  # format-suffix duplicate of a route
+        if (action == RETRIEVE) != ("pk" in kwargs):
+            continue
+        route = _route(prefix, pattern)
+        if include and not any(re.search(p, route) for p in include):
+            continue
+        if exclude and any(re.search(p, route) for p in exclude):
+            continue
+        seen.add(pattern.name)
+        cls = pattern.callback.cls
+        paginator = getattr(cls, "pagination_class", None)
+        endpoints.append(Endpoint(
+            name=pattern.name,
+            route=route,
+            action=action,
+            view=f"{cls.__module__}.{cls.__qualname__}",
+            kwargs=tuple(sorted(kwargs - {"pk"})),
+            page_param=getattr(paginator, "page_size_query_param", None) or "",
+        ))
+    return sorted(endpoints, key=lambda e: (e.route, e.action))
+
+
+# ---------------------------------------------------------------------------
+# Measurement
+# ---------------------------------------------------------------------------
+
+_timing = threading.local()
+
+
+def _timed(fget):
+    @functools.wraps(fget)
+    def wrapper(self):
+        depth = getattr(_timing, "depth", 0)
+        if depth:
+            return fget(self)
+        _timing.depth = 1
+        start = time.perf_counter()
+        try:
+            return fget(self)
+        finally:
+            _timing.elapsed += time.perf_counter() - start
+            _timing.depth = 0
+
+    return wrapper
+
+
+@contextmanager
+def serialization_timer():
+    """Seconds spent in top-level serializer `.data` (yields a getter)."""
+    originals = {cls: cls.__dict__["data"] for cls in (serializers.Serializer, serializers.ListSerializer)}
+    _timing.elapsed, _timing.depth = 0.0, 0
+    for cls, prop in originals.items():
+        setattr(cls, "data", property(_timed(prop.fget)))
+    try:
+        yield lambda: _timing.elapsed
+    finally:
+        for cls, prop in originals.items():
+            setattr(cls, "data", prop)
+
+
+def _rows(data):
+    if isinstance(data, list):
+        return len(data)
+    if isinstance(data, dict):
+        if isinstance(data.get("results"), list):
+            return len(data["results"])
+        return 1
+    return None
+
+
+def _first_id(data):
+    rows = data.get("results") if isinstance(data, dict) else data
+    if isinstance(rows, list) and rows and isinstance(rows[0], dict):
+        return rows[0].get("id")
+    return None
+
+
+def measure(client, url, params, scale) -> tuple:
+    """(Sample, response data) of one GET."""
+    with serialization_timer() as serialize_s:
+        with CaptureQueriesContext(connection) as ctx:
+            start = time.perf_counter()
+            response = client.get(url, params)
+            total = time.perf_counter() - start
+    data = getattr(response, "data", None)
+    sample = Sample(
+        scale=scale,
+        status=response.status_code,
+        rows=_rows(data) if response.status_code < 400 else None,
+        queries=len(ctx.captured_queries),
+        sql_ms=round(sum(float(q["time"]) for q in ctx.captured_queries) * 1000, 2),
+        serialize_ms=round(serialize_s() * 1000, 2),
+        total_ms=round(total * 1000, 2),
+    )
+    return sample, data
+
+
+def run(endpoints, data, scales, *, warmup=True) -> list:
+    """
+    Measure every endpoint at every scale. `data` is a set-up BenchData;
+    it is grown to each scale in turn.
+    """
+    from rest_framework.test import APIClient
+
+    client = APIClient(raise_request_exception=False)
+    client.force_authenticate(user=data.persona)
+    url_kwargs = data.url_kwargs()
+    results = {e.key: Result(e) for e in endpoints}
+
+    for scale in scales:
+        data.grow(scale)
+        first_ids = {}  # view -> id of a row from its list endpoint
+        for endpoint in sorted(endpoints, key=lambda e: e.action):  # lists before retrieves
+            result = results[endpoint.key]
+            missing = [k for k in endpoint.kwargs if k not in url_kwargs]
+            if missing:
+                result.skipped = f"no value for URL kwarg(s) {', '.join(missing)}"
+                continue
+            kwargs = {k: url_kwargs[k] for k in endpoint.kwargs}
+            if endpoint.action == RETRIEVE:
+                pk = first_ids.get(endpoint.view)
+                if pk is None:
+                    result.skipped = "no row id from the list endpoint"
+                    continue
+                kwargs["pk"] = pk
+            url = reverse(endpoint.name, kwargs=kwargs)
+            params = {endpoint.page_param: MAX_PAGE_SIZE} if endpoint.page_param else {}
+            if warmup:
+                client.get(url, params)  # one-time work (caches, lazy settings)
+            sample, payload = measure(client, url, params, scale)
+            result.samples.append(sample)
+            result.skipped = ""
+            if endpoint.action == LIST and sample.status < 400:
+                first_ids[endpoint.view] = _first_id(payload)
+    return list(results.values())
@@ -0,0 +1,308 @@
+"""
+core.search
+
+Small full-text search engine shared by list endpoints (patients, providers,
+drugs, lab tests).
+
+Every indexed object gets one SearchDocument row holding a normalised text
+document (lower-cased, accent-free tokens, phone numbers as digits). Matching
+is done by the database:
+
+- PostgreSQL: tsvector prefix match (`tok:*`) OR pg_trgm word similarity for
+  typos, ranked by ts_rank + word_similarity.
+- SQLite (local dev): FTS5 prefix match ranked by bm25 (the FTS5 `rank`
+  column); when nothing matches, query tokens are corrected against the FTS5
+  vocabulary (difflib) for fuzzy matching.
+- Anything else: AND of `icontains` per token.
+
+Views call `search_queryset(qs, kind, text)`, which keeps the view's own
+scoping and adds a `search_rank` annotation + ordering.
+"""
+import difflib
+import re
+import unicodedata
+from dataclasses import dataclass, field
+from typing import Callable
+
+from django.apps import apps
+from django.db import connection, transaction
+from django.db.models import FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.signals import post_save, post_delete
+
+from .models import SearchDocument
+
+FTS_TABLE = "core_searchdocument_fts"
+FTS_VOCAB_TABLE = "core_searchdocument_fts_vocab"
+
+_TOKEN_RE = re.compile(r"[^0-9a-z]+")
+_PHONE_QUERY_RE = re.compile(r"^[\d\s+\-().]+$")
+
+
+# ---------------------------------------------------------------------------
+# Normalisation
+# ---------------------------------------------------------------------------
+
+def normalize(text) -> str:
+    """Lower-case, strip accents and collapse punctuation to single spaces."""
+    if text is None:
+        return ""
+    text = unicodedata.normalize("NFKD", str(text))
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return _TOKEN_RE.sub(" ", text.lower()).strip()
+
+
+def phone_variants(phone) -> list[str]:
+    """Digits-only phone plus its local (0-prefixed) form for +234 numbers."""
+    digits = re.sub(r"\D", "", phone or "")
+    if not digits:
+        return []
+    out = [digits]
+    if digits.startswith("234") and len(digits) > 10:
+        out.append("0" + digits[3:])
+    return out
+
+
+def query_tokens(text) -> list[str]:
+    text = (text or "").strip()
+    if _PHONE_QUERY_RE.match(text) and re.search(r"\d", text):
+        digits = re.sub(r"\D", "", text)
+        return [digits] if digits else []
+    return normalize(text).split()
+
+
+def build_document(*parts) -> str:
+    tokens = []
+    for part in parts:
+        if isinstance(part, (list, tuple)):
+            tokens.extend(normalize(p) for p in part)
+        else:
+            tokens.append(normalize(part))
+    return " ".join(t for t in tokens if t)
+
+
+# ---------------------------------------------------------------------------
+# Document builders (registered per kind)
+# ---------------------------------------------------------------------------
+
+def _patient_document(p) -> str:
+    return build_document(
+        p.first_name, p.middle_name, p.last_name,
+        p.email,
+        phone_variants(p.phone),
+        p.insurance_number,
+        str(p.pk),
+    )
+
+
+def _provider_document(prof) -> str:
+    user = prof.user
+    return build_document(
+        getattr(user, "first_name", ""), getattr(user, "last_name", ""),
+        prof.business_name, prof.license_number,
+        phone_variants(prof.phone),
+        prof.bio,
+    )
+
+
+def _drug_document(d) -> str:
+    return build_document(d.name, d.code, d.strength, d.form, d.route)
+
+
+def _labtest_document(t) -> str:
+    return build_document(t.name, t.code, t.unit)
+
+
+@dataclass(frozen=True)
+class IndexSpec:
+    model_label: str
+    build: Callable
+    select_related: tuple = field(default_factory=tuple)
+
+    @property
+    def model(self):
+        return apps.get_model(self.model_label)
+
+
+INDEXES = {
+    "patient": IndexSpec("patients.Patient", _patient_document),
+    "provider": IndexSpec("providers.ProviderProfile", _provider_document, ("user",)),
+    "drug": IndexSpec("pharmacy.Drug", _drug_document),
+    "labtest": IndexSpec("labs.LabTest", _labtest_document),
+}
+
+
+# ---------------------------------------------------------------------------
+# Index maintenance
+# ---------------------------------------------------------------------------
+
+def index_object(kind, obj):
+    SearchDocument.objects.update_or_create(
+        kind=kind, object_id=obj.pk,
+        defaults={"document": INDEXES[kind].build(obj)},
+    )
+
+
+def remove_object(kind, pk):
+    SearchDocument.objects.filter(kind=kind, object_id=pk).delete()
+
+
+def rebuild(kind, *, batch_size=1000) -> int:
+    spec = INDEXES[kind]
+    qs = spec.model._default_manager.all()
+    if spec.select_related:
+        qs = qs.select_related(*spec.select_related)
+
+    written = 0
+    with transaction.atomic():
+        SearchDocument.objects.filter(kind=kind).delete()
+        batch = []
+        for obj in qs.iterator(chunk_size=batch_size):
+            batch.append(SearchDocument(kind=kind, object_id=obj.pk, document=spec.build(obj)))
+            if len(batch) >= batch_size:
+                SearchDocument.objects.bulk_create(batch)
+                written += len(batch)
+                batch = []
+        if batch:
+            SearchDocument.objects.bulk_create(batch)
+            written += len(batch)
+    return written
+
+
+def _kind_for(sender):
+    label = sender._meta.label
+    for kind, spec in INDEXES.items():
+        if spec.model_label == label:
+            return kind
+    return None
+
+
+def _on_save(sender, instance, raw=False, **kwargs):
+    kind = _kind_for(sender)
+    if kind and not raw:
+        index_object(kind, instance)
+
+
+def _on_delete(sender, instance, **kwargs):
+    kind = _kind_for(sender)
+    if kind:
+        remove_object(kind, instance.pk)
+
+
+def _on_user_save(sender, instance, raw=False, **kwargs):
+    # Provider documents embed the user's name.
+    if raw:
+        return
+    ProviderProfile = INDEXES["provider"].model
+    prof = ProviderProfile._default_manager.filter(user_id=instance.pk).first()
+    if prof is not None:
+        prof.user = instance
+        index_object("provider", prof)
+
+
+def connect_signals():
+    for kind, spec in INDEXES.items():
+        post_save.connect(_on_save, sender=spec.model, dispatch_uid=f"search:{kind}:save")
+        post_delete.connect(_on_delete, sender=spec.model, dispatch_uid=f"search:{kind}:delete")
+    from django.contrib.auth import get_user_model
+    post_save.connect(_on_user_save, sender=get_user_model(), dispatch_uid="search:provider:user")
+
+
+# ---------------------------------------------------------------------------
+# Query backends
+# ---------------------------------------------------------------------------
+
+class PostgresBackend:
+    def match_sql(self, kind, tokens, raw_text):
+        tsquery = " & ".join(f"{tok}:*" for tok in tokens)
+        text = " ".join(tokens)
+        sql = (
+            "SELECT object_id, "
+            "ts_rank(to_tsvector('simple', document), to_tsquery('simple', %s)) "
+            "+ word_similarity(%s, document) AS rank "
+            "FROM core_searchdocument "
+            "WHERE kind = %s AND ("
+            "to_tsvector('simple', document) @@ to_tsquery('simple', %s) "
+            "OR %s <%% document)"
+        )
+        return sql, [tsquery, text, kind, tsquery, text]
+
+
+class SqliteBackend:
+    def _match_expr(self, tokens):
+        return " AND ".join(f'"{tok}"*' for tok in tokens)
+
+    def _has_hits(self, kind, expr):
+        with connection.cursor() as cur:
+            cur.execute(
+                f"SELECT 1 FROM {FTS_TABLE} f JOIN core_searchdocument d ON d.id = f.rowid "
+                f"WHERE {FTS_TABLE} MATCH %s AND d.kind = %s LIMIT 1",
+                [expr, kind],
+            )
+            return cur.fetchone() is not None
+
+    def _correct(self, tokens):
+        """Replace unknown tokens with the closest indexed term (fuzzy match)."""
+        with connection.cursor() as cur:
+            cur.execute(f"SELECT term FROM {FTS_VOCAB_TABLE}")
+            vocab = [row[0] for row in cur.fetchall()]
+        out = []
+        for tok in tokens:
+            if any(term.startswith(tok) for term in vocab):
+                out.append(tok)
+                continue
+            close = difflib.get_close_matches(tok, vocab, n=1, cutoff=0.7)
+            out.append(close[0] if close else tok)
+        return out
+
+    def match_sql(self, kind, tokens, raw_text):
+        expr = self._match_expr(tokens)
+        if not self._has_hits(kind, expr):
+            expr = self._match_expr(self._correct(tokens))
+        sql = (
+            f"SELECT d.object_id AS object_id, -{FTS_TABLE}.rank AS rank "
+            f"FROM {FTS_TABLE} JOIN core_searchdocument d ON d.id = {FTS_TABLE}.rowid "
+            f"WHERE {FTS_TABLE} MATCH %s AND d.kind = %s"
+        )
+        return sql, [expr, kind]
+
+
+def _backend():
+    if connection.vendor == "postgresql":
+        return PostgresBackend()
+    if connection.vendor == "sqlite":
+        return SqliteBackend()
+    return None
+
+
+def search_queryset(qs, kind, text):
+    """
+    Restrict `qs` (a queryset of INDEXES[kind].model) to objects matching
+    `text`, annotated with `search_rank` and ordered best-first.
+    """
+    tokens = query_tokens(text)
+    if not tokens:
+        return qs
+
+    backend = _backend()
+    if backend is None:
+        q = Q()
+        for tok in tokens:
+            q &= Q(document__icontains=tok)
+        ids = SearchDocument.objects.filter(q, kind=kind).values("object_id")
+        return qs.filter(pk__in=ids).annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+    sql, params = backend.match_sql(kind, tokens, text)
+    model = qs.model
+    pk_col = f'"{model._meta.db_table}"."{model._meta.pk.column}"'
+    return (
+        qs.filter(pk__in=RawSQL(f"SELECT object_id FROM ({sql}) _m", params))
+        .annotate(
+            search_rank=RawSQL(
+                f"(SELECT MAX(rank) FROM ({sql}) _r WHERE _r.object_id = {pk_col})",
+                params,
+                output_field=FloatField(),
+            )
+        )
+        .order_by("-search_rank", *(qs.query.order_by or ()))
+    )
@@ -0,0 +1,169 @@
+"""
+core.uploads
+
+Streaming multipart uploads (FILE_UPLOAD_HANDLERS).
+
+StreamingUploadHandler replaces Django's memory + temporary-file handlers
+and makes ONE pass over each uploaded file while the request is parsed:
+- the per-file size limit is enforced as bytes arrive (413, nothing more is
+  buffered once the limit is crossed);
+- sha256 is computed on the fly (`uploaded.sha256`, reused by
+  attachments.services.blobs instead of re-reading the file);
+- the type is sniffed from the first bytes (`uploaded.sniffed_type`, "" if
+  unknown);
+- files stay in memory up to FILE_UPLOAD_MAX_MEMORY_SIZE and are spooled
+  to a temporary file beyond that.
+
+The default limit is FILE_UPLOAD_MAX_BYTES; endpoints tighten it with
+@upload_limit(max_bytes). Importers read CSV through text_reader(), a
+streaming text view of the upload instead of `.read().decode()`.
+"""
+import functools
+import hashlib
+import io
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.files.uploadedfile import InMemoryUploadedFile, TemporaryUploadedFile
+from django.core.files.uploadhandler import FileUploadHandler
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+SNIFF_BYTES = 2048
+
+# (signature, offset, mime type); checked in order
+_SIGNATURES = [
+    (b"\x89PNG\r\n\x1a\n", 0, "image/png"),
+    (b"\xff\xd8\xff", 0, "image/jpeg"),
+    (b"GIF87a", 0, "image/gif"),
+    (b"GIF89a", 0, "image/gif"),
+    (b"II*\x00", 0, "image/tiff"),
+    (b"MM\x00*", 0, "image/tiff"),
+    (b"BM", 0, "image/bmp"),
+    (b"PK\x03\x04", 0, "application/zip"),  # also xlsx/docx
+    (b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1", 0, "application/x-ole-storage"),  # legacy xls/doc
+    (b"DICM", 128, "application/dicom"),
+]
+
+
+def sniff_mime(head: bytes) -> str:
+    """MIME type from a file's first bytes, or "" if unrecognised."""
+    for sig, offset, mime in _SIGNATURES:
+        if head[offset:offset + len(sig)] == sig:
+            return mime
+    # PDF readers accept the header anywhere in the first 1 KB
+    if b"%PDF-" in head[:1024]:
+        return "application/pdf"
+    return ""
+
+
+class UploadTooLarge(APIException):
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_detail = "File too large."
+    default_code = "file_too_large"
+
+
+def default_max_bytes() -> int:
+    return int(getattr(settings, "FILE_UPLOAD_MAX_BYTES", 50 * 1024 * 1024))
+
+
+class StreamingUploadHandler(FileUploadHandler):
+    """Size-limited, hashing, sniffing upload handler (see module docstring)."""
+
+    def __init__(self, request=None, max_bytes=None):
+        super().__init__(request)
+        self.max_bytes = max_bytes or default_max_bytes()
+        self.max_memory = settings.FILE_UPLOAD_MAX_MEMORY_SIZE
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.size = 0
+        self.hasher = hashlib.sha256()
+        self.head = b""
+        self.buffer = io.BytesIO()
+        self.spooled = None
+
+    def receive_data_chunk(self, raw_data, start):
+        self.size += len(raw_data)
+        if self.size > self.max_bytes:
+            self._discard()
+            raise UploadTooLarge(f"File too large (>{self.max_bytes // (1024 * 1024)}MB).")
+
+        self.hasher.update(raw_data)
+        if len(self.head) < SNIFF_BYTES:
+            self.head += raw_data[:SNIFF_BYTES - len(self.head)]
+
+        if self.spooled is None and self.size > self.max_memory:
+            self.spooled = TemporaryUploadedFile(
+                self.file_name, self.content_type, 0, self.charset, self.content_type_extra
+            )
+            self.spooled.write(self.buffer.getvalue())
+            self.buffer = None
+        (self.spooled or self.buffer).write(raw_data)
+        return None
+
+    def file_complete(self, file_size):
+        if self.spooled is not None:
+            uploaded = self.spooled
+            uploaded.flush()
+            uploaded.size = file_size
+        else:
+            uploaded = InMemoryUploadedFile(
+                file=self.buffer,
+                field_name=self.field_name,
+                name=self.file_name,
+                content_type=self.content_type,
+                size=file_size,
+                charset=self.charset,
+                content_type_extra=self.content_type_extra,
+            )
+        uploaded.seek(0)
+        uploaded.sha256 = self.hasher.hexdigest()
+        uploaded.sniffed_type = sniff_mime(self.head)
+        return uploaded
+
+    def upload_interrupted(self):
+        self._discard()
+
+    def _discard(self):
+        if getattr(self, "spooled", None) is not None:
+            self.spooled.close()  # deletes the temporary file
+            self.spooled = None
+        self.buffer = None
+
+
+def upload_limit(max_bytes):
+    """
+    View/action decorator: parse this endpoint's uploads with a
+    StreamingUploadHandler capped at `max_bytes` (int or callable).
+    Must run before request.data / request.FILES is touched.
+    """
+
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(self, request, *args, **kwargs):
+            limit = max_bytes() if callable(max_bytes) else max_bytes
+            django_request = getattr(request, "_request", request)
+            django_request.upload_handlers = [StreamingUploadHandler(django_request, max_bytes=limit)]
+            return view(self, request, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def import_max_bytes() -> int:
+    return int(getattr(settings, "IMPORT_UPLOAD_MAX_BYTES", 10 * 1024 * 1024))
+
+
+@contextmanager
+def text_reader(uploaded_file, encoding="utf-8", errors="strict"):
+    """Decoded, line-streaming view of an upload (for csv.reader / DictReader)."""
+    uploaded_file.seek(0)
+    raw = getattr(uploaded_file, "file", uploaded_file)
+    reader = io.TextIOWrapper(raw, encoding=encoding, errors=errors, newline="")
+    try:
+        yield reader
+    finally:
+        # keep the upload open for whoever owns it
+        reader.detach()
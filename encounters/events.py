@@ -0,0 +1,54 @@
+"""encounters/events.py
+
+Encounter domain events and their post-commit handlers (see core.events).
+"""
+
+from dataclasses import dataclass
+
+from core.events import DomainEvent, subscribe
+from notifications.enums import Topic, Priority
+from notifications.services.notify import notify_patient
+
+from .models import Encounter
+
+
+@dataclass(frozen=True)
+class EncounterClosed(DomainEvent):
+    encounter_id: int
+    # Set when closing the encounter moved its appointment to COMPLETED.
+    completed_appointment_id: int | None = None
+
+
+@subscribe(EncounterClosed)
+def notify_encounter_closed(event):
+    enc = Encounter.objects.select_related("patient").filter(id=event.encounter_id).first()
+    if not enc or not enc.patient:
+        return
+    notify_patient(
+        patient=enc.patient,
+        topic=Topic.ENCOUNTER_COMPLETED,
+        priority=Priority.NORMAL,
+        title="Visit completed",
+        body=f"Your encounter #{enc.id} has been closed.",
+        facility_id=enc.facility_id,
+        data={"encounter_id": enc.id},
+        action_url="/patient/encounters",
+        group_key=f"ENC:{enc.id}:CLOSED",
+        dedupe=True,
+    )
+
+
+@subscribe(EncounterClosed)
+def send_appointment_completed_email(event):
+    if not event.completed_appointment_id:
+        return
+    from appointments.models import Appointment
+    from appointments.services.notify import send_completed
+
+    appt = (
+        Appointment.objects.select_related("patient", "facility", "provider")
+        .filter(id=event.completed_appointment_id)
+        .first()
+    )
+    if appt:
+        send_completed(appt)
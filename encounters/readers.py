@@ -0,0 +1,87 @@
+"""encounters/readers.py
+
+values()-based list reader for encounters (core.fastread). Mirrors
+EncounterListSerializer field for field; keep the two in step.
+"""
+from datetime import timedelta
+
+from django.utils import timezone
+
+from core.fastread import Reader, computed
+
+from .models import LOCK_AFTER_HOURS
+from .serializers import EncounterListSerializer
+
+PROVIDER_LOOKUPS = ("provider", "provider__facility", "provider__provider_profile")
+
+
+def user_lookups(relation):
+    return (relation, f"{relation}__first_name", f"{relation}__last_name", f"{relation}__email")
+
+
+def user_names(user_ids, firsts, lasts, emails):
+    """_get_user_name() per row: full name, else email."""
+    return [
+        None if uid is None else (f"{first or ''} {last or ''}".strip() or email)
+        for uid, first, last, email in zip(user_ids, firsts, lasts, emails)
+    ]
+
+
+def independent(provider_ids, facility_ids, profile_ids):
+    """Provider with a provider profile and no facility, per row."""
+    return [
+        pid is not None and not fid and profile is not None
+        for pid, fid, profile in zip(provider_ids, facility_ids, profile_ids)
+    ]
+
+
+def requester_role(context):
+    request = context.get("request")
+    return getattr(getattr(request, "user", None), "role", None) if request else None
+
+
+class EncounterListReader(Reader):
+    serializer_class = EncounterListSerializer
+
+    @computed("locked_at", "clinical_finalized_at")
+    def locked(locked_ats, finalized_ats):
+        # Encounter.is_locked
+        due = timezone.now() - timedelta(hours=LOCK_AFTER_HOURS)
+        return [
+            bool(locked_at) or (bool(finalized_at) and finalized_at <= due)
+            for locked_at, finalized_at in zip(locked_ats, finalized_ats)
+        ]
+
+    @computed("patient", "patient__first_name", "patient__last_name")
+    def patient_name(patient_ids, firsts, lasts):
+        return [
+            None if pid is None else (f"{first or ''} {last or ''}".strip() or None)
+            for pid, first, last in zip(patient_ids, firsts, lasts)
+        ]
+
+    @computed("facility", "facility__name", *PROVIDER_LOOKUPS, context=True)
+    def facility_name(context, facility_ids, names, *provider_cols):
+        if requester_role(context) == "PATIENT":
+            hidden = independent(*provider_cols)
+        else:
+            hidden = [False] * len(facility_ids)
+        return [
+            None if hide or fid is None else name
+            for fid, name, hide in zip(facility_ids, names, hidden)
+        ]
+
+    @computed(*user_lookups("nurse"))
+    def nurse_name(*cols):
+        return user_names(*cols)
+
+    @computed(*user_lookups("provider"))
+    def provider_name(*cols):
+        return user_names(*cols)
+
+    @computed(*PROVIDER_LOOKUPS)
+    def provider_is_independent(*cols):
+        return independent(*cols)
+
+    @computed(*user_lookups("created_by"))
+    def created_by_name(*cols):
+        return user_names(*cols)
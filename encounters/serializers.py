@@ -82,6 +82,8 @@ class EncounterListSerializer(serializers.ModelSerializer):
             "locked",
             "created_at",
         )
+        # walked by the SerializerMethodFields (core.prefetch)
+        select_related = ("patient", "facility", "created_by", "nurse", "provider__provider_profile")
 
     def get_locked(self, obj):
         return obj.is_locked
@@ -166,6 +168,18 @@ class EncounterSerializer(serializers.ModelSerializer):
             "created_at",
             "updated_at",
         )
+        # walked by the SerializerMethodFields (core.prefetch)
+        select_related = (
+            "patient",
+            "facility",
+            "created_by",
+            "nurse",
+            "provider__provider_profile",
+            "paused_by",
+            "resumed_by",
+            "labs_skipped_by",
+            "clinical_finalized_by",
+        )
 
     def get_locked(self, obj):
         return obj.is_locked
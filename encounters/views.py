@@ -5,7 +5,7 @@ from rest_framework import mixins, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from accounts.authentication import HeaderJWTAuthentication as JWTAuthentication
 from accounts.models import User
 from appointments.models import Appointment
 from appointments.enums import ApptStatus
@@ -13,9 +13,14 @@ from patients.models import Patient
 from accounts.enums import UserRole
 from notifications.services.notify import notify_user, notify_patient, notify_facility_roles
 from notifications.enums import Topic, Priority
+from core.events import publish
+from core.fastread import FastListMixin
+from core.prefetch import PrefetchPlanMixin
 from .enums import EncounterStage, EncounterStatus, SoapSection, AmendmentType
+from .events import EncounterClosed
 from .models import Encounter, EncounterAmendment
 from .permissions import CanViewEncounter, IsStaff
+from .readers import EncounterListReader
 from .serializers import AmendmentSerializer, EncounterListSerializer, EncounterSerializer
 from facilities.permissions_utils import (
     has_facility_permission,
@@ -26,6 +31,8 @@ from facilities.permissions_utils import (
 )
 
 class EncounterViewSet(
+    FastListMixin,
+    PrefetchPlanMixin,
     viewsets.GenericViewSet,
     mixins.CreateModelMixin,
     mixins.RetrieveModelMixin,
@@ -35,6 +42,7 @@ class EncounterViewSet(
     queryset = Encounter.objects.select_related("patient", "facility", "created_by", "nurse", "provider", "provider__provider_profile").all()
     authentication_classes = [JWTAuthentication]
     permission_classes = [IsAuthenticated]
+    fast_reader = EncounterListReader
 
     def get_serializer_class(self):
         return EncounterListSerializer if self.action == "list" else EncounterSerializer
@@ -529,44 +537,20 @@ class EncounterViewSet(
         enc.save(update_fields=["status", "locked_at", "updated_at"])
 
         # Sync linked appointment to COMPLETED
+        completed_appointment_id = None
         if enc.appointment_id:
-            try:
-                appt = Appointment.objects.filter(id=enc.appointment_id).first()
-                if appt and appt.status not in (
-                    ApptStatus.COMPLETED,
-                    ApptStatus.CANCELLED,
-                    ApptStatus.NO_SHOW,
-                ):
-                    appt.status = ApptStatus.COMPLETED
-                    appt.save(update_fields=["status", "updated_at"])
-                    # Email + notify hooks (best-effort)
-                    try:
-                        from appointments.services.notify import send_completed
-
-                        send_completed(appt)
-                    except Exception:
-                        pass
-            except Exception:
-                pass
-
-        # Notify patient/guardian (best-effort)
-        try:
-            if enc.patient:
-                notify_patient(
-                    patient=enc.patient,
-                    topic=Topic.ENCOUNTER_COMPLETED,
-                    priority=Priority.NORMAL,
-                    title="Visit completed",
-                    body=f"Your encounter #{enc.id} has been closed.",
-                    facility_id=enc.facility_id,
-                    data={"encounter_id": enc.id},
-                    action_url="/patient/encounters",
-                    group_key=f"ENC:{enc.id}:CLOSED",
-                )
-                
-
-        except Exception:
-            pass
+            appt = Appointment.objects.filter(id=enc.appointment_id).first()
+            if appt and appt.status not in (
+                ApptStatus.COMPLETED,
+                ApptStatus.CANCELLED,
+                ApptStatus.NO_SHOW,
+            ):
+                appt.status = ApptStatus.COMPLETED
+                appt.save(update_fields=["status", "updated_at"])
+                completed_appointment_id = appt.id
+
+        # Completion email + patient/guardian notification run after commit.
+        publish(EncounterClosed(encounter_id=enc.id, completed_appointment_id=completed_appointment_id))
 
         return Response(
             {
@@ -15,7 +15,7 @@ def has_facility_permission(user, permission_name: str) -> bool:
     Check if user has a specific permission in their facility.
     
     Args:
-        user: User instance
+        user: User instance, or ScopedTokenUser (role/facility_id from token claims)
         permission_name: Permission field name (e.g., 'can_manage_pharmacy_catalog')
     
     Returns:
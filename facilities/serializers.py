@@ -14,9 +14,10 @@ from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
 from django.core.exceptions import ValidationError as DjangoValidationError
 from django.db import transaction
-from rest_framework_simplejwt.tokens import RefreshToken
+from accounts.tokens import ScopedRefreshToken
 from django.utils.text import slugify
 from accounts.models import UserRole
+from attachments.serializers import SignedUrlListSerializer, SignedUrlsMixin
 
 
 class SpecialtySerializer(serializers.ModelSerializer):
@@ -266,10 +267,11 @@ class WardSerializer(serializers.ModelSerializer):
         read_only_fields = ["id"]
 
 
-class FacilityExtraDocumentSerializer(serializers.ModelSerializer):
+class FacilityExtraDocumentSerializer(SignedUrlsMixin, serializers.ModelSerializer):
     class Meta:
         model = FacilityExtraDocument
         fields = ["id", "title", "file", "uploaded_at"]
+        list_serializer_class = SignedUrlListSerializer
 
 
 class FacilityExtraDocumentInlineSerializer(serializers.ModelSerializer):
@@ -358,7 +360,7 @@ class FacilityCreateSerializer(serializers.ModelSerializer):
         return facility
 
 
-class FacilityDetailSerializer(serializers.ModelSerializer):
+class FacilityDetailSerializer(SignedUrlsMixin, serializers.ModelSerializer):
     specialties = SpecialtySerializer(many=True, read_only=True)
     wards = WardSerializer(many=True, read_only=True)
     extra_docs = FacilityExtraDocumentSerializer(many=True, read_only=True)
@@ -529,7 +531,7 @@ class FacilityAdminSignupSerializer(serializers.Serializer):
             user.save()
 
         # Generate tokens (keep existing logic)
-        refresh = RefreshToken.for_user(user)
+        refresh = ScopedRefreshToken.for_user(user)
         return {
             "facility": {
                 "id": str(getattr(facility, "id", "")),
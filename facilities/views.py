@@ -15,6 +15,7 @@ from patients.serializers import (
     PatientFacilityHMOApprovalSerializer,
 )
 from facilities.models import Facility
+from core.prefetch import PrefetchPlanMixin, apply_plan
 from .permissions import IsFacilityStaff, IsFacilitySuperAdmin, IsFacilityAdmin
 from rest_framework import viewsets, mixins, status, filters
 from rest_framework.views import APIView
@@ -22,7 +23,7 @@ from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from accounts.authentication import HeaderJWTAuthentication as JWTAuthentication
 from django_filters.rest_framework import DjangoFilterBackend
 from facilities.permissions_utils import has_facility_permission
 from accounts.models import User
@@ -100,7 +101,7 @@ class FacilitySystemHMOViewSet(viewsets.ReadOnlyModelViewSet):
 # FACILITY HMO MANAGEMENT VIEWSET (Nested under facility)
 # ============================================================================
 
-class FacilityHMOManagementViewSet(viewsets.ModelViewSet):
+class FacilityHMOManagementViewSet(PrefetchPlanMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing a facility's HMO relationships.
     
@@ -299,10 +300,10 @@ class FacilityHMOManagementViewSet(viewsets.ModelViewSet):
         
         # Serialize charges
         # ChargeReadSerializer expects allocated_total to be present (we annotated it)
-        charges_data = ChargeReadSerializer(charges_qs, many=True).data
+        charges_data = ChargeReadSerializer(apply_plan(charges_qs, ChargeReadSerializer), many=True).data
         
         # Serialize patients
-        patients_data = PatientSerializer(patients_qs, many=True).data
+        patients_data = PatientSerializer(apply_plan(patients_qs, PatientSerializer), many=True).data
         
         # Get the HMO serializer data
         hmo_serializer = self.get_serializer(hmo_relationship)
@@ -0,0 +1,64 @@
+"""imaging/events.py
+
+Imaging domain events and their post-commit handlers (see core.events).
+"""
+
+from dataclasses import dataclass
+
+from core.events import DomainEvent, subscribe
+from notifications.enums import Topic, Priority
+from notifications.services.notify import notify_user, notify_patient
+
+from .models import ImagingRequest
+
+
+@dataclass(frozen=True)
+class ImagingReportReady(DomainEvent):
+    request_id: int
+
+
+def _load(request_id):
+    return (
+        ImagingRequest.objects.select_related("patient", "procedure", "requested_by")
+        .filter(id=request_id)
+        .first()
+    )
+
+
+@subscribe(ImagingReportReady)
+def notify_imaging_report_patient(event):
+    req = _load(event.request_id)
+    if not req or not req.patient:
+        return
+    notify_patient(
+        patient=req.patient,
+        topic=Topic.IMAGING_REPORT_READY,
+        priority=Priority.NORMAL,
+        title="Your imaging report is ready",
+        body=f"Report for {req.procedure.name} is available.",
+        data={"request_id": req.id},
+        facility_id=req.facility_id,
+        action_url="/patient/imaging",
+        group_key=f"IMAGING:{req.id}:READY",
+        dedupe=True,
+    )
+
+
+@subscribe(ImagingReportReady)
+def notify_imaging_report_clinician(event):
+    """Ordering clinician (in-app)."""
+    req = _load(event.request_id)
+    if not req or not req.requested_by_id:
+        return
+    notify_user(
+        user=req.requested_by,
+        topic=Topic.IMAGING_REPORT_READY,
+        priority=Priority.HIGH,
+        title="Imaging report ready",
+        body=f"Imaging request #{req.id} report is ready for review.",
+        data={"request_id": req.id, "patient_id": req.patient_id},
+        facility_id=req.facility_id,
+        action_url="/facility/imaging",
+        group_key=f"IMAGING:{req.id}:READY",
+        dedupe=True,
+    )
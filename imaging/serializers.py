@@ -1,6 +1,9 @@
 from django.db import transaction
 from rest_framework import serializers
 
+from attachments.serializers import DerivativeUrlField, SignedUrlListSerializer, SignedUrlsMixin
+from attachments.services.derivatives import PREVIEW, THUMB
+
 from .models import ImagingProcedure, ImagingRequest, ImagingReport, ImagingAsset
 from .enums import RequestStatus
 
@@ -101,10 +104,14 @@ class ImagingRequestCreateSerializer(serializers.ModelSerializer):
         return req
 
 
-class ImagingAssetSerializer(serializers.ModelSerializer):
+class ImagingAssetSerializer(SignedUrlsMixin, serializers.ModelSerializer):
+    thumbnail_url = DerivativeUrlField(THUMB)
+    preview_url = DerivativeUrlField(PREVIEW)
+
     class Meta:
         model = ImagingAsset
-        fields = ["id", "kind", "file", "uploaded_at"]
+        fields = ["id", "kind", "file", "thumbnail_url", "preview_url", "uploaded_at"]
+        list_serializer_class = SignedUrlListSerializer
 
 
 class ImagingReportSerializer(serializers.ModelSerializer):
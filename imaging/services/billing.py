@@ -0,0 +1,38 @@
+"""
+imaging/services/billing.py
+
+Billing scope and charge line for imaging requests. With IMAGING_AUTO_CHARGE
+on, the charge is posted with billing.services.charges.post_charges_for_order
+when the report is issued; re-reporting does not bill twice.
+"""
+
+from decimal import Decimal
+
+from billing.services.charges import ChargeLine
+
+
+def billing_scope(req, user=None):
+    """
+    (facility, owner) for a request's charge:
+    - facility requests -> the facility
+    - independent requests -> the requesting provider, else the acting user
+    """
+    if req.facility_id:
+        return req.facility, None
+    if getattr(req, "requested_by", None) and not getattr(req.requested_by, "facility_id", None):
+        return None, req.requested_by
+    if user is not None and not getattr(user, "facility_id", None):
+        return None, user
+    return None, None
+
+
+def charge_lines(req) -> list[ChargeLine]:
+    procedure = req.procedure
+    return [
+        ChargeLine(
+            code=f"IMG:{procedure.code}",
+            name=procedure.name,
+            base_price=Decimal(str(procedure.price or 0)),
+            description=procedure.name,
+        )
+    ]
@@ -1,11 +1,13 @@
-import csv, io
+import csv
+from django.conf import settings
 from django.utils.dateparse import parse_datetime
+from django.db import transaction
 from django.db.models import Q
 from rest_framework import viewsets, mixins, status
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from accounts.authentication import HeaderJWTAuthentication as JWTAuthentication
 
 from .models import ImagingProcedure, ImagingRequest, ImagingReport, ImagingAsset
 from .serializers import (
@@ -15,8 +17,9 @@ from .serializers import (
 )
 from .permissions import IsStaff, CanViewRequest
 from .enums import RequestStatus
-from notifications.services.notify import notify_user, notify_patient
-from notifications.enums import Topic, Priority
+from .events import ImagingReportReady
+from core.events import publish
+from core.uploads import import_max_bytes, text_reader, upload_limit
 
 class ProcedureViewSet(viewsets.GenericViewSet, mixins.ListModelMixin, mixins.CreateModelMixin):
     queryset = ImagingProcedure.objects.filter(is_active=True).order_by("name")
@@ -30,6 +33,7 @@ class ProcedureViewSet(viewsets.GenericViewSet, mixins.ListModelMixin, mixins.Cr
         return super().create(request, *args, **kwargs)
 
     @action(detail=False, methods=["post"], permission_classes=[IsAuthenticated, IsStaff])
+    @upload_limit(import_max_bytes)
     def import_csv(self, request):
         """
         CSV columns: code,name,modality,price
@@ -37,22 +41,25 @@ class ProcedureViewSet(viewsets.GenericViewSet, mixins.ListModelMixin, mixins.Cr
         f = request.FILES.get("file")
         if not f:
             return Response({"detail":"file is required"}, status=400)
-        buf = io.StringIO(f.read().decode("utf-8"))
-        reader = csv.DictReader(buf)
         created, updated = 0, 0
-        for row in reader:
-            code = (row.get("code") or "").strip()
-            if not code:
-                continue
-            defaults = {
-                "name": (row.get("name") or "").strip(),
-                "modality": (row.get("modality") or "XR").strip(),
-                "price": (row.get("price") or 0),
-                "is_active": True,
-            }
-            obj, is_created = ImagingProcedure.objects.update_or_create(code=code, defaults=defaults)
-            created += int(is_created)
-            updated += int(not is_created)
+        # Rows are decoded as they are written: all or nothing.
+        try:
+            with transaction.atomic(), text_reader(f) as buf:
+                for row in csv.DictReader(buf):
+                    code = (row.get("code") or "").strip()
+                    if not code:
+                        continue
+                    defaults = {
+                        "name": (row.get("name") or "").strip(),
+                        "modality": (row.get("modality") or "XR").strip(),
+                        "price": (row.get("price") or 0),
+                        "is_active": True,
+                    }
+                    obj, is_created = ImagingProcedure.objects.update_or_create(code=code, defaults=defaults)
+                    created += int(is_created)
+                    updated += int(not is_created)
+        except UnicodeDecodeError:
+            return Response({"detail": "File must be UTF-8 encoded CSV."}, status=400)
         return Response({"created": created, "updated": updated})
 
 class ImagingRequestViewSet(viewsets.GenericViewSet,
@@ -134,7 +141,7 @@ class ImagingRequestViewSet(viewsets.GenericViewSet,
     def report(self, request, pk=None):
         """
         Create final report; optional file uploads via multipart.
-        fields: findings, impression, (files[])
+        fields: findings, impression, (files[]) or (upload_ids[] from attachments/uploads/)
         """
         req = self.get_object()
         if req.status == RequestStatus.CANCELLED:
@@ -157,40 +164,44 @@ class ImagingRequestViewSet(viewsets.GenericViewSet,
 
         # handle assets
         files = request.FILES.getlist("files")
-        for f in files:
-            ImagingAsset.objects.create(report=rep, kind=f.content_type or "", file=f)
+        assets = [ImagingAsset.objects.create(report=rep, kind=f.content_type or "", file=f) for f in files]
+
+        # direct uploads (attachments/uploads/): upload_ids[] instead of multipart files
+        upload_ids = request.data.getlist("upload_ids") if hasattr(request.data, "getlist") else request.data.get("upload_ids")
+        if upload_ids:
+            from attachments.services.direct import claim_upload, finalize_to_field
+
+            with transaction.atomic():
+                for token in upload_ids:
+                    upload = claim_upload(token, request.user)
+                    asset = ImagingAsset(report=rep, kind=(upload.mime_type or "")[:32])
+                    finalize_to_field(upload, asset, "file")
+                    asset.save()
+                    assets.append(asset)
+
+        # thumbnails/previews for the report gallery, generated in the background
+        from attachments.services.derivatives import queue
+
+        for asset in assets:
+            queue(asset.file.name)
 
         # update status
         req.status = RequestStatus.REPORTED
         req.save(update_fields=["status"])
 
-        # notify patient (non-blocking)
-        if req.patient:
-            notify_patient(
-                patient=req.patient,
-                topic=Topic.IMAGING_REPORT_READY,
-                priority=Priority.NORMAL,
-                title="Your imaging report is ready",
-                body=f"Report for {req.procedure.name} is available.",
-                data={"request_id": req.id},
-                facility_id=req.facility_id,
-                action_url="/patient/imaging",
-                group_key=f"IMAGING:{req.id}:READY",
-            )
+        # Ensure the procedure charge exists (idempotent on re-report); opt-in,
+        # imaging is otherwise billed by hand
+        if getattr(settings, "IMAGING_AUTO_CHARGE", False):
+            try:
+                from billing.services.charges import post_charges_for_order
 
-        # Ordering clinician (in-app)
-        if getattr(req, "requested_by_id", None):
-            notify_user(
-                user=req.requested_by,
-                topic=Topic.IMAGING_REPORT_READY,
-                priority=Priority.HIGH,
-                title="Imaging report ready",
-                body=f"Imaging request #{req.id} report is ready for review.",
-                data={"request_id": req.id, "patient_id": req.patient_id},
-                facility_id=req.facility_id,
-                action_url="/facility/imaging",
-                group_key=f"IMAGING:{req.id}:READY",
-            )
+                post_charges_for_order(req, user=request.user)
+            except Exception as e:
+                import logging
+                logging.getLogger(__name__).warning(f"Billing ensure step failed for imaging request {req.id}: {e}")
+
+        # Patient + ordering clinician notifications run after commit.
+        publish(ImagingReportReady(request_id=req.id))
 
         return Response(ImagingReportSerializer(rep).data, status=201)
 
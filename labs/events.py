@@ -0,0 +1,64 @@
+"""labs/events.py
+
+Lab domain events and their post-commit handlers (see core.events).
+"""
+
+from dataclasses import dataclass
+
+from core.events import DomainEvent, subscribe
+from notifications.enums import Topic, Priority
+from notifications.services.notify import notify_user, notify_patient
+
+from .models import LabOrder
+
+
+@dataclass(frozen=True)
+class LabResultReady(DomainEvent):
+    """All items of a lab order have results (order is COMPLETED)."""
+    order_id: int
+
+
+def _load(order_id):
+    return (
+        LabOrder.objects.select_related("patient", "ordered_by")
+        .filter(id=order_id)
+        .first()
+    )
+
+
+@subscribe(LabResultReady)
+def notify_lab_result_patient(event):
+    order = _load(event.order_id)
+    if not order or not order.patient:
+        return
+    notify_patient(
+        patient=order.patient,
+        topic=Topic.LAB_RESULT_READY,
+        priority=Priority.NORMAL,
+        title="Your lab result is ready",
+        body=f"Lab order #{order.id} now has results.",
+        data={"order_id": order.id},
+        facility_id=order.facility_id,
+        group_key=f"LAB:{order.id}:READY",
+        dedupe=True,
+    )
+
+
+@subscribe(LabResultReady)
+def notify_lab_result_clinician(event):
+    """Ordering clinician."""
+    order = _load(event.order_id)
+    if not order or not order.ordered_by_id:
+        return
+    notify_user(
+        user=order.ordered_by,
+        topic=Topic.LAB_RESULT_READY,
+        priority=Priority.HIGH,
+        title="Lab results ready",
+        body=f"Lab order #{order.id} results are ready for review.",
+        data={"order_id": order.id, "patient_id": order.patient_id},
+        facility_id=order.facility_id,
+        action_url="/facility/labs",
+        group_key=f"LAB:{order.id}:READY",
+        dedupe=True,
+    )
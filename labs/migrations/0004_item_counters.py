@@ -0,0 +1,46 @@
+# Generated by Django 5.2.7 on 2026-10-18 20:56
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    Parent = apps.get_model("labs", "LabOrder")
+    Item = apps.get_model("labs", "LabOrderItem")
+
+    def counted(condition=Q()):
+        sub = (
+            Item.objects.filter(condition, order=OuterRef("pk"))
+            .order_by()
+            .values("order")
+            .annotate(n=Count("id"))
+            .values("n")
+        )
+        return Coalesce(Subquery(sub), Value(0))
+
+    Parent.objects.update(
+        items_total=counted(),
+        items_complete=counted(Q(completed_at__isnull=False)),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('labs', '0003_labtest_created_by_labtest_facility_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='laborder',
+            name='items_complete',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='laborder',
+            name='items_total',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -103,6 +103,10 @@ class LabOrder(models.Model):
         related_name="lab_orders_assigned",
     )
 
+    # Item counters kept in step with the items (see record_item_completion)
+    items_total = models.PositiveIntegerField(default=0)
+    items_complete = models.PositiveIntegerField(default=0)
+
     class Meta:
         indexes = [
             models.Index(fields=["patient", "ordered_at"]),
@@ -115,6 +119,35 @@ class LabOrder(models.Model):
     def __str__(self):
         return f"LabOrder#{self.id} P:{self.patient_id}"
 
+    def record_item_completion(self, completed_delta=0):
+        """
+        Bump items_complete with an F() update and mark the order COMPLETED
+        in the same UPDATE once every item has a result.
+        """
+        LabOrder.objects.filter(pk=self.pk).update(
+            items_complete=models.F("items_complete") + completed_delta,
+            # Conditions see the pre-update row, hence "- completed_delta".
+            status=models.Case(
+                models.When(
+                    items_complete__gte=models.F("items_total") - completed_delta,
+                    then=models.Value(OrderStatus.COMPLETED),
+                ),
+                default=models.F("status"),
+            ),
+        )
+        before = self.status
+        self.refresh_from_db(fields=["items_total", "items_complete", "status"])
+        if self.status != before:
+            self._status_updated(before)
+
+    def _status_updated(self, before):
+        """The UPDATE above skips post_save: audit the flip and drop cached dashboards."""
+        from audit.services import log_update
+        from patients.dashboard import invalidate_for
+
+        log_update(obj=self, before={"status": before}, after={"status": self.status})
+        invalidate_for(self)
+
 
 class LabOrderItem(models.Model):
     order = models.ForeignKey(LabOrder, on_delete=models.CASCADE, related_name="items")
@@ -228,10 +228,8 @@ class LabOrderCreateSerializer(serializers.ModelSerializer):
 
     @transaction.atomic
     def create(self, validated_data):
-        from decimal import Decimal
         import logging
-        from billing.models import Service, Price, Charge
-        from billing.services.pricing import resolve_price
+        from billing.services.charges import post_charges_for_order
 
         logger = logging.getLogger(__name__)
         
@@ -258,126 +256,25 @@ class LabOrderCreateSerializer(serializers.ModelSerializer):
             except User.DoesNotExist:
                 logger.warning(f"Outsourced provider {outsourced_to_id} not found during order creation")
 
-        order = LabOrder.objects.create(**validated_data)
+        order = LabOrder.objects.create(items_total=len(items_data), **validated_data)
 
         # Create items
         for it in items_data:
             LabOrderItem.objects.create(order=order, **it)
 
         # ========================================================================
-        # AUTOMATIC BILLING (if billing app is available)
+        # AUTOMATIC BILLING
         # ========================================================================
+        # Billing scope (labs.services.billing.billing_scope):
+        # - Facility orders -> facility-scoped billing
+        # - Outsourced orders -> independent lab (outsourced_to) owns the billing (NOT the facility)
+        # - Independent self-owned orders -> ordered_by owns the billing
         try:
-            # Determine billing scope
-            billing_facility = None
-            billing_owner = None
-
-            # Billing scope:
-            # - Facility orders -> facility-scoped billing
-            # - Outsourced orders -> independent lab (outsourced_to) owns the billing (NOT the facility)
-            # - Independent self-owned orders -> ordered_by owns the billing
-            if order.outsourced_to_id:
-                billing_owner = order.outsourced_to
-                billing_facility = None
-            elif order.facility_id:
-                billing_facility = order.facility
-            elif order.ordered_by and not order.ordered_by.facility_id:
-                billing_owner = order.ordered_by
-
-            # Get patient's HMO info (UPDATED for new SystemHMO structure)
-            patient_system_hmo = None
-            patient_tier = None
-            
-            if order.patient:
-                patient_system_hmo = getattr(order.patient, 'system_hmo', None)
-                patient_tier = getattr(order.patient, 'hmo_tier', None)
-            
-            if billing_facility or billing_owner:
-                # Ensure all lab tests have corresponding services
-                # This uses the code LAB:{test.code} convention.
-                for it in order.items.all():
-                    # Skip manual tests (no test FK)
-                    if not it.test_id:
-                        continue
-                    test = it.test
-                    if not test:
-                        continue
-
-                    code = f"LAB:{test.code}"
-                    service, _ = Service.objects.get_or_create(
-                        code=code,
-                        defaults={
-                            "name": test.name,
-                            "default_price": getattr(test, "price", 0) or 0,
-                            "is_active": True,
-                        },
-                    )
-
-                    # Ensure per-scope price exists so independent labs don't inherit someone else's defaults.
-                    try:
-                        if billing_facility and not billing_owner:
-                            Price.objects.get_or_create(
-                                facility=billing_facility,
-                                owner=None,
-                                service=service,
-                                defaults={"amount": getattr(test, "price", 0) or 0, "currency": "NGN"},
-                            )
-                        if billing_owner and not billing_facility:
-                            Price.objects.get_or_create(
-                                facility=None,
-                                owner=billing_owner,
-                                service=service,
-                                defaults={"amount": getattr(test, "price", 0) or 0, "currency": "NGN"},
-                            )
-                    except Exception as e:
-                        logger.warning(f"Failed to create price override for service {code}: {e}")
-
-                    # 🔥 FIX: Pass patient's HMO and tier to resolve_price
-                    unit_price = resolve_price(
-                        service=service, 
-                        facility=billing_facility, 
-                        owner=billing_owner, 
-                        system_hmo=patient_system_hmo,
-                        tier=patient_tier
-                    )
-                    
-                    # 🔥 FIX: Handle None pricing gracefully - use test price as fallback
-                    if unit_price is None:
-                        unit_price = getattr(test, "price", 0) or Decimal("0.00")
-                        logger.warning(
-                            f"No price configured for lab test {test.code} "
-                            f"(facility={billing_facility}, system_hmo={patient_system_hmo}). "
-                            f"Using test default price: {unit_price}"
-                        )
-                    
-                    # Convert to Decimal safely
-                    unit_price = Decimal(str(unit_price)) if unit_price is not None else Decimal("0.00")
-                    qty = 1
-                    amount = (unit_price * Decimal(qty)).quantize(Decimal("0.01"))
-                    
-                    # Create charge
-                    Charge.objects.create(
-                        patient=order.patient,
-                        facility=billing_facility,
-                        owner=billing_owner,
-                        service=service,
-                        description=test.name,
-                        unit_price=unit_price,
-                        qty=qty,
-                        amount=amount,
-                        created_by=u,
-                        encounter_id=order.encounter_id,
-                        lab_order_id=order.id,
-                    )
-                    
-                    logger.info(
-                        f"Created billing charge for lab order {order.id}, test {test.code}: "
-                        f"₦{amount} (patient HMO: {patient_system_hmo.name if patient_system_hmo else 'None'})"
-                    )
+            with transaction.atomic():
+                charges = post_charges_for_order(order, user=u)
+            logger.info(f"Lab order {order.id}: {len(charges)} billing charge(s)")
         except Exception as e:
             # Log the error but don't fail the lab order creation
-            import logging
-            logger = logging.getLogger(__name__)
             logger.error(f"Failed to create billing charges for lab order {order.id}: {e}", exc_info=True)
 
         # Link to encounter (append order.id to encounter.lab_order_ids)
@@ -461,6 +358,15 @@ class LabOrderReadSerializer(serializers.ModelSerializer):
             "results_ready",
             "results",
         ]
+        # walked by the SerializerMethodFields (core.prefetch)
+        select_related = [
+            "patient__hmo",
+            "patient__system_hmo",
+            "patient__hmo_tier",
+            "facility",
+            "ordered_by",
+            "outsourced_to__provider_profile",
+        ]
 
     def get_patient_name(self, obj):
         if not obj.patient_id:
@@ -563,23 +469,27 @@ class LabOrderReadSerializer(serializers.ModelSerializer):
                 facility = obj.facility
                 owner = obj.ordered_by if not facility and obj.ordered_by else None
                 
-                # Query FacilityHMO
-                facility_hmo = None
-                if facility:
-                    facility_hmo = FacilityHMO.objects.filter(
-                        facility=facility,
-                        system_hmo=system_hmo,
-                        owner__isnull=True
-                    ).first()
-                elif owner:
-                    facility_hmo = FacilityHMO.objects.filter(
-                        owner=owner,
-                        system_hmo=system_hmo,
-                        facility__isnull=True
-                    ).first()
+                # Query FacilityHMO (once per scope and HMO for the whole list)
+                statuses = self.context.setdefault("facility_hmo_status", {})
+                key = (getattr(facility, "id", None), getattr(owner, "id", None), system_hmo.id)
+                if key not in statuses:
+                    facility_hmo = None
+                    if facility:
+                        facility_hmo = FacilityHMO.objects.filter(
+                            facility=facility,
+                            system_hmo=system_hmo,
+                            owner__isnull=True
+                        ).first()
+                    elif owner:
+                        facility_hmo = FacilityHMO.objects.filter(
+                            owner=owner,
+                            system_hmo=system_hmo,
+                            facility__isnull=True
+                        ).first()
+                    statuses[key] = facility_hmo.relationship_status if facility_hmo else None
                 
-                if facility_hmo:
-                    return facility_hmo.relationship_status
+                if statuses[key]:
+                    return statuses[key]
             except Exception:
                 pass
         
@@ -651,15 +561,16 @@ class ResultEntrySerializer(serializers.Serializer):
                 setattr(item, f, self.validated_data[f])
                 changed = True
 
+        first_result = 0
         if changed:
-            item.completed_at = timezone.now()
+            now = timezone.now()
+            # Conditional claim: only one request counts an item's first result.
+            first_result = LabOrderItem.objects.filter(pk=item.pk, completed_at__isnull=True).update(completed_at=now)
+            item.completed_at = now
             item.completed_by = user
             item.save()
 
-        order = item.order
-        # If all items completed, mark order completed
-        if order.items.filter(completed_at__isnull=True).count() == 0:
-            order.status = OrderStatus.COMPLETED
-            order.save(update_fields=["status"])
+        # Mark the order completed once every item has a result
+        item.order.record_item_completion(first_result)
 
         return item
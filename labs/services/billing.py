@@ -0,0 +1,42 @@
+"""
+labs/services/billing.py
+
+Billing scope and charge lines for lab orders. Charges are posted with
+billing.services.charges.post_charges_for_order (at order creation and again,
+idempotently, on completion).
+"""
+
+from decimal import Decimal
+
+from billing.services.charges import ChargeLine
+
+
+def billing_scope(order, user=None):
+    """
+    (facility, owner) for an order's charges:
+    - outsourced orders -> the independent lab (outsourced_to)
+    - facility orders -> the facility
+    - independent orders -> the ordering provider, else the acting user
+    """
+    if getattr(order, "outsourced_to_id", None):
+        return None, order.outsourced_to
+    if order.facility_id:
+        return order.facility, None
+    if getattr(order, "ordered_by", None) and not getattr(order.ordered_by, "facility_id", None):
+        return None, order.ordered_by
+    if user is not None and not getattr(user, "facility_id", None):
+        return None, user
+    return None, None
+
+
+def charge_lines(order) -> list[ChargeLine]:
+    """One line per catalog test; manual (free-text) tests are not billed."""
+    return [
+        ChargeLine(
+            code=f"LAB:{it.test.code}",
+            name=it.test.name,
+            base_price=Decimal(str(getattr(it.test, "price", 0) or 0)),
+            description=it.test.name,
+        )
+        for it in order.items.select_related("test").filter(test__isnull=False)
+    ]
@@ -1,5 +1,4 @@
 import csv
-import io
 import math
 
 from django.db.models import Q
@@ -11,14 +10,19 @@ from rest_framework.decorators import action
 from rest_framework.exceptions import PermissionDenied
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from accounts.authentication import HeaderJWTAuthentication as JWTAuthentication
 
 from accounts.enums import UserRole
 from patients.models import SystemHMO, HMOTier, Patient, PatientProviderLink
-from notifications.services.notify import notify_user, notify_patient
+from notifications.services.notify import notify_user
 from notifications.enums import Topic, Priority
+from core.events import publish
+from core.prefetch import PrefetchPlanMixin
+from core.uploads import import_max_bytes, text_reader, upload_limit
+from core.search import search_queryset
 from facilities.permissions_utils import has_facility_permission
 from .enums import OrderStatus
+from .events import LabResultReady
 from .models import LabTest, LabOrder, LabOrderItem
 from .permissions import CanViewLabOrder, IsLabOrAdmin, IsStaff
 from .serializers import (
@@ -163,7 +167,7 @@ class LabTestViewSet(viewsets.GenericViewSet, mixins.ListModelMixin, mixins.Crea
         # ✅ Catalog search: supports ?s=<text> (and ?q=<text> fallback)
         s = (self.request.query_params.get("s") or self.request.query_params.get("q") or "").strip()
         if s:
-            qs = qs.filter(Q(name__icontains=s) | Q(code__icontains=s) | Q(unit__icontains=s))
+            qs = search_queryset(qs, "labtest", s)
 
         return qs
 
@@ -293,6 +297,7 @@ class LabTestViewSet(viewsets.GenericViewSet, mixins.ListModelMixin, mixins.Crea
             serializer.save(facility=None, created_by=u)
 
     @action(detail=False, methods=["post"], permission_classes=[IsAuthenticated, IsStaff])
+    @upload_limit(import_max_bytes)
     def import_file(self, request):
         if not has_facility_permission(request.user, 'can_manage_lab_catalog'):
             return Response(
@@ -325,9 +330,8 @@ class LabTestViewSet(viewsets.GenericViewSet, mixins.ListModelMixin, mixins.Crea
             # Determine file type and read data
             if filename.endswith('.csv'):
                 # CSV import
-                buf = io.StringIO(f.read().decode("utf-8"))
-                reader = csv.DictReader(buf)
-                rows = list(reader)
+                with text_reader(f) as buf:
+                    rows = list(csv.DictReader(buf))
             elif filename.endswith('.xlsx'):
                 # Excel import (.xlsx)
                 try:
@@ -704,6 +708,7 @@ class LabTestViewSet(viewsets.GenericViewSet, mixins.ListModelMixin, mixins.Crea
         )
 
     @action(detail=False, methods=["post"], permission_classes=[IsAuthenticated, IsStaff], url_path="import-hmo-file")
+    @upload_limit(import_max_bytes)
     def import_hmo_file(self, request):
         """
         Bulk import HMO-specific prices from CSV/Excel.
@@ -755,9 +760,8 @@ class LabTestViewSet(viewsets.GenericViewSet, mixins.ListModelMixin, mixins.Crea
         try:
             # Parse file
             if filename.endswith(".csv"):
-                buf = io.StringIO(f.read().decode("utf-8"))
-                reader = csv.DictReader(buf)
-                rows = list(reader)
+                with text_reader(f) as buf:
+                    rows = list(csv.DictReader(buf))
             elif filename.endswith(".xlsx"):
                 try:
                     import openpyxl
@@ -879,6 +883,7 @@ class LabTestViewSet(viewsets.GenericViewSet, mixins.ListModelMixin, mixins.Crea
 
 
 class LabOrderViewSet(
+    PrefetchPlanMixin,
     viewsets.GenericViewSet,
     mixins.CreateModelMixin,
     mixins.RetrieveModelMixin,
@@ -1135,130 +1140,14 @@ class LabOrderViewSet(
         if order.status == OrderStatus.COMPLETED:
             # Ensure billing charges exist (idempotent) when an order completes
             try:
-                import logging
-                from decimal import Decimal
-                from billing.models import Charge, Service, Price
-                from billing.enums import ChargeStatus
-                from billing.services.pricing import resolve_price
-
-                logger = logging.getLogger(__name__)
-
-                # Determine billing scope
-                billing_facility = order.facility if order.facility_id else None
-                billing_owner = None
-
-                if getattr(order, 'outsourced_to_id', None):
-                    billing_owner = order.outsourced_to
-                    billing_facility = None
-                elif not order.facility_id:
-                    if getattr(order, 'ordered_by', None) and not getattr(order.ordered_by, 'facility_id', None):
-                        billing_owner = order.ordered_by
-                    elif not getattr(request.user, 'facility_id', None):
-                        billing_owner = request.user
-
-                patient_system_hmo = getattr(order.patient, 'system_hmo', None) if order.patient else None
-                patient_tier = getattr(order.patient, 'hmo_tier', None) if order.patient else None
-
-                for it2 in order.items.select_related('test').all():
-                    if not it2.test_id or not getattr(it2, 'test', None):
-                        continue
-                    test = it2.test
-                    code = f"LAB:{test.code}"
-                    service, _ = Service.objects.get_or_create(
-                        code=code,
-                        defaults={
-                            'name': test.name,
-                            'default_price': getattr(test, 'price', 0) or 0,
-                            'is_active': True,
-                        },
-                    )
-
-                    # Ensure per-scope price exists
-                    try:
-                        if billing_facility and not billing_owner:
-                            Price.objects.get_or_create(
-                                facility=billing_facility,
-                                owner=None,
-                                service=service,
-                                defaults={'amount': getattr(test, 'price', 0) or 0, 'currency': 'NGN'},
-                            )
-                        elif billing_owner and not billing_facility:
-                            Price.objects.get_or_create(
-                                facility=None,
-                                owner=billing_owner,
-                                service=service,
-                                defaults={'amount': getattr(test, 'price', 0) or 0, 'currency': 'NGN'},
-                            )
-                    except Exception as e:
-                        logger.warning(f"Failed to ensure base price for {code}: {e}")
-
-                    # Skip if charge already exists (avoid duplicates)
-                    if Charge.objects.filter(
-                        patient=order.patient,
-                        lab_order_id=order.id,
-                        service=service,
-                        facility=billing_facility,
-                        owner=billing_owner,
-                    ).exclude(status=ChargeStatus.VOID).exists():
-                        continue
-
-                    unit_price = resolve_price(
-                        service=service,
-                        facility=billing_facility,
-                        owner=billing_owner,
-                        system_hmo=patient_system_hmo,
-                        tier=patient_tier,
-                    )
-                    if unit_price is None:
-                        unit_price = getattr(test, 'price', 0) or Decimal('0.00')
-                    unit_price = Decimal(str(unit_price))
-                    amount = (unit_price * Decimal('1')).quantize(Decimal('0.01'))
-
-                    Charge.objects.create(
-                        patient=order.patient,
-                        facility=billing_facility,
-                        owner=billing_owner,
-                        service=service,
-                        description=test.name,
-                        unit_price=unit_price,
-                        qty=1,
-                        amount=amount,
-                        created_by=request.user,
-                        encounter_id=order.encounter_id,
-                        lab_order_id=order.id,
-                    )
+                from billing.services.charges import post_charges_for_order
 
+                post_charges_for_order(order, user=request.user)
             except Exception as e:
-                try:
-                    import logging
-                    logging.getLogger(__name__).warning(f"Billing ensure step failed for lab order {order.id}: {e}")
-                except Exception:
-                    pass
-
-            if order.patient:
-                notify_patient(
-                    patient=order.patient,
-                    topic=Topic.LAB_RESULT_READY,
-                    priority=Priority.NORMAL,
-                    title="Your lab result is ready",
-                    body=f"Lab order #{order.id} now has results.",
-                    data={"order_id": order.id},
-                    facility_id=order.facility_id,
-                )
+                import logging
+                logging.getLogger(__name__).warning(f"Billing ensure step failed for lab order {order.id}: {e}")
 
-            # Ordering clinician
-            if getattr(order, "ordered_by_id", None):
-                notify_user(
-                    user=order.ordered_by,
-                    topic=Topic.LAB_RESULT_READY,
-                    priority=Priority.HIGH,
-                    title="Lab results ready",
-                    body=f"Lab order #{order.id} results are ready for review.",
-                    data={"order_id": order.id, "patient_id": order.patient_id},
-                    facility_id=order.facility_id,
-                    action_url="/facility/labs",
-                    group_key=f"LAB:{order.id}:READY",
-                )
+            publish(LabResultReady(order_id=order.id))
 
         return Response(LabOrderItemReadSerializer(item).data)
 
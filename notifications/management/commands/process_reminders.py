@@ -2,17 +2,24 @@
 
 Processes due reminders and turns them into in-app notifications for the assigned nurse.
 
-Run periodically (cron / Celery beat), e.g. every 1-5 minutes.
+Batches are claimed atomically (see notifications.services.reminders), so
+several runners - overlapping cron runs or multiple --loop workers - never
+notify a nurse twice for the same reminder.
+
+Run periodically (cron / Celery beat), e.g. every 1-5 minutes, or keep one
+resident worker with --loop.
 
 Usage:
   python manage.py process_reminders
   python manage.py process_reminders --dry-run
   python manage.py process_reminders --lookahead 5
+  python manage.py process_reminders --loop --min-sleep 1 --max-sleep 30
 """
 
-from datetime import timedelta
+import time
 
 from django.core.management.base import BaseCommand
+from django.db import close_old_connections
 from django.utils import timezone
 
 
@@ -22,75 +29,95 @@ class Command(BaseCommand):
     def add_arguments(self, parser):
         parser.add_argument("--dry-run", action="store_true", help="Do not send, just print")
         parser.add_argument("--lookahead", type=int, default=5, help="Minutes to look ahead")
-        parser.add_argument("--batch-size", type=int, default=200, help="Max reminders per run")
+        parser.add_argument("--batch-size", type=int, default=200, help="Max reminders per batch")
+        parser.add_argument("--loop", action="store_true", help="Keep running, polling for due reminders")
+        parser.add_argument("--min-sleep", type=float, default=1.0, help="Loop: seconds to wait after a partial batch")
+        parser.add_argument("--max-sleep", type=float, default=30.0, help="Loop: longest idle wait in seconds")
 
     def handle(self, *args, **options):
-        from notifications.models import Reminder
-        from notifications.services.notify import notify_user
-        from notifications.enums import Topic, Priority
-
-        dry_run = bool(options["dry_run"])
         lookahead = int(options["lookahead"])
-        batch_size = int(options["batch_size"])
+        batch_size = max(1, int(options["batch_size"]))
 
-        now = timezone.now()
-        cutoff = now + timedelta(minutes=lookahead)
+        if options["dry_run"]:
+            return self._dry_run(lookahead, batch_size)
 
-        qs = (
-            Reminder.objects.select_related("patient", "nurse")
-            .filter(status=Reminder.Status.PENDING, reminder_time__lte=cutoff)
-            .order_by("reminder_time")
-        )
-
-        due = list(qs[:batch_size])
-        if not due:
-            self.stdout.write("No reminders due")
+        if not options["loop"]:
+            sent = self._drain(lookahead, batch_size)
+            if not sent:
+                self.stdout.write("No reminders due")
+            self._report(sent, lookahead)
             return
 
-        if dry_run:
-            self.stdout.write(self.style.WARNING("DRY RUN - no notifications will be created"))
+        self._loop(lookahead, batch_size, float(options["min_sleep"]), float(options["max_sleep"]))
+
+    # ------------------------------------------------------------------
+
+    def _drain(self, lookahead, batch_size) -> int:
+        """Process full batches until fewer than batch_size are due."""
+        from notifications.services.reminders import process_batch
+
+        total = 0
+        while True:
+            result = process_batch(batch_size=batch_size, lookahead_minutes=lookahead)
+            total += result.claimed
+            if result.claimed < batch_size:
+                return total
+
+    def _report(self, sent, lookahead):
+        from notifications.services.reminders import unassigned_count
+
+        skipped = unassigned_count(timezone.now(), lookahead_minutes=lookahead)
+        self.stdout.write(self.style.SUCCESS(f"Processed reminders: sent={sent} skipped={skipped}"))
+
+    def _loop(self, lookahead, batch_size, min_sleep, max_sleep):
+        """
+        Resident worker. Full batches are followed immediately by the next;
+        a partial batch waits min_sleep; idle polls back off exponentially
+        up to max_sleep.
+        """
+        from notifications.services.reminders import process_batch
+
+        min_sleep = max(0.1, min_sleep)
+        max_sleep = max(min_sleep, max_sleep)
+        idle = min_sleep
+        self.stdout.write(f"Reminder worker started (batch={batch_size}, sleep {min_sleep}-{max_sleep}s)")
+        try:
+            while True:
+                close_old_connections()
+                try:
+                    result = process_batch(batch_size=batch_size, lookahead_minutes=lookahead)
+                except Exception as e:
+                    self.stdout.write(self.style.ERROR(f"Reminder batch failed: {e}"))
+                    time.sleep(max_sleep)
+                    continue
+
+                if result.claimed:
+                    self.stdout.write(f"Sent {result.claimed} reminder(s), {result.emailed} by email")
+                if result.claimed >= batch_size:
+                    idle = min_sleep
+                    continue
+                if result.claimed:
+                    idle = min_sleep
+                    time.sleep(min_sleep)
+                else:
+                    time.sleep(idle)
+                    idle = min(idle * 2, max_sleep)
+        except KeyboardInterrupt:
+            self.stdout.write("Reminder worker stopped")
+        finally:
+            close_old_connections()
+
+    def _dry_run(self, lookahead, batch_size):
+        from notifications.services.reminders import due_queryset, unassigned_count
 
-        sent = 0
-        skipped = 0
-        failed = 0
-
-        for rem in due:
-            if not rem.nurse_id:
-                skipped += 1
-                continue
-
-            title = f"Reminder: {rem.get_reminder_type_display()}"
-            patient_name = getattr(rem.patient, "full_name", None) or f"Patient #{rem.patient_id}"
-            body = f"{patient_name}\n{rem.message}"
-
-            if dry_run:
-                self.stdout.write(f"Would notify nurse={rem.nurse_id} reminder={rem.id} time={rem.reminder_time}")
-                continue
-
-            try:
-                notify_user(
-                    user=rem.nurse,
-                    topic=Topic.REMINDER,
-                    priority=Priority.NORMAL,
-                    title=title,
-                    body=body,
-                    facility_id=getattr(getattr(rem.patient, "facility", None), "id", None),
-                    data={"reminder_id": rem.id, "patient_id": rem.patient_id, "reminder_type": rem.reminder_type},
-                    action_url=f"/facility/patients/{rem.patient_id}",
-                    group_key=f"REMINDER:{rem.id}",
-                )
-
-                rem.status = Reminder.Status.SENT
-                rem.sent_at = now
-                rem.save(update_fields=["status", "sent_at"])
-
-                sent += 1
-            except Exception as e:
-                failed += 1
-                self.stdout.write(self.style.ERROR(f"Failed reminder {rem.id}: {e}"))
-
-        if dry_run:
-            self.stdout.write(self.style.WARNING(f"DRY RUN complete. Would process: {len(due)}"))
+        now = timezone.now()
+        due = list(due_queryset(now, lookahead_minutes=lookahead)[:batch_size])
+        skipped = unassigned_count(now, lookahead_minutes=lookahead)
+        if not due and not skipped:
+            self.stdout.write("No reminders due")
             return
 
-        self.stdout.write(self.style.SUCCESS(f"Processed reminders: sent={sent} skipped={skipped} failed={failed}"))
+        self.stdout.write(self.style.WARNING("DRY RUN - no notifications will be created"))
+        for rem in due:
+            self.stdout.write(f"Would notify nurse={rem.nurse_id} reminder={rem.id} time={rem.reminder_time}")
+        self.stdout.write(self.style.WARNING(f"DRY RUN complete. Would process: {len(due)} (no nurse: {skipped})"))
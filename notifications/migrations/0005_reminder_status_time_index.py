@@ -0,0 +1,20 @@
+# Generated by Django 5.2.7 on 2026-10-18 20:45
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0004_alter_facilityannouncement_topic_and_more'),
+        ('patients', '0016_backfill_patientaccessgrant'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reminder',
+            index=models.Index(fields=['status', 'reminder_time'], name='notificatio_status_ccd915_idx'),
+        ),
+    ]
@@ -170,4 +170,7 @@ class Reminder(models.Model):
         return f"Reminder for {self.patient.full_name} - {self.reminder_type}"
 
     class Meta:
-        ordering = ['reminder_time']
\ No newline at end of file
+        ordering = ['reminder_time']
+        indexes = [
+            models.Index(fields=["status", "reminder_time"]),  # process_reminders claim scan
+        ]
\ No newline at end of file
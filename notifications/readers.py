@@ -0,0 +1,63 @@
+"""notifications/readers.py
+
+values()-based list reader for notifications (core.fastread). Mirrors
+NotificationSerializer field for field; keep the two in step.
+"""
+from django.utils import timezone
+
+from core.fastread import Reader, computed
+
+from .serializers import NotificationSerializer, enrich_text, load_text_refs
+
+TEXT_LOOKUPS = ("id", "topic", "title", "body", "data", "user__role")
+
+
+def _texts(context, ids, topics, titles, bodies, datas, owner_roles):
+    """enrich_text() per row (records loaded once per page), shared by the title and body columns."""
+    memo = context.setdefault("notification_texts", {})
+    user = getattr(context.get("request"), "user", None)
+    rows = list(zip(ids, topics, titles, bodies, datas, owner_roles))
+    refs = load_text_refs(row[1:5] for row in rows if row[0] not in memo)
+    out = []
+    for nid, topic, title, body, data, owner_role in rows:
+        if nid not in memo:
+            role = getattr(user, "role", "") if user else owner_role
+            memo[nid] = enrich_text(topic, title, body, data, (role or "").upper(), refs)
+        out.append(memo[nid])
+    return out
+
+
+class NotificationListReader(Reader):
+    serializer_class = NotificationSerializer
+
+    @computed(*TEXT_LOOKUPS, context=True)
+    def title(context, *cols):
+        return [title for title, _ in _texts(context, *cols)]
+
+    @computed(*TEXT_LOOKUPS, context=True)
+    def body(context, *cols):
+        return [body for _, body in _texts(context, *cols)]
+
+    @computed("expires_at")
+    def is_expired(expires_ats):
+        now = timezone.now()
+        return [bool(expires_at and expires_at <= now) for expires_at in expires_ats]
+
+    @computed("created_at")
+    def time_ago(created_ats):
+        now = timezone.now()
+        out = []
+        for created_at in created_ats:
+            if created_at is None:
+                out.append(None)  # the serializer's subtraction fails
+                continue
+            seconds = int((now - created_at).total_seconds())
+            if seconds < 60:
+                out.append(f"{seconds}s")
+            elif seconds < 3600:
+                out.append(f"{seconds // 60}m")
+            elif seconds < 86400:
+                out.append(f"{seconds // 3600}h")
+            else:
+                out.append(f"{seconds // 86400}d")
+        return out
@@ -1,3 +1,5 @@
+import re
+
 from django.utils import timezone
 from rest_framework import serializers
 
@@ -7,6 +9,288 @@ from .models import Notification, Preference, Reminder, FacilityAnnouncement
 from accounts.enums import UserRole
 
 
+LAB_TOPICS = {Topic.LAB_RESULT_READY, Topic.LAB_RESULT_CRITICAL}
+RX_TOPICS = {Topic.PRESCRIPTION_READY, Topic.PRESCRIPTION_REFILL}
+
+
+def text_refs(topic, title, body, data):
+    """(patient_id, order_id, rx_id) a notification refers to, for enrich_text()."""
+    title = title or ""
+    body = body or ""
+    data = data or {}
+
+    # Prefer payload IDs, but fall back to parsing legacy text.
+    patient_id = data.get("patient_id") or data.get("patient")
+    order_id = data.get("order_id") or data.get("lab_order_id")
+    rx_id = data.get("prescription_id") or data.get("rx_id")
+
+    if not patient_id:
+        m = re.search(r"Patient\s*#\s*(\d+)", body) or re.search(r"Patient\s*#\s*(\d+)", title)
+        if m:
+            try:
+                patient_id = int(m.group(1))
+            except Exception:
+                patient_id = m.group(1)
+
+    if not order_id and topic in LAB_TOPICS:
+        m = re.search(r"Lab\s*order\s*#\s*(\d+)", body, re.I) or re.search(
+            r"Lab\s*order\s*#\s*(\d+)", title, re.I
+        )
+        if m:
+            try:
+                order_id = int(m.group(1))
+            except Exception:
+                order_id = m.group(1)
+
+    if not rx_id and topic in RX_TOPICS:
+        m = re.search(r"Prescription\s*#\s*(\d+)", body, re.I) or re.search(
+            r"Prescription\s*#\s*(\d+)", title, re.I
+        )
+        if m:
+            try:
+                rx_id = int(m.group(1))
+            except Exception:
+                rx_id = m.group(1)
+    return patient_id, order_id, rx_id
+
+
+def _pk(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class TextRefs:
+    """Patients, lab orders and prescriptions enrich_text() reads, loaded per page."""
+
+    def __init__(self, patients=None, orders=None, prescriptions=None):
+        self.patients = patients or {}
+        self.orders = orders or {}
+        self.prescriptions = prescriptions or {}
+
+
+def load_text_refs(rows) -> TextRefs:
+    """One in_bulk() per referenced model for (topic, title, body, data) rows."""
+    patient_ids, order_ids, rx_ids = set(), set(), set()
+    for topic, title, body, data in rows:
+        try:
+            patient_id, order_id, rx_id = text_refs(topic, title, body, data)
+        except Exception:
+            continue
+        if patient_id and not (data or {}).get("patient_name"):
+            patient_ids.add(_pk(patient_id))
+        if order_id and topic in LAB_TOPICS and not (data or {}).get("tests_summary"):
+            order_ids.add(_pk(order_id))
+        if rx_id and topic in RX_TOPICS:
+            rx_ids.add(_pk(rx_id))
+
+    return TextRefs(
+        patients=_in_bulk(
+            "patients.Patient", patient_ids, lambda qs: qs.only("first_name", "middle_name", "last_name")
+        ),
+        orders=_in_bulk(
+            "labs.LabOrder", order_ids, lambda qs: qs.select_related("patient").prefetch_related("items__test")
+        ),
+        prescriptions=_in_bulk(
+            "pharmacy.Prescription", rx_ids, lambda qs: qs.select_related("patient").prefetch_related("items__drug")
+        ),
+    )
+
+
+def _in_bulk(label, ids, shape) -> dict:
+    ids = ids - {None}
+    if not ids:
+        return {}
+    try:
+        from django.apps import apps
+
+        return shape(apps.get_model(label).objects.all()).in_bulk(ids)
+    except Exception:
+        return {}
+
+
+def enrich_text(topic, title, body, data, role, refs=None):
+    """Human-friendly (title, body) of a notification for a reader of `role`.
+
+    Older notifications were created with IDs (e.g. "Patient #12").
+    We keep the stored data as-is, but render a more human-friendly title/body
+    by resolving names from payload IDs when available.
+
+    This is intentionally best-effort: on any error the stored text is returned.
+    `refs` are the records of a whole page (load_text_refs()); without them
+    this row's are loaded.
+    """
+    stored = (title, body)
+    try:
+        title = title or ""
+        body = body or ""
+        data = data or {}
+
+        def summarize(items, limit=3):
+            items = [str(x).strip() for x in (items or []) if x]
+            if not items:
+                return ""
+            head = items[:limit]
+            tail = len(items) - len(head)
+            s = ", ".join(head)
+            if tail > 0:
+                s += f" (+{tail} more)"
+            return s
+
+        if refs is None:
+            refs = load_text_refs([(topic, title, body, data)])
+        patient_id, order_id, rx_id = text_refs(topic, title, body, data)
+
+        # Resolve patient name (best-effort)
+        patient_name = data.get("patient_name")
+        if not patient_name and patient_id:
+            try:
+                p = refs.patients.get(_pk(patient_id))
+                if p:
+                    patient_name = getattr(p, "full_name", None) or " ".join(
+                        [
+                            x
+                            for x in [
+                                getattr(p, "first_name", ""),
+                                getattr(p, "middle_name", ""),
+                                getattr(p, "last_name", ""),
+                            ]
+                            if x
+                        ]
+                    ).strip()
+            except Exception:
+                patient_name = None
+
+        if patient_id and not patient_name:
+            patient_name = f"Patient #{patient_id}"
+
+        # Replace legacy "Patient #ID" where possible.
+        if patient_id and patient_name and patient_name != f"Patient #{patient_id}":
+            body = re.sub(
+                rf"Patient\s*#\s*{re.escape(str(patient_id))}\b",
+                patient_name,
+                body,
+            )
+            title = re.sub(
+                rf"Patient\s*#\s*{re.escape(str(patient_id))}\b",
+                patient_name,
+                title,
+            )
+
+        # Replace legacy "Lab order #ID" / "Prescription #ID" in title/body so patients don't see internal IDs.
+        def replace_legacy(pattern, replacement):
+            nonlocal title, body
+            try:
+                title = re.sub(pattern, replacement, title, flags=re.I)
+                body = re.sub(pattern, replacement, body, flags=re.I)
+            except Exception:
+                pass
+
+        if order_id:
+            replace_legacy(rf"Lab\s*order\s*#\s*{re.escape(str(order_id))}\b", "Lab results")
+        if rx_id:
+            replace_legacy(rf"Prescription\s*#\s*{re.escape(str(rx_id))}\b", "Prescription")
+
+        # Enrich Lab notifications: add test names (and patient name for staff).
+        if topic in LAB_TOPICS:
+            tests_summary = data.get("tests_summary")
+            if not tests_summary and order_id:
+                try:
+                    order = refs.orders.get(_pk(order_id))
+                    if order:
+                        # refresh patient name from order.patient if needed
+                        if getattr(order, "patient", None) and (
+                            not patient_name or patient_name == f"Patient #{patient_id}"
+                        ):
+                            try:
+                                patient_name = getattr(order.patient, "full_name", None) or patient_name
+                            except Exception:
+                                pass
+
+                        names = []
+                        for it in order.items.all():
+                            nm = None
+                            if getattr(it, "test_id", None) and getattr(it, "test", None):
+                                nm = getattr(it.test, "name", None) or getattr(it.test, "code", None)
+                            nm = nm or getattr(it, "requested_name", None)
+                            if nm:
+                                names.append(str(nm))
+                        tests_summary = summarize(names)
+                except Exception:
+                    tests_summary = ""
+
+            if tests_summary:
+                if role == UserRole.PATIENT:
+                    line = f"Tests: {tests_summary}"
+                    if line not in body:
+                        body = f"{line}\n{body}".strip()
+                else:
+                    prefix = (
+                        f"{patient_name} • {tests_summary}" if patient_name else tests_summary
+                    )
+                    if prefix and prefix not in body:
+                        body = f"{prefix}\n{body}".strip()
+
+        # Enrich Prescription notifications: add medication names (and patient name for staff).
+        if topic in RX_TOPICS:
+            meds_summary = data.get("meds_summary")
+            if (not meds_summary or not patient_name or patient_name == f"Patient #{patient_id}") and rx_id:
+                try:
+                    rx = refs.prescriptions.get(_pk(rx_id))
+                    if rx:
+                        if getattr(rx, "patient", None) and (
+                            not patient_name or patient_name == f"Patient #{patient_id}"
+                        ):
+                            try:
+                                patient_name = getattr(rx.patient, "full_name", None) or patient_name
+                            except Exception:
+                                pass
+
+                        if not meds_summary:
+                            names = []
+                            for it in rx.items.all():
+                                nm = None
+                                if getattr(it, "drug_id", None) and getattr(it, "drug", None):
+                                    nm = getattr(it.drug, "name", None)
+                                nm = nm or getattr(it, "drug_name", None)
+                                dose = getattr(it, "dose", None) or ""
+                                nm = (str(nm).strip() if nm else "")
+                                dose = str(dose).strip()
+                                if nm and dose:
+                                    names.append(f"{nm} {dose}".strip())
+                                elif nm:
+                                    names.append(nm)
+                            meds_summary = summarize(names)
+                except Exception:
+                    meds_summary = meds_summary or ""
+
+            if meds_summary:
+                if role == UserRole.PATIENT:
+                    line = f"Medications: {meds_summary}"
+                    if line not in body:
+                        body = f"{line}\n{body}".strip()
+                else:
+                    prefix = f"{patient_name} • {meds_summary}" if patient_name else meds_summary
+                    if prefix and prefix not in body:
+                        body = f"{prefix}\n{body}".strip()
+        return title, body
+    except Exception:
+        return stored
+
+
+class NotificationListSerializer(serializers.ListSerializer):
+    """Loads the records enrich_text() reads once for the whole list."""
+
+    def to_representation(self, data):
+        items = data.all() if hasattr(data, "all") else data
+        items = list(items)
+        self.context["notification_refs"] = load_text_refs(
+            (obj.topic, obj.title, obj.body, obj.data) for obj in items
+        )
+        return super().to_representation(items)
+
+
 class NotificationSerializer(serializers.ModelSerializer):
     time_ago = serializers.SerializerMethodField()
     is_expired = serializers.SerializerMethodField()
@@ -46,6 +330,7 @@ class NotificationSerializer(serializers.ModelSerializer):
             "time_ago",
             "is_expired",
         ]
+        list_serializer_class = NotificationListSerializer
 
     def get_time_ago(self, obj):
         # Keep frontend simple; still okay if frontend ignores this.
@@ -70,288 +355,21 @@ class NotificationSerializer(serializers.ModelSerializer):
 
 
     def to_representation(self, obj):
-        """Enrich notification text for dashboard/activity feeds.
-
-        Older notifications were created with IDs (e.g. "Patient #12").
-        We keep the stored data as-is, but render a more human-friendly title/body
-        by resolving names from payload IDs when available.
-
-        This is intentionally best-effort and lightweight (recent feeds are small).
-        """
+        """Enrich notification text for dashboard/activity feeds (enrich_text)."""
         rep = super().to_representation(obj)
-        try:
-            import re
-
-            request = self.context.get("request")
-            ctx_user = getattr(request, "user", None)
-            # Fallback for places where the serializer is used without context
-            # (e.g. custom actions returning NotificationSerializer(...).data)
-            user = ctx_user or getattr(obj, "user", None)
-            role = (getattr(user, "role", "") or "").upper()
-            # (e.g. custom actions returning NotificationSerializer(...).data)
-            user = ctx_user or getattr(obj, "user", None)
-            role = (getattr(user, "role", "") or "").upper()
-            # (e.g. custom actions returning NotificationSerializer(...).data)
-            user = ctx_user or getattr(obj, "user", None)
-            role = (getattr(user, "role", "") or "").upper()
-            # (e.g. custom actions returning NotificationSerializer(...).data)
-            user = ctx_user or getattr(obj, "user", None)
-            role = (getattr(user, "role", "") or "").upper()
-
-            # (e.g. custom actions returning NotificationSerializer(...).data)
-            user = ctx_user or getattr(obj, "user", None)
-            role = (getattr(user, "role", "") or "").upper()
-
-            # Fallback for places where the serializer is used without context
-            # (e.g. custom actions returning NotificationSerializer(...).data)
-            user = ctx_user or getattr(obj, "user", None)
-            role = (getattr(user, "role", "") or "").upper()
-            # Fallback for places where the serializer is used without context
-            # (e.g. custom actions returning NotificationSerializer(...).data)
-            user = ctx_user or getattr(obj, "user", None)
-            role = (getattr(user, "role", "") or "").upper()
-            # Fallback for places where the serializer is used without context
-            # (e.g. custom actions returning NotificationSerializer(...).data)
-            user = ctx_user or getattr(obj, "user", None)
-            role = (getattr(user, "role", "") or "").upper()
-            # Fallback for places where the serializer is used without context
-            # (e.g. custom actions returning NotificationSerializer(...).data)
-            user = ctx_user or getattr(obj, "user", None)
-            role = (getattr(user, "role", "") or "").upper()
-            # Fallback for places where the serializer is used without context
-            # (e.g. custom actions returning NotificationSerializer(...).data)
-            user = ctx_user or getattr(obj, "user", None)
-            role = (getattr(user, "role", "") or "").upper()
-
-
-            topic = rep.get("topic")
-            title = rep.get("title") or ""
-            body = rep.get("body") or ""
-            data = rep.get("data") or {}
-
-            def summarize(items, limit=3):
-                items = [str(x).strip() for x in (items or []) if x]
-                if not items:
-                    return ""
-                head = items[:limit]
-                tail = len(items) - len(head)
-                s = ", ".join(head)
-                if tail > 0:
-                    s += f" (+{tail} more)"
-                return s
-
-            # Prefer payload IDs, but fall back to parsing legacy text.
-            patient_id = data.get("patient_id") or data.get("patient")
-            order_id = data.get("order_id") or data.get("lab_order_id")
-            rx_id = data.get("prescription_id") or data.get("rx_id")
-
-            if not patient_id:
-                m = re.search(r"Patient\s*#\s*(\d+)", body) or re.search(r"Patient\s*#\s*(\d+)", title)
-                if m:
-                    try:
-                        patient_id = int(m.group(1))
-                    except Exception:
-                        patient_id = m.group(1)
-
-            if not order_id and topic in {Topic.LAB_RESULT_READY, Topic.LAB_RESULT_CRITICAL}:
-                m = re.search(r"Lab\s*order\s*#\s*(\d+)", body, re.I) or re.search(
-                    r"Lab\s*order\s*#\s*(\d+)", title, re.I
-                )
-                if m:
-                    try:
-                        order_id = int(m.group(1))
-                    except Exception:
-                        order_id = m.group(1)
-
-            if not rx_id and topic in {Topic.PRESCRIPTION_READY, Topic.PRESCRIPTION_REFILL}:
-                m = re.search(r"Prescription\s*#\s*(\d+)", body, re.I) or re.search(
-                    r"Prescription\s*#\s*(\d+)", title, re.I
-                )
-                if m:
-                    try:
-                        rx_id = int(m.group(1))
-                    except Exception:
-                        rx_id = m.group(1)
-
-            # Resolve patient name (best-effort)
-            patient_name = data.get("patient_name")
-            if not patient_name and patient_id:
-                try:
-                    from patients.models import Patient
-
-                    p = (
-                        Patient.objects.filter(id=patient_id)
-                        .only("first_name", "middle_name", "last_name")
-                        .first()
-                    )
-                    if p:
-                        patient_name = getattr(p, "full_name", None) or " ".join(
-                            [
-                                x
-                                for x in [
-                                    getattr(p, "first_name", ""),
-                                    getattr(p, "middle_name", ""),
-                                    getattr(p, "last_name", ""),
-                                ]
-                                if x
-                            ]
-                        ).strip()
-                except Exception:
-                    patient_name = None
-
-            if patient_id and not patient_name:
-                patient_name = f"Patient #{patient_id}"
-
-            # Replace legacy "Patient #ID" where possible.
-            if patient_id and patient_name and patient_name != f"Patient #{patient_id}":
-                body = re.sub(
-                    rf"Patient\s*#\s*{re.escape(str(patient_id))}\b",
-                    patient_name,
-                    body,
-                )
-                title = re.sub(
-                    rf"Patient\s*#\s*{re.escape(str(patient_id))}\b",
-                    patient_name,
-                    title,
-                )
-
-
-            # Replace legacy "Lab order #ID" / "Prescription #ID" in title/body so patients don't see internal IDs.
-            def replace_legacy(pattern, replacement):
-                nonlocal title, body
-                try:
-                    title = re.sub(pattern, replacement, title, flags=re.I)
-                    body = re.sub(pattern, replacement, body, flags=re.I)
-                except Exception:
-                    pass
-
-            if order_id:
-                replace_legacy(rf"Lab\s*order\s*#\s*{re.escape(str(order_id))}\b", "Lab results")
-            if rx_id:
-                replace_legacy(rf"Prescription\s*#\s*{re.escape(str(rx_id))}\b", "Prescription")
-
-
-            # Replace legacy "Lab order #ID" / "Prescription #ID" in title/body so patients don't see internal IDs.
-            def replace_legacy(pattern, replacement):
-                nonlocal title, body
-                try:
-                    title = re.sub(pattern, replacement, title, flags=re.I)
-                    body = re.sub(pattern, replacement, body, flags=re.I)
-                except Exception:
-                    pass
-
-            if order_id:
-                replace_legacy(
-                    rf"Lab\s*order\s*#\s*{re.escape(str(order_id))}\b",
-                    "Lab results",
-                )
-            if rx_id:
-                replace_legacy(
-                    rf"Prescription\s*#\s*{re.escape(str(rx_id))}\b",
-                    "Prescription",
-                )
-
-            # Enrich Lab notifications: add test names (and patient name for staff).
-            if topic in {Topic.LAB_RESULT_READY, Topic.LAB_RESULT_CRITICAL}:
-                tests_summary = data.get("tests_summary")
-                if not tests_summary and order_id:
-                    try:
-                        from labs.models import LabOrder
-
-                        order = (
-                            LabOrder.objects.filter(id=order_id)
-                            .select_related("patient")
-                            .prefetch_related("items__test")
-                            .first()
-                        )
-                        if order:
-                            # refresh patient name from order.patient if needed
-                            if getattr(order, "patient", None) and (
-                                not patient_name or patient_name == f"Patient #{patient_id}"
-                            ):
-                                try:
-                                    patient_name = getattr(order.patient, "full_name", None) or patient_name
-                                except Exception:
-                                    pass
-
-                            names = []
-                            for it in order.items.all():
-                                nm = None
-                                if getattr(it, "test_id", None) and getattr(it, "test", None):
-                                    nm = getattr(it.test, "name", None) or getattr(it.test, "code", None)
-                                nm = nm or getattr(it, "requested_name", None)
-                                if nm:
-                                    names.append(str(nm))
-                            tests_summary = summarize(names)
-                    except Exception:
-                        tests_summary = ""
-
-                if tests_summary:
-                    if role == UserRole.PATIENT:
-                        line = f"Tests: {tests_summary}"
-                        if line not in body:
-                            body = f"{line}\n{body}".strip()
-                    else:
-                        prefix = (
-                            f"{patient_name} • {tests_summary}" if patient_name else tests_summary
-                        )
-                        if prefix and prefix not in body:
-                            body = f"{prefix}\n{body}".strip()
-
-            # Enrich Prescription notifications: add medication names (and patient name for staff).
-            if topic in {Topic.PRESCRIPTION_READY, Topic.PRESCRIPTION_REFILL}:
-                meds_summary = data.get("meds_summary")
-                if (not meds_summary or not patient_name or patient_name == f"Patient #{patient_id}") and rx_id:
-                    try:
-                        from pharmacy.models import Prescription
-
-                        rx = (
-                            Prescription.objects.filter(id=rx_id)
-                            .select_related("patient")
-                            .prefetch_related("items__drug")
-                            .first()
-                        )
-                        if rx:
-                            if getattr(rx, "patient", None) and (
-                                not patient_name or patient_name == f"Patient #{patient_id}"
-                            ):
-                                try:
-                                    patient_name = getattr(rx.patient, "full_name", None) or patient_name
-                                except Exception:
-                                    pass
-
-                            if not meds_summary:
-                                names = []
-                                for it in rx.items.all():
-                                    nm = None
-                                    if getattr(it, "drug_id", None) and getattr(it, "drug", None):
-                                        nm = getattr(it.drug, "name", None)
-                                    nm = nm or getattr(it, "drug_name", None)
-                                    dose = getattr(it, "dose", None) or ""
-                                    nm = (str(nm).strip() if nm else "")
-                                    dose = str(dose).strip()
-                                    if nm and dose:
-                                        names.append(f"{nm} {dose}".strip())
-                                    elif nm:
-                                        names.append(nm)
-                                meds_summary = summarize(names)
-                    except Exception:
-                        meds_summary = meds_summary or ""
-
-                if meds_summary:
-                    if role == UserRole.PATIENT:
-                        line = f"Medications: {meds_summary}"
-                        if line not in body:
-                            body = f"{line}\n{body}".strip()
-                    else:
-                        prefix = f"{patient_name} • {meds_summary}" if patient_name else meds_summary
-                        if prefix and prefix not in body:
-                            body = f"{prefix}\n{body}".strip()
+        if "title" not in rep and "body" not in rep:
+            return rep
+        request = self.context.get("request")
+        # Fallback for places where the serializer is used without context
+        # (e.g. custom actions returning NotificationSerializer(...).data)
+        user = getattr(request, "user", None) or getattr(obj, "user", None)
+        role = (getattr(user, "role", "") or "").upper()
+        refs = self.context.get("notification_refs")
+        title, body = enrich_text(obj.topic, obj.title, obj.body, obj.data, role, refs)
+        if "title" in rep:
             rep["title"] = title
+        if "body" in rep:
             rep["body"] = body
-        except Exception:
-            return rep
-
         return rep
 
 
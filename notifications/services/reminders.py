@@ -0,0 +1,109 @@
+"""notifications/services/reminders.py
+
+Claim-and-send for nurse Reminder rows (used by `manage.py process_reminders`).
+
+A batch is processed in ONE transaction:
+1. lock due PENDING rows with SELECT ... FOR UPDATE SKIP LOCKED (where the
+   backend supports it) so concurrent runners take disjoint batches;
+2. flip them to SENT with a single conditional UPDATE
+   (`WHERE status = 'PENDING'`) and keep only the rows this runner flipped;
+3. insert the nurses' notifications with one bulk insert.
+
+If anything fails the transaction rolls back and the rows stay PENDING, so a
+reminder is never marked SENT without its notification (and vice versa).
+
+After the commit, nurses with EMAIL enabled for REMINDER also get the
+reminder by email, as notify_user() would send it.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from notifications.enums import Topic, Priority
+from notifications.models import Notification, Reminder
+from notifications.services.notify import bulk_notify, email_enabled_user_ids, send_email_if_enabled
+
+
+@dataclass
+class BatchResult:
+    claimed: int = 0
+    notified: int = 0
+    emailed: int = 0
+
+
+def due_queryset(now, *, lookahead_minutes=5):
+    return (
+        Reminder.objects.filter(
+            status=Reminder.Status.PENDING,
+            reminder_time__lte=now + timedelta(minutes=lookahead_minutes),
+            nurse__isnull=False,
+        )
+        .order_by("reminder_time", "id")
+    )
+
+
+def unassigned_count(now, *, lookahead_minutes=5) -> int:
+    """Due reminders with no nurse (never sent; reported by the command)."""
+    return Reminder.objects.filter(
+        status=Reminder.Status.PENDING,
+        reminder_time__lte=now + timedelta(minutes=lookahead_minutes),
+        nurse__isnull=True,
+    ).count()
+
+
+def _notification_for(rem) -> Notification:
+    patient_name = getattr(rem.patient, "full_name", None) or f"Patient #{rem.patient_id}"
+    return Notification(
+        user_id=rem.nurse_id,
+        facility_id=rem.patient.facility_id,
+        topic=Topic.REMINDER,
+        priority=Priority.NORMAL,
+        title=f"Reminder: {rem.get_reminder_type_display()}",
+        body=f"{patient_name}\n{rem.message}",
+        data={"reminder_id": rem.id, "patient_id": rem.patient_id, "reminder_type": rem.reminder_type},
+        action_url=f"/facility/patients/{rem.patient_id}",
+        group_key=f"REMINDER:{rem.id}",
+    )
+
+
+def process_batch(*, batch_size=200, lookahead_minutes=5, now=None) -> BatchResult:
+    """Claim up to `batch_size` due reminders and notify their nurses."""
+    now = now or timezone.now()
+    with transaction.atomic():
+        qs = due_queryset(now, lookahead_minutes=lookahead_minutes)
+        if connection.features.has_select_for_update_skip_locked:
+            qs = qs.select_for_update(skip_locked=True)
+        ids = list(qs.values_list("id", flat=True)[:batch_size])
+        if not ids:
+            return BatchResult()
+
+        Reminder.objects.filter(id__in=ids, status=Reminder.Status.PENDING).update(
+            status=Reminder.Status.SENT, sent_at=now
+        )
+        # Rows another runner flipped first carry a different sent_at.
+        claimed = list(
+            Reminder.objects.select_related("patient", "nurse")
+            .filter(id__in=ids, status=Reminder.Status.SENT, sent_at=now)
+            .order_by("reminder_time", "id")
+        )
+        rows = [_notification_for(rem) for rem in claimed]
+        notified = bulk_notify(rows)
+
+    return BatchResult(claimed=len(claimed), notified=notified, emailed=_email(claimed, rows))
+
+
+def _email(claimed, rows) -> int:
+    """Email the reminders whose nurse has EMAIL enabled (bulk_notify is in-app only)."""
+    enabled = email_enabled_user_ids({rem.nurse_id for rem in claimed}, Topic.REMINDER)
+    sent = 0
+    for rem, n in zip(claimed, rows):
+        if rem.nurse_id in enabled and send_email_if_enabled(
+            user=rem.nurse, topic=Topic.REMINDER, subject=n.title, html=f"<p>{n.body}</p>", text=n.body
+        ):
+            sent += 1
+    return sent
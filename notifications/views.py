@@ -7,8 +7,9 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
 from rest_framework.exceptions import PermissionDenied
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from accounts.authentication import ClaimsJWTAuthentication, HeaderJWTAuthentication as JWTAuthentication
 from accounts.enums import UserRole
+from core.fastread import FastListMixin
 
 from .enums import Channel, Topic, Priority
 from .models import Notification, Preference, Reminder, FacilityAnnouncement
@@ -21,6 +22,7 @@ from .serializers import (
     FacilityAnnouncementCreateSerializer,
 )
 
+from .readers import NotificationListReader
 from .permissions import CanBroadcastFacilityAnnouncements
 from .services.notify import notify_facility_roles, notify_facility_patients, facility_staff_roles
 
@@ -75,18 +77,21 @@ def _parse_since(value: str):
 
 
 class NotificationViewSet(
+    FastListMixin,
     mixins.ListModelMixin,
     mixins.RetrieveModelMixin,
     mixins.DestroyModelMixin,
     viewsets.GenericViewSet,
 ):
     serializer_class = NotificationSerializer
-    authentication_classes = [JWTAuthentication]
+    fast_reader = NotificationListReader
+    # polled by every client: scoped by the token's user id alone
+    authentication_classes = [ClaimsJWTAuthentication]
     permission_classes = [IsAuthenticated]
     pagination_class = StandardPagination
 
     def get_queryset(self):
-        qs = Notification.objects.filter(user=self.request.user).select_related("facility")
+        qs = Notification.objects.filter(user_id=self.request.user.id).select_related("facility")
 
         read = _parse_bool(self.request.query_params.get("read"))
         if read is not None:
@@ -155,7 +160,7 @@ class NotificationViewSet(
     def read_all(self, request):
         now = timezone.now()
         updated = (
-            Notification.objects.filter(user=request.user, archived=False, is_read=False)
+            Notification.objects.filter(user_id=request.user.id, archived=False, is_read=False)
             .update(is_read=True, read_at=now)
         )
         return Response({"updated": updated})
@@ -164,7 +169,7 @@ class NotificationViewSet(
     def archive_all_read(self, request):
         now = timezone.now()
         updated = (
-            Notification.objects.filter(user=request.user, archived=False, is_read=True)
+            Notification.objects.filter(user_id=request.user.id, archived=False, is_read=True)
             .update(archived=True, archived_at=now)
         )
         return Response({"updated": updated})
@@ -176,7 +181,7 @@ class NotificationViewSet(
             return Response({"detail": "ids must be a list"}, status=400)
         now = timezone.now()
         updated = (
-            Notification.objects.filter(user=request.user, id__in=ids)
+            Notification.objects.filter(user_id=request.user.id, id__in=ids)
             .update(is_read=True, read_at=now)
         )
         return Response({"updated": updated})
@@ -188,7 +193,7 @@ class NotificationViewSet(
             return Response({"detail": "ids must be a list"}, status=400)
         now = timezone.now()
         updated = (
-            Notification.objects.filter(user=request.user, id__in=ids)
+            Notification.objects.filter(user_id=request.user.id, id__in=ids)
             .update(archived=True, archived_at=now)
         )
         return Response({"updated": updated})
@@ -198,12 +203,12 @@ class NotificationViewSet(
         ids = request.data.get("ids") or []
         if not isinstance(ids, list):
             return Response({"detail": "ids must be a list"}, status=400)
-        deleted, _ = Notification.objects.filter(user=request.user, id__in=ids).delete()
+        deleted, _ = Notification.objects.filter(user_id=request.user.id, id__in=ids).delete()
         return Response({"deleted": deleted})
 
     @action(detail=False, methods=["get"])
     def unread_count(self, request):
-        base = Notification.objects.filter(user=request.user, archived=False)
+        base = Notification.objects.filter(user_id=request.user.id, archived=False)
         unread = base.filter(is_read=False).count()
         urgent = base.filter(is_read=False, priority=Priority.URGENT).count()
         return Response({"count": unread, "urgent_count": urgent})
@@ -216,7 +221,7 @@ class NotificationViewSet(
             limit = 10
         limit = max(1, min(limit, 50))
 
-        qs = Notification.objects.filter(user=request.user, archived=False).order_by("-created_at", "-id")
+        qs = Notification.objects.filter(user_id=request.user.id, archived=False).order_by("-created_at", "-id")
         items = list(qs[:limit])
         unread = qs.filter(is_read=False).count()
         return Response({
@@ -226,7 +231,7 @@ class NotificationViewSet(
 
     @action(detail=False, methods=["get"])
     def stats(self, request):
-        base = Notification.objects.filter(user=request.user)
+        base = Notification.objects.filter(user_id=request.user.id)
         total = base.count()
         unread = base.filter(is_read=False, archived=False).count()
         read = base.filter(is_read=True, archived=False).count()
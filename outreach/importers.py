@@ -1,12 +1,13 @@
 from __future__ import annotations
 
 import csv
-import io
+
+from core.uploads import text_reader
 
 def read_tabular_file(uploaded_file):
     """Read CSV or XLSX into list[dict].
 
-    - CSV: utf-8
+    - CSV: utf-8, read as a stream
     - XLSX: requires openpyxl
     """
     if not uploaded_file:
@@ -14,9 +15,8 @@ def read_tabular_file(uploaded_file):
 
     filename = (uploaded_file.name or "").lower()
     if filename.endswith(".csv"):
-        buf = io.StringIO(uploaded_file.read().decode("utf-8"))
-        reader = csv.DictReader(buf)
-        return list(reader)
+        with text_reader(uploaded_file) as buf:
+            return list(csv.DictReader(buf))
     if filename.endswith(".xlsx"):
         import openpyxl  # already in requirements
 
@@ -11,7 +11,7 @@ from django.conf import settings
 from django.core.files.base import ContentFile
 from django.db import transaction
 from django.db.models import Q, Count
-from django.http import FileResponse, Http404
+from django.http import FileResponse, Http404, HttpResponseRedirect
 from django.template.loader import render_to_string
 from django.utils import timezone
 
@@ -20,8 +20,9 @@ from rest_framework.decorators import action, api_view, permission_classes, auth
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from accounts.authentication import HeaderJWTAuthentication as JWTAuthentication
 from rest_framework.exceptions import PermissionDenied
+from core.uploads import import_max_bytes, upload_limit
 
 from .constants import (
     MODULE_VITALS, MODULE_ENCOUNTER, MODULE_LAB, MODULE_PHARMACY, MODULE_IMMUNIZATION,
@@ -537,6 +538,7 @@ class OutreachEventViewSet(viewsets.ModelViewSet):
         return Response({"detail": "Staff enabled."})
 
     @action(detail=True, methods=["post"], url_path="staff/import-file")
+    @upload_limit(import_max_bytes)
     def staff_import_file(self, request, pk=None):
         """Bulk import staff from CSV/XLSX.
 
@@ -704,12 +706,18 @@ class OutreachEventViewSet(viewsets.ModelViewSet):
         export = OutreachExport.objects.filter(outreach_event=evt, id=export_id).first()
         if not export or not export.file:
             return Response({"detail": "Export not found."}, status=404)
-        try:
-            inline = request.query_params.get("inline") in ("1","true","yes")
-            as_attach = not (inline and export.export_format == "pdf")
-            return FileResponse(export.file.open("rb"), as_attachment=as_attach, filename=export.file.name.split("/")[-1])
-        except Exception:
-            raise Http404("Export file missing")
+        from attachments.services.direct import presign_download
+
+        inline = request.query_params.get("inline") in ("1","true","yes")
+        # Short-lived presigned GET: the bytes go storage -> client, not through a worker.
+        url = presign_download(
+            export.file,
+            filename=export.file.name.split("/")[-1],
+            inline=inline and export.export_format == "pdf",
+        )
+        if request.query_params.get("json") in ("1","true","yes"):
+            return Response({"url": url})
+        return HttpResponseRedirect(url)
 
 
 # ------------------------
@@ -1053,6 +1061,7 @@ class OutreachLabTestViewSet(viewsets.ModelViewSet):
         return super().update(request, *args, **kwargs)
 
     @action(detail=False, methods=["post"], url_path="import-file")
+    @upload_limit(import_max_bytes)
     def import_file(self, request):
         """Import lab tests catalog from CSV/XLSX.
 
@@ -1398,6 +1407,7 @@ class OutreachDrugViewSet(viewsets.ModelViewSet):
         return super().update(request, *args, **kwargs)
 
     @action(detail=False, methods=["post"], url_path="import-file")
+    @upload_limit(import_max_bytes)
     def import_file(self, request):
         """Import pharmacy catalog from CSV/XLSX.
 
@@ -1629,6 +1639,7 @@ class OutreachVaccineCatalogViewSet(viewsets.ModelViewSet):
         return super().update(request, *args, **kwargs)
 
     @action(detail=False, methods=["post"], url_path="import-file")
+    @upload_limit(import_max_bytes)
     def import_file(self, request, *args, **kwargs):
         """Import vaccines from CSV/XLSX with columns: name (required), code, manufacturer, notes, is_active."""
         try:
@@ -0,0 +1,128 @@
+"""
+patients.access
+
+Maintains PatientAccessGrant, the (patient, user, source) index used to scope
+independent providers to the patients they are related to.
+
+Each source relationship is a (model, user field) pair whose rows carry a
+`patient_id`. Signal handlers in patients.signals call `sync_instance` after
+saves/deletes; `rebuild_grants` recomputes everything from scratch.
+"""
+from django.apps import apps
+from django.db import transaction
+from django.db.models import Q
+
+from .enums import AccessSource
+from .models import PatientAccessGrant
+
+# source -> (model label, user FK attname)
+SOURCES = {
+    AccessSource.APPOINTMENT: ("appointments.Appointment", "provider_id"),
+    AccessSource.ENCOUNTER_CREATOR: ("encounters.Encounter", "created_by_id"),
+    AccessSource.ENCOUNTER_PROVIDER: ("encounters.Encounter", "provider_id"),
+    AccessSource.ENCOUNTER_NURSE: ("encounters.Encounter", "nurse_id"),
+    AccessSource.LAB_ORDERED_BY: ("labs.LabOrder", "ordered_by_id"),
+    AccessSource.LAB_OUTSOURCED_TO: ("labs.LabOrder", "outsourced_to_id"),
+    AccessSource.RX_PRESCRIBED_BY: ("pharmacy.Prescription", "prescribed_by_id"),
+    AccessSource.RX_OUTSOURCED_TO: ("pharmacy.Prescription", "outsourced_to_id"),
+    AccessSource.PROVIDER_LINK: ("patients.PatientProviderLink", "provider_id"),
+}
+
+
+def sources_for_model(model) -> list[tuple[str, str]]:
+    """[(source, user attname)] tracked for a model class."""
+    label = model._meta.label
+    return [(src, attname) for src, (m, attname) in SOURCES.items() if m == label]
+
+
+def tracked_models():
+    return {apps.get_model(label) for label, _ in SOURCES.values()}
+
+
+def _has_backing_row(source, patient_id, user_id) -> bool:
+    label, attname = SOURCES[source]
+    model = apps.get_model(label)
+    return model._default_manager.filter(**{"patient_id": patient_id, attname: user_id}).exists()
+
+
+def refresh_grant(source, patient_id, user_id):
+    """Create or drop one grant so it matches the source table."""
+    if not patient_id or not user_id:
+        return
+    if _has_backing_row(source, patient_id, user_id):
+        PatientAccessGrant.objects.get_or_create(patient_id=patient_id, user_id=user_id, source=source)
+    else:
+        PatientAccessGrant.objects.filter(patient_id=patient_id, user_id=user_id, source=source).delete()
+
+
+def snapshot(instance) -> dict:
+    """{source: (patient_id, user_id)} for an instance's tracked relationships."""
+    return {
+        src: (getattr(instance, "patient_id", None), getattr(instance, attname, None))
+        for src, attname in sources_for_model(instance.__class__)
+    }
+
+
+def sync_instance(instance, *, before: dict | None = None, deleted: bool = False):
+    """
+    Bring grants in line after an instance was saved or deleted.
+
+    `before` is the snapshot taken prior to the save; pairs that changed are
+    re-checked so stale grants are dropped.
+    """
+    before = before or {}
+    for src, (patient_id, user_id) in snapshot(instance).items():
+        if deleted:
+            refresh_grant(src, patient_id, user_id)
+            continue
+        if patient_id and user_id:
+            PatientAccessGrant.objects.get_or_create(patient_id=patient_id, user_id=user_id, source=src)
+        old = before.get(src)
+        if old and old != (patient_id, user_id):
+            refresh_grant(src, *old)
+
+
+def rebuild_grants(*, batch_size=1000, stdout=None) -> int:
+    """Recompute every grant from the source tables. Returns rows written."""
+    written = 0
+    for src, (label, attname) in SOURCES.items():
+        model = apps.get_model(label)
+        pairs = (
+            model._default_manager.filter(patient_id__isnull=False, **{f"{attname}__isnull": False})
+            .values_list("patient_id", attname)
+            .distinct()
+        )
+        with transaction.atomic():
+            PatientAccessGrant.objects.filter(source=src).delete()
+
+            batch = []
+            for patient_id, user_id in pairs.iterator(chunk_size=batch_size):
+                batch.append(PatientAccessGrant(patient_id=patient_id, user_id=user_id, source=src))
+                if len(batch) >= batch_size:
+                    PatientAccessGrant.objects.bulk_create(batch, ignore_conflicts=True)
+                    written += len(batch)
+                    batch = []
+            if batch:
+                PatientAccessGrant.objects.bulk_create(batch, ignore_conflicts=True)
+                written += len(batch)
+
+        if stdout is not None:
+            stdout.write(f"{src}: {PatientAccessGrant.objects.filter(source=src).count()} grants")
+    return written
+
+
+def accessible_patient_ids(user_id, *, sources=None):
+    """Subquery of patient ids the user is related to (for `id__in=` filters)."""
+    qs = PatientAccessGrant.objects.filter(user_id=user_id)
+    if sources:
+        qs = qs.filter(source__in=list(sources))
+    return qs.values("patient_id")
+
+
+def has_access(patient_id, user_id) -> bool:
+    return PatientAccessGrant.objects.filter(patient_id=patient_id, user_id=user_id).exists()
+
+
+def access_q(user_id, *, field="id", sources=None) -> Q:
+    """Q restricting `field` (a patient id column) to patients granted to the user."""
+    return Q(**{f"{field}__in": accessible_patient_ids(user_id, sources=sources)})
@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class PatientsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'patients'
+
+    def ready(self):
+        # keep PatientAccessGrant in sync with appointments/encounters/labs/rx
+        from . import signals
+        signals.connect()
+
+        # drop cached dashboard summaries when contributing rows change
+        from .dashboard import connect_signals
+        connect_signals()
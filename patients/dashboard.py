@@ -0,0 +1,269 @@
+"""
+patients.dashboard
+
+Patient summary counts (visits, appointments, billing, pending labs/imaging,
+active prescriptions, latest vitals) computed in ONE query and cached briefly.
+
+Used by:
+  - PatientViewSet.dashboard_summary (patient app: self + dependents)
+  - PatientViewSet.summary (staff-side patient header card, one patient)
+
+The query returns one row per scoped patient, with every metric as a
+correlated scalar subquery; rows are then summed in Python. Scopes are tiny
+(a patient plus dependents), so this is a single cheap round trip.
+
+Cache entries are dropped by post_save/post_delete on the contributing models
+(see `connect_signals`). Services that write those models with
+QuerySet.update() or bulk_create() call `invalidate_for` themselves
+(billing.services.charges.post_charges, labs/pharmacy status roll-ups).
+"""
+from decimal import Decimal
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import DecimalField, F, Func, IntegerField, OuterRef, Q, Subquery
+from django.db.models.signals import post_save, post_delete
+
+from .models import Patient
+
+CACHE_PREFIX = "patient-summary"
+
+VITALS_FIELDS = [
+    "id", "measured_at", "systolic", "diastolic", "heart_rate", "temp_c",
+    "resp_rate", "spo2", "weight_kg", "height_cm", "bmi", "overall",
+]
+DECIMAL_VITALS = {"temp_c", "weight_kg", "height_cm", "bmi"}
+
+
+def _ttl() -> int:
+    return int(getattr(settings, "PATIENT_SUMMARY_CACHE_TTL", 60))
+
+
+def cache_key(patient_id, *, include_dependents: bool, facility_id=None) -> str:
+    scope = "family" if include_dependents else "self"
+    return f"{CACHE_PREFIX}:{patient_id}:{scope}:{facility_id or 'all'}"
+
+
+def _count(qs):
+    return Subquery(
+        qs.order_by().annotate(_n=Func(F("pk"), function="COUNT")).values("_n"),
+        output_field=IntegerField(),
+    )
+
+
+def _sum(qs, field):
+    return Subquery(
+        qs.order_by().annotate(_s=Func(F(field), function="SUM")).values("_s"),
+        output_field=DecimalField(max_digits=14, decimal_places=2),
+    )
+
+
+def _annotations(facility_id=None) -> dict:
+    from encounters.models import Encounter
+    from appointments.models import Appointment
+    from billing.models import Charge, PaymentAllocation
+    from billing.enums import ChargeStatus
+    from labs.models import LabOrder
+    from labs.enums import OrderStatus
+    from pharmacy.models import Prescription
+    from pharmacy.enums import RxStatus
+    from imaging.models import ImagingRequest
+    from imaging.enums import RequestStatus
+    from vitals.models import VitalSign
+
+    def scoped(model, **filters):
+        qs = model.objects.filter(patient_id=OuterRef("pk"), **filters)
+        if facility_id:
+            qs = qs.filter(facility_id=facility_id)
+        return qs
+
+    charges = scoped(Charge).exclude(status=ChargeStatus.VOID)
+    allocations = PaymentAllocation.objects.filter(charge__patient_id=OuterRef("pk")).exclude(
+        charge__status=ChargeStatus.VOID
+    )
+    if facility_id:
+        allocations = allocations.filter(charge__facility_id=facility_id)
+
+    latest_vitals = scoped(VitalSign).order_by("-measured_at", "-id")
+
+    ann = {
+        "m_visits": _count(scoped(Encounter)),
+        "m_appointments": _count(scoped(Appointment)),
+        "m_charged": _sum(charges, "amount"),
+        "m_allocated": _sum(allocations, "amount"),
+        "m_unpaid": _count(charges.filter(status__in=[ChargeStatus.UNPAID, ChargeStatus.PARTIALLY_PAID])),
+        "m_pending_labs": _count(scoped(LabOrder, status__in=[OrderStatus.PENDING, OrderStatus.IN_PROGRESS])),
+        "m_active_rx": _count(scoped(Prescription, status__in=[RxStatus.PRESCRIBED, RxStatus.PARTIALLY_DISPENSED])),
+        "m_pending_imaging": _count(scoped(ImagingRequest, status__in=[RequestStatus.REQUESTED, RequestStatus.SCHEDULED])),
+    }
+    for f in VITALS_FIELDS:
+        ann[f"v_{f}"] = Subquery(latest_vitals.values(f)[:1])
+    return ann
+
+
+def _annotations_keys():
+    return [
+        "m_visits", "m_appointments", "m_charged", "m_allocated", "m_unpaid",
+        "m_pending_labs", "m_active_rx", "m_pending_imaging",
+        *(f"v_{f}" for f in VITALS_FIELDS),
+    ]
+
+
+def _vitals_decimal_places(field_name) -> int:
+    from vitals.models import VitalSign
+    return VitalSign._meta.get_field(field_name).decimal_places
+
+
+def _is_self_pay(row) -> bool:
+    return row["insurance_status"] == "SELF_PAY" and not row["system_hmo_id"] and not row["hmo_id"]
+
+
+def compute_summary(patient, *, include_dependents: bool = True, facility_id=None) -> dict:
+    """Uncached summary for `patient` (and dependents when include_dependents)."""
+    scope = Q(id=patient.id)
+    if include_dependents:
+        scope |= Q(parent_patient_id=patient.id)
+
+    rows = list(
+        Patient.objects.filter(scope)
+        .order_by("id")
+        .annotate(**_annotations(facility_id))
+        .values("id", "insurance_status", "system_hmo_id", "hmo_id", *_annotations_keys())
+    )
+
+    total_visits = sum(r["m_visits"] or 0 for r in rows)
+    total_appointments = sum(r["m_appointments"] or 0 for r in rows)
+
+    # Billing outstanding (PATIENT LIABILITY ONLY): insured patients' bills are
+    # not "your" outstanding bills, so only self-pay patients count.
+    outstanding = Decimal("0.00")
+    unpaid = 0
+    for r in rows:
+        if not _is_self_pay(r):
+            continue
+        outstanding += (r["m_charged"] or Decimal("0.00")) - (r["m_allocated"] or Decimal("0.00"))
+        unpaid += r["m_unpaid"] or 0
+    # Guard against negative values due to over-allocation
+    if outstanding < 0:
+        outstanding = Decimal("0.00")
+
+    latest = None
+    for r in rows:
+        if r["v_id"] is None:
+            continue
+        if latest is None or (r["v_measured_at"], r["v_id"]) > (latest["v_measured_at"], latest["v_id"]):
+            latest = r
+
+    latest_vitals = None
+    if latest:
+        latest_vitals = {"patient_id": latest["id"]}
+        for f in VITALS_FIELDS:
+            val = latest[f"v_{f}"]
+            if f in DECIMAL_VITALS and val is not None:
+                places = _vitals_decimal_places(f)
+                val = str(Decimal(val).quantize(Decimal(1).scaleb(-places)))
+            latest_vitals[f] = val
+        # keep the historical key order: id, patient_id, measured_at, ...
+        latest_vitals = {"id": latest_vitals.pop("id"), **latest_vitals}
+
+    return {
+        "patient_id": patient.id,
+        "scoped_patient_ids": [r["id"] for r in rows],
+        "total_visits": total_visits,
+        "total_appointments": total_appointments,
+        "billing": {
+            "outstanding_balance": outstanding,
+            "unpaid_charges_count": unpaid,
+        },
+        "metrics": {
+            "pending_labs": sum(r["m_pending_labs"] or 0 for r in rows),
+            "active_prescriptions": sum(r["m_active_rx"] or 0 for r in rows),
+            "pending_imaging": sum(r["m_pending_imaging"] or 0 for r in rows),
+        },
+        "latest_vitals": latest_vitals,
+    }
+
+
+def get_summary(patient, *, include_dependents: bool = True, facility_id=None) -> dict:
+    """Cached wrapper around compute_summary (TTL: PATIENT_SUMMARY_CACHE_TTL)."""
+    key = cache_key(patient.id, include_dependents=include_dependents, facility_id=facility_id)
+    data = cache.get(key)
+    if data is None:
+        data = compute_summary(patient, include_dependents=include_dependents, facility_id=facility_id)
+        cache.set(key, data, _ttl())
+    return data
+
+
+# ---------------------------------------------------------------------------
+# Invalidation
+# ---------------------------------------------------------------------------
+
+def invalidate(patient_id, *, facility_id=None):
+    """Drop cached summaries that include `patient_id` (own and guardian's)."""
+    if not patient_id:
+        return
+    ids = {patient_id}
+    parent_id = Patient.objects.filter(pk=patient_id).values_list("parent_patient_id", flat=True).first()
+    if parent_id:
+        ids.add(parent_id)
+
+    keys = []
+    for pid in ids:
+        for fam in (True, False):
+            keys.append(cache_key(pid, include_dependents=fam))
+            if facility_id:
+                keys.append(cache_key(pid, include_dependents=fam, facility_id=facility_id))
+    cache.delete_many(keys)
+
+
+# model label -> callable(instance) -> (patient_id, facility_id)
+SOURCES = {
+    "encounters.Encounter": lambda o: (o.patient_id, o.facility_id),
+    "appointments.Appointment": lambda o: (o.patient_id, o.facility_id),
+    "billing.Charge": lambda o: (o.patient_id, o.facility_id),
+    "billing.PaymentAllocation": lambda o: (o.charge.patient_id, o.charge.facility_id),
+    "labs.LabOrder": lambda o: (o.patient_id, o.facility_id),
+    "pharmacy.Prescription": lambda o: (o.patient_id, o.facility_id),
+    "imaging.ImagingRequest": lambda o: (o.patient_id, o.facility_id),
+    "vitals.VitalSign": lambda o: (o.patient_id, o.facility_id),
+    "patients.Patient": lambda o: (o.pk, None),
+}
+
+
+def _on_change(sender, instance, **kwargs):
+    resolve = SOURCES.get(sender._meta.label)
+    if resolve is None:
+        return
+    try:
+        patient_id, facility_id = resolve(instance)
+    except Exception:
+        return
+    invalidate(patient_id, facility_id=facility_id)
+
+
+def invalidate_for(*instances):
+    """
+    invalidate() for SOURCES rows written without post_save/post_delete
+    (QuerySet.update(), bulk_create()).
+    """
+    seen = set()
+    for instance in instances:
+        resolve = SOURCES.get(type(instance)._meta.label)
+        if resolve is None:
+            continue
+        try:
+            key = resolve(instance)
+        except Exception:
+            continue
+        if key not in seen:
+            seen.add(key)
+            invalidate(key[0], facility_id=key[1])
+
+
+def connect_signals():
+    for label in SOURCES:
+        model = apps.get_model(label)
+        uid = f"patient_summary:{model._meta.label_lower}"
+        post_save.connect(_on_change, sender=model, dispatch_uid=f"{uid}:save")
+        post_delete.connect(_on_change, sender=model, dispatch_uid=f"{uid}:delete")
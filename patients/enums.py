@@ -44,4 +44,16 @@ class AllergySeverity(models.TextChoices):
     MILD = "MILD", "Mild"
     MODERATE = "MODERATE", "Moderate"
     SEVERE = "SEVERE", "Severe"
-    LIFE_THREATENING = "LIFE_THREATENING", "Life-threatening"
\ No newline at end of file
+    LIFE_THREATENING = "LIFE_THREATENING", "Life-threatening"
+
+class AccessSource(models.TextChoices):
+    """Relationship that gives an independent provider access to a patient."""
+    APPOINTMENT = "APPOINTMENT", "Appointment provider"
+    ENCOUNTER_CREATOR = "ENCOUNTER_CREATOR", "Encounter creator"
+    ENCOUNTER_PROVIDER = "ENCOUNTER_PROVIDER", "Encounter provider"
+    ENCOUNTER_NURSE = "ENCOUNTER_NURSE", "Encounter nurse"
+    LAB_ORDERED_BY = "LAB_ORDERED_BY", "Lab order requester"
+    LAB_OUTSOURCED_TO = "LAB_OUTSOURCED_TO", "Lab order outsourced to"
+    RX_PRESCRIBED_BY = "RX_PRESCRIBED_BY", "Prescriber"
+    RX_OUTSOURCED_TO = "RX_OUTSOURCED_TO", "Prescription outsourced to"
+    PROVIDER_LINK = "PROVIDER_LINK", "Provider roster link"
@@ -0,0 +1,32 @@
+# patients/management/commands/rebuild_patient_access.py
+"""
+Backfill / rebuild the PatientAccessGrant index from its source tables
+(appointments, encounters, lab orders, prescriptions, provider links).
+
+Signals keep the index current for normal saves; run this after deploying the
+index, after bulk imports, or any time `.update()` was used on a source table.
+
+Usage:
+    python manage.py rebuild_patient_access
+    python manage.py rebuild_patient_access --batch-size 5000
+"""
+
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = "Rebuild the patient access index used for independent-provider scoping"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Insert grants in batches of this size (default: 1000)",
+        )
+
+    def handle(self, *args, **options):
+        from patients.access import rebuild_grants
+
+        written = rebuild_grants(batch_size=options["batch_size"], stdout=self.stdout)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt patient access index: {written} grants"))
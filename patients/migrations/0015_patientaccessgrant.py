@@ -0,0 +1,30 @@
+# Generated by Django 5.2.7 on 2026-10-18 20:30
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('patients', '0014_patientfacilitylink'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PatientAccessGrant',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(choices=[('APPOINTMENT', 'Appointment provider'), ('ENCOUNTER_CREATOR', 'Encounter creator'), ('ENCOUNTER_PROVIDER', 'Encounter provider'), ('ENCOUNTER_NURSE', 'Encounter nurse'), ('LAB_ORDERED_BY', 'Lab order requester'), ('LAB_OUTSOURCED_TO', 'Lab order outsourced to'), ('RX_PRESCRIBED_BY', 'Prescriber'), ('RX_OUTSOURCED_TO', 'Prescription outsourced to'), ('PROVIDER_LINK', 'Provider roster link')], max_length=24)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('patient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='access_grants', to='patients.patient')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='patient_access_grants', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'patient'], name='patients_pa_user_id_6d6d22_idx')],
+                'unique_together': {('patient', 'user', 'source')},
+            },
+        ),
+    ]
@@ -0,0 +1,48 @@
+from django.db import migrations
+
+# Frozen copy of patients.access.SOURCES at the time of this migration.
+SOURCES = [
+    ("APPOINTMENT", "appointments", "Appointment", "provider_id"),
+    ("ENCOUNTER_CREATOR", "encounters", "Encounter", "created_by_id"),
+    ("ENCOUNTER_PROVIDER", "encounters", "Encounter", "provider_id"),
+    ("ENCOUNTER_NURSE", "encounters", "Encounter", "nurse_id"),
+    ("LAB_ORDERED_BY", "labs", "LabOrder", "ordered_by_id"),
+    ("LAB_OUTSOURCED_TO", "labs", "LabOrder", "outsourced_to_id"),
+    ("RX_PRESCRIBED_BY", "pharmacy", "Prescription", "prescribed_by_id"),
+    ("RX_OUTSOURCED_TO", "pharmacy", "Prescription", "outsourced_to_id"),
+    ("PROVIDER_LINK", "patients", "PatientProviderLink", "provider_id"),
+]
+
+
+def backfill(apps, schema_editor):
+    Grant = apps.get_model("patients", "PatientAccessGrant")
+    for source, app_label, model_name, attname in SOURCES:
+        model = apps.get_model(app_label, model_name)
+        pairs = (
+            model.objects.filter(patient_id__isnull=False, **{f"{attname}__isnull": False})
+            .values_list("patient_id", attname)
+            .distinct()
+        )
+        batch = []
+        for patient_id, user_id in pairs.iterator(chunk_size=2000):
+            batch.append(Grant(patient_id=patient_id, user_id=user_id, source=source))
+            if len(batch) >= 2000:
+                Grant.objects.bulk_create(batch, ignore_conflicts=True)
+                batch = []
+        if batch:
+            Grant.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('patients', '0015_patientaccessgrant'),
+        ('appointments', '0003_alter_appointment_appt_type'),
+        ('encounters', '0006_encounteramendment_amendment_type'),
+        ('labs', '0003_labtest_created_by_labtest_facility_and_more'),
+        ('pharmacy', '0005_stockitem_max_stock_level_stockitem_reorder_level'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -7,7 +7,7 @@ from django.core.exceptions import ValidationError
 from facilities.models import Facility
 from .enums import (
     PatientStatus, EncounterType, BloodGroup, Genotype, InsuranceStatus,
-    AllergyType, AllergySeverity
+    AllergyType, AllergySeverity, AccessSource
 )
 from django.utils import timezone
 phone_validator = RegexValidator(
@@ -997,6 +997,43 @@ class PatientFacilityLink(models.Model):
         return f"PatientFacilityLink(patient={self.patient_id}, facility={self.facility_id})"
 
 
+class PatientAccessGrant(models.Model):
+    """Precomputed index of which users are related to which patients.
+
+    Why:
+      - Independent providers (no facility) may only see patients they are
+        related to via appointments, encounters, lab orders, prescriptions or
+        an explicit PatientProviderLink.
+      - Evaluating that as a 9-way OR join on every list/object check is slow,
+        so each relationship is mirrored here (see patients.access) and
+        scoping becomes a single indexed lookup.
+
+    Rebuild with `python manage.py rebuild_patient_access`.
+    """
+
+    patient = models.ForeignKey(
+        "patients.Patient",
+        on_delete=models.CASCADE,
+        related_name="access_grants",
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="patient_access_grants",
+    )
+    source = models.CharField(max_length=24, choices=AccessSource.choices)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ("patient", "user", "source")
+        indexes = [
+            models.Index(fields=["user", "patient"]),
+        ]
+
+    def __str__(self):
+        return f"PatientAccessGrant(patient={self.patient_id}, user={self.user_id}, source={self.source})"
+
+
 class PatientDocument(models.Model):
     class DocumentType(models.TextChoices):
         BLOOD_TEST = "BLOOD_TEST", "Blood test"
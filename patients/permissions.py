@@ -1,5 +1,6 @@
 from rest_framework.permissions import BasePermission, SAFE_METHODS
 from accounts.enums import UserRole
+from .access import has_access
 
 class IsSelfOrFacilityStaff(BasePermission):
     """
@@ -27,23 +28,13 @@ class IsSelfOrFacilityStaff(BasePermission):
                 pass
 
         # Independent staff (no facility): allow access only if the patient is related to the user
-        # via appointments/encounters/labs/prescriptions.
+        # via appointments/encounters/labs/prescriptions (indexed in PatientAccessGrant).
         if u.role in self.staff_roles and not u.facility_id:
             uid = getattr(u, "id", None)
             if not uid:
                 return False
 
-            return (
-                obj.appointments.filter(provider_id=uid).exists()
-                or obj.encounters.filter(created_by_id=uid).exists()
-                or obj.encounters.filter(provider_id=uid).exists()
-                or obj.encounters.filter(nurse_id=uid).exists()
-                or obj.lab_orders.filter(ordered_by_id=uid).exists()
-                or obj.lab_orders.filter(outsourced_to_id=uid).exists()
-                or obj.prescriptions.filter(prescribed_by_id=uid).exists()
-                or obj.prescriptions.filter(outsourced_to_id=uid).exists()
-                or obj.provider_links.filter(provider_id=uid).exists()
-            )
+            return has_access(obj.id, uid)
 
         return False
 
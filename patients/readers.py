@@ -0,0 +1,12 @@
+"""patients/readers.py
+
+values()-based list reader for patients (core.fastread). PatientSerializer
+has no method fields, so the reader is derived from it entirely.
+"""
+from core.fastread import Reader
+
+from .serializers import PatientSerializer
+
+
+class PatientListReader(Reader):
+    serializer_class = PatientSerializer
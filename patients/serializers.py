@@ -4,6 +4,8 @@ from rest_framework import serializers
 from accounts.models import User
 from django.utils import timezone
 from accounts.enums import UserRole
+from attachments.serializers import DerivativeUrlField, DirectUploadMixin, SignedUrlListSerializer, SignedUrlsMixin
+from attachments.services.derivatives import PREVIEW, THUMB
 from .models import Patient, PatientDocument, HMO, Allergy
 from .enums import BloodGroup, Genotype, InsuranceStatus, AllergyType, AllergySeverity
 from rest_framework import serializers as rf_serializers
@@ -314,8 +316,10 @@ class SelfRegisterSerializer(serializers.Serializer):
 # PATIENT DOCUMENT SERIALIZERS
 # ============================================================================
 
-class PatientDocumentSerializer(serializers.ModelSerializer):
+class PatientDocumentSerializer(SignedUrlsMixin, DirectUploadMixin, serializers.ModelSerializer):
     uploaded_by_name = serializers.SerializerMethodField(read_only=True)
+    thumbnail_url = DerivativeUrlField(THUMB)
+    preview_url = DerivativeUrlField(PREVIEW)
 
     class Meta:
         model = PatientDocument
@@ -325,6 +329,8 @@ class PatientDocumentSerializer(serializers.ModelSerializer):
             "title",
             "document_type",
             "file",
+            "thumbnail_url",
+            "preview_url",
             "notes",
             "uploaded_by",
             "uploaded_by_name",
@@ -339,6 +345,7 @@ class PatientDocumentSerializer(serializers.ModelSerializer):
             "uploaded_by_name",
             "created_at",
         ]
+        list_serializer_class = SignedUrlListSerializer
 
     def get_uploaded_by_name(self, obj):
         user = obj.uploaded_by
@@ -1040,6 +1047,10 @@ class PatientHMOMixin(serializers.Serializer):
         ...
     """
     
+    class Meta:
+        # walked by get_hmo_enrollment_info (core.prefetch)
+        select_related = ("hmo_enrollment_facility", "hmo_enrollment_provider")
+
     # Read-only computed fields
     system_hmo_display = SystemHMOMinimalSerializer(source='system_hmo', read_only=True)
     hmo_tier_display = HMOTierMinimalSerializer(source='hmo_tier', read_only=True)
@@ -0,0 +1,34 @@
+from django.db.models.signals import pre_save, post_save, post_delete
+
+from . import access
+
+
+def _track_pre_save(sender, instance, update_fields=None, **kwargs):
+    if instance._state.adding or not instance.pk:
+        return
+    attnames = {"patient_id"} | {attname for _, attname in access.sources_for_model(sender)}
+    if update_fields is not None and not ({f"{f}_id" for f in update_fields} | set(update_fields)) & attnames:
+        return
+    old = sender._default_manager.filter(pk=instance.pk).values(*attnames).first()
+    if old:
+        instance.__access_before__ = {
+            src: (old["patient_id"], old[attname])
+            for src, attname in access.sources_for_model(sender)
+        }
+
+
+def _track_post_save(sender, instance, **kwargs):
+    access.sync_instance(instance, before=getattr(instance, "__access_before__", None))
+
+
+def _track_post_delete(sender, instance, **kwargs):
+    access.sync_instance(instance, deleted=True)
+
+
+def connect():
+    """Attach grant maintenance to every model listed in access.SOURCES."""
+    for model in access.tracked_models():
+        uid = f"patient_access:{model._meta.label_lower}"
+        pre_save.connect(_track_pre_save, sender=model, dispatch_uid=f"{uid}:pre_save")
+        post_save.connect(_track_post_save, sender=model, dispatch_uid=f"{uid}:post_save")
+        post_delete.connect(_track_post_delete, sender=model, dispatch_uid=f"{uid}:post_delete")
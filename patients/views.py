@@ -1,14 +1,16 @@
-from django.db.models import Q, Prefetch, Count, Sum, F
-from django.db.models.functions import Coalesce
+from django.db.models import Q, Prefetch
 from django.utils import timezone
 from django.shortcuts import get_object_or_404
-from decimal import Decimal
 from rest_framework import viewsets, mixins, status, permissions
 from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from accounts.authentication import HeaderJWTAuthentication as JWTAuthentication
 from rest_framework.exceptions import ValidationError
+from attachments.serializers import MAX_SIZE_BYTES
+from core.fastread import FastListMixin
+from core.search import search_queryset
+from core.uploads import upload_limit
 from facilities.permissions_utils import has_facility_permission
 from facilities.permissions import IsFacilityAdmin, IsFacilityStaff, IsFacilitySuperAdmin
 from .models import Patient, PatientDocument, HMO, Allergy, PatientProviderLink, PatientFacilityLink
@@ -32,6 +34,9 @@ from .serializers import (
     PatientFacilityHMOApprovalSerializer,
     PatientFacilityHMOApprovalCreateSerializer,
 )
+from .access import access_q
+from .dashboard import get_summary
+from .readers import PatientListReader
 from .permissions import IsSelfOrFacilityStaff, IsStaff, IsStaffOrGuardianForDependent, IsStaffOrSelfPatient
 from accounts.enums import UserRole
 from .enums import InsuranceStatus
@@ -41,7 +46,8 @@ from .enums import InsuranceStatus
 # PATIENT VIEWSET
 # ============================================================================
 
-class PatientViewSet(viewsets.GenericViewSet,
+class PatientViewSet(FastListMixin,
+                     viewsets.GenericViewSet,
                      mixins.CreateModelMixin,
                      mixins.RetrieveModelMixin,
                      mixins.UpdateModelMixin,
@@ -51,6 +57,7 @@ class PatientViewSet(viewsets.GenericViewSet,
     ).all().order_by("-created_at")
     authentication_classes = [JWTAuthentication]
     permission_classes = [IsAuthenticated]
+    fast_reader = PatientListReader
 
     def get_serializer_class(self):
         if self.action in ("create",):
@@ -87,32 +94,14 @@ class PatientViewSet(viewsets.GenericViewSet,
             if role not in {"SUPER_ADMIN", "ADMIN"}:
                 uid = getattr(u, "id", None)
                 if uid:
-                    q = q.filter(
-                        Q(appointments__provider_id=uid)
-                        | Q(encounters__created_by_id=uid)
-                        | Q(encounters__provider_id=uid)
-                        | Q(encounters__nurse_id=uid)
-                        | Q(lab_orders__ordered_by_id=uid)
-                        | Q(lab_orders__outsourced_to_id=uid)
-                        | Q(prescriptions__prescribed_by_id=uid)
-                        | Q(prescriptions__outsourced_to_id=uid)
-                        | Q(provider_links__provider_id=uid)
-                    ).distinct()
+                    q = q.filter(access_q(uid))
 
         # Basic search
         s = request.query_params.get("s")
         if s:
-            q = q.filter(
-                Q(first_name__icontains=s) | Q(last_name__icontains=s) |
-                Q(email__icontains=s) | Q(phone__icontains=s)
-            )
-        
-        page = self.paginate_queryset(q)
-        if page is not None:
-            ser = PatientSerializer(page, many=True, context={"request": request})
-            return self.get_paginated_response(ser.data)
-        ser = PatientSerializer(q, many=True, context={"request": request})
-        return Response(ser.data)
+            q = search_queryset(q, "patient", s)
+
+        return self.list_response(q)
 
     def perform_create(self, serializer):
         """On independent provider create, auto-link patient to the creator."""
@@ -159,126 +148,31 @@ class PatientViewSet(viewsets.GenericViewSet,
         if not base_patient:
             return Response({"detail": "Patient profile not found."}, status=404)
 
-        # Patient scope: self + dependents
-        patient_ids = list(
-            Patient.objects.filter(Q(id=base_patient.id) | Q(parent_patient=base_patient))
-            .values_list("id", flat=True)
-        )
-
-        # Local imports to avoid circular dependencies
-        from encounters.models import Encounter
-        from appointments.models import Appointment
-        from billing.models import Charge
-        from billing.enums import ChargeStatus
-        from labs.models import LabOrder
-        from labs.enums import OrderStatus
-        from pharmacy.models import Prescription
-        from pharmacy.enums import RxStatus
-        from imaging.models import ImagingRequest
-        from imaging.enums import RequestStatus
-        from vitals.models import VitalSign
-
-        total_visits = Encounter.objects.filter(patient_id__in=patient_ids).count()
-        total_appointments = Appointment.objects.filter(patient_id__in=patient_ids).count()
-
-        # Billing outstanding (PATIENT LIABILITY ONLY)
-        #
-        # If a patient is insured (HMO), those outstanding amounts should not be
-        # shown on the patient dashboard as "your" outstanding bills.
-        # We therefore only include self-pay charges here.
-        charges_qs = (
-            Charge.objects.filter(patient_id__in=patient_ids)
-            .filter(
-                patient__insurance_status="SELF_PAY",
-                patient__system_hmo__isnull=True,
-                patient__hmo__isnull=True,
-            )
-            .exclude(status=ChargeStatus.VOID)
-            .annotate(allocated_total=Coalesce(Sum("allocations__amount"), Decimal("0.00")))
-            .annotate(outstanding=F("amount") - F("allocated_total"))
-        )
-
-        billing_agg = charges_qs.aggregate(
-            outstanding_balance=Coalesce(Sum("outstanding"), Decimal("0.00")),
-            unpaid_charges_count=Count(
-                "id",
-                filter=Q(status__in=[ChargeStatus.UNPAID, ChargeStatus.PARTIALLY_PAID]),
-            ),
-        )
-
-        outstanding_balance = billing_agg.get("outstanding_balance") or Decimal("0.00")
-        # Guard against negative values due to over-allocation
-        if outstanding_balance < 0:
-            outstanding_balance = Decimal("0.00")
-
-        unpaid_charges_count = int(billing_agg.get("unpaid_charges_count") or 0)
-
-        pending_labs = LabOrder.objects.filter(
-            patient_id__in=patient_ids,
-            status__in=[OrderStatus.PENDING, OrderStatus.IN_PROGRESS],
-        ).count()
+        # Patient scope: self + dependents (one query, cached briefly)
+        return Response(get_summary(base_patient, include_dependents=True))
 
-        active_prescriptions = Prescription.objects.filter(
-            patient_id__in=patient_ids,
-            status__in=[RxStatus.PRESCRIBED, RxStatus.PARTIALLY_DISPENSED],
-        ).count()
+    @action(detail=True, methods=["get"], permission_classes=[IsAuthenticated, IsSelfOrFacilityStaff])
+    def summary(self, request, pk=None):
+        """Patient header card for staff: same metrics as the dashboard, for one patient.
 
-        pending_imaging = ImagingRequest.objects.filter(
-            patient_id__in=patient_ids,
-            status__in=[RequestStatus.REQUESTED, RequestStatus.SCHEDULED],
-        ).count()
-
-        latest = (
-            VitalSign.objects.filter(patient_id__in=patient_ids)
-            .order_by("-measured_at", "-id")
-            .first()
-        )
-
-        latest_vitals = None
-        if latest:
-            latest_vitals = {
-                "id": latest.id,
-                "patient_id": latest.patient_id,
-                "measured_at": latest.measured_at,
-                "systolic": latest.systolic,
-                "diastolic": latest.diastolic,
-                "heart_rate": latest.heart_rate,
-                "temp_c": str(latest.temp_c) if latest.temp_c is not None else None,
-                "resp_rate": latest.resp_rate,
-                "spo2": latest.spo2,
-                "weight_kg": str(latest.weight_kg) if latest.weight_kg is not None else None,
-                "height_cm": str(latest.height_cm) if latest.height_cm is not None else None,
-                "bmi": str(latest.bmi) if latest.bmi is not None else None,
-                "overall": latest.overall,
-            }
-
-        return Response(
-            {
-                "patient_id": base_patient.id,
-                "scoped_patient_ids": patient_ids,
-                "total_visits": total_visits,
-                "total_appointments": total_appointments,
-                "billing": {
-                    "outstanding_balance": outstanding_balance,
-                    "unpaid_charges_count": unpaid_charges_count,
-                },
-                "metrics": {
-                    "pending_labs": pending_labs,
-                    "active_prescriptions": active_prescriptions,
-                    "pending_imaging": pending_imaging,
-                },
-                "latest_vitals": latest_vitals,
-            }
-        )
+        Facility staff only see counts from their own facility.
+        """
+        patient = self.get_object()
+        facility_id = getattr(request.user, "facility_id", None)
+        if patient.user_id == request.user.id:
+            facility_id = None
+        return Response(get_summary(patient, include_dependents=False, facility_id=facility_id))
 
     # =========================================================================
     # DOCUMENT ACTIONS
     # =========================================================================
     
     @action(detail=True, methods=["post"], permission_classes=[IsAuthenticated, IsSelfOrFacilityStaff])
+    @upload_limit(MAX_SIZE_BYTES)
     def upload_document(self, request, pk=None):
         patient = self.get_object()
-        s = PatientDocumentSerializer(data=request.data)
+        # multipart `file`, or `upload_id` from attachments/uploads/ (direct upload)
+        s = PatientDocumentSerializer(data=request.data, context={"request": request})
         s.is_valid(raise_exception=True)
 
         user = request.user
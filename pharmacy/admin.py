@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Drug, StockItem, StockTxn, Prescription, PrescriptionItem, DispenseEvent
+from .models import Drug, StockItem, StockTxn, StockSnapshot, Prescription, PrescriptionItem, DispenseEvent
 
 @admin.register(Drug)
 class DrugAdmin(admin.ModelAdmin):
@@ -18,6 +18,12 @@ class StockTxnAdmin(admin.ModelAdmin):
     list_display = ("facility", "drug", "txn_type", "qty", "created_by", "created_at")
     list_filter = ("facility", "txn_type")
 
+@admin.register(StockSnapshot)
+class StockSnapshotAdmin(admin.ModelAdmin):
+    list_display = ("stock_item", "day", "qty", "qty_in", "qty_out", "qty_adjusted")
+    list_filter = ("day",)
+    raw_id_fields = ("stock_item",)
+
 class RxItemInline(admin.TabularInline):
     model = PrescriptionItem
     extra = 0
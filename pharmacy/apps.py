@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class PharmacyConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'pharmacy'
+
+    def ready(self):
+        # register post-commit domain event handlers
+        from . import events  # noqa: F401
@@ -0,0 +1,118 @@
+"""pharmacy/events.py
+
+Pharmacy domain events and their post-commit handlers (see core.events).
+"""
+
+from dataclasses import dataclass
+
+from core.events import DomainEvent, subscribe
+from notifications.enums import Topic, Priority
+from notifications.services.notify import notify_user, notify_patient
+
+from .models import Prescription
+
+
+@dataclass(frozen=True)
+class PrescriptionCreated(DomainEvent):
+    prescription_id: int
+
+
+def _patient_name(patient) -> str:
+    name = getattr(patient, "full_name", None)
+    if not name:
+        parts = [getattr(patient, "first_name", ""), getattr(patient, "middle_name", ""), getattr(patient, "last_name", "")]
+        name = " ".join([p for p in parts if p]).strip()
+    return name or f"Patient #{getattr(patient, 'id', '')}"
+
+
+def summarize_meds(items, limit=3) -> str:
+    """'Amoxicillin 500 mg, Paracetamol 1 g (+2 more)' from PrescriptionItem rows."""
+    names = []
+    for it in items:
+        nm = (it.drug.name if it.drug_id else it.drug_name) or ""
+        nm = str(nm).strip()
+        dose = str(it.dose or "").strip()
+        if nm and dose:
+            names.append(f"{nm} {dose}")
+        elif nm:
+            names.append(nm)
+    if not names:
+        return ""
+    head = names[:limit]
+    tail = len(names) - len(head)
+    s = ", ".join(head)
+    if tail > 0:
+        s += f" (+{tail} more)"
+    return s
+
+
+def _load(prescription_id):
+    return (
+        Prescription.objects.select_related("patient", "outsourced_to")
+        .prefetch_related("items__drug")
+        .filter(id=prescription_id)
+        .first()
+    )
+
+
+@subscribe(PrescriptionCreated)
+def notify_patient_new_prescription(event):
+    rx = _load(event.prescription_id)
+    if not rx or not rx.patient:
+        return
+    patient_name = _patient_name(rx.patient)
+    meds_summary = summarize_meds(rx.items.all())
+
+    # Notify patient (and guardian/dependents fanout via notify_patient)
+    notify_patient(
+        patient=rx.patient,
+        topic=Topic.PRESCRIPTION_READY,
+        priority=Priority.NORMAL,
+        title="New prescription",
+        body=(
+            f"New prescription: {meds_summary} (Rx #{rx.id})." if meds_summary else f"A new prescription (Rx #{rx.id}) has been created for you."
+        ),
+        facility_id=rx.facility_id,
+        data={
+            "prescription_id": rx.id,
+            "patient_id": rx.patient_id,
+            "patient_name": patient_name,
+            "meds_summary": meds_summary,
+        },
+        action_url="/patient/pharmacy",
+        group_key=f"RX:{rx.id}:NEW",
+        dedupe=True,
+    )
+
+
+@subscribe(PrescriptionCreated)
+def notify_outsourced_pharmacy(event):
+    rx = _load(event.prescription_id)
+    if not rx or not rx.outsourced_to_id:
+        return
+    patient_name = _patient_name(rx.patient) if rx.patient else None
+    meds_summary = summarize_meds(rx.items.all())
+
+    notify_user(
+        user=rx.outsourced_to,
+        topic=Topic.PRESCRIPTION_READY,
+        priority=Priority.NORMAL,
+        title="New outsourced prescription",
+        body=(
+            f"New outsourced prescription for {patient_name}: {meds_summary} (Rx #{rx.id})."
+            if patient_name and meds_summary
+            else (
+                f"New outsourced prescription for {patient_name} (Rx #{rx.id})." if patient_name else f"New outsourced prescription (Rx #{rx.id})."
+            )
+        ),
+        data={
+            "prescription_id": rx.id,
+            "patient_id": rx.patient_id,
+            "patient_name": patient_name,
+            "meds_summary": meds_summary,
+        },
+        facility_id=rx.facility_id,
+        action_url="/provider/pharmacy",
+        group_key=f"RX:{rx.id}:ASSIGNED",
+        dedupe=True,
+    )
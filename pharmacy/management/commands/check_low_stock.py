@@ -6,6 +6,10 @@ Management command to check for low stock items and send notifications.
 This command should be run periodically (e.g., daily) via cron or task scheduler to ensure
 pharmacy managers are alerted about low stock levels.
 
+Thresholds are evaluated in the database (StockItem.objects.low_stock()), so a
+full run is a handful of queries regardless of catalogue size, and each
+facility / independent pharmacy gets one batched alert.
+
 Usage:
     python manage.py check_low_stock                      # Check all facilities and independent pharmacies
     python manage.py check_low_stock --facility 1         # Check specific facility only
@@ -14,9 +18,8 @@ Usage:
 """
 
 from django.core.management.base import BaseCommand
-from django.db.models import Q
 from pharmacy.models import StockItem
-from pharmacy.services.stock_alerts import check_and_notify_low_stock, check_all_low_stock
+from pharmacy.services.stock_alerts import check_all_low_stock, check_low_stock_everywhere
 from facilities.models import Facility
 from django.contrib.auth import get_user_model
 
@@ -68,7 +71,7 @@ class Command(BaseCommand):
                     summary = check_all_low_stock(facility=facility)
                     self._display_summary(summary, f"Facility {facility.name}")
                 else:
-                    stock_items = StockItem.objects.filter(facility=facility).select_related('drug')
+                    stock_items = StockItem.objects.filter(facility=facility)
                     self._dry_run_check(stock_items)
                     
             except Facility.DoesNotExist:
@@ -85,7 +88,7 @@ class Command(BaseCommand):
                     summary = check_all_low_stock(owner=owner)
                     self._display_summary(summary, f"Owner {owner.email}")
                 else:
-                    stock_items = StockItem.objects.filter(owner=owner).select_related('drug')
+                    stock_items = StockItem.objects.filter(owner=owner)
                     self._dry_run_check(stock_items)
                     
             except User.DoesNotExist:
@@ -93,83 +96,69 @@ class Command(BaseCommand):
                 return
 
         else:
-            # Check all facilities and independent pharmacies
+            # Check all facilities and independent pharmacies in one pass
             self.stdout.write("Checking all facilities and independent pharmacies...")
-            
-            total_notifications = 0
-            total_low_stock = 0
-            total_out_of_stock = 0
-            total_items = 0
-            
-            # Check all facilities
-            facilities = Facility.objects.all()
-            for facility in facilities:
-                self.stdout.write(f"\nChecking facility: {facility.name}")
-                
-                if not dry_run:
-                    summary = check_all_low_stock(facility=facility)
-                    total_notifications += summary.get("notifications_sent", 0)
-                    total_low_stock += summary.get("low_stock_count", 0)
-                    total_out_of_stock += summary.get("out_of_stock_count", 0)
-                    total_items += summary.get("total_items", 0)
-                    self._display_summary(summary, facility.name)
-                else:
-                    stock_items = StockItem.objects.filter(facility=facility).select_related('drug')
-                    self._dry_run_check(stock_items)
-            
-            # Check all independent pharmacies
-            from accounts.enums import UserRole
-            independent_pharmacies = User.objects.filter(
-                role=UserRole.PHARMACY,
-                facility__isnull=True,
-                is_active=True
-            )
-            
-            for owner in independent_pharmacies:
-                self.stdout.write(f"\nChecking independent pharmacy: {owner.email}")
-                
-                if not dry_run:
-                    summary = check_all_low_stock(owner=owner)
-                    total_notifications += summary.get("notifications_sent", 0)
-                    total_low_stock += summary.get("low_stock_count", 0)
-                    total_out_of_stock += summary.get("out_of_stock_count", 0)
-                    total_items += summary.get("total_items", 0)
-                    self._display_summary(summary, owner.email)
-                else:
-                    stock_items = StockItem.objects.filter(owner=owner).select_related('drug')
-                    self._dry_run_check(stock_items)
-            
-            if not dry_run:
-                # Overall summary
-                self.stdout.write("\n" + "=" * 60)
-                self.stdout.write(self.style.SUCCESS("OVERALL SUMMARY"))
-                self.stdout.write(f"Total items checked: {total_items}")
-                self.stdout.write(self.style.WARNING(f"Low stock items: {total_low_stock}"))
-                self.stdout.write(self.style.ERROR(f"Out of stock items: {total_out_of_stock}"))
-                self.stdout.write(self.style.SUCCESS(f"Notifications sent: {total_notifications}"))
-                self.stdout.write("=" * 60)
+
+            stock_items = StockItem.objects.all()
+            if dry_run:
+                self._dry_run_check(stock_items)
+                return
+
+            summaries = check_low_stock_everywhere()
+            labels = self._scope_labels(summaries.keys())
+            for key, summary in summaries.items():
+                self.stdout.write(f"\nChecking {labels.get(key, key)}")
+                self._display_summary(summary, labels.get(key, key))
+
+            # Overall summary
+            self.stdout.write("\n" + "=" * 60)
+            self.stdout.write(self.style.SUCCESS("OVERALL SUMMARY"))
+            self.stdout.write(f"Scopes checked: {len(summaries)}")
+            self.stdout.write(f"Total items checked: {sum(s['total_items'] for s in summaries.values())}")
+            self.stdout.write(self.style.WARNING(f"Low stock items: {sum(s['low_stock_count'] for s in summaries.values())}"))
+            self.stdout.write(self.style.ERROR(f"Out of stock items: {sum(s['out_of_stock_count'] for s in summaries.values())}"))
+            self.stdout.write(self.style.SUCCESS(f"Notifications sent: {sum(s['notifications_sent'] for s in summaries.values())}"))
+            self.stdout.write("=" * 60)
+
+    def _scope_labels(self, keys):
+        """{(facility_id, owner_id): display name} with one query per scope type."""
+        keys = list(keys)
+        facility_ids = [f for f, _ in keys if f]
+        owner_ids = [o for f, o in keys if not f and o]
+        facilities = dict(Facility.objects.filter(id__in=facility_ids).values_list("id", "name"))
+        owners = dict(User.objects.filter(id__in=owner_ids).values_list("id", "email"))
+        return {
+            (f, o): (f"facility: {facilities.get(f, f)}" if f else f"independent pharmacy: {owners.get(o, o)}")
+            for f, o in keys
+        }
 
     def _dry_run_check(self, stock_items):
         """Display what would be checked in dry run mode."""
         total = stock_items.count()
         low_stock_count = 0
         out_of_stock_count = 0
-        
-        for stock_item in stock_items:
-            if stock_item.is_out_of_stock():
+
+        low_items = (
+            stock_items.low_stock()
+            .with_reorder_threshold()
+            .select_related("drug")
+            .order_by("facility_id", "owner_id", "current_qty", "drug__name")
+        )
+        for stock_item in low_items:
+            if stock_item.current_qty == 0:
                 out_of_stock_count += 1
                 self.stdout.write(
                     self.style.ERROR(
                         f"  OUT OF STOCK: {stock_item.drug.name} "
-                        f"(Current: {stock_item.current_qty}, Threshold: {stock_item.get_reorder_threshold()})"
+                        f"(Current: {stock_item.current_qty}, Threshold: {stock_item.reorder_threshold})"
                     )
                 )
-            elif stock_item.is_low_stock():
+            else:
                 low_stock_count += 1
                 self.stdout.write(
                     self.style.WARNING(
                         f"  LOW STOCK: {stock_item.drug.name} "
-                        f"(Current: {stock_item.current_qty}, Threshold: {stock_item.get_reorder_threshold()})"
+                        f"(Current: {stock_item.current_qty}, Threshold: {stock_item.reorder_threshold})"
                     )
                 )
         
@@ -0,0 +1,76 @@
+"""
+pharmacy/management/commands/forecast_stock.py
+
+Refresh forecast-based reorder suggestions (see pharmacy/services/forecast.py).
+
+Run nightly, before check_low_stock, so alerts use the fresh reorder points.
+
+Usage:
+    python manage.py forecast_stock                        # all facilities and independent pharmacies
+    python manage.py forecast_stock --facility 1
+    python manage.py forecast_stock --owner 5
+    python manage.py forecast_stock --window 60 --lead-time 10
+    python manage.py forecast_stock --dry-run              # print suggestions, do not save
+"""
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from facilities.models import Facility
+from pharmacy.services.forecast import ForecastParams, refresh_reorder_suggestions
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Recompute consumption forecasts and reorder suggestions for pharmacy stock"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--facility", type=int, help="Facility ID only")
+        parser.add_argument("--owner", type=int, help="Independent pharmacy owner ID only")
+        parser.add_argument("--window", type=int, help="Days of history to use")
+        parser.add_argument("--alpha", type=float, help="Exponential smoothing factor (0-1]")
+        parser.add_argument("--lead-time", type=int, dest="lead_time", help="Supplier lead time in days")
+        parser.add_argument("--review", type=int, help="Days between orders")
+        parser.add_argument("--dry-run", action="store_true", help="Show suggestions without saving")
+
+    def handle(self, *args, **options):
+        scope = None
+        if options.get("facility"):
+            try:
+                scope = {"facility": Facility.objects.get(id=options["facility"]), "owner": None}
+            except Facility.DoesNotExist:
+                raise CommandError(f"Facility with ID {options['facility']} not found")
+        elif options.get("owner"):
+            try:
+                scope = {"facility": None, "owner": User.objects.get(id=options["owner"])}
+            except User.DoesNotExist:
+                raise CommandError(f"User with ID {options['owner']} not found")
+
+        params = ForecastParams.from_settings(
+            window_days=options.get("window"),
+            alpha=options.get("alpha"),
+            lead_time_days=options.get("lead_time"),
+            review_days=options.get("review"),
+        )
+        if params.window_days < 1:
+            raise CommandError("--window must be at least 1")
+
+        items = refresh_reorder_suggestions(scope, params=params, dry_run=options["dry_run"])
+        forecast_items = [i for i in items if i.suggested_reorder_level]
+
+        if options["dry_run"]:
+            self.stdout.write(self.style.WARNING("DRY RUN - suggestions not saved"))
+            for item in forecast_items:
+                self.stdout.write(
+                    f"  {item.drug.name}: use/day={item.forecast_daily_use} "
+                    f"reorder at {item.suggested_reorder_level}, order {item.suggested_order_qty} "
+                    f"(current {item.current_qty})"
+                )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Forecast {len(items)} stock item(s): {len(forecast_items)} with recent dispensing, "
+                f"{sum(1 for i in forecast_items if i.suggested_order_qty)} with an order suggestion"
+            )
+        )
@@ -0,0 +1,79 @@
+"""
+pharmacy/management/commands/snapshot_stock.py
+
+Write end-of-day StockSnapshot rows (see pharmacy/services/stock_history.py).
+
+Run once a day shortly after midnight via cron; re-running a day rewrites it.
+Use --days to backfill a range (oldest first, so each day rolls forward from
+the previous one) and --check-drift to report items whose snapshot + ledger
+balance disagrees with StockItem.current_qty.
+
+Usage:
+    python manage.py snapshot_stock                       # yesterday, all scopes
+    python manage.py snapshot_stock --day 2025-01-31
+    python manage.py snapshot_stock --days 30             # backfill the last 30 days
+    python manage.py snapshot_stock --facility 1 --check-drift
+"""
+
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from facilities.models import Facility
+from pharmacy.services.stock_history import find_drift, take_snapshots
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Write daily stock snapshots from the stock ledger"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--day", help="Day to snapshot (YYYY-MM-DD, default: yesterday)")
+        parser.add_argument("--days", type=int, default=1, help="Number of days ending at --day to (re)write")
+        parser.add_argument("--facility", type=int, help="Facility ID only")
+        parser.add_argument("--owner", type=int, help="Independent pharmacy owner ID only")
+        parser.add_argument("--check-drift", action="store_true", help="Report ledger/current_qty drift afterwards")
+
+    def handle(self, *args, **options):
+        last = timezone.localdate() - timedelta(days=1)
+        if options.get("day"):
+            last = parse_date(options["day"])
+            if last is None:
+                raise CommandError("--day must be YYYY-MM-DD")
+
+        scope = None
+        if options.get("facility"):
+            try:
+                scope = {"facility": Facility.objects.get(id=options["facility"]), "owner": None}
+            except Facility.DoesNotExist:
+                raise CommandError(f"Facility with ID {options['facility']} not found")
+        elif options.get("owner"):
+            try:
+                scope = {"facility": None, "owner": User.objects.get(id=options["owner"])}
+            except User.DoesNotExist:
+                raise CommandError(f"User with ID {options['owner']} not found")
+
+        days = max(1, options["days"])
+        for offset in range(days - 1, -1, -1):
+            day = last - timedelta(days=offset)
+            try:
+                written = take_snapshots(day, scope=scope)
+            except ValueError as e:
+                raise CommandError(str(e))
+            self.stdout.write(f"{day}: {written} snapshot(s)")
+
+        if options["check_drift"]:
+            drift = find_drift(scope=scope)
+            if not drift:
+                self.stdout.write(self.style.SUCCESS("No drift between ledger and current stock"))
+            for item, ledger_qty in drift:
+                self.stdout.write(
+                    self.style.WARNING(
+                        f"  DRIFT: {item.drug.name} (stock item {item.id}) "
+                        f"current={item.current_qty} ledger={ledger_qty}"
+                    )
+                )
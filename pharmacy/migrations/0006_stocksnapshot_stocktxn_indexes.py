@@ -0,0 +1,50 @@
+# Generated by Django 5.2.7 on 2026-10-18 20:49
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('facilities', '0008_facility_is_publicly_visible'),
+        ('pharmacy', '0005_stockitem_max_stock_level_stockitem_reorder_level'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('qty', models.IntegerField()),
+                ('qty_in', models.PositiveIntegerField(default=0)),
+                ('qty_out', models.PositiveIntegerField(default=0)),
+                ('qty_adjusted', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='stocktxn',
+            index=models.Index(fields=['facility', 'drug', 'created_at'], name='stocktxn_fac_drug_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stocktxn',
+            index=models.Index(fields=['owner', 'drug', 'created_at'], name='stocktxn_owner_drug_at_idx'),
+        ),
+        migrations.AddField(
+            model_name='stocksnapshot',
+            name='stock_item',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='snapshots', to='pharmacy.stockitem'),
+        ),
+        migrations.AddIndex(
+            model_name='stocksnapshot',
+            index=models.Index(fields=['day'], name='stocksnap_day_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='stocksnapshot',
+            constraint=models.UniqueConstraint(fields=('stock_item', 'day'), name='unique_snapshot_per_item_day'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.7 on 2026-10-18 20:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pharmacy', '0006_stocksnapshot_stocktxn_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stockitem',
+            name='forecast_daily_use',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='stockitem',
+            name='forecast_updated_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='stockitem',
+            name='suggested_order_qty',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='stockitem',
+            name='suggested_reorder_level',
+            field=models.PositiveIntegerField(default=0, help_text='Forecast reorder point (used when reorder_level is 0)'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.7 on 2026-10-18 20:56
+
+from django.db import migrations, models
+from django.db.models import Count, F, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    Parent = apps.get_model("pharmacy", "Prescription")
+    Item = apps.get_model("pharmacy", "PrescriptionItem")
+
+    def counted(condition=Q()):
+        sub = (
+            Item.objects.filter(condition, prescription=OuterRef("pk"))
+            .order_by()
+            .values("prescription")
+            .annotate(n=Count("id"))
+            .values("n")
+        )
+        return Coalesce(Subquery(sub), Value(0))
+
+    Parent.objects.update(
+        items_total=counted(),
+        items_complete=counted(Q(qty_dispensed__gte=F("qty_prescribed"))),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pharmacy', '0007_stockitem_forecast'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='prescription',
+            name='items_complete',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='prescription',
+            name='items_total',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -68,6 +68,32 @@ class Drug(models.Model):
         return f"{self.code} - {self.name} {self.strength} {self.form}".strip()
 
 
+def reorder_threshold_expression():
+    """
+    DB-side twin of StockItem.get_reorder_threshold(): manual reorder_level,
+    else the forecast reorder point, else 20% of max_stock_level, else 10.
+    """
+    return models.Case(
+        models.When(reorder_level__gt=0, then=models.F("reorder_level")),
+        models.When(suggested_reorder_level__gt=0, then=models.F("suggested_reorder_level")),
+        models.When(max_stock_level__gt=0, then=models.F("max_stock_level") / 5),
+        default=models.Value(10),
+        output_field=models.IntegerField(),
+    )
+
+
+class StockItemQuerySet(models.QuerySet):
+    def with_reorder_threshold(self):
+        return self.annotate(reorder_threshold=reorder_threshold_expression())
+
+    def low_stock(self):
+        """Rows at or below their reorder threshold (out-of-stock included)."""
+        return self.filter(current_qty__lte=reorder_threshold_expression())
+
+    def out_of_stock(self):
+        return self.filter(current_qty=0)
+
+
 class StockItem(models.Model):
     """
     Stock per scope per drug.
@@ -106,6 +132,17 @@ class StockItem(models.Model):
         help_text="Maximum stock level ever recorded (used for auto-calculating reorder level)"
     )
 
+    # Consumption forecast (manage.py forecast_stock); 0 = no usable history
+    suggested_reorder_level = models.PositiveIntegerField(
+        default=0,
+        help_text="Forecast reorder point (used when reorder_level is 0)",
+    )
+    suggested_order_qty = models.PositiveIntegerField(default=0)
+    forecast_daily_use = models.FloatField(default=0)
+    forecast_updated_at = models.DateTimeField(null=True, blank=True)
+
+    objects = StockItemQuerySet.as_manager()
+
     class Meta:
         constraints = [
             models.UniqueConstraint(
@@ -127,16 +164,22 @@ class StockItem(models.Model):
 
     def get_reorder_threshold(self):
         """
-        Get the reorder threshold (20% of max stock or manual reorder_level).
+        Get the reorder threshold (manual reorder_level, forecast reorder point,
+        or 20% of max stock).
         Returns the quantity below which stock is considered low.
         """
         if self.reorder_level > 0:
             # Manual reorder level set
             return self.reorder_level
+
+        # Forecast reorder point from recent dispensing
+        if self.suggested_reorder_level > 0:
+            return self.suggested_reorder_level
         
-        # Auto-calculate: 20% of max_stock_level
+        # Auto-calculate: 20% of max_stock_level (integer division, as in
+        # reorder_threshold_expression)
         if self.max_stock_level > 0:
-            return int(self.max_stock_level * 0.2)
+            return self.max_stock_level // 5
         
         # Fallback: if no max stock recorded, use 10 as default threshold
         return 10
@@ -173,6 +216,43 @@ class StockTxn(models.Model):
     created_by = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, on_delete=models.SET_NULL, related_name="stock_txns_created")
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # bounded ledger range scans (see services/stock_history.py)
+            models.Index(fields=["facility", "drug", "created_at"], name="stocktxn_fac_drug_at_idx"),
+            models.Index(fields=["owner", "drug", "created_at"], name="stocktxn_owner_drug_at_idx"),
+        ]
+
+
+class StockSnapshot(models.Model):
+    """
+    End-of-day stock for one StockItem (scope + drug), derived from the
+    StockTxn ledger.
+
+    qty is the closing balance at the end of `day` (local time); qty_in /
+    qty_out / qty_adjusted are that day's movements (qty_out is positive).
+    Written by `manage.py snapshot_stock`; history queries start from the
+    nearest snapshot and only scan the ledger after it.
+    """
+    stock_item = models.ForeignKey(StockItem, on_delete=models.CASCADE, related_name="snapshots")
+    day = models.DateField()
+    qty = models.IntegerField()
+    qty_in = models.PositiveIntegerField(default=0)
+    qty_out = models.PositiveIntegerField(default=0)
+    qty_adjusted = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["stock_item", "day"], name="unique_snapshot_per_item_day"),
+        ]
+        indexes = [
+            models.Index(fields=["day"], name="stocksnap_day_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.stock_item_id} @ {self.day}: {self.qty}"
+
 
 class Prescription(models.Model):
     patient = models.ForeignKey(Patient, on_delete=models.CASCADE, related_name="prescriptions")
@@ -194,6 +274,10 @@ class Prescription(models.Model):
         related_name="prescriptions_assigned",
     )
 
+    # Item counters kept in step with the items (see record_item_progress)
+    items_total = models.PositiveIntegerField(default=0)
+    items_complete = models.PositiveIntegerField(default=0)  # qty_dispensed >= qty_prescribed
+
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -208,6 +292,43 @@ class Prescription(models.Model):
     def __str__(self):
         return f"Rx#{self.id} P:{self.patient_id}"
 
+    def record_item_progress(self, completed_delta=0, dispensed=False):
+        """
+        Adjust items_complete and roll the status up in ONE UPDATE (F()
+        expressions, so concurrent dispenses add up): PRESCRIBED until
+        something is dispensed, DISPENSED once every item is complete,
+        PARTIALLY_DISPENSED in between.
+        """
+        started = dispensed or self.status in (RxStatus.PARTIALLY_DISPENSED, RxStatus.DISPENSED)
+        if started:
+            # Conditions see the pre-update row, hence "- completed_delta".
+            status = models.Case(
+                models.When(
+                    items_complete__gte=models.F("items_total") - completed_delta,
+                    then=models.Value(RxStatus.DISPENSED),
+                ),
+                default=models.Value(RxStatus.PARTIALLY_DISPENSED),
+            )
+        else:
+            status = models.Value(RxStatus.PRESCRIBED)
+
+        Prescription.objects.filter(pk=self.pk).update(
+            items_complete=models.F("items_complete") + completed_delta,
+            status=status,
+        )
+        before = self.status
+        self.refresh_from_db(fields=["items_total", "items_complete", "status"])
+        if self.status != before:
+            self._status_updated(before)
+
+    def _status_updated(self, before):
+        """The UPDATE above skips post_save: audit the flip and drop cached dashboards."""
+        from audit.services import log_update
+        from patients.dashboard import invalidate_for
+
+        log_update(obj=self, before={"status": before}, after={"status": self.status})
+        invalidate_for(self)
+
 
 class PrescriptionItem(models.Model):
     prescription = models.ForeignKey(Prescription, on_delete=models.CASCADE, related_name="items")
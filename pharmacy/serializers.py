@@ -1,18 +1,12 @@
-from decimal import Decimal
-
 from django.contrib.auth import get_user_model
-from django.db import models, transaction
+from django.db import transaction
 from rest_framework import serializers
 
 from accounts.enums import UserRole
-from billing.models import Service, Charge, Price
-from billing.services.pricing import resolve_price
-from notifications.services.notify import notify_user, notify_patient
-from notifications.enums import Topic, Priority
+from core.events import publish
 
-from .models import Drug, StockItem, StockTxn, Prescription, PrescriptionItem, DispenseEvent
-from .enums import RxStatus, TxnType
-from .services.stock_alerts import check_and_notify_low_stock
+from .models import Drug, StockItem, StockTxn, Prescription, PrescriptionItem
+from .events import PrescriptionCreated
 
 
 User = get_user_model()
@@ -114,8 +108,22 @@ class StockItemSerializer(serializers.ModelSerializer):
             "reorder_threshold",
             "is_low_stock",
             "is_out_of_stock",
+            "suggested_reorder_level",
+            "suggested_order_qty",
+            "forecast_daily_use",
+            "forecast_updated_at",
+        ]
+        read_only_fields = [
+            "facility",
+            "owner",
+            "reorder_threshold",
+            "is_low_stock",
+            "is_out_of_stock",
+            "suggested_reorder_level",
+            "suggested_order_qty",
+            "forecast_daily_use",
+            "forecast_updated_at",
         ]
-        read_only_fields = ["facility", "owner", "reorder_threshold", "is_low_stock", "is_out_of_stock"]
 
     def get_reorder_threshold(self, obj):
         return obj.get_reorder_threshold()
@@ -127,6 +135,36 @@ class StockItemSerializer(serializers.ModelSerializer):
         return obj.is_out_of_stock()
 
 
+class StockLineSerializer(serializers.Serializer):
+    drug_id = serializers.IntegerField()
+    qty = serializers.IntegerField()
+    note = serializers.CharField(max_length=255, required=False, allow_blank=True, default="")
+
+    def validate_qty(self, value):
+        if value == 0:
+            raise serializers.ValidationError("qty must be non-zero")
+        return value
+
+
+class GoodsReceivedSerializer(serializers.Serializer):
+    """A batch of stock lines applied in one transaction (goods-received note)."""
+    reference = serializers.CharField(max_length=64, required=False, allow_blank=True, default="")
+    note = serializers.CharField(max_length=255, required=False, allow_blank=True, default="")
+    lines = StockLineSerializer(many=True)
+
+    def validate_lines(self, lines):
+        if not lines:
+            raise serializers.ValidationError("At least one line is required")
+        if len(lines) > 1000:
+            raise serializers.ValidationError("At most 1000 lines per receipt")
+        drug_ids = {ln["drug_id"] for ln in lines}
+        found = set(Drug.objects.filter(id__in=drug_ids).values_list("id", flat=True))
+        unknown = sorted(drug_ids - found)
+        if unknown:
+            raise serializers.ValidationError(f"Unknown drug id(s): {', '.join(map(str, unknown))}")
+        return lines
+
+
 class StockTxnSerializer(serializers.ModelSerializer):
     drug_name = serializers.SerializerMethodField()
     drug_code = serializers.SerializerMethodField()
@@ -336,102 +374,16 @@ class PrescriptionCreateSerializer(serializers.ModelSerializer):
             facility=facility,
             prescribed_by=u,
             outsourced_to_id=outsourced_to_id,
+            items_total=len(items),
+            items_complete=sum(1 for it in items if not it.get("qty_prescribed")),
             **validated,  # now contains only encounter_id, note, etc.
         )
 
         for it in items:
             PrescriptionItem.objects.create(prescription=rx, **it)
 
-        # Build compact summary strings for notifications
-        patient_name = None
-        try:
-            patient_name = getattr(patient, 'full_name', None)
-        except Exception:
-            patient_name = None
-        if not patient_name:
-            parts = [getattr(patient, 'first_name', ''), getattr(patient, 'middle_name', ''), getattr(patient, 'last_name', '')]
-            patient_name = ' '.join([p for p in parts if p]).strip() or f"Patient #{getattr(patient, 'id', '')}"
-
-        def summarize_meds(raw_items, limit=3):
-            names = []
-            for it in (raw_items or []):
-                try:
-                    drug_obj = it.get('drug')
-                    nm = (getattr(drug_obj, 'name', None) if drug_obj else None) or it.get('drug_name')
-                    nm = (str(nm).strip() if nm else '')
-                    dose = str(it.get('dose') or '').strip()
-                    if nm and dose:
-                        names.append(f"{nm} {dose}".strip())
-                    elif nm:
-                        names.append(nm)
-                except Exception:
-                    continue
-            names = [x for x in names if x]
-            if not names:
-                return ''
-            head = names[:limit]
-            tail = len(names) - len(head)
-            s = ', '.join(head)
-            if tail > 0:
-                s += f" (+{tail} more)"
-            return s
-
-        meds_summary = summarize_meds(items)
-
-        # Notify patient (and guardian/dependents fanout via notify_patient)
-        try:
-            notify_patient(
-                patient=patient,
-                topic=Topic.PRESCRIPTION_READY,
-                priority=Priority.NORMAL,
-                title="New prescription",
-                body=(
-                    f"New prescription: {meds_summary} (Rx #{rx.id})." if meds_summary else f"A new prescription (Rx #{rx.id}) has been created for you."
-                ),
-                facility_id=getattr(facility, "id", None),
-                data={
-                    "prescription_id": rx.id,
-                    "patient_id": getattr(patient, "id", None),
-                    "patient_name": patient_name,
-                    "meds_summary": meds_summary,
-                },
-                action_url="/patient/pharmacy",
-                group_key=f"RX:{rx.id}:NEW",
-            )
-        except Exception:
-            pass
-
-        # Notify outsourced pharmacy if applicable
-        if outsourced_to_id:
-            try:
-                outsourced_user = User.objects.filter(id=outsourced_to_id).first()
-                if not outsourced_user:
-                    raise ValueError("outsourced user not found")
-
-                notify_user(
-                    user=outsourced_user,
-                    topic=Topic.PRESCRIPTION_READY,
-                    priority=Priority.NORMAL,
-                    title="New outsourced prescription",
-                    body=(
-                        f"New outsourced prescription for {patient_name}: {meds_summary} (Rx #{rx.id})."
-                        if patient_name and meds_summary
-                        else (
-                            f"New outsourced prescription for {patient_name} (Rx #{rx.id})." if patient_name else f"New outsourced prescription (Rx #{rx.id})."
-                        )
-                    ),
-                    data={
-                        "prescription_id": rx.id,
-                        "patient_id": getattr(patient, "id", None),
-                        "patient_name": patient_name,
-                        "meds_summary": meds_summary,
-                    },
-                    facility_id=getattr(facility, "id", None),
-                    action_url="/provider/pharmacy",
-                    group_key=f"RX:{rx.id}:ASSIGNED",
-                )
-            except Exception:
-                pass
+        # Patient / outsourced pharmacy notifications run after commit.
+        publish(PrescriptionCreated(prescription_id=rx.id))
 
         return rx
 
@@ -471,6 +423,13 @@ class PrescriptionReadSerializer(serializers.ModelSerializer):
             "created_at",
             "items",
         ]
+        # walked by the SerializerMethodFields (core.prefetch)
+        select_related = [
+            "patient__hmo",
+            "facility",
+            "prescribed_by__provider_profile",
+            "outsourced_to__provider_profile",
+        ]
 
     def get_patient_name(self, obj):
         p = getattr(obj, "patient", None)
@@ -584,204 +543,37 @@ class DispenseSerializer(serializers.Serializer):
     note = serializers.CharField(required=False, allow_blank=True)
 
     def save(self, *, rx: Prescription, user):
-        item = rx.items.filter(id=self.validated_data["item_id"]).first()
-        if not item:
-            raise serializers.ValidationError("Item not found in prescription")
+        from .services.dispensing import DispenseLine, dispense_items
 
-        take = int(self.validated_data["qty"])
-        if take <= 0:
-            raise serializers.ValidationError("qty must be >= 1")
-
-        if item.remaining() <= 0:
-            raise serializers.ValidationError("Item already fully dispensed")
-
-        take = min(take, item.remaining())
-
-        is_outsourced = bool(rx.outsourced_to_id)
-        is_free_text = not bool(item.drug_id)
-
-        # Determine stock scope:
-        # - Facility pharmacy (not outsourced): facility stock
-        # - Independent outsourced pharmacy: owner stock (pharmacy user)
-        stock_scope = None
-        role = (getattr(user, "role", "") or "").upper()
-
-        if not is_free_text:
-            if (not is_outsourced) and bool(rx.facility_id) and bool(getattr(user, "facility_id", None)) and rx.facility_id == user.facility_id:
-                stock_scope = {"facility": rx.facility}
-            elif is_outsourced and role == UserRole.PHARMACY and (not getattr(user, "facility_id", None)) and rx.outsourced_to_id == getattr(user, "id", None):
-                stock_scope = {"owner": user}
-            elif (not is_outsourced) and role == UserRole.PHARMACY and (not getattr(user, "facility_id", None)) and (rx.prescribed_by_id == getattr(user, "id", None)):
-                # Independent pharmacy issuing + dispensing its own prescriptions
-                stock_scope = {"owner": user}
-
-        stock_required = bool(stock_scope)
+        items = dispense_items(
+            rx,
+            [DispenseLine(self.validated_data["item_id"], self.validated_data["qty"])],
+            user=user,
+            note=self.validated_data.get("note", ""),
+        )
+        return items[0]
 
-        with transaction.atomic():
-            stock_item = None
-            
-            if stock_required:
-                if "facility" in stock_scope:
-                    stock_item, _ = StockItem.objects.select_for_update().get_or_create(
-                        facility=stock_scope["facility"],
-                        owner=None,
-                        drug=item.drug,
-                        defaults={"current_qty": 0},
-                    )
-                else:
-                    stock_item, _ = StockItem.objects.select_for_update().get_or_create(
-                        facility=None,
-                        owner=stock_scope["owner"],
-                        drug=item.drug,
-                        defaults={"current_qty": 0},
-                    )
-
-                if stock_item.current_qty < take:
-                    raise serializers.ValidationError(
-                        f"Insufficient stock for {item.drug.name}. In stock: {stock_item.current_qty}"
-                    )
-
-                stock_item.current_qty -= take
-                stock_item.save(update_fields=["current_qty"])
-
-                StockTxn.objects.create(
-                    facility=stock_scope.get("facility"),
-                    owner=stock_scope.get("owner"),
-                    drug=item.drug,
-                    txn_type=TxnType.OUT,
-                    qty=-take,
-                    note=f"Dispense Rx#{rx.id}",
-                    created_by=user,
-                )
 
-            # record dispense event
-            DispenseEvent.objects.create(
-                prescription_item=item,
-                qty=take,
-                dispensed_by=user,
-                note=self.validated_data.get("note", ""),
-            )
+class DispenseLineSerializer(serializers.Serializer):
+    item_id = serializers.IntegerField()
+    qty = serializers.IntegerField(min_value=1)
 
-            # update item qty
-            item.qty_dispensed += take
-            item.save(update_fields=["qty_dispensed"])
 
-            # roll up rx status
-            totals = rx.items.aggregate(
-                total=models.Sum("qty_prescribed"),
-                out=models.Sum("qty_dispensed"),
-            )
-            total = totals["total"] or 0
-            out = totals["out"] or 0
-
-            if out == 0:
-                rx.status = RxStatus.PRESCRIBED
-            elif out < total:
-                rx.status = RxStatus.PARTIALLY_DISPENSED
-            else:
-                rx.status = RxStatus.DISPENSED
-            rx.save(update_fields=["status"])
-
-            # billing when catalog drug exists (facility billing OR owner billing)
-            billing_facility = rx.facility if rx.facility_id else None
-            billing_owner = None
-
-            # Independent pharmacy collects payment directly for:
-            # - outsourced prescriptions assigned to them
-            # - prescriptions they issued themselves (self-prescribed workflows)
-            if role == UserRole.PHARMACY and not getattr(user, "facility_id", None):
-                if rx.outsourced_to_id == getattr(user, "id", None):
-                    billing_owner = user
-                    billing_facility = None  # force owner-billing even if the Rx has a facility
-                elif rx.prescribed_by_id == getattr(user, "id", None) and not rx.outsourced_to_id:
-                    billing_owner = user
-                    billing_facility = None
-
-            if (billing_facility or billing_owner) and rx.patient and item.drug_id:
-                drug = item.drug
-                service_code = f"DRUG:{drug.code}"
-
-                service_defaults = {
-                    "name": f"{drug.name} {drug.strength}".strip(),
-                    "default_price": drug.unit_price,
-                    "is_active": True,
-                }
-                service, _ = Service.objects.get_or_create(code=service_code, defaults=service_defaults)
-
-                # Ensure per-scope price exists for consistent independent pricing.
-                try:
-                    if billing_facility and not billing_owner:
-                        Price.objects.get_or_create(
-                            facility=billing_facility,
-                            owner=None,
-                            service=service,
-                            defaults={"amount": drug.unit_price, "currency": "NGN"},
-                        )
-                    if billing_owner and not billing_facility:
-                        Price.objects.get_or_create(
-                            facility=None,
-                            owner=billing_owner,
-                            service=service,
-                            defaults={"amount": drug.unit_price, "currency": "NGN"},
-                        )
-                except Exception:
-                    pass
-
-                patient_system_hmo = None
-                patient_tier = None
-                if rx.patient:
-                    patient_system_hmo = getattr(rx.patient, 'system_hmo', None)
-                    patient_tier = getattr(rx.patient, 'hmo_tier', None)
-
-                unit_price = resolve_price(
-                    service=service, 
-                    facility=billing_facility, 
-                    owner=billing_owner,
-                    system_hmo=patient_system_hmo,
-                    tier=patient_tier
-                )
-                amount = (unit_price or Decimal("0")) * Decimal(take)
-
-                charge = Charge.objects.create(
-                    patient=rx.patient,
-                    facility=billing_facility,
-                    owner=billing_owner,
-                    service=service,
-                    description=f"{drug.name} x{take}",
-                    unit_price=unit_price,
-                    qty=take,
-                    amount=amount,
-                    prescription_id=rx.id,
-                    encounter_id=rx.encounter_id,
-                    created_by=user,
-                )
-                try:
-                    if rx.patient:
-                        notify_patient(
-                            patient=rx.patient,
-                            topic=Topic.PRESCRIPTION_READY,
-                            priority=Priority.NORMAL,
-                            title="Medication dispensed",
-                            body=f"{drug.name} x{take} has been dispensed.",
-                            data={
-                                "prescription_id": rx.id,
-                                "charge_id": charge.id,
-                                "drug_id": drug.id,
-                                "qty": take,
-                            },
-                            facility_id=(billing_facility.id if billing_facility else getattr(rx.patient, "facility_id", None)),
-                            action_url="/patient/pharmacy",
-                            group_key=f"RX:{rx.id}:DISPENSE",
-                        )
-                except Exception:
-                    pass
+class BatchDispenseSerializer(serializers.Serializer):
+    """
+    Dispense several items of one prescription in a single transaction:
+    {"items": [{"item_id": 1, "qty": 10}, ...], "note": "..."}.
+    All lines succeed or none do.
+    """
+    items = DispenseLineSerializer(many=True, allow_empty=False, max_length=100)
+    note = serializers.CharField(required=False, allow_blank=True)
 
-            # Check for low stock after dispensing and send notification if needed
-            if stock_item is not None:
-                try:
-                    check_and_notify_low_stock(stock_item)
-                except Exception as e:
-                    # Log but don't fail the dispense
-                    print(f"Failed to check low stock after dispense: {e}")
+    def save(self, *, rx: Prescription, user):
+        from .services.dispensing import DispenseLine, dispense_items
 
-        return item
\ No newline at end of file
+        return dispense_items(
+            rx,
+            [DispenseLine(line["item_id"], line["qty"]) for line in self.validated_data["items"]],
+            user=user,
+            note=self.validated_data.get("note", ""),
+        )
@@ -0,0 +1,228 @@
+"""
+pharmacy/services/dispensing.py
+
+Dispense one or more items of a prescription in ONE transaction.
+
+- prescription items are locked in id order, stock rows in drug_id order
+  (stock_ledger.lock_stock_items), so concurrent dispenses cannot deadlock
+  or oversell;
+- stock is decremented with a single UPDATE and one StockTxn (OUT) per item;
+- DispenseEvents and billing Charges are bulk-inserted, one charge per
+  event (ChargeSource.DISPENSE), so a charge can never be posted twice;
+- the prescription status is rolled up once, from its item counters;
+- the patient gets one "Medication dispensed" notification and the low-stock
+  check runs once, both after commit.
+
+Stock rules (unchanged from the single-item flow):
+- outsourced prescriptions OR free-text meds bypass stock checks;
+- facility catalog meds dispensed by the facility use facility stock;
+- independent pharmacies use their own (owner) stock.
+"""
+
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from django.db import transaction
+from rest_framework import serializers
+
+from accounts.enums import UserRole
+from billing.enums import ChargeSource
+from billing.services.charges import ChargeLine, post_charges
+from notifications.enums import Topic, Priority
+from notifications.services.notify import notify_patient
+
+from ..enums import TxnType
+from ..models import DispenseEvent, PrescriptionItem
+from .stock_ledger import StockLine, apply_adjustments, lock_stock_items
+
+
+@dataclass(frozen=True)
+class DispenseLine:
+    item_id: int
+    qty: int
+
+
+def stock_scope_for(rx, user):
+    """{"facility": ...} / {"owner": ...} whose stock a dispense draws from, or None."""
+    role = (getattr(user, "role", "") or "").upper()
+    is_outsourced = bool(rx.outsourced_to_id)
+    user_facility_id = getattr(user, "facility_id", None)
+
+    if (not is_outsourced) and bool(rx.facility_id) and bool(user_facility_id) and rx.facility_id == user_facility_id:
+        return {"facility": rx.facility}
+    if is_outsourced and role == UserRole.PHARMACY and (not user_facility_id) and rx.outsourced_to_id == getattr(user, "id", None):
+        return {"owner": user}
+    if (not is_outsourced) and role == UserRole.PHARMACY and (not user_facility_id) and (rx.prescribed_by_id == getattr(user, "id", None)):
+        # Independent pharmacy issuing + dispensing its own prescriptions
+        return {"owner": user}
+    return None
+
+
+def billing_scope_for(rx, user):
+    """(facility, owner) the dispense is billed to."""
+    billing_facility = rx.facility if rx.facility_id else None
+    billing_owner = None
+
+    # Independent pharmacy collects payment directly for:
+    # - outsourced prescriptions assigned to them
+    # - prescriptions they issued themselves (self-prescribed workflows)
+    role = (getattr(user, "role", "") or "").upper()
+    if role == UserRole.PHARMACY and not getattr(user, "facility_id", None):
+        if rx.outsourced_to_id == getattr(user, "id", None):
+            return None, user  # force owner-billing even if the Rx has a facility
+        if rx.prescribed_by_id == getattr(user, "id", None) and not rx.outsourced_to_id:
+            return None, user
+    return billing_facility, billing_owner
+
+
+def _bill(rx, taken, events, *, user):
+    """One Charge per dispensed catalog item, keyed by its DispenseEvent. Returns the charges."""
+    billing_facility, billing_owner = billing_scope_for(rx, user)
+    lines = [
+        ChargeLine(
+            code=f"DRUG:{item.drug.code}",
+            name=f"{item.drug.name} {item.drug.strength}".strip(),
+            base_price=item.drug.unit_price,
+            qty=take,
+            description=f"{item.drug.name} x{take}",
+            source_id=event.id,
+        )
+        for (item, take), event in zip(taken, events)
+        if item.drug_id
+    ]
+    return post_charges(
+        lines,
+        patient=rx.patient,
+        source_type=ChargeSource.DISPENSE,
+        facility=billing_facility,
+        owner=billing_owner,
+        created_by=user,
+        prescription_id=rx.id,
+        encounter_id=rx.encounter_id,
+    )
+
+
+def _notify_dispensed(rx, taken, charges, facility_id):
+    lines = [(item, take) for item, take in taken if item.drug_id]
+    if not lines or not charges:
+        return
+    data = {
+        "prescription_id": rx.id,
+        "charge_ids": [c.id for c in charges],
+        "items": [{"drug_id": item.drug_id, "qty": take} for item, take in lines],
+    }
+    if len(lines) == 1:
+        item, take = lines[0]
+        data.update({"charge_id": charges[0].id, "drug_id": item.drug_id, "qty": take})
+    try:
+        notify_patient(
+            patient=rx.patient,
+            topic=Topic.PRESCRIPTION_READY,
+            priority=Priority.NORMAL,
+            title="Medication dispensed",
+            body="\n".join(f"{item.drug.name} x{take} has been dispensed." for item, take in lines),
+            data=data,
+            facility_id=facility_id,
+            action_url="/patient/pharmacy",
+            group_key=f"RX:{rx.id}:DISPENSE",
+        )
+    except Exception:
+        pass
+
+
+def dispense_items(rx, lines, *, user, note="") -> list[PrescriptionItem]:
+    """
+    Dispense `lines` (DispenseLine, quantities capped at what remains) and
+    return the updated PrescriptionItems in request order. Raises
+    serializers.ValidationError without side effects on any invalid line.
+    """
+    requested = OrderedDict()
+    for ln in lines:
+        requested[int(ln.item_id)] = requested.get(int(ln.item_id), 0) + int(ln.qty)
+    if not requested:
+        raise serializers.ValidationError("No items to dispense")
+    batch = len(requested) > 1
+
+    with transaction.atomic():
+        items = {
+            i.id: i
+            for i in rx.items.select_for_update(of=("self",))
+            .select_related("drug")
+            .filter(id__in=requested.keys())
+            .order_by("id")
+        }
+
+        taken = []
+        for item_id, qty in requested.items():
+            item = items.get(item_id)
+            if not item:
+                raise serializers.ValidationError(
+                    f"Item {item_id} not found in prescription" if batch else "Item not found in prescription"
+                )
+            if qty <= 0:
+                raise serializers.ValidationError("qty must be >= 1")
+            if item.remaining() <= 0:
+                raise serializers.ValidationError(
+                    f"{item.display_name}: item already fully dispensed" if batch else "Item already fully dispensed"
+                )
+            taken.append((item, min(qty, item.remaining())))
+
+        stock_scope = stock_scope_for(rx, user)
+        stocked = [(item, take) for item, take in taken if stock_scope and item.drug_id]
+        if stocked:
+            facility = stock_scope.get("facility")
+            owner = stock_scope.get("owner")
+            need = {}
+            for item, take in stocked:
+                need[item.drug_id] = need.get(item.drug_id, 0) + take
+            locked = lock_stock_items(need.keys(), facility=facility, owner=owner)
+            for item, _ in stocked:
+                available = locked[item.drug_id].current_qty
+                if available < need[item.drug_id]:
+                    raise serializers.ValidationError(
+                        f"Insufficient stock for {item.drug.name}. In stock: {available}"
+                    )
+            apply_adjustments(
+                [
+                    StockLine(item.drug_id, -take, note=f"Dispense Rx#{rx.id}", txn_type=TxnType.OUT)
+                    for item, take in stocked
+                ],
+                facility=facility,
+                owner=owner,
+                user=user,
+                locked=locked,
+            )
+
+        events = DispenseEvent.objects.bulk_create([
+            DispenseEvent(prescription_item=item, qty=take, dispensed_by=user, note=note or "")
+            for item, take in taken
+        ])
+        for item, take in taken:
+            item.qty_dispensed += take
+        PrescriptionItem.objects.bulk_update([item for item, _ in taken], ["qty_dispensed"])
+
+        # Items were incomplete before (checked above); count those now done.
+        rx.record_item_progress(
+            sum(1 for item, _ in taken if item.qty_dispensed >= item.qty_prescribed),
+            dispensed=True,
+        )
+
+        charges = _bill(rx, taken, events, user=user)
+
+        # Bulk writes skip the per-row audit signals; record the dispense once.
+        from audit.services import log_action
+
+        log_action(
+            obj=rx,
+            title=f"Dispensed {len(taken)} item(s)",
+            extra={
+                "items": {str(item.id): take for item, take in taken},
+                "charge_ids": [c.id for c in charges],
+            },
+        )
+        if charges:
+            billing_facility, _ = billing_scope_for(rx, user)
+            facility_id = billing_facility.id if billing_facility else getattr(rx.patient, "facility_id", None)
+            transaction.on_commit(lambda: _notify_dispensed(rx, taken, charges, facility_id))
+
+    return [item for item, _ in taken]
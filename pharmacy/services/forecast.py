@@ -0,0 +1,138 @@
+"""
+pharmacy/services/forecast.py
+
+Consumption forecast -> reorder suggestions for StockItem rows.
+
+For every stock item in scope (or all scopes) the daily dispensed quantity
+over the last PHARMACY_FORECAST_WINDOW_DAYS completed days is loaded with ONE
+grouped ledger query (StockTxn OUT rows) into an items x days NumPy matrix.
+All forecasts are then computed together:
+
+- demand:         exponentially weighted daily use (newest days weigh most)
+- safety stock:   z * std(daily use) * sqrt(lead time)
+- reorder point:  demand * lead time + safety stock
+- order-up-to:    demand * (lead time + review period) + safety stock
+
+Results are written back to StockItem (suggested_reorder_level,
+suggested_order_qty, forecast_daily_use) with one bulk update. A positive
+suggested_reorder_level replaces the 20%-of-max fallback threshold; a manual
+reorder_level still wins.
+"""
+
+import math
+from dataclasses import dataclass, replace
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+
+from ..models import StockItem
+from .stock_history import day_end, ledger_by_day, ledger_key, scoped_queryset
+
+
+@dataclass(frozen=True)
+class ForecastParams:
+    window_days: int = 90
+    alpha: float = 0.2
+    lead_time_days: int = 7
+    review_days: int = 14
+    service_z: float = 1.65
+
+    @classmethod
+    def from_settings(cls, **overrides):
+        params = cls(
+            window_days=getattr(settings, "PHARMACY_FORECAST_WINDOW_DAYS", cls.window_days),
+            alpha=getattr(settings, "PHARMACY_FORECAST_ALPHA", cls.alpha),
+            lead_time_days=getattr(settings, "PHARMACY_LEAD_TIME_DAYS", cls.lead_time_days),
+            review_days=getattr(settings, "PHARMACY_REVIEW_DAYS", cls.review_days),
+            service_z=getattr(settings, "PHARMACY_SERVICE_LEVEL_Z", cls.service_z),
+        )
+        return replace(params, **{k: v for k, v in overrides.items() if v is not None})
+
+
+@dataclass
+class Forecast:
+    demand: np.ndarray          # forecast units per day
+    reorder_point: np.ndarray   # int
+    order_up_to: np.ndarray     # int
+
+
+def usage_matrix(items, *, scope, start, days) -> np.ndarray:
+    """items x days matrix of units dispensed per local day, from `start`."""
+    usage = np.zeros((len(items), days), dtype=float)
+    if not items or days <= 0:
+        return usage
+
+    row_of = {ledger_key(item): i for i, item in enumerate(items)}
+    ledger = ledger_by_day(
+        scope,
+        since=day_end(start - timedelta(days=1)),
+        until=day_end(start + timedelta(days=days - 1)),
+    )
+    for key, by_day in ledger.items():
+        row = row_of.get(key)
+        if row is None:
+            continue
+        for day, movement in by_day.items():
+            col = (day - start).days
+            if 0 <= col < days and movement.qty_out:
+                usage[row, col] = movement.qty_out
+    return usage
+
+
+def forecast(usage: np.ndarray, params: ForecastParams) -> Forecast:
+    """Vectorised forecast for every row of `usage` at once."""
+    n_items, n_days = usage.shape
+    if n_days == 0:
+        zeros = np.zeros(n_items)
+        return Forecast(zeros, zeros.astype(int), zeros.astype(int))
+
+    # Normalised exponential weights, oldest day first.
+    alpha = min(max(params.alpha, 0.01), 1.0)
+    weights = alpha * (1 - alpha) ** np.arange(n_days - 1, -1, -1)
+    demand = usage @ (weights / weights.sum())
+
+    std = usage.std(axis=1, ddof=1) if n_days > 1 else np.zeros(n_items)
+    safety = params.service_z * std * math.sqrt(params.lead_time_days)
+
+    reorder_point = np.ceil(demand * params.lead_time_days + safety)
+    order_up_to = np.ceil(demand * (params.lead_time_days + params.review_days) + safety)
+    # No dispensing in the window: no suggestion (fallback threshold applies).
+    idle = ~usage.any(axis=1)
+    reorder_point[idle] = 0
+    order_up_to[idle] = 0
+    return Forecast(demand, reorder_point.astype(int), order_up_to.astype(int))
+
+
+def refresh_reorder_suggestions(scope=None, *, params=None, today=None, dry_run=False) -> list[StockItem]:
+    """
+    Recompute and store suggestions for every StockItem in `scope`
+    (None = all scopes). Returns the items with the new values set.
+    """
+    params = params or ForecastParams.from_settings()
+    today = today or timezone.localdate()
+    start = today - timedelta(days=params.window_days)
+
+    items = list(scoped_queryset(StockItem.objects.select_related("drug"), scope).order_by("pk"))
+    if not items:
+        return []
+
+    result = forecast(usage_matrix(items, scope=scope, start=start, days=params.window_days), params)
+    current = np.array([item.current_qty for item in items])
+    order_qty = np.maximum(result.order_up_to - current, 0)
+    now = timezone.now()
+
+    for i, item in enumerate(items):
+        item.suggested_reorder_level = int(result.reorder_point[i])
+        item.suggested_order_qty = int(order_qty[i]) if result.reorder_point[i] else 0
+        item.forecast_daily_use = round(float(result.demand[i]), 3)
+        item.forecast_updated_at = now
+
+    if not dry_run:
+        StockItem.objects.bulk_update(
+            items,
+            ["suggested_reorder_level", "suggested_order_qty", "forecast_daily_use", "forecast_updated_at"],
+            batch_size=500,
+        )
+    return items
@@ -4,7 +4,10 @@ pharmacy/services/stock_alerts.py
 Service for managing low stock notifications.
 """
 
+from itertools import groupby
+
 from django.contrib.auth import get_user_model
+from django.db.models import Count, Q
 from notifications.services.notify import notify_users
 from notifications.enums import Topic, Priority
 from accounts.enums import UserRole
@@ -137,6 +140,103 @@ def check_and_notify_low_stock(stock_item, force=False):
         return False
 
 
+def notify_low_stock_items(stock_items):
+    """
+    Low-stock check for a batch of StockItem rows from ONE scope (e.g. all
+    lines of a goods-received note or a dispense).
+
+    A single low item gets the usual per-item alert; several low items are
+    summarised in one notification per recipient. Returns the number of low
+    items found.
+    """
+    low = [s for s in stock_items if s.is_low_stock()]
+    if not low:
+        return 0
+    if len(low) == 1:
+        check_and_notify_low_stock(low[0])
+        return 1
+
+    first = low[0]
+    if first.facility_id:
+        recipients = get_pharmacy_managers(facility=first.facility)
+        facility_id = first.facility_id
+        action_url = "/facility/pharmacy/stock"
+    elif first.owner_id:
+        recipients = get_pharmacy_managers(owner=first.owner)
+        facility_id = None
+        action_url = "/provider/pharmacy/stock"
+    else:
+        return 0
+
+    out = [s for s in low if s.is_out_of_stock()]
+    priority = Priority.URGENT if out else Priority.HIGH
+    lines = [
+        f"{s.drug.name}: {s.current_qty} units (reorder level {s.get_reorder_threshold()})"
+        for s in low[:10]
+    ]
+    if len(low) > 10:
+        lines.append(f"... and {len(low) - 10} more")
+
+    try:
+        notify_users(
+            users=recipients,
+            topic=Topic.VITAL_ALERT,  # Using VITAL_ALERT for stock alerts
+            priority=priority,
+            title=f"⚠️ {len(low)} items low on stock" + (f" ({len(out)} out of stock)" if out else ""),
+            body="\n".join(lines),
+            data={
+                "stock_item_ids": [s.id for s in low],
+                "low_stock_count": len(low),
+                "out_of_stock_count": len(out),
+            },
+            facility_id=facility_id,
+            action_url=action_url,
+            group_key=f"LOW_STOCK_BATCH:{facility_id or f'u{first.owner_id}'}",
+        )
+    except Exception as e:
+        print(f"Failed to send low stock notification: {e}")
+    return len(low)
+
+
+def _scope_counts(qs):
+    """
+    {(facility_id, owner_id): {total_items, low_stock_count, out_of_stock_count}}
+    in one grouped query. low_stock_count excludes out-of-stock rows.
+    """
+    from pharmacy.models import reorder_threshold_expression
+
+    rows = (
+        qs.order_by()
+        .values("facility_id", "owner_id")
+        .annotate(
+            total_items=Count("id"),
+            low=Count("id", filter=Q(current_qty__lte=reorder_threshold_expression(), current_qty__gt=0)),
+            out=Count("id", filter=Q(current_qty=0)),
+        )
+    )
+    return {
+        (r["facility_id"], r["owner_id"]): {
+            "total_items": r["total_items"],
+            "low_stock_count": r["low"],
+            "out_of_stock_count": r["out"],
+            "notifications_sent": 0,
+        }
+        for r in rows
+    }
+
+
+def _notify_low_by_scope(qs, summaries):
+    """Load every low row of `qs` in one query and send one alert batch per scope."""
+    low_items = (
+        qs.low_stock()
+        .select_related("drug", "facility", "owner")
+        .order_by("facility_id", "owner_id", "current_qty", "drug__name")
+    )
+    for key, items in groupby(low_items, key=lambda s: (s.facility_id, s.owner_id)):
+        if notify_low_stock_items(list(items)):
+            summaries[key]["notifications_sent"] += 1
+
+
 def check_all_low_stock(facility=None, owner=None):
     """
     Check all stock items in a facility/pharmacy for low stock and send notifications.
@@ -149,30 +249,30 @@ def check_all_low_stock(facility=None, owner=None):
     
     # Get stock items for the scope
     if facility:
-        stock_items = StockItem.objects.filter(facility=facility).select_related('drug')
+        stock_items = StockItem.objects.filter(facility=facility)
     elif owner:
-        stock_items = StockItem.objects.filter(owner=owner).select_related('drug')
+        stock_items = StockItem.objects.filter(owner=owner)
     else:
         return {"error": "No facility or owner specified"}
-    
-    summary = {
-        "total_items": 0,
-        "low_stock_count": 0,
-        "out_of_stock_count": 0,
-        "notifications_sent": 0,
-    }
-    
-    for stock_item in stock_items:
-        summary["total_items"] += 1
-        
-        if stock_item.is_out_of_stock():
-            summary["out_of_stock_count"] += 1
-        elif stock_item.is_low_stock():
-            summary["low_stock_count"] += 1
-        
-        # Send notification if low or out of stock
-        if stock_item.is_low_stock() or stock_item.is_out_of_stock():
-            if check_and_notify_low_stock(stock_item):
-                summary["notifications_sent"] += 1
-    
-    return summary
\ No newline at end of file
+
+    summaries = _scope_counts(stock_items)
+    if not summaries:
+        return {"total_items": 0, "low_stock_count": 0, "out_of_stock_count": 0, "notifications_sent": 0}
+    _notify_low_by_scope(stock_items, summaries)
+    return next(iter(summaries.values()))
+
+
+def check_low_stock_everywhere():
+    """
+    Nightly check across every facility and independent pharmacy: one grouped
+    count query, one query for all low rows, then one alert batch per scope.
+
+    Returns:
+        dict: {(facility_id, owner_id): summary} for every scope holding stock
+    """
+    from pharmacy.models import StockItem
+
+    stock_items = StockItem.objects.all()
+    summaries = _scope_counts(stock_items)
+    _notify_low_by_scope(stock_items, summaries)
+    return summaries
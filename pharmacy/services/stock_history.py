@@ -0,0 +1,267 @@
+"""
+pharmacy/services/stock_history.py
+
+Historical stock queries on top of the StockTxn ledger.
+
+StockItem.current_qty is the mutable "now"; StockTxn is append-only. To
+answer "what was in stock on day X" without summing the whole ledger, a
+StockSnapshot row (closing qty + the day's movements) is written per
+StockItem per day by `manage.py snapshot_stock`. Every query here starts
+from the nearest snapshot and scans only the ledger range after it:
+
+- balances_on(day)          closing stock per item at the end of `day`
+- consumption(start, end)   received / dispensed / adjusted per item
+- days_of_cover(window)     current_qty / average daily dispensing
+- find_drift()              items whose snapshot + ledger != current_qty
+
+The first snapshot of an item is anchored to current_qty (rolling the
+ledger backwards from now), so stock seeded before the ledger existed does
+not count as drift; later divergence does.
+
+`scope` is the {"facility": ..., "owner": ...} dict used by StockViewSet;
+None means every scope (snapshot job only).
+"""
+
+from dataclasses import dataclass
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import Max, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from ..enums import TxnType
+from ..models import StockItem, StockSnapshot, StockTxn
+
+
+@dataclass
+class Movement:
+    qty_in: int = 0
+    qty_out: int = 0        # positive number of units dispensed
+    qty_adjusted: int = 0
+
+    @property
+    def net(self) -> int:
+        return self.qty_in - self.qty_out + self.qty_adjusted
+
+    def add(self, other):
+        self.qty_in += other.qty_in
+        self.qty_out += other.qty_out
+        self.qty_adjusted += other.qty_adjusted
+
+
+def day_end(day):
+    """Aware datetime at the end of local `day` (start of the next day)."""
+    return timezone.make_aware(datetime.combine(day + timedelta(days=1), time.min))
+
+
+def scoped_queryset(model_qs, scope, prefix=""):
+    if scope is None:
+        return model_qs
+    if scope.get("facility"):
+        return model_qs.filter(**{f"{prefix}facility": scope["facility"]})
+    return model_qs.filter(**{f"{prefix}facility__isnull": True, f"{prefix}owner": scope["owner"]})
+
+
+def stock_items(scope, drug_ids=None):
+    qs = scoped_queryset(StockItem.objects.select_related("drug"), scope)
+    if drug_ids:
+        qs = qs.filter(drug_id__in=drug_ids)
+    return qs
+
+
+def _key(facility_id, owner_id, drug_id):
+    return (facility_id, None if facility_id else owner_id, drug_id)
+
+
+def ledger_key(item):
+    return _key(item.facility_id, item.owner_id, item.drug_id)
+
+
+def ledger_by_day(scope, since=None, until=None, drug_ids=None) -> dict:
+    """
+    {(facility_id, owner_id, drug_id): {day: Movement}} for ledger rows in
+    [since, until) - one grouped query over the (scope, drug, created_at) index.
+    """
+    qs = scoped_queryset(StockTxn.objects.all(), scope)
+    if since is not None:
+        qs = qs.filter(created_at__gte=since)
+    if until is not None:
+        qs = qs.filter(created_at__lt=until)
+    if drug_ids:
+        qs = qs.filter(drug_id__in=drug_ids)
+
+    rows = (
+        qs.annotate(day=TruncDate("created_at"))
+        .values("facility_id", "owner_id", "drug_id", "day")
+        .annotate(
+            qty_in=Sum("qty", filter=Q(txn_type=TxnType.IN)),
+            qty_out=Sum("qty", filter=Q(txn_type=TxnType.OUT)),
+            qty_adjusted=Sum("qty", filter=Q(txn_type=TxnType.ADJUST)),
+        )
+        .order_by()
+    )
+    out = {}
+    for r in rows:
+        out.setdefault(_key(r["facility_id"], r["owner_id"], r["drug_id"]), {})[r["day"]] = Movement(
+            qty_in=r["qty_in"] or 0,
+            qty_out=-(r["qty_out"] or 0),
+            qty_adjusted=r["qty_adjusted"] or 0,
+        )
+    return out
+
+
+def _sum_days(days: dict, after=None, through=None) -> Movement:
+    """Movement total for days in (after, through]."""
+    total = Movement()
+    for d, m in days.items():
+        if (after is None or d > after) and (through is None or d <= through):
+            total.add(m)
+    return total
+
+
+def _with_nearest_snapshot(items, day, *, before=False):
+    """Annotate items with the latest snapshot on (or strictly before) `day`."""
+    lookup = {"day__lt": day} if before else {"day__lte": day}
+    snaps = StockSnapshot.objects.filter(stock_item=OuterRef("pk"), **lookup).order_by("-day")
+    return items.annotate(
+        snap_day=Subquery(snaps.values("day")[:1]),
+        snap_qty=Subquery(snaps.values("qty")[:1]),
+    )
+
+
+def _closing_balances(items, day, *, scope, drug_ids=None, before=False) -> list:
+    """
+    [(item, qty)] closing stock at the end of `day`. Items with a snapshot
+    roll forward from it; items without one roll backwards from current_qty.
+    """
+    items = list(_with_nearest_snapshot(items, day, before=before))
+    if not items:
+        return []
+    end = day_end(day)
+
+    anchored = [i for i in items if i.snap_day is not None]
+    forward = {}
+    if anchored:
+        since = day_end(min(i.snap_day for i in anchored))
+        forward = ledger_by_day(scope, since=since, until=end, drug_ids=drug_ids)
+
+    backward = {}
+    if len(anchored) < len(items):
+        backward = ledger_by_day(scope, since=end, drug_ids=drug_ids)
+
+    out = []
+    for item in items:
+        key = ledger_key(item)
+        if item.snap_day is not None:
+            qty = item.snap_qty + _sum_days(forward.get(key, {}), after=item.snap_day).net
+        else:
+            qty = item.current_qty - _sum_days(backward.get(key, {})).net
+        out.append((item, qty))
+    return out
+
+
+def balances_on(day, *, scope, drug_ids=None) -> list:
+    """[(StockItem, qty)] - stock held at the end of `day`."""
+    return _closing_balances(stock_items(scope, drug_ids), day, scope=scope, drug_ids=drug_ids)
+
+
+def take_snapshots(day, *, scope=None, batch_size=1000) -> int:
+    """
+    Write (or rewrite) the StockSnapshot rows for `day`, which must be a
+    completed local day. Idempotent; returns the number of rows written.
+    """
+    if day >= timezone.localdate():
+        raise ValueError("Snapshots can only be taken for completed days")
+
+    items = scoped_queryset(StockItem.objects.all(), scope)
+    balances = _closing_balances(items, day, scope=scope, before=True)
+    moves = ledger_by_day(scope, since=day_end(day - timedelta(days=1)), until=day_end(day))
+
+    rows = []
+    for item, qty in balances:
+        m = moves.get(ledger_key(item), {}).get(day, Movement())
+        rows.append(StockSnapshot(
+            stock_item=item,
+            day=day,
+            qty=qty,
+            qty_in=m.qty_in,
+            qty_out=m.qty_out,
+            qty_adjusted=m.qty_adjusted,
+        ))
+
+    with transaction.atomic():
+        StockSnapshot.objects.filter(stock_item__in=items, day=day).delete()
+        StockSnapshot.objects.bulk_create(rows, batch_size=batch_size)
+    return len(rows)
+
+
+def consumption(start, end, *, scope, drug_ids=None) -> list:
+    """
+    [(StockItem, Movement)] for local days start..end inclusive: summed
+    snapshots where they exist, the ledger for the days after the last one.
+    """
+    items = list(stock_items(scope, drug_ids))
+    if not items:
+        return []
+
+    snap_rows = (
+        StockSnapshot.objects.filter(stock_item__in=items, day__gte=start, day__lte=end)
+        .values("stock_item_id")
+        .annotate(
+            qty_in=Sum("qty_in"),
+            qty_out=Sum("qty_out"),
+            qty_adjusted=Sum("qty_adjusted"),
+            covered=Max("day"),
+        )
+        .order_by()
+    )
+    snaps = {r["stock_item_id"]: r for r in snap_rows}
+
+    day_before = start - timedelta(days=1)
+    covered = {i.pk: snaps[i.pk]["covered"] if i.pk in snaps else day_before for i in items}
+    tail = {}
+    if min(covered.values()) < end:
+        tail = ledger_by_day(
+            scope,
+            since=day_end(min(covered.values())),
+            until=day_end(end),
+            drug_ids=drug_ids,
+        )
+
+    out = []
+    for item in items:
+        total = Movement()
+        if item.pk in snaps:
+            r = snaps[item.pk]
+            total.add(Movement(r["qty_in"] or 0, r["qty_out"] or 0, r["qty_adjusted"] or 0))
+        total.add(_sum_days(tail.get(ledger_key(item), {}), after=covered[item.pk], through=end))
+        out.append((item, total))
+    return out
+
+
+def days_of_cover(*, scope, window_days=30, drug_ids=None, today=None) -> list:
+    """
+    [(StockItem, avg_daily_out, days_of_cover)] based on dispensing over the
+    last `window_days` days (today included). days_of_cover is None when
+    nothing was dispensed in the window.
+    """
+    today = today or timezone.localdate()
+    start = today - timedelta(days=window_days - 1)
+    out = []
+    for item, m in consumption(start, today, scope=scope, drug_ids=drug_ids):
+        avg = m.qty_out / window_days
+        cover = round(item.current_qty / avg, 1) if avg else None
+        out.append((item, round(avg, 2), cover))
+    return out
+
+
+def find_drift(*, scope=None, drug_ids=None) -> list:
+    """[(StockItem, ledger_qty)] where snapshot + ledger disagrees with current_qty."""
+    today = timezone.localdate()
+    items = scoped_queryset(StockItem.objects.select_related("drug"), scope)
+    if drug_ids:
+        items = items.filter(drug_id__in=drug_ids)
+    # end of today is in the future, so every txn so far is included
+    balances = _closing_balances(items, today, scope=scope, drug_ids=drug_ids)
+    return [(item, qty) for item, qty in balances if qty != item.current_qty]
@@ -0,0 +1,137 @@
+"""
+pharmacy/services/stock_ledger.py
+
+Race-free stock adjustments for one scope (facility stock or an independent
+pharmacy owner's stock).
+
+`apply_adjustments` takes any number of (drug_id, qty, note) lines - a single
+manual adjustment or a whole goods-received note - and in ONE transaction:
+- creates missing StockItem rows (bulk, conflict-safe),
+- locks the affected rows with SELECT ... FOR UPDATE in drug_id order (a
+  fixed order so concurrent batches cannot deadlock),
+- applies every line with a single UPDATE built from F() expressions, so
+  concurrent receipts add up instead of overwriting each other,
+- bulk-inserts one StockTxn per line.
+
+The low-stock check runs once per batch, after commit.
+"""
+
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.db.models.functions import Greatest
+
+from ..enums import TxnType
+from ..models import StockItem, StockTxn
+
+
+@dataclass(frozen=True)
+class StockLine:
+    drug_id: int
+    qty: int            # positive = received, negative = removed/adjusted down
+    note: str = ""
+    txn_type: str = ""  # default: IN for positive qty, ADJUST otherwise
+
+
+def _scope_filter(facility, owner) -> dict:
+    if facility is not None:
+        return {"facility": facility, "owner": None}
+    return {"facility": None, "owner": owner}
+
+
+def _txn_type(line) -> str:
+    if line.txn_type:
+        return line.txn_type
+    return TxnType.IN if line.qty > 0 else TxnType.ADJUST
+
+
+def lock_stock_items(drug_ids, *, facility=None, owner=None) -> dict[int, StockItem]:
+    """
+    {drug_id: StockItem} for the scope, creating missing rows, locked for the
+    rest of the current transaction. Must run inside transaction.atomic().
+    """
+    scope = _scope_filter(facility, owner)
+    drug_ids = sorted(set(drug_ids))
+    qs = StockItem.objects.filter(**scope, drug_id__in=drug_ids)
+
+    existing = set(qs.values_list("drug_id", flat=True))
+    missing = [d for d in drug_ids if d not in existing]
+    if missing:
+        StockItem.objects.bulk_create(
+            [StockItem(**scope, drug_id=d, current_qty=0) for d in missing],
+            ignore_conflicts=True,
+        )
+
+    locked = qs.select_for_update().order_by("drug_id")
+    return {item.drug_id: item for item in locked}
+
+
+def apply_adjustments(lines, *, facility=None, owner=None, user=None, notify=True, locked=None) -> list[StockItem]:
+    """
+    Apply stock lines atomically for one scope. Returns the refreshed
+    StockItem rows (with `drug` loaded), one per distinct drug.
+
+    Callers that already hold the rows (lock_stock_items in the same
+    transaction, e.g. to check availability first) pass them as `locked`.
+    """
+    lines = [ln for ln in lines if ln.qty]
+    if not lines:
+        return []
+    if facility is None and owner is None:
+        raise ValueError("A stock scope (facility or owner) is required")
+
+    deltas = OrderedDict()
+    for ln in lines:
+        deltas[ln.drug_id] = deltas.get(ln.drug_id, 0) + ln.qty
+
+    with transaction.atomic():
+        items = locked if locked is not None else lock_stock_items(deltas.keys(), facility=facility, owner=owner)
+
+        new_qty = {
+            d: Greatest(F("current_qty") + Value(delta), Value(0))
+            for d, delta in deltas.items()
+        }
+        StockItem.objects.filter(pk__in=[items[d].pk for d in deltas]).update(
+            current_qty=Case(
+                *(When(pk=items[d].pk, then=expr) for d, expr in new_qty.items()),
+                default=F("current_qty"),
+                output_field=IntegerField(),
+            ),
+            # max_stock_level tracks the highest level reached by a receipt.
+            max_stock_level=Case(
+                *(
+                    When(pk=items[d].pk, then=Greatest(F("max_stock_level"), expr))
+                    for d, expr in new_qty.items()
+                    if deltas[d] > 0
+                ),
+                default=F("max_stock_level"),
+                output_field=IntegerField(),
+            ),
+        )
+
+        StockTxn.objects.bulk_create([
+            StockTxn(
+                **_scope_filter(facility, owner),
+                drug_id=ln.drug_id,
+                txn_type=_txn_type(ln),
+                qty=ln.qty,
+                note=(ln.note or "")[:255],
+                created_by=user,
+            )
+            for ln in lines
+        ])
+
+        refreshed = list(
+            StockItem.objects.select_related("drug", "facility", "owner")
+            .filter(pk__in=[items[d].pk for d in deltas])
+            .order_by("drug_id")
+        )
+
+        if notify:
+            from .stock_alerts import notify_low_stock_items
+
+            transaction.on_commit(lambda: notify_low_stock_items(refreshed))
+
+    return refreshed
@@ -1,16 +1,21 @@
 import csv
-import io
 import math
+from datetime import timedelta
 
-from django.utils.dateparse import parse_datetime
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 from django.db.models import Q
 from django.shortcuts import get_object_or_404
 from rest_framework import viewsets, mixins, status
 from rest_framework.decorators import action
 from rest_framework.exceptions import PermissionDenied
+from rest_framework.pagination import PageNumberPagination
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from accounts.authentication import HeaderJWTAuthentication as JWTAuthentication
+from core.prefetch import PrefetchPlanMixin
+from core.search import search_queryset
+from core.uploads import import_max_bytes, text_reader, upload_limit
 from facilities.permissions_utils import has_facility_permission
 from accounts.enums import UserRole
 from patients.models import SystemHMO, HMOTier, Patient, PatientProviderLink
@@ -21,13 +26,42 @@ from .serializers import (
     DrugSerializer,
     StockItemSerializer,
     StockTxnSerializer,
+    GoodsReceivedSerializer,
     PrescriptionCreateSerializer,
     PrescriptionReadSerializer,
     DispenseSerializer,
+    BatchDispenseSerializer,
 )
 from .permissions import IsStaff, CanViewRx, IsPharmacyStaff, CanPrescribe
-from .enums import RxStatus, TxnType
-from .services.stock_alerts import check_and_notify_low_stock
+from .enums import RxStatus
+from .services.stock_ledger import StockLine, apply_adjustments
+
+
+MAX_HISTORY_DAYS = 366
+
+
+class StockTxnPagination(PageNumberPagination):
+    """Local pagination for the stock ledger (it only grows)."""
+
+    page_size = 50
+    page_size_query_param = "limit"
+    page_query_param = "page"
+    max_page_size = 500
+
+
+def _parse_id_list(raw):
+    """'1,2,3' -> [1, 2, 3]; ignores blanks and non-numeric parts."""
+    return [int(x) for x in (raw or "").split(",") if x.strip().isdigit()]
+
+
+def _stock_row(item, **extra):
+    return {
+        "stock_item_id": item.id,
+        "drug_id": item.drug_id,
+        "drug_name": item.drug.name,
+        "drug_code": item.drug.code,
+        **extra,
+    }
 
 
 def can_user_access_patient_system_scope(user, patient_id):
@@ -172,14 +206,7 @@ class DrugViewSet(
             or self.request.query_params.get("search")
         )
         if search and str(search).strip():
-            s = str(search).strip()
-            qs = qs.filter(
-                Q(name__icontains=s)
-                | Q(code__icontains=s)
-                | Q(strength__icontains=s)
-                | Q(form__icontains=s)
-                | Q(route__icontains=s)
-            )
+            return search_queryset(qs.order_by("name"), "drug", str(search).strip())
 
         return qs.order_by("name")
 
@@ -499,6 +526,7 @@ class DrugViewSet(
         )
 
     @action(detail=False, methods=["post"], permission_classes=[IsAuthenticated, IsPharmacyStaff], url_path="import-hmo-file")
+    @upload_limit(import_max_bytes)
     def import_hmo_file(self, request):
         """
         Bulk import HMO-specific prices from CSV/Excel.
@@ -550,9 +578,8 @@ class DrugViewSet(
         try:
             # Parse file
             if filename.endswith(".csv"):
-                buf = io.StringIO(f.read().decode("utf-8"))
-                reader = csv.DictReader(buf)
-                rows = list(reader)
+                with text_reader(f) as buf:
+                    rows = list(csv.DictReader(buf))
             elif filename.endswith(".xlsx"):
                 try:
                     import openpyxl
@@ -663,6 +690,7 @@ class DrugViewSet(
             return Response({"detail": f"Import failed: {str(e)}"}, status=400)
 
     @action(detail=False, methods=["post"], permission_classes=[IsAuthenticated, IsPharmacyStaff])
+    @upload_limit(import_max_bytes)
     def import_file(self, request):
         if not has_facility_permission(request.user, 'can_manage_pharmacy_catalog'):
             return Response(
@@ -694,9 +722,8 @@ class DrugViewSet(
             # Determine file type and read data
             if filename.endswith('.csv'):
                 # CSV import
-                buf = io.StringIO(f.read().decode("utf-8"))
-                reader = csv.DictReader(buf)
-                rows = list(reader)
+                with text_reader(f) as buf:
+                    rows = list(csv.DictReader(buf))
             elif filename.endswith('.xlsx'):
                 # Excel import (.xlsx)
                 try:
@@ -889,46 +916,67 @@ class StockViewSet(viewsets.GenericViewSet, mixins.ListModelMixin):
         if not scope:
             return Response({"detail": "You do not have access to pharmacy stock."}, status=403)
 
-        u = request.user
-        drug_id = request.data.get("drug_id")
-        qty = int(request.data.get("qty", 0))
+        try:
+            drug_id = int(request.data.get("drug_id") or 0)
+            qty = int(request.data.get("qty", 0))
+        except (TypeError, ValueError):
+            return Response({"detail": "drug_id and non-zero qty required"}, status=400)
         if not drug_id or qty == 0:
             return Response({"detail": "drug_id and non-zero qty required"}, status=400)
+        if not Drug.objects.filter(id=drug_id).exists():
+            return Response({"detail": "Drug not found"}, status=404)
 
-        stock, _ = StockItem.objects.get_or_create(
+        items = apply_adjustments(
+            [StockLine(drug_id=drug_id, qty=qty, note=request.data.get("note", "") or "")],
             facility=scope["facility"],
             owner=scope["owner"],
-            drug_id=drug_id,
-            defaults={"current_qty": 0},
+            user=request.user,
         )
-        
-        # Update stock quantity
-        stock.current_qty = max(stock.current_qty + qty, 0)
-        
-        # Update max stock level if this is a stock increase
-        if qty > 0:
-            stock.update_max_stock_level()
-        
-        stock.save(update_fields=["current_qty", "max_stock_level"])
+        return Response(StockItemSerializer(items[0]).data, status=201)
 
-        StockTxn.objects.create(
+    @action(detail=False, methods=["post"], permission_classes=[IsAuthenticated, IsPharmacyStaff])
+    def receive(self, request):
+        """
+        Goods-received note: apply many stock lines in one transaction.
+
+        payload: {"reference": "GRN-001", "note": "...",
+                  "lines": [{"drug_id": 1, "qty": 100, "note": "batch A"}, ...]}
+        """
+        if not has_facility_permission(request.user, 'can_manage_pharmacy_stock'):
+            return Response(
+                {"detail": "You do not have permission to manage pharmacy stock."},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        scope = self._scope(request.user)
+        if not scope:
+            return Response({"detail": "You do not have access to pharmacy stock."}, status=403)
+
+        s = GoodsReceivedSerializer(data=request.data)
+        s.is_valid(raise_exception=True)
+        reference = s.validated_data["reference"]
+        header_note = s.validated_data["note"]
+
+        lines = []
+        for ln in s.validated_data["lines"]:
+            note = ln.get("note") or header_note
+            if reference:
+                note = f"{reference}: {note}" if note else reference
+            lines.append(StockLine(drug_id=ln["drug_id"], qty=ln["qty"], note=note))
+
+        items = apply_adjustments(
+            lines,
             facility=scope["facility"],
             owner=scope["owner"],
-            drug_id=drug_id,
-            txn_type=TxnType.IN if qty > 0 else TxnType.ADJUST,
-            qty=qty,
-            note=request.data.get("note", ""),
-            created_by=u,
+            user=request.user,
+        )
+        return Response(
+            {
+                "reference": reference,
+                "lines": len(lines),
+                "items": StockItemSerializer(items, many=True).data,
+            },
+            status=201,
         )
-        
-        # Check for low stock and send notification if needed
-        try:
-            check_and_notify_low_stock(stock)
-        except Exception as e:
-            # Log but don't fail the request
-            print(f"Failed to check low stock: {e}")
-        
-        return Response(StockItemSerializer(stock).data, status=201)
 
     @action(detail=False, methods=["get"], permission_classes=[IsAuthenticated, IsPharmacyStaff])
     def txns(self, request):
@@ -942,8 +990,132 @@ class StockViewSet(viewsets.GenericViewSet, mixins.ListModelMixin):
         else:
             qs = qs.filter(owner=scope["owner"])
 
-        qs = qs.select_related("drug", "created_by").order_by("-created_at")
-        return Response(StockTxnSerializer(qs, many=True).data)
+        drug_ids = _parse_id_list(request.query_params.get("drug"))
+        if drug_ids:
+            qs = qs.filter(drug_id__in=drug_ids)
+        since = request.query_params.get("since")
+        if since:
+            qs = qs.filter(created_at__gte=parse_datetime(since) or since)
+        until = request.query_params.get("until")
+        if until:
+            qs = qs.filter(created_at__lt=parse_datetime(until) or until)
+
+        qs = qs.select_related("drug", "created_by").order_by("-created_at", "-id")
+        paginator = StockTxnPagination()
+        page = paginator.paginate_queryset(qs, request, view=self)
+        return paginator.get_paginated_response(StockTxnSerializer(page, many=True).data)
+
+    def _history_scope(self, request):
+        scope = self._scope(request.user)
+        if not scope:
+            raise PermissionDenied("You do not have access to pharmacy stock.")
+        return scope, _parse_id_list(request.query_params.get("drug"))
+
+    @action(detail=False, methods=["get"], url_path="on-date", permission_classes=[IsAuthenticated, IsPharmacyStaff])
+    def on_date(self, request):
+        """Closing stock per drug at the end of ?date=YYYY-MM-DD (optional ?drug=1,2)."""
+        from .services.stock_history import balances_on
+
+        scope, drug_ids = self._history_scope(request)
+        day = parse_date(request.query_params.get("date") or "")
+        if not day:
+            return Response({"detail": "date (YYYY-MM-DD) is required."}, status=400)
+        if day > timezone.localdate():
+            return Response({"detail": "date cannot be in the future."}, status=400)
+
+        rows = [_stock_row(item, qty=qty) for item, qty in balances_on(day, scope=scope, drug_ids=drug_ids)]
+        return Response({"date": day, "results": rows})
+
+    @action(detail=False, methods=["get"], permission_classes=[IsAuthenticated, IsPharmacyStaff])
+    def consumption(self, request):
+        """Received / dispensed / adjusted per drug for ?start..?end (default: last 30 days)."""
+        from .services.stock_history import consumption
+
+        scope, drug_ids = self._history_scope(request)
+        today = timezone.localdate()
+        start = parse_date(request.query_params.get("start") or "") or today - timedelta(days=29)
+        end = parse_date(request.query_params.get("end") or "") or today
+        if start > end:
+            return Response({"detail": "start must be on or before end."}, status=400)
+        if (end - start).days >= MAX_HISTORY_DAYS:
+            return Response({"detail": f"Range cannot exceed {MAX_HISTORY_DAYS} days."}, status=400)
+
+        rows = [
+            _stock_row(item, qty_in=m.qty_in, qty_out=m.qty_out, qty_adjusted=m.qty_adjusted)
+            for item, m in consumption(start, end, scope=scope, drug_ids=drug_ids)
+        ]
+        return Response({"start": start, "end": end, "results": rows})
+
+    @action(detail=False, methods=["get"], url_path="days-of-cover", permission_classes=[IsAuthenticated, IsPharmacyStaff])
+    def days_of_cover(self, request):
+        """Days until each drug runs out at the average daily dispensing rate (?window=30)."""
+        from .services.stock_history import days_of_cover
+
+        scope, drug_ids = self._history_scope(request)
+        try:
+            window = int(request.query_params.get("window") or 30)
+        except ValueError:
+            return Response({"detail": "window must be an integer."}, status=400)
+        if not 1 <= window <= MAX_HISTORY_DAYS:
+            return Response({"detail": f"window must be between 1 and {MAX_HISTORY_DAYS}."}, status=400)
+
+        rows = [
+            _stock_row(item, current_qty=item.current_qty, avg_daily_out=avg, days_of_cover=cover)
+            for item, avg, cover in days_of_cover(scope=scope, window_days=window, drug_ids=drug_ids)
+        ]
+        rows.sort(key=lambda r: (r["days_of_cover"] is None, r["days_of_cover"] or 0))
+        return Response({"window": window, "results": rows})
+
+    @action(detail=False, methods=["get"], url_path="reorder-suggestions", permission_classes=[IsAuthenticated, IsPharmacyStaff])
+    def reorder_suggestions(self, request):
+        """
+        Forecast-based reorder suggestions. Default: items at or below their
+        threshold with a suggested order; ?all=1 lists every forecast item.
+        """
+        scope = self._scope(request.user)
+        if not scope:
+            return Response({"detail": "You do not have access to pharmacy stock."}, status=403)
+
+        qs = self.get_queryset().filter(forecast_updated_at__isnull=False)
+        if (request.query_params.get("all") or "").lower() not in ("1", "true", "yes"):
+            qs = qs.low_stock().filter(suggested_order_qty__gt=0)
+        qs = qs.order_by("-suggested_order_qty", "drug__name")
+        return Response(StockItemSerializer(qs, many=True).data)
+
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="reorder-suggestions/refresh",
+        permission_classes=[IsAuthenticated, IsPharmacyStaff],
+    )
+    def refresh_reorder_suggestions(self, request):
+        """Recompute the consumption forecast for the caller's stock now."""
+        from .services.forecast import refresh_reorder_suggestions
+
+        if not has_facility_permission(request.user, 'can_manage_pharmacy_stock'):
+            return Response(
+                {"detail": "You do not have permission to manage pharmacy stock."},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        scope = self._scope(request.user)
+        if not scope:
+            return Response({"detail": "You do not have access to pharmacy stock."}, status=403)
+
+        items = refresh_reorder_suggestions(scope)
+        suggested = [i for i in items if i.suggested_order_qty > 0 and i.is_low_stock()]
+        return Response({"items": len(items), "suggestions": len(suggested)})
+
+    @action(detail=False, methods=["get"], permission_classes=[IsAuthenticated, IsPharmacyStaff])
+    def drift(self, request):
+        """Stock items whose snapshot + ledger balance disagrees with current_qty."""
+        from .services.stock_history import find_drift
+
+        scope, drug_ids = self._history_scope(request)
+        rows = [
+            _stock_row(item, current_qty=item.current_qty, ledger_qty=qty, difference=item.current_qty - qty)
+            for item, qty in find_drift(scope=scope, drug_ids=drug_ids)
+        ]
+        return Response({"results": rows})
     
     @action(detail=False, methods=["get"], permission_classes=[IsAuthenticated, IsPharmacyStaff])
     def low_stock_items(self, request):
@@ -954,19 +1126,13 @@ class StockViewSet(viewsets.GenericViewSet, mixins.ListModelMixin):
         if not scope:
             return Response({"detail": "You do not have access to pharmacy stock."}, status=403)
 
-        qs = StockItem.objects.select_related("drug")
+        qs = StockItem.objects.low_stock().select_related("drug")
         if scope["facility"]:
             qs = qs.filter(facility=scope["facility"])
         else:
             qs = qs.filter(owner=scope["owner"])
 
-        # Filter for low stock items
-        low_stock = []
-        for stock_item in qs:
-            if stock_item.is_low_stock():
-                low_stock.append(stock_item)
-
-        return Response(StockItemSerializer(low_stock, many=True).data)
+        return Response(StockItemSerializer(qs.order_by("current_qty", "drug__name"), many=True).data)
 
 
 # --- Prescriptions ---
@@ -974,6 +1140,7 @@ class StockViewSet(viewsets.GenericViewSet, mixins.ListModelMixin):
 
 
 class PrescriptionViewSet(
+    PrefetchPlanMixin,
     viewsets.GenericViewSet,
     mixins.CreateModelMixin,
     mixins.RetrieveModelMixin,
@@ -1304,7 +1471,45 @@ class PrescriptionViewSet(
                 status=status.HTTP_403_FORBIDDEN
             )
         rx = self.get_object()
-        u = request.user
+        denied = self._dispense_denied(rx, request.user)
+        if denied:
+            return denied
+
+        s = DispenseSerializer(data=request.data)
+        s.is_valid(raise_exception=True)
+        s.save(rx=rx, user=request.user)
+        rx.refresh_from_db()
+        return Response(PrescriptionReadSerializer(rx).data)
+
+    @action(detail=True, methods=["post"], url_path="dispense-batch", permission_classes=[IsAuthenticated, IsPharmacyStaff])
+    def dispense_batch(self, request, pk=None):
+        """
+        Dispense several items in one transaction.
+
+        Body:
+        {
+            "items": [{"item_id": 1, "qty": 10}, {"item_id": 2, "qty": 5}],
+            "note": "optional"
+        }
+        """
+        if not has_facility_permission(request.user, 'can_dispense_prescriptions'):
+            return Response(
+                {"detail": "You do not have permission to dispense prescriptions."},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        rx = self.get_object()
+        denied = self._dispense_denied(rx, request.user)
+        if denied:
+            return denied
+
+        s = BatchDispenseSerializer(data=request.data)
+        s.is_valid(raise_exception=True)
+        s.save(rx=rx, user=request.user)
+        rx.refresh_from_db()
+        return Response(PrescriptionReadSerializer(rx).data)
+
+    def _dispense_denied(self, rx, u):
+        """403 response when `u` may not dispense `rx`, else None."""
         role = (getattr(u, "role", "") or "").upper()
 
         # If outsourced, ONLY assigned pharmacy (or admins) can dispense
@@ -1322,12 +1527,7 @@ class PrescriptionViewSet(
                 # - their own prescriptions they issued (self-prescribed workflows)
                 if role != UserRole.PHARMACY or rx.prescribed_by_id != u.id:
                     return Response({"detail": "Independent pharmacies can only dispense outsourced prescriptions or their own prescriptions."}, status=403)
-
-        s = DispenseSerializer(data=request.data)
-        s.is_valid(raise_exception=True)
-        s.save(rx=rx, user=request.user)
-        rx.refresh_from_db()
-        return Response(PrescriptionReadSerializer(rx).data)
+        return None
     
     @action(detail=True, methods=["patch"], url_path="update-item", permission_classes=[IsAuthenticated, IsPharmacyStaff])
     def update_item(self, request, pk=None):
@@ -1393,25 +1593,12 @@ class PrescriptionViewSet(
             )
         
         # Update the prescribed quantity
+        was_complete = item.qty_dispensed >= item.qty_prescribed
         item.qty_prescribed = qty_prescribed
         item.save(update_fields=["qty_prescribed"])
         
-        # Recalculate prescription status
-        from django.db import models
-        totals = rx.items.aggregate(
-            total=models.Sum("qty_prescribed"),
-            out=models.Sum("qty_dispensed"),
-        )
-        total = totals["total"] or 0
-        out = totals["out"] or 0
-        
-        if out == 0:
-            rx.status = RxStatus.PRESCRIBED
-        elif out < total:
-            rx.status = RxStatus.PARTIALLY_DISPENSED
-        else:
-            rx.status = RxStatus.DISPENSED
-        rx.save(update_fields=["status"])
+        # Recalculate prescription status from the item counters
+        rx.record_item_progress(int(item.qty_dispensed >= qty_prescribed) - int(was_complete))
         
         # Return updated prescription
         rx.refresh_from_db()
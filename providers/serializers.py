@@ -5,10 +5,11 @@ from django.contrib.auth.password_validation import validate_password
 from django.utils import timezone
 from accounts.enums import UserRole
 from rest_framework import serializers
-from rest_framework_simplejwt.tokens import RefreshToken
+from accounts.tokens import ScopedRefreshToken
 from accounts.models import User
 from accounts.enums import UserRole
 from facilities.models import Specialty
+from attachments.serializers import DirectUploadMixin, SignedUrlListSerializer, SignedUrlsMixin
 from .models import ProviderProfile, ProviderDocument, ProviderFacilityApplication
 from .enums import ProviderType, Council, VerificationStatus
 from facilities.models import Specialty, Facility
@@ -82,6 +83,8 @@ class ProviderProfileSerializer(serializers.ModelSerializer):
         model = ProviderProfile
         # `__all__` includes the new fields above as standard DRF behaviour
         fields = "__all__"
+        select_related = ("user__sacked_by",)
+        prefetch_related = ("specialties", "documents")
 
     def get_role(self, obj):
         # Map provider_type to something the UI can show as "Role"
@@ -106,8 +109,9 @@ class ProviderProfileSerializer(serializers.ModelSerializer):
         return [s.name for s in obj.specialties.all()]
 
     def get_documents_read(self, obj):
-        qs = ProviderDocument.objects.filter(profile=obj).order_by("-uploaded_at")
-        return ProviderDocumentSerializer(qs, many=True).data
+        # sorted here so a prefetched `documents` is used as is
+        docs = sorted(obj.documents.all(), key=lambda d: (d.uploaded_at, d.id), reverse=True)
+        return ProviderDocumentSerializer(docs, many=True).data
 
     def _upsert_specialties(self, prof: ProviderProfile, names):
         if names is None:
@@ -136,11 +140,16 @@ class ProviderProfileSerializer(serializers.ModelSerializer):
 # -------------------------
 # Documents
 # -------------------------
-class ProviderDocumentSerializer(serializers.ModelSerializer):
+class ProviderDocumentSerializer(SignedUrlsMixin, serializers.ModelSerializer):
     class Meta:
         model = ProviderDocument
         fields = ["id", "kind", "file", "uploaded_at"]
         read_only_fields = ["id", "uploaded_at"]
+        list_serializer_class = SignedUrlListSerializer
+
+
+class ProviderDocumentUploadSerializer(DirectUploadMixin, ProviderDocumentSerializer):
+    """Owner upload: multipart `file` or a direct-upload `upload_id`."""
 
 
 # -------------------------
@@ -269,7 +278,7 @@ class SelfRegisterProviderSerializer(serializers.Serializer):
             )
 
         # Return tokens payload for immediate sign-in
-        refresh = RefreshToken.for_user(user)
+        refresh = ScopedRefreshToken.for_user(user)
         return {
             "user_id": user.id,
             "profile_id": prof.id,
@@ -12,12 +12,16 @@ from rest_framework.decorators import (
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from accounts.authentication import HeaderJWTAuthentication as JWTAuthentication
 from .enums import VerificationStatus
 from django.utils import timezone
 from accounts.enums import UserRole
 from accounts.models import User
 from accounts.permissions import IsAdmin
+from attachments.serializers import MAX_SIZE_BYTES
+from core.prefetch import PrefetchPlanMixin
+from core.search import search_queryset
+from core.uploads import upload_limit
 # from core.pagination import DefaultPagination
 from django.shortcuts import get_object_or_404
 from .models import ProviderProfile, ProviderDocument, ProviderFacilityApplication
@@ -25,6 +29,7 @@ from .serializers import (
     ProviderProfileSerializer,
     SelfRegisterProviderSerializer,
     ProviderDocumentSerializer,
+    ProviderDocumentUploadSerializer,
     ProviderFacilityApplicationSerializer,
     ProviderApplyToFacilitySerializer,
     FacilityProviderCreateSerializer,
@@ -37,6 +42,7 @@ from notifications.enums import Topic, Priority
 
 
 class ProviderViewSet(
+    PrefetchPlanMixin,
     viewsets.GenericViewSet,
     mixins.RetrieveModelMixin,
     mixins.UpdateModelMixin,
@@ -132,14 +138,11 @@ class ProviderViewSet(
             q = q.filter(provider_type=ptype)
         if status_:
             q = q.filter(verification_status=status_)
+        q = q.distinct().order_by("-created_at", "-id")
         if s:
-            q = q.filter(
-                Q(user__first_name__icontains=s)
-                | Q(user__last_name__icontains=s)
-                | Q(bio__icontains=s)
-            )
+            q = search_queryset(q, "provider", s)
 
-        return q.distinct().order_by("-created_at", "-id")
+        return q
 
     def retrieve(self, request, *args, **kwargs):
         obj = self.get_object()
@@ -196,13 +199,14 @@ class ProviderViewSet(
 
     # Owner uploads docs
     @action(detail=True, methods=["post"])
+    @upload_limit(MAX_SIZE_BYTES)
     def upload(self, request, pk=None):
         prof = self.get_object()
         if request.user.id != prof.user_id and not IsAdmin().has_permission(
             request, self
         ):
             return Response({"detail": "Not allowed"}, status=403)
-        s = ProviderDocumentSerializer(data=request.data)
+        s = ProviderDocumentUploadSerializer(data=request.data, context={"request": request})
         s.is_valid(raise_exception=True)
         doc = s.save(profile=prof)
         return Response(ProviderDocumentSerializer(doc).data, status=201)
@@ -61,6 +61,7 @@ class UserAdminSerializer(serializers.ModelSerializer):
             "has_provider_profile",
             "has_patient_profile",
         ]
+        select_related = ["provider_profile", "patient_profile"]
 
     def get_has_provider_profile(self, obj):
         return hasattr(obj, "provider_profile")
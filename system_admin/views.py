@@ -4,9 +4,10 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.pagination import PageNumberPagination
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from accounts.authentication import HeaderJWTAuthentication as JWTAuthentication
 
 from audit.services import log_action
+from core.prefetch import PrefetchPlanMixin
 from facilities.models import Facility
 from django.contrib.auth import get_user_model
 
@@ -151,6 +152,7 @@ class FacilityAdminViewSet(
 
 
 class UserAdminViewSet(
+    PrefetchPlanMixin,
     viewsets.GenericViewSet,
     mixins.ListModelMixin,
     mixins.RetrieveModelMixin,
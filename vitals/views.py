@@ -5,7 +5,7 @@ from rest_framework import viewsets, mixins, status
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from accounts.authentication import HeaderJWTAuthentication as JWTAuthentication
 from facilities.permissions_utils import has_facility_permission
 from .models import VitalSign
 from .serializers import VitalSignSerializer, VitalSignListSerializer, VitalSummarySerializer